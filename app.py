@@ -1,10 +1,12 @@
 import os
 import re
 import hmac
+import json
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs
 
-from flask import Flask, render_template, redirect, url_for, request, jsonify, flash
+import click
+from flask import Flask, current_app, render_template, redirect, url_for, request, jsonify, flash
 from flask_login import LoginManager, login_required, current_user
 from dotenv import load_dotenv
 from sqlalchemy.exc import OperationalError
@@ -14,8 +16,12 @@ if os.getenv("APP_ENV", "development").lower() not in {"production", "prod"} and
     load_dotenv()
 
 from config import Config
-from models.entrada_model import init_db
+from models.db_routing import install_read_routing, use_primary
+from models.entrada_model import init_db, setup_database
 from models.extensions import db
+from models.query_stats import install_query_stats
+from models.slow_queries import SLOW_QUERIES, clear_slow_queries, read_slow_queries, slow_query_dir
+from models.sqlite_writes import DatabaseBusyError
 from models.user_model import User
 
 # Perfil (Opção 1)
@@ -63,19 +69,17 @@ from services.checkout_store import (
 )
 from services.subscription import apply_paid_order, is_subscription_active, subscription_context
 from services.password_policy import validate_password, PasswordValidationError
-
-app = Flask(__name__)
-app.config.from_object(Config)
-
-# DB
-# Observação: para garantir que create_all enxergue UserProfile,
-# ele precisa estar importado antes de init_db(app). Já está acima.
-init_db(app)
+from services.projection_alerts import run_projection_alerts
+from services.json_provider import install_json_provider
+from services.metrics import install_metrics
+from services.profiling import diff_profiles, install_profiling, list_profiles, profile_dir
+from services.memory_profiling import diff_snapshots, install_memory_profiling, list_memory_files, memory_dir
+from services.compression import install_compression
+from services.static_assets import install_static_assets
 
 # Login manager
 login_manager = LoginManager()
 login_manager.login_view = "auth.login_page"  # endpoint GET /login
-login_manager.init_app(app)
 
 
 @login_manager.user_loader
@@ -83,29 +87,35 @@ def load_user(user_id):
     if not user_id:
         return None
 
-    try:
-        return db.session.get(User, int(user_id))
-    except OperationalError:
-        # Conexao SSL instavel em pools remotos: tenta limpar e reabrir.
-        db.session.rollback()
-        db.session.remove()
-        db.engine.dispose()
+    # Usuário (plano, verificação) sempre do primário: a réplica pode estar atrasada.
+    with use_primary():
         try:
             return db.session.get(User, int(user_id))
         except OperationalError:
+            # Conexao SSL instavel em pools remotos: a conexão quebrada já foi
+            # invalidada (models/db_pool.py); as demais do pool seguem intactas.
             db.session.rollback()
-            return None
+            db.session.remove()
+            try:
+                return db.session.get(User, int(user_id))
+            except OperationalError:
+                db.session.rollback()
+                return None
 
 
-# Blueprints
-app.register_blueprint(entradas_bp)
-app.register_blueprint(auth_bp)
-app.register_blueprint(analytics_bp)
-app.register_blueprint(rules_bp)
-app.register_blueprint(notifications_bp)
+# Rotas do app principal (fora de blueprint). Ficam registradas aqui e são
+# ligadas ao app em create_app(), mantendo os endpoints "index", "account_page"...
+_APP_ROUTES: list[tuple[str, object, dict]] = []
+
+
+def _route(rule: str, **options):
+    def decorator(fn):
+        _APP_ROUTES.append((rule, fn, options))
+        return fn
+
+    return decorator
 
 
-@app.context_processor
 def inject_plan_helpers():
     """Helpers globais para templates."""
 
@@ -114,7 +124,7 @@ def inject_plan_helpers():
             return False
         return user_has_feature(current_user, feature)
 
-    card_enabled = bool(app.config.get("ABACATEPAY_CARD_ENABLED"))
+    card_enabled = bool(current_app.config.get("ABACATEPAY_CARD_ENABLED"))
     subscription_notice = None
     if current_user.is_authenticated:
         sub = subscription_context(current_user)
@@ -134,10 +144,10 @@ def inject_plan_helpers():
             }
 
     return {
-        "MARKETING_BASE_URL": app.config.get("MARKETING_BASE_URL", "https://controledeorcamento.onrender.com").rstrip("/"),
-        "APP_NAME": app.config.get("APP_NAME", "Controle Financeiro"),
-        "APP_TAGLINE": app.config.get("APP_TAGLINE", ""),
-        "APP_COMPANY": app.config.get("APP_COMPANY", "LinkGestor"),
+        "MARKETING_BASE_URL": current_app.config.get("MARKETING_BASE_URL", "https://controledeorcamento.onrender.com").rstrip("/"),
+        "APP_NAME": current_app.config.get("APP_NAME", "Controle Financeiro"),
+        "APP_TAGLINE": current_app.config.get("APP_TAGLINE", ""),
+        "APP_COMPANY": current_app.config.get("APP_COMPANY", "LinkGestor"),
         "CURRENT_YEAR": datetime.utcnow().year,
 
         "PLANS": PLANS,
@@ -148,7 +158,6 @@ def inject_plan_helpers():
     }
 
 
-@app.before_request
 def enforce_subscription():
     if not current_user.is_authenticated:
         return
@@ -183,7 +192,6 @@ def enforce_subscription():
     return redirect(url_for("account_page", section="billing"))
 
 
-@app.before_request
 def enforce_verified_for_app():
     if not current_user.is_authenticated:
         return
@@ -197,7 +205,6 @@ def enforce_verified_for_app():
     return redirect(url_for("auth.verify_pending"))
 
 
-@app.before_request
 def enforce_csrf():
     if request.method not in {"POST", "PUT", "PATCH", "DELETE"}:
         return
@@ -211,7 +218,15 @@ def enforce_csrf():
     return "Forbidden", 403
 
 
-@app.after_request
+def handle_database_busy(exc):
+    """Lock de escrita do SQLite esgotado: 503 com Retry-After, sem stack trace."""
+    if is_json_request():
+        response, status = json_error("database_busy", 503)
+    else:
+        response, status = "Serviço ocupado, tente novamente.", 503
+    return response, status, {"Retry-After": str(exc.retry_after)}
+
+
 def apply_security_headers(response):
     response.headers.setdefault("X-Content-Type-Options", "nosniff")
     response.headers.setdefault("X-Frame-Options", "SAMEORIGIN")
@@ -237,11 +252,11 @@ def apply_security_headers(response):
         )
         response.headers["Content-Security-Policy"] = csp
 
-    if app.config.get("IS_PRODUCTION") and app.config.get("HSTS_ENABLED"):
+    if current_app.config.get("IS_PRODUCTION") and current_app.config.get("HSTS_ENABLED"):
         hsts = "max-age=31536000"
-        if app.config.get("HSTS_INCLUDE_SUBDOMAINS"):
+        if current_app.config.get("HSTS_INCLUDE_SUBDOMAINS"):
             hsts += "; includeSubDomains"
-        if app.config.get("HSTS_PRELOAD"):
+        if current_app.config.get("HSTS_PRELOAD"):
             hsts += "; preload"
         response.headers.setdefault("Strict-Transport-Security", hsts)
 
@@ -408,23 +423,23 @@ def _build_billing_history(user, orders, include_remote: bool = False) -> list[d
     return items
 
 
-@app.get("/")
+@_route("/", methods=["GET"])
 def marketing_home():
     """Redireciona para o site de marketing (estático)."""
-    base = app.config.get("MARKETING_BASE_URL", "https://controledeorcamento.onrender.com").rstrip("/")
+    base = current_app.config.get("MARKETING_BASE_URL", "https://controledeorcamento.onrender.com").rstrip("/")
     return redirect(f"{base}/")
 
-@app.get("/pricing")
+@_route("/pricing", methods=["GET"])
 def pricing():
     """Redireciona para a página de planos no site de marketing."""
-    base = app.config.get("MARKETING_BASE_URL", "https://controledeorcamento.onrender.com").rstrip("/")
+    base = current_app.config.get("MARKETING_BASE_URL", "https://controledeorcamento.onrender.com").rstrip("/")
     plan = request.args.get("plan")
     url = f"{base}/pricing.html"
     if plan:
         url += f"?plan={plan}"
     return redirect(url)
 
-@app.get("/buy")
+@_route("/buy", methods=["GET"])
 @login_required
 @require_verified_email("Confirme seu email para liberar o pagamento.")
 def buy():
@@ -488,7 +503,7 @@ def buy():
     return redirect(billing["url"], code=302)
 
 
-@app.get("/checkout/completion")
+@_route("/checkout/completion", methods=["GET"])
 @require_verified_email("Confirme seu email para liberar o pagamento.")
 def checkout_completion():
     token = (request.args.get("token") or "").strip()
@@ -521,7 +536,7 @@ def checkout_completion():
     )
 
 
-@app.get("/checkout/status")
+@_route("/checkout/status", methods=["GET"])
 @require_verified_email("Confirme seu email para liberar o pagamento.")
 def checkout_status():
     token = (request.args.get("token") or "").strip()
@@ -552,9 +567,9 @@ def checkout_status():
     return jsonify({"ok": True, "status": status, "plan": order.plan})
 
 
-@app.post("/webhook/abacatepay")
+@_route("/webhook/abacatepay", methods=["POST"])
 def abacatepay_webhook():
-    expected = (app.config.get("ABACATEPAY_WEBHOOK_SECRET") or "").strip()
+    expected = (current_app.config.get("ABACATEPAY_WEBHOOK_SECRET") or "").strip()
     if not expected:
         return jsonify({"ok": False, "error": "misconfigured"}), 500
 
@@ -590,7 +605,7 @@ def abacatepay_webhook():
     return jsonify({"ok": True}), 200
 
 
-@app.route("/app")
+@_route("/app")
 @login_required
 def index():
     if not current_user.is_verified:
@@ -598,8 +613,7 @@ def index():
     return render_template("index.html")
 
 
-# ✅ ROTA DEVE FICAR ANTES DO app.run()
-@app.route("/app/entradas")
+@_route("/app/entradas")
 @login_required
 def entradas_page():
     if not current_user.is_verified:
@@ -607,7 +621,7 @@ def entradas_page():
     return render_template("entries.html")
 
 
-@app.get("/app/account")
+@_route("/app/account", methods=["GET"])
 @login_required
 def account_page():
     """Tela de configurações/conta do usuário (dentro do sistema)."""
@@ -634,7 +648,7 @@ def account_page():
     )
 
 
-@app.post("/app/account/profile")
+@_route("/app/account/profile", methods=["POST"])
 @login_required
 def account_profile_save():
     """Salva dados pessoais do usuário."""
@@ -672,7 +686,7 @@ def account_profile_save():
     return redirect(url_for("account_page", section="profile"))
 
 
-@app.post("/app/account/access")
+@_route("/app/account/access", methods=["POST"])
 @login_required
 def account_access_save():
     """Atualiza e-mail e/ou senha do usuário."""
@@ -736,7 +750,7 @@ def account_access_save():
     return redirect(url_for("account_page", section="access"))
 
 
-@app.post("/app/account/notifications")
+@_route("/app/account/notifications", methods=["POST"])
 @login_required
 def account_notifications_save():
     """Salva preferencia de alerta de vencimento."""
@@ -750,7 +764,7 @@ def account_notifications_save():
     return redirect(url_for("account_page", section="notifications"))
 
 
-@app.post("/app/billing/renew")
+@_route("/app/billing/renew", methods=["POST"])
 @login_required
 @require_verified_email("Confirme seu email para liberar o pagamento.")
 def billing_renew():
@@ -799,7 +813,7 @@ def billing_renew():
     return redirect(billing["url"], code=302)
 
 
-@app.get("/app/billing/return")
+@_route("/app/billing/return", methods=["GET"])
 @login_required
 @require_verified_email("Confirme seu email para liberar o pagamento.")
 def billing_return():
@@ -834,10 +848,222 @@ def billing_return():
     )
 
 
-@app.get("/healthz")
+@_route("/healthz", methods=["GET"])
 def healthz():
     return "ok", 200
 
 
+def create_app(config=None) -> Flask:
+    """Application factory.
+
+    Não importa módulos pesados (reportlab/openpyxl) e só toca no banco quando
+    DB_AUTO_SETUP está ligado. Ao final descarta o pool de conexões, para que
+    um master do gunicorn com --preload não repasse conexões abertas aos workers.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config or Config)
+    install_json_provider(app)
+
+    # DB: associa a extensão (sem I/O) e, opcionalmente, cria tabelas/migra.
+    init_db(app)
+    if app.config.get("DB_AUTO_SETUP", True):
+        setup_database(app)
+        with app.app_context():
+            db.engine.dispose()
+
+    login_manager.init_app(app)
+
+    # Blueprints
+    app.register_blueprint(entradas_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(analytics_bp)
+    app.register_blueprint(rules_bp)
+    app.register_blueprint(notifications_bp)
+
+    for rule, view_func, options in _APP_ROUTES:
+        app.add_url_rule(rule, view_func=view_func, **options)
+
+    app.context_processor(inject_plan_helpers)
+    # Primeiro hook: conta o SQL de todo o request (inclusive o carregamento do usuário).
+    install_query_stats(app)
+    install_metrics(app)
+    install_profiling(app)
+    install_memory_profiling(app)
+    app.before_request(enforce_subscription)
+    app.before_request(enforce_verified_for_app)
+    app.before_request(enforce_csrf)
+    app.after_request(apply_security_headers)
+    install_compression(app)
+    # Depois da compressão: o nome com hash é resolvido antes dos .gz/.br.
+    install_static_assets(app)
+    # Depois dos hooks acima: o usuário já foi carregado do primário.
+    install_read_routing(app)
+    app.register_error_handler(DatabaseBusyError, handle_database_busy)
+
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Cria tabelas e aplica a migração leve (passo único de deploy)."""
+        setup_database(app)
+        click.echo("Banco inicializado.")
+
+    @app.cli.command("projection-alerts")
+    @click.option("--horizon", type=int, default=None, help="Janela em dias (padrão: PROJECTION_ALERTS_HORIZON_DAYS).")
+    @click.option("--workers", type=int, default=None, help="Processos (1 = sem pool).")
+    @click.option("--chunk-size", type=int, default=None, help="Usuários por lote.")
+    @click.option("--db-budget", type=float, default=None, help="Segundos de banco por segundo (0 = sem limite).")
+    @click.option("--dry-run", is_flag=True, help="Só calcula, não grava notificações.")
+    def projection_alerts_command(horizon, workers, chunk_size, db_budget, dry_run):
+        """Alerta usuários cuja projeção fica negativa nos próximos dias (rodar via cron)."""
+        report = run_projection_alerts(
+            horizon_days=horizon,
+            workers=workers,
+            chunk_size=chunk_size,
+            db_budget=db_budget,
+            dry_run=dry_run,
+        )
+        stats = report.as_dict()
+        click.echo(
+            f"{stats['users']} usuários em {stats['elapsed_s']}s ({stats['users_per_second']} usuários/s), "
+            f"{stats['breaks']} com saldo negativo, {stats['created']} alertas novos, {stats['errors']} erros."
+        )
+        click.echo(
+            f"Banco: {stats['db_seconds']}s (carga {stats['db_load']} / orçamento {stats['db_budget']}), "
+            f"espera por orçamento {stats['throttled_s']}s, {stats['workers']} processo(s)."
+        )
+
+    @app.cli.group("profiles")
+    def profiles_group():
+        """Capturas do profiler sob demanda (services/profiling.py)."""
+
+    @profiles_group.command("list")
+    @click.option("--endpoint", default=None, help="Só capturas deste endpoint.")
+    @click.option("--limit", type=int, default=20, help="Quantidade máxima (mais recentes primeiro).")
+    def profiles_list_command(endpoint, limit):
+        """Lista as capturas gravadas."""
+        directory = profile_dir(app)
+        items = [meta for meta in list_profiles(directory) if not endpoint or meta.get("endpoint") == endpoint]
+        if not items:
+            click.echo(f"Nenhuma captura em {directory}.")
+            return
+        for meta in items[:limit]:
+            click.echo(
+                f"{meta['id']}  {meta['mode']:<8} {meta.get('status') or '-':>3} {meta['duration_ms']:>9.1f} ms  "
+                f"{meta['method']} {meta['path']}  ({meta['trigger']}, {(meta.get('db') or {}).get('queries', '-')} queries)"
+            )
+
+    @profiles_group.command("diff")
+    @click.argument("base_id")
+    @click.argument("other_id")
+    @click.option("--top", type=int, default=20, help="Quantas funções mostrar.")
+    def profiles_diff_command(base_id, other_id, top):
+        """Compara a fatia do tempo de cada função entre duas capturas (aceita prefixo do id)."""
+        try:
+            report = diff_profiles(profile_dir(app), base_id, other_id, top=top)
+        except KeyError as exc:
+            raise click.ClickException(exc.args[0]) from exc
+        if report["base"]["mode"] != report["other"]["mode"]:
+            click.echo("Aviso: modos diferentes (cprofile x sample); compare com cautela.")
+        click.echo(
+            f"{report['base']['id']} ({report['base']['duration_ms']} ms) -> "
+            f"{report['other']['id']} ({report['other']['duration_ms']} ms)"
+        )
+        for row in report["rows"]:
+            click.echo(
+                f"{row['delta_pct']:+7.2f} pp  {row['before_pct']:6.2f}% -> {row['after_pct']:6.2f}%  "
+                f"({row['before_ms']:.1f} -> {row['after_ms']:.1f} ms)  {row['function']}"
+            )
+
+    @app.cli.group("slow-queries")
+    def slow_queries_group():
+        """Consultas acima de SLOW_QUERY_MS, com plano (models/slow_queries.py)."""
+
+    @slow_queries_group.command("show")
+    @click.option("--sort", type=click.Choice(["total", "max", "count"]), default="total", help="Ordenação.")
+    @click.option("--limit", type=int, default=20, help="Quantas consultas mostrar.")
+    @click.option("--endpoint", default=None, help="Só consultas vistas neste endpoint.")
+    @click.option("--json", "as_json", is_flag=True, help="Saída em JSON (todas as colunas).")
+    def slow_queries_show_command(sort, limit, endpoint, as_json):
+        """Soma os buffers gravados pelos workers, por impressão digital."""
+        directory = slow_query_dir(app)
+        entries = [
+            entry for entry in read_slow_queries(directory, sort=sort) if not endpoint or endpoint in entry["endpoints"]
+        ][:limit]
+        if as_json:
+            click.echo(json.dumps(entries, ensure_ascii=False, indent=2))
+            return
+        if not entries:
+            click.echo(f"Nenhuma consulta lenta em {directory}.")
+            return
+        for entry in entries:
+            endpoints = ", ".join(f"{name} ({count})" for name, count in sorted(entry["endpoints"].items(), key=lambda item: -item[1]))
+            click.echo(
+                f"[{entry['fingerprint']}] {entry['count']}x  total {entry['total_ms']:.1f} ms  máx {entry['max_ms']:.1f} ms  "
+                f"{entry['bind']}{'  FULL SCAN' if entry.get('full_scan') else ''}"
+            )
+            click.echo(f"    {entry['normalized'][:300]}")
+            click.echo(f"    params {entry['parameters']}  endpoints: {endpoints}")
+            for line in entry.get("plan") or []:
+                click.echo(f"      | {line}")
+            if entry.get("plan_error"):
+                click.echo(f"      | plano indisponível: {entry['plan_error']}")
+
+    @slow_queries_group.command("clear")
+    def slow_queries_clear_command():
+        """Apaga os buffers gravados (workers em execução voltam a gravar os seus)."""
+        SLOW_QUERIES.clear()
+        click.echo(f"{clear_slow_queries(slow_query_dir(app))} arquivo(s) removido(s).")
+
+    @app.cli.group("memory")
+    def memory_group():
+        """Medições de memória por request e snapshots do tracemalloc (services/memory_profiling.py)."""
+
+    @memory_group.command("list")
+    @click.option("--limit", type=int, default=20, help="Quantidade máxima de registros.")
+    def memory_list_command(limit):
+        """Lista requests acima do orçamento de memória e snapshots gravados."""
+        directory = memory_dir(app)
+        files = list_memory_files(directory)
+        if not files["records"] and not files["snapshots"]:
+            click.echo(f"Nada gravado em {directory}.")
+            return
+        for record in files["records"][:limit]:
+            click.echo(
+                f"{record['id']}  pico {record['peak_kb'] / 1024:8.1f} MB  retido {record['retained_kb'] / 1024:7.1f} MB  "
+                f"RSS {record['rss_kb'] / 1024:7.1f} MB  {record['method']} {record['path']}"
+            )
+            for site in record["top_sites"][:3]:
+                click.echo(f"    {site['kb']:>10.1f} KB  {site['site']}")
+        for snapshot_id in files["snapshots"]:
+            click.echo(f"snapshot {snapshot_id}")
+
+    @memory_group.command("diff")
+    @click.argument("base_id")
+    @click.argument("other_id")
+    @click.option("--top", type=int, default=20, help="Quantas linhas mostrar.")
+    @click.option("--traceback", "by_traceback", is_flag=True, help="Agrupa pela pilha (requer MEMORY_PROFILING_FRAMES > 1).")
+    def memory_diff_command(base_id, other_id, top, by_traceback):
+        """Crescimento da memória viva entre dois snapshots (aceita prefixo do id)."""
+        try:
+            rows = diff_snapshots(
+                memory_dir(app),
+                base_id,
+                other_id,
+                top=top,
+                key_type="traceback" if by_traceback else "lineno",
+                root=app.root_path,
+            )
+        except KeyError as exc:
+            raise click.ClickException(exc.args[0]) from exc
+        if not rows:
+            click.echo("Sem crescimento entre os snapshots.")
+        for row in rows:
+            click.echo(f"{row['kb']:>+10.1f} KB  {row['blocks']:>+7d} blocos  {row['site']}")
+
+    return app
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
     app.run(debug=bool(app.config.get("DEBUG")), use_reloader=False)
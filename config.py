@@ -11,6 +11,44 @@ def _env_bool(name: str, default: bool = False) -> bool:
     return str(value).strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _normalize_postgres_url(url: str) -> str:
+    # Alguns provedores usam "postgres://", SQLAlchemy prefere "postgresql://"
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+
+    # Força psycopg (v3) para compatibilidade com Python 3.13 no Render
+    # Se vier apontando para psycopg2, converte para psycopg
+    if url.startswith("postgresql+psycopg2://"):
+        url = url.replace("postgresql+psycopg2://", "postgresql+psycopg://", 1)
+
+    # Se vier sem driver explícito (postgresql://), força psycopg (v3)
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+psycopg://", 1)
+
+    # Garante SSL quando necessário (Neon geralmente exige)
+    if "sslmode=" not in url:
+        sep = "&" if "?" in url else "?"
+        url = f"{url}{sep}sslmode=require"
+    return url
+
+
+def _postgres_connect_args() -> dict:
+    return {
+        "sslmode": "require",
+        "keepalives": 1,
+        "keepalives_idle": 30,
+        "keepalives_interval": 10,
+        "keepalives_count": 5,
+    }
+
+
+def _sqlite_connect_args() -> dict:
+    return {
+        "check_same_thread": False,
+        "timeout": int(os.getenv("SQLITE_TIMEOUT", "30")),
+    }
+
+
 class Config:
     # Ambiente (opcional) - use para rotular logs/UX
     APP_ENV = (
@@ -49,57 +87,204 @@ class Config:
     # - Local: sqlite
     # - Produção: DATABASE_URL do Render/Neon (Postgres)
     DATABASE_URL = os.getenv("DATABASE_URL")
-
-    if DATABASE_URL:
-        # Alguns provedores usam "postgres://", SQLAlchemy prefere "postgresql://"
-        if DATABASE_URL.startswith("postgres://"):
-            DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-
-        # Força psycopg (v3) para compatibilidade com Python 3.13 no Render
-        # Se vier apontando para psycopg2, converte para psycopg
-        if DATABASE_URL.startswith("postgresql+psycopg2://"):
-            DATABASE_URL = DATABASE_URL.replace(
-                "postgresql+psycopg2://", "postgresql+psycopg://", 1
-            )
-
-        # Se vier sem driver explícito (postgresql://), força psycopg (v3)
-        if DATABASE_URL.startswith("postgresql://"):
-            DATABASE_URL = DATABASE_URL.replace(
-                "postgresql://", "postgresql+psycopg://", 1
-            )
-
-        # Garante SSL quando necessário (Neon geralmente exige)
-        if "sslmode=" not in DATABASE_URL:
-            sep = "&" if "?" in DATABASE_URL else "?"
-            DATABASE_URL = f"{DATABASE_URL}{sep}sslmode=require"
-
+    # DATABASE_URL apontando para SQLite (testes/benchmarks) segue o caminho local.
+    if DATABASE_URL and DATABASE_URL.startswith("sqlite"):
+        SQLALCHEMY_DATABASE_URI = DATABASE_URL
+        DATABASE_URL = None
+    elif DATABASE_URL:
+        DATABASE_URL = _normalize_postgres_url(DATABASE_URL)
         SQLALCHEMY_DATABASE_URI = DATABASE_URL
     else:
         SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(BASE_DIR, "database.db")
+    IS_SQLITE = SQLALCHEMY_DATABASE_URI.startswith("sqlite")
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
-    # Evita conexoes reutilizadas mortas (Neon/SSL/Pooler)
+    # Evita conexoes reutilizadas mortas (Neon/SSL/Pooler).
+    # pool_size/max_overflow/LIFO/pre-ping são completados em models/db_pool.py.
     SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_pre_ping": True,
         "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "280")),
         "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
     }
 
+    # Pool por processo. Sem DB_POOL_SIZE/DB_MAX_OVERFLOW, o tamanho sai do tipo
+    # de worker (GUNICORN_WORKER_CLASS/GUNICORN_THREADS, os mesmos do gunicorn.conf.py).
+    GUNICORN_WORKER_CLASS = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+    GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", "1"))
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE")) if os.getenv("DB_POOL_SIZE") else None
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW")) if os.getenv("DB_MAX_OVERFLOW") else None
+    DB_POOL_USE_LIFO = _env_bool("DB_POOL_USE_LIFO", default=False)
+    # always = ping em todo checkout | idle = só conexões ociosas há N s | off
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "idle")
+    DB_POOL_PING_IDLE_SECONDS = int(os.getenv("DB_POOL_PING_IDLE_SECONDS", "30"))
+    # Em erro de conexão, invalida o pool inteiro (comportamento antigo) ou só a conexão quebrada.
+    DB_POOL_INVALIDATE_ALL = _env_bool("DB_POOL_INVALIDATE_ALL", default=False)
+
     # connect_args só faz sentido quando é Postgres
     if DATABASE_URL:
-        SQLALCHEMY_ENGINE_OPTIONS["connect_args"] = {
-            "sslmode": "require",
-            "keepalives": 1,
-            "keepalives_idle": 30,
-            "keepalives_interval": 10,
-            "keepalives_count": 5,
-        }
+        SQLALCHEMY_ENGINE_OPTIONS["connect_args"] = _postgres_connect_args()
     else:
-        SQLALCHEMY_ENGINE_OPTIONS["connect_args"] = {
-            "check_same_thread": False,
-            "timeout": int(os.getenv("SQLITE_TIMEOUT", "30")),
-        }
+        SQLALCHEMY_ENGINE_OPTIONS["connect_args"] = _sqlite_connect_args()
+
+    # Réplica de leitura opcional (roteamento em models/db_routing.py).
+    # Um segundo arquivo SQLite serve de réplica local para testes.
+    DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or None
+    SQLALCHEMY_BINDS = {}
+    if DATABASE_READ_URL:
+        if DATABASE_READ_URL.startswith("sqlite"):
+            SQLALCHEMY_BINDS["replica"] = {"url": DATABASE_READ_URL, "connect_args": _sqlite_connect_args()}
+        else:
+            DATABASE_READ_URL = _normalize_postgres_url(DATABASE_READ_URL)
+            SQLALCHEMY_BINDS["replica"] = {"url": DATABASE_READ_URL, "connect_args": _postgres_connect_args()}
+    # Endpoints só de leitura que podem ir para a réplica (lista separada por vírgula).
+    READ_REPLICA_ENDPOINTS = [
+        item.strip()
+        for item in os.getenv(
+            "READ_REPLICA_ENDPOINTS",
+            "analytics.charts_data,analytics.charts_drilldown,analytics.insights_data,"
+            "analytics.projection_data,analytics.projection_compare,"
+            "analytics.projection_simulate,analytics.projection_optimize,analytics.reports_data,analytics.reports_export_pdf,"
+            "analytics.reports_export_excel",
+        ).split(",")
+        if item.strip()
+    ]
+    # Após uma escrita do usuário, as leituras dele ficam no primário por N segundos.
+    READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+    # SQL por request (models/query_stats.py): "auto" = headers X-DB-* em
+    # desenvolvimento e log em produção (só acima dos limites abaixo); "off" desliga.
+    QUERY_STATS_MODE = os.getenv("QUERY_STATS_MODE", "auto")
+    QUERY_STATS_LOG_MIN_QUERIES = int(os.getenv("QUERY_STATS_LOG_MIN_QUERIES", "25"))
+    QUERY_STATS_LOG_MIN_MS = float(os.getenv("QUERY_STATS_LOG_MIN_MS", "250"))
+
+    # Consultas lentas (models/slow_queries.py): acima de SLOW_QUERY_MS o statement
+    # vai para o log com EXPLAIN (SQLite: EXPLAIN QUERY PLAN), agrupado por SQL
+    # normalizado; `flask slow-queries show` lê SLOW_QUERY_DIR (padrão instance/slow_queries).
+    SLOW_QUERY_LOG_ENABLED = _env_bool("SLOW_QUERY_LOG_ENABLED", default=True)
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+    SLOW_QUERY_EXPLAIN = _env_bool("SLOW_QUERY_EXPLAIN", default=True)
+    SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+    SLOW_QUERY_DIR = os.getenv("SLOW_QUERY_DIR") or None
+    SLOW_QUERY_FLUSH_SECONDS = float(os.getenv("SLOW_QUERY_FLUSH_SECONDS", "10"))
+
+    # Métricas Prometheus em /metrics (services/metrics.py). Só loopback por padrão;
+    # IPs/redes extras separados por vírgula ou METRICS_TOKEN (Authorization: Bearer).
+    # Com vários workers do gunicorn, METRICS_MULTIPROC_DIR soma os processos.
+    METRICS_ENABLED = _env_bool("METRICS_ENABLED", default=True)
+    METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+    METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+    # Profiling sob demanda (services/profiling.py): header X-Profile com
+    # X-Profile-Token = PROFILING_TOKEN, ou fração PROFILING_SAMPLE_RATE dos
+    # requests aos PROFILING_ENDPOINTS. Capturas em PROFILING_DIR (padrão
+    # instance/profiles), limitadas a PROFILING_MAX_BYTES.
+    PROFILING_ENABLED = _env_bool("PROFILING_ENABLED", default=True)
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN") or None
+    PROFILING_MODE = os.getenv("PROFILING_MODE", "sample")
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_ENDPOINTS = [
+        item.strip() for item in os.getenv("PROFILING_ENDPOINTS", "").split(",") if item.strip()
+    ]
+    PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+    PROFILING_DIR = os.getenv("PROFILING_DIR") or None
+    PROFILING_MAX_BYTES = int(os.getenv("PROFILING_MAX_BYTES", str(50 * 1024 * 1024)))
+
+    # Memória por request (services/memory_profiling.py, tracemalloc): opt-in, só
+    # nos endpoints listados. Acima de MEMORY_PROFILING_BUDGET_MB o request vai
+    # para o log e para MEMORY_PROFILING_DIR (padrão instance/memory).
+    MEMORY_PROFILING_ENABLED = _env_bool("MEMORY_PROFILING_ENABLED", default=False)
+    MEMORY_PROFILING_ENDPOINTS = [
+        item.strip()
+        for item in os.getenv(
+            "MEMORY_PROFILING_ENDPOINTS",
+            "analytics.reports_data,analytics.reports_export_pdf,analytics.reports_export_excel,"
+            "analytics.projection_data",
+        ).split(",")
+        if item.strip()
+    ]
+    MEMORY_PROFILING_BUDGET_MB = float(os.getenv("MEMORY_PROFILING_BUDGET_MB", "64"))
+    MEMORY_PROFILING_TOP = int(os.getenv("MEMORY_PROFILING_TOP", "10"))
+    # Frames por alocação (1 = só a linha; mais frames custam mais memória/CPU).
+    MEMORY_PROFILING_FRAMES = int(os.getenv("MEMORY_PROFILING_FRAMES", "1"))
+    MEMORY_PROFILING_DIR = os.getenv("MEMORY_PROFILING_DIR") or None
+    MEMORY_PROFILING_KEEP_SNAPSHOTS = int(os.getenv("MEMORY_PROFILING_KEEP_SNAPSHOTS", "10"))
+    MEMORY_PROFILING_KEEP_RECORDS = int(os.getenv("MEMORY_PROFILING_KEEP_RECORDS", "200"))
+
+    # Compressão de respostas (services/compression.py): gzip/brotli para JSON, HTML,
+    # CSS e JS acima de COMPRESSION_MIN_SIZE bytes; estáticos .gz/.br gerados no
+    # build (scripts/precompress_static.py) são servidos direto. Desligue se o
+    # proxy reverso já comprime.
+    COMPRESSION_ENABLED = _env_bool("COMPRESSION_ENABLED", default=True)
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+    COMPRESSION_PRECOMPRESSED_STATIC = _env_bool("COMPRESSION_PRECOMPRESSED_STATIC", default=True)
+
+    # Serialização JSON (services/json_provider.py): "auto" usa orjson se instalado;
+    # "stdlib" força o json da biblioteca padrão. Datas saem em ISO 8601.
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+
+    # Estáticos com hash no nome (services/static_assets.py): cache imutável de 1 ano.
+    STATIC_ASSET_HASHING = _env_bool("STATIC_ASSET_HASHING", default=True)
+    STATIC_ASSET_MAX_AGE = int(os.getenv("STATIC_ASSET_MAX_AGE", "31536000"))
+
+    # Perfil de performance do SQLite, aplicado em TODA conexão do pool
+    # (evento "connect" do SQLAlchemy; ver models/sqlite_profile.py).
+    SQLITE_PROFILE_ENABLED = _env_bool("SQLITE_PROFILE_ENABLED", default=True)
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # OFF | NORMAL | FULL | EXTRA
+    SQLITE_BUSY_TIMEOUT_MS = int(
+        os.getenv("SQLITE_BUSY_TIMEOUT_MS", str(int(os.getenv("SQLITE_TIMEOUT", "30")) * 1000))
+    )
+    # Negativo = tamanho em KiB (-20000 ~ 20 MB por conexão)
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-20000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024)))
+    SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")  # DEFAULT | FILE | MEMORY
+    # Desligado por padrão: exclusões de entradas com logs de regra/recorrência
+    # vinculados passariam a falhar.
+    SQLITE_FOREIGN_KEYS = _env_bool("SQLITE_FOREIGN_KEYS", default=False)
+
+    # Caminho de escrita serializado (models/sqlite_writes.py): BEGIN IMMEDIATE
+    # com busy_timeout curto e retry com backoff + jitter em "database is locked".
+    SQLITE_WRITE_SERIALIZATION = _env_bool("SQLITE_WRITE_SERIALIZATION", default=True)
+    SQLITE_WRITE_RETRIES = int(os.getenv("SQLITE_WRITE_RETRIES", "5"))
+    SQLITE_WRITE_LOCK_TIMEOUT_MS = int(os.getenv("SQLITE_WRITE_LOCK_TIMEOUT_MS", "1000"))
+    SQLITE_WRITE_BACKOFF_MS = int(os.getenv("SQLITE_WRITE_BACKOFF_MS", "25"))
+    SQLITE_WRITE_BACKOFF_MAX_MS = int(os.getenv("SQLITE_WRITE_BACKOFF_MAX_MS", "500"))
+
+    # Projeção: cache (por processo) do baseline vindo do banco, para o what-if
+    # recalcular só o delta dos overrides. 0 desliga.
+    PROJECTION_BASELINE_CACHE_SIZE = int(os.getenv("PROJECTION_BASELINE_CACHE_SIZE", "256"))
+    PROJECTION_BASELINE_CACHE_TTL = int(os.getenv("PROJECTION_BASELINE_CACHE_TTL", "300"))
+    # Resultado completo (JSON + zlib) por período/modo/reserva/hash dos overrides,
+    # invalidado pela versão dos dados do usuário. 0 desliga.
+    PROJECTION_RESULT_CACHE_SIZE = int(os.getenv("PROJECTION_RESULT_CACHE_SIZE", "512"))
+    PROJECTION_RESULT_CACHE_TTL = int(os.getenv("PROJECTION_RESULT_CACHE_TTL", "600"))
+    PROJECTION_RESULT_CACHE_MAX_BYTES = int(os.getenv("PROJECTION_RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    # /app/projection/compare: máximo de variantes (cenários) por chamada.
+    PROJECTION_COMPARE_MAX_VARIANTS = int(os.getenv("PROJECTION_COMPARE_MAX_VARIANTS", "12"))
+    # Projeção estocástica (services/projection_simulation.py): fluxos "tipo:categoria"
+    # ajustados nos últimos N dias. Amostragem em Python puro: PROJECTION_SIM_PATHS é
+    # o padrão e o máximo por pedido, e caminhos x dias fica abaixo de MAX_CELLS.
+    PROJECTION_SIM_STREAMS = os.getenv("PROJECTION_SIM_STREAMS", "despesa:mercado,despesa:transporte,receita:extras")
+    PROJECTION_SIM_LOOKBACK_DAYS = int(os.getenv("PROJECTION_SIM_LOOKBACK_DAYS", "180"))
+    PROJECTION_SIM_MIN_SAMPLES = int(os.getenv("PROJECTION_SIM_MIN_SAMPLES", "3"))
+    PROJECTION_SIM_PATHS = int(os.getenv("PROJECTION_SIM_PATHS", "300"))
+    PROJECTION_SIM_MAX_CELLS = int(os.getenv("PROJECTION_SIM_MAX_CELLS", "200000"))
+    # Otimizador (services/projection_optimizer.py): adiamento máximo por item e parcelas.
+    PROJECTION_OPTIMIZER_MAX_SHIFT_DAYS = int(os.getenv("PROJECTION_OPTIMIZER_MAX_SHIFT_DAYS", "30"))
+    PROJECTION_OPTIMIZER_MAX_PARTS = int(os.getenv("PROJECTION_OPTIMIZER_MAX_PARTS", "6"))
+    # Alertas em lote (`flask --app app projection-alerts`): janela em dias, processos,
+    # usuários por lote e orçamento de carga (segundos de banco por segundo; 0 desliga).
+    PROJECTION_ALERTS_HORIZON_DAYS = int(os.getenv("PROJECTION_ALERTS_HORIZON_DAYS", "14"))
+    PROJECTION_ALERTS_WORKERS = int(os.getenv("PROJECTION_ALERTS_WORKERS", "2"))
+    PROJECTION_ALERTS_CHUNK_SIZE = int(os.getenv("PROJECTION_ALERTS_CHUNK_SIZE", "200"))
+    PROJECTION_ALERTS_DB_BUDGET = float(os.getenv("PROJECTION_ALERTS_DB_BUDGET", "1.0"))
+
+    # Startup do banco: create_all + migração leve ao criar o app.
+    # Desligue (DB_AUTO_SETUP=0) quando o deploy rodar `flask --app app init-db` antes dos workers.
+    DB_AUTO_SETUP = _env_bool("DB_AUTO_SETUP", default=True)
 
     DEBUG = _env_bool("DEBUG", default=not IS_PRODUCTION)
     if IS_PRODUCTION:
@@ -0,0 +1,77 @@
+"""Configuração do gunicorn (lida automaticamente a partir da raiz do projeto).
+
+Com preload_app o master importa app.py uma única vez (a migração leve roda só
+ali) e os workers nascem por fork, compartilhando a memória copy-on-write.
+Bind e número de workers seguem os padrões do gunicorn ($PORT, $WEB_CONCURRENCY);
+tipo de worker e threads vêm de GUNICORN_WORKER_CLASS / GUNICORN_THREADS.
+"""
+
+import os
+import sys
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").strip().lower() in {"1", "true", "yes", "on"}
+# Mesmas variáveis lidas pelo config.py para dimensionar o pool do banco por worker.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+# Carrega reportlab/openpyxl no master para os workers herdarem via copy-on-write.
+warm_renderers = os.getenv("GUNICORN_WARM_RENDERERS", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def on_starting(server):
+    # Snapshots de métricas de uma execução anterior não podem entrar na soma.
+    directory = os.getenv("METRICS_MULTIPROC_DIR")
+    if not directory:
+        return
+
+    from services.metrics import clear_snapshots
+
+    os.makedirs(directory, exist_ok=True)
+    server.log.info("Métricas multiprocesso em %s (%s snapshots antigos removidos)", directory, clear_snapshots(directory))
+
+
+def when_ready(server):
+    if not (preload_app and warm_renderers):
+        return
+
+    from services.report_renderers import warm
+
+    server.log.info("Renderizadores pré-carregados: %s", ", ".join(warm()) or "-")
+
+
+def post_fork(server, worker):
+    # Conexões abertas no master não podem ser usadas por outro processo.
+    app_module = sys.modules.get("app")
+    if app_module is None:
+        return
+
+    from models.extensions import db
+
+    with app_module.app.app_context():
+        db.engine.dispose(close=False)
+        pool_size = getattr(db.engine.pool, "size", lambda: None)()
+        if pool_size is not None and worker.cfg.threads > pool_size:
+            # Threads além do pool caem no overflow (conexões descartáveis).
+            server.log.warning(
+                "Pool do banco (pool_size=%s) menor que --threads=%s; use GUNICORN_THREADS ou DB_POOL_SIZE.",
+                pool_size,
+                worker.cfg.threads,
+            )
+
+
+def worker_exit(server, worker):
+    # Contadores do pool/escritas por worker (o /metrics expõe os mesmos valores).
+    app_module = sys.modules.get("app")
+    if app_module is None:
+        return
+
+    from models.db_pool import pool_stats
+    from models.extensions import db
+    from models.sqlite_writes import write_stats
+    from models.slow_queries import SLOW_QUERIES
+    from services.metrics import flush_metrics
+
+    with app_module.app.app_context():
+        server.log.info("worker %s pool=%s writes=%s", worker.pid, pool_stats(db.engine), write_stats())
+    # Último snapshot: os contadores deste worker continuam no /metrics.
+    flush_metrics(app_module.app)
+    SLOW_QUERIES.flush()
@@ -0,0 +1,224 @@
+"""Pool de conexões: dimensionamento, invalidação pontual e métricas.
+
+- Tamanho do pool por tipo de worker do gunicorn (sync/gthread/gevent), a
+  menos que DB_POOL_SIZE / DB_MAX_OVERFLOW venham explícitos.
+- Erro de rede transitório (SSL/conexão derrubada) invalida só a conexão
+  quebrada; o resto do pool segue atendendo os requests em andamento.
+- Pre-ping opcional só para conexões ociosas há mais de N segundos, em vez de
+  um round-trip extra em todo checkout. LIFO opcional, para que as conexões
+  quentes sejam reusadas e as ociosas expirem sozinhas.
+- Contadores por processo: espera no checkout, overflow, timeouts,
+  invalidações e falhas de ping (pool_stats()).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+PRE_PING_MODES = {"always", "idle", "off"}
+
+# Mensagens de erro de rede que o driver nem sempre marca como "disconnect".
+TRANSIENT_ERROR_MARKERS = (
+    "ssl syscall error",
+    "ssl connection has been closed unexpectedly",
+    "server closed the connection unexpectedly",
+    "connection reset by peer",
+    "terminating connection due to administrator command",
+    "could not receive data from server",
+    "consuming input failed",
+    "the connection is closed",
+    "connection is lost",
+)
+
+
+def pool_sizing(worker_class: str | None, threads: int | None) -> tuple[int, int]:
+    """(pool_size, max_overflow) para o tipo de worker.
+
+    Cada processo tem o próprio pool: no gthread, uma conexão por thread.
+    """
+    kind = (worker_class or "sync").strip().lower().rsplit(".", 1)[-1]
+    threads = max(1, int(threads or 1))
+    if kind in {"gevent", "eventlet", "geventworker", "eventletworker"}:
+        return 10, 20
+    if kind in {"gthread", "threadworker"} or threads > 1:
+        return threads, max(2, threads // 2)
+    return 2, 2
+
+
+class _PoolStats:
+    def __init__(self, max_samples: int = 4096):
+        self._lock = Lock()
+        self._waits_ms: deque[float] = deque(maxlen=max_samples)
+        self._counters = {
+            "checkouts": 0,
+            "overflow_checkouts": 0,
+            "timeouts": 0,
+            "invalidations": 0,
+            "soft_invalidations": 0,
+            "disconnects": 0,
+            "pings": 0,
+            "ping_failures": 0,
+        }
+        self._wait_total_ms = 0.0
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[key] += amount
+
+    def checkout(self, wait_ms: float, overflow: bool) -> None:
+        with self._lock:
+            self._counters["checkouts"] += 1
+            if overflow:
+                self._counters["overflow_checkouts"] += 1
+            self._wait_total_ms += wait_ms
+            self._waits_ms.append(wait_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = dict(self._counters)
+            waits = sorted(self._waits_ms)
+            data["checkout_wait_total_ms"] = round(self._wait_total_ms, 2)
+        for pct in (50, 95, 99):
+            if waits:
+                idx = min(len(waits) - 1, int(round(pct / 100 * (len(waits) - 1))))
+                data[f"checkout_wait_p{pct}_ms"] = round(waits[idx], 3)
+            else:
+                data[f"checkout_wait_p{pct}_ms"] = 0.0
+        data["checkout_wait_max_ms"] = round(waits[-1], 3) if waits else 0.0
+        return data
+
+    def reset(self) -> None:
+        with self._lock:
+            for key in self._counters:
+                self._counters[key] = 0
+            self._waits_ms.clear()
+            self._wait_total_ms = 0.0
+
+
+_stats = _PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mede a espera por conexão e conta overflow/timeouts."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            _stats.incr("timeouts")
+            raise
+        _stats.checkout((time.perf_counter() - started) * 1000, self.checkedout() > self.size())
+        return connection
+
+
+def _pre_ping_mode(config) -> str:
+    mode = str(config.get("DB_POOL_PRE_PING") or "idle").strip().lower()
+    if mode not in PRE_PING_MODES:
+        logger.warning("DB_POOL_PRE_PING invalido: %s (usando 'idle')", mode)
+        return "idle"
+    return mode
+
+
+def build_engine_options(config) -> dict:
+    """Completa SQLALCHEMY_ENGINE_OPTIONS com pool, LIFO e modo de pre-ping."""
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    uri = str(config.get("SQLALCHEMY_DATABASE_URI") or "")
+    if uri in {"sqlite://", "sqlite:///:memory:"} or ":memory:" in uri:
+        # SQLite em memória usa pool próprio (uma conexão); não mexe.
+        return options
+
+    pool_size, max_overflow = pool_sizing(config.get("GUNICORN_WORKER_CLASS"), config.get("GUNICORN_THREADS"))
+    if config.get("DB_POOL_SIZE") is not None:
+        pool_size = int(config["DB_POOL_SIZE"])
+    if config.get("DB_MAX_OVERFLOW") is not None:
+        max_overflow = int(config["DB_MAX_OVERFLOW"])
+
+    options.setdefault("poolclass", InstrumentedQueuePool)
+    options["pool_size"] = pool_size
+    options["max_overflow"] = max_overflow
+    options["pool_use_lifo"] = bool(config.get("DB_POOL_USE_LIFO", False))
+    options["pool_pre_ping"] = _pre_ping_mode(config) == "always"
+    return options
+
+
+def install_pool_events(engine, config) -> None:
+    """Registra invalidação pontual, ping de ociosas e contadores no engine."""
+    invalidate_all = bool(config.get("DB_POOL_INVALIDATE_ALL", False))
+
+    @event.listens_for(engine, "handle_error")
+    def _classify_error(context):
+        original = context.original_exception
+        if not context.is_disconnect and isinstance(context.sqlalchemy_exception, sa_exc.OperationalError):
+            message = str(original).lower()
+            if any(marker in message for marker in TRANSIENT_ERROR_MARKERS):
+                context.is_disconnect = True
+        if context.is_disconnect:
+            _stats.incr("disconnects")
+            # Padrão do SQLAlchemy: invalida o pool inteiro. Aqui só a conexão quebrada.
+            context.invalidate_pool_on_disconnect = invalidate_all
+
+    pool = engine.pool
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        _stats.incr("invalidations")
+
+    @event.listens_for(pool, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+        _stats.incr("soft_invalidations")
+
+    if _pre_ping_mode(config) != "idle":
+        return
+
+    idle_seconds = float(config.get("DB_POOL_PING_IDLE_SECONDS", 30))
+    dialect = engine.dialect
+
+    @event.listens_for(pool, "checkin")
+    def _mark_checkin(dbapi_connection, connection_record):
+        connection_record.info["last_checkin"] = time.monotonic()
+
+    @event.listens_for(pool, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        last_checkin = connection_record.info.get("last_checkin")
+        if last_checkin is None or time.monotonic() - last_checkin < idle_seconds:
+            return
+        _stats.incr("pings")
+        try:
+            alive = dialect.do_ping(dbapi_connection)
+        except Exception as exc:
+            _stats.incr("ping_failures")
+            # DisconnectionError faz o pool descartar ESTA conexão e tentar outra.
+            raise sa_exc.DisconnectionError("conexão ociosa morta") from exc
+        if alive is False:
+            _stats.incr("ping_failures")
+            raise sa_exc.DisconnectionError("conexão ociosa morta")
+
+
+def pool_stats(engine=None) -> dict:
+    """Contadores do processo + estado atual do pool (quando houver engine)."""
+    data = _stats.snapshot()
+    pool = getattr(engine, "pool", None)
+    if isinstance(pool, QueuePool):
+        data.update(
+            {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            }
+        )
+    return data
+
+
+def reset_pool_stats() -> None:
+    _stats.reset()
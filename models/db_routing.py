@@ -0,0 +1,98 @@
+"""Roteamento de leituras para a réplica (DATABASE_READ_URL).
+
+Os endpoints de leitura pesada (gráficos, relatórios, projeção) leem da
+réplica; todo o resto segue no primário. Regras:
+
+- só SELECT vai para a réplica; flush, DML, session.connection() e qualquer
+  coisa fora de request ficam no primário;
+- read-your-writes: depois de uma escrita do usuário, as leituras dele ficam
+  no primário por READ_YOUR_WRITES_SECONDS (marca no cookie de sessão, então
+  vale entre workers);
+- depois de um flush no request, todas as leituras seguintes dele ficam no
+  primário (o refresh de linhas recém-gravadas não existe numa réplica
+  atrasada);
+- use_primary() força o primário em um trecho (ex.: ler antes de escrever).
+
+Sem DATABASE_READ_URL nada muda: a sessão se comporta como a padrão.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request, session
+from flask_login import current_user
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND_KEY = "replica"
+_PRIMARY_UNTIL_KEY = "_db_primary_until"
+
+
+def _replica_allowed(clause) -> bool:
+    if not has_request_context() or not g.get("db_read_replica"):
+        return False
+    if g.get("db_force_primary", 0) > 0 or g.get("db_wrote"):
+        return False
+    return clause is not None and bool(getattr(clause, "is_select", False))
+
+
+class RoutingSession(Session):
+    """Sessão do Flask-SQLAlchemy que manda SELECTs elegíveis para a réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _replica_allowed(clause):
+            engine = self._db.engines.get(REPLICA_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_request_write(db_session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+@contextmanager
+def use_primary():
+    """Força o primário dentro do bloco (no request atual)."""
+    if not has_request_context():
+        yield
+        return
+    g.db_force_primary = g.get("db_force_primary", 0) + 1
+    try:
+        yield
+    finally:
+        g.db_force_primary -= 1
+
+
+def is_reading_replica() -> bool:
+    return (
+        has_request_context()
+        and bool(g.get("db_read_replica"))
+        and not g.get("db_force_primary", 0)
+        and not g.get("db_wrote")
+    )
+
+
+def install_read_routing(app) -> None:
+    """Liga os hooks de request. Não faz nada sem réplica configurada."""
+    if REPLICA_BIND_KEY not in (app.config.get("SQLALCHEMY_BINDS") or {}):
+        return
+
+    endpoints = set(app.config.get("READ_REPLICA_ENDPOINTS") or [])
+    window = int(app.config.get("READ_YOUR_WRITES_SECONDS", 10))
+
+    def choose_database():
+        pinned_until = session.get(_PRIMARY_UNTIL_KEY, 0) if window > 0 else 0
+        g.db_read_replica = request.endpoint in endpoints and pinned_until <= time.time()
+
+    def remember_write(response):
+        if window > 0 and g.get("db_wrote") and current_user.is_authenticated:
+            session[_PRIMARY_UNTIL_KEY] = int(time.time()) + window
+        return response
+
+    app.before_request(choose_database)
+    app.after_request(remember_write)
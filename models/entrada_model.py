@@ -4,7 +4,11 @@ from datetime import datetime
 
 from sqlalchemy import text
 
+from models.db_pool import build_engine_options, install_pool_events
 from models.extensions import db
+from models.query_stats import install_query_events
+from models.slow_queries import install_slow_query_log, slow_query_dir
+from models.sqlite_profile import install_sqlite_profile
 
 
 class Entrada(db.Model):
@@ -41,6 +45,13 @@ class Entrada(db.Model):
         nullable=False,
     )
 
+    __table_args__ = (
+        # Consultas por usuário + período (projeção, gráficos, relatórios).
+        db.Index("ix_entradas_user_data", "user_id", "data"),
+        # Versão dos dados do usuário (cache da projeção): count + max(updated_at) só no índice.
+        db.Index("ix_entradas_user_updated", "user_id", "updated_at"),
+    )
+
 
 def _column_exists(conn, table: str, column: str) -> bool:
     rows = conn.execute(text(f"PRAGMA table_info({table})")).mappings().all()
@@ -169,29 +180,49 @@ def _migrate_sqlite_schema(conn) -> None:
 
 
 def init_db(app):
+    """Associa o SQLAlchemy ao app. Não abre conexão com o banco."""
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = build_engine_options(app.config)
     db.init_app(app)
     with app.app_context():
-        # IMPORTANTE: garante que a tabela user_profiles entra no metadata
-        from models.user_profile_model import UserProfile  # noqa: F401
-        from models.automation_rule_model import AutomationRule, RuleExecution  # noqa: F401
-        from models.recurrence_model import Recurrence, RecurrenceExecution  # noqa: F401
-        from models.reminder_model import Reminder  # noqa: F401
-        from models.notification_model import Notification  # noqa: F401
-        from models.projection_scenario_model import ProjectionScenario  # noqa: F401
-
-
+        # Primário e, se houver, a réplica de leitura (bind "replica").
+        for bind, engine in db.engines.items():
+            install_pool_events(engine, app.config)
+            install_sqlite_profile(engine, app.config)
+            install_query_events(engine)
+            install_slow_query_log(engine, app.config, slow_query_dir(app), bind=bind or "primary")
+    # IMPORTANTE: garante que a tabela user_profiles entra no metadata
+    from models.user_profile_model import UserProfile  # noqa: F401
+    from models.automation_rule_model import AutomationRule, RuleExecution  # noqa: F401
+    from models.recurrence_model import Recurrence, RecurrenceExecution  # noqa: F401
+    from models.reminder_model import Reminder  # noqa: F401
+    from models.notification_model import Notification  # noqa: F401
+    from models.projection_scenario_model import ProjectionScenario  # noqa: F401
+
+
+def setup_database(app):
+    """Cria tabelas e aplica a migração leve.
+
+    Passo único de startup: roda no master do gunicorn (--preload) ou via
+    `flask --app app init-db`, e não a cada worker.
+    """
+    with app.app_context():
         db.create_all()
 
         # Migração leve (SQLite/Postgres) sem Alembic
         engine_name = db.engine.name
         with db.engine.begin() as conn:
             if engine_name == "sqlite":
+                # journal_mode é persistente no arquivo; os demais PRAGMAs
+                # são por conexão (models/sqlite_profile.py).
                 conn.execute(text("PRAGMA journal_mode=WAL"))
-                conn.execute(text("PRAGMA synchronous=NORMAL"))
-                conn.execute(text("PRAGMA busy_timeout=5000"))
                 _migrate_sqlite_schema(conn)
             elif engine_name in {"postgresql", "postgres"}:
                 _migrate_postgres_schema(conn)
+            # Bancos antigos: create_all não cria índice em tabela existente.
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_entradas_user_data ON entradas (user_id, data)"))
+            conn.execute(
+                text("CREATE INDEX IF NOT EXISTS ix_entradas_user_updated ON entradas (user_id, updated_at)")
+            )
 
 
 def _column_exists_postgres(conn, table: str, column: str) -> bool:
@@ -1,4 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 
-# Instância única do SQLAlchemy para todo o projeto
-db = SQLAlchemy()
+from models.db_routing import RoutingSession
+
+# Instância única do SQLAlchemy para todo o projeto.
+# RoutingSession só desvia leituras quando há réplica (DATABASE_READ_URL).
+db = SQLAlchemy(session_options={"class_": RoutingSession})
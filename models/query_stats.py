@@ -0,0 +1,211 @@
+"""Contagem de SQL por request e orçamento de queries (contra N+1).
+
+Os eventos before/after_cursor_execute de cada engine (primário e réplica)
+alimentam o coletor ativo (ContextVar): número de statements, tempo total de
+banco, statement mais lento e statement mais repetido (o sinal típico de N+1:
+o mesmo SELECT parametrizado rodando uma vez por item de uma lista).
+
+- Por request (QUERY_STATS_MODE): "headers" devolve X-DB-Queries,
+  X-DB-Time-Ms, X-DB-Slowest-Ms, X-DB-Repeated e Server-Timing (padrão em
+  desenvolvimento); "log" registra no log os requests acima de
+  QUERY_STATS_LOG_MIN_QUERIES / QUERY_STATS_LOG_MIN_MS (padrão em produção).
+- Em testes/scripts:
+
+      with query_budget(6):
+          client.get("/app/reports/data")
+
+  levanta QueryBudgetExceeded se o bloco rodar mais statements que o
+  declarado (ou repetir um mesmo statement mais que max_repeats).
+
+Sem coletor ativo o custo por statement é uma leitura de ContextVar.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import Flask, g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+QUERY_STATS_MODES = {"headers", "log", "off"}
+STATEMENT_PREVIEW_LEN = 200
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_current: ContextVar["QueryStats | None"] = ContextVar("query_stats", default=None)
+
+
+def _preview(statement: str | None) -> str:
+    text = _WHITESPACE_RE.sub(" ", statement or "").strip()
+    if len(text) > STATEMENT_PREVIEW_LEN:
+        text = text[: STATEMENT_PREVIEW_LEN - 3] + "..."
+    return text
+
+
+class QueryStats:
+    """Acumulador de um request (ou de um bloco query_budget)."""
+
+    __slots__ = ("count", "total_ms", "slowest_ms", "slowest_statement", "statements", "parent")
+
+    def __init__(self, parent: "QueryStats | None" = None):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: str | None = None
+        self.statements: Counter[str] = Counter()
+        self.parent = parent
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.statements[statement] += 1
+            if elapsed_ms > stats.slowest_ms:
+                stats.slowest_ms = elapsed_ms
+                stats.slowest_statement = statement
+            stats = stats.parent
+
+    def most_repeated(self) -> tuple[str | None, int]:
+        if not self.statements:
+            return None, 0
+        statement, times = self.statements.most_common(1)[0]
+        return statement, times
+
+    def as_dict(self) -> dict:
+        repeated, repeats = self.most_repeated()
+        return {
+            "queries": self.count,
+            "db_ms": round(self.total_ms, 2),
+            "slowest_ms": round(self.slowest_ms, 2),
+            "slowest_statement": _preview(self.slowest_statement) if self.slowest_statement else None,
+            "most_repeated": repeats,
+            "most_repeated_statement": _preview(repeated) if repeated else None,
+        }
+
+
+class QueryBudgetExceeded(AssertionError):
+    """O bloco rodou mais SQL que o orçamento declarado."""
+
+    def __init__(self, message: str, stats: QueryStats):
+        super().__init__(message)
+        self.stats = stats
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def collect_queries():
+    """Coleta os statements do bloco (aninha: o coletor externo também conta)."""
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int, *, max_repeats: int | None = None):
+    """Falha se o bloco passar de max_queries statements (ou repetir um além de max_repeats)."""
+    with collect_queries() as stats:
+        yield stats
+    problems = []
+    if stats.count > max_queries:
+        problems.append(f"{stats.count} queries (orçamento {max_queries})")
+    repeated, repeats = stats.most_repeated()
+    if max_repeats is not None and repeats > max_repeats:
+        problems.append(f"statement repetido {repeats}x (máximo {max_repeats})")
+    if problems:
+        detail = f"; mais repetido {repeats}x: {_preview(repeated)}" if repeated else ""
+        raise QueryBudgetExceeded(", ".join(problems) + detail, stats)
+
+
+def install_query_events(engine) -> None:
+    """Mede cada statement do engine para o coletor ativo."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None and context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _query_finished(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        started = getattr(context, "_query_started", None)
+        if stats is None or started is None:
+            return
+        stats.record(statement, (time.perf_counter() - started) * 1000)
+
+
+def _query_stats_mode(app: Flask) -> str:
+    mode = str(app.config.get("QUERY_STATS_MODE") or "auto").strip().lower()
+    if mode == "auto":
+        return "log" if app.config.get("IS_PRODUCTION") else "headers"
+    if mode not in QUERY_STATS_MODES:
+        logger.warning("QUERY_STATS_MODE invalido: %s (usando 'off')", mode)
+        return "off"
+    return mode
+
+
+def install_query_stats(app: Flask) -> None:
+    """Hooks de request. Instalar antes dos demais hooks para contar tudo do request."""
+    mode = _query_stats_mode(app)
+    if mode == "off":
+        return
+    min_queries = int(app.config.get("QUERY_STATS_LOG_MIN_QUERIES", 25))
+    min_ms = float(app.config.get("QUERY_STATS_LOG_MIN_MS", 250))
+
+    def start_query_stats():
+        stats = QueryStats(parent=_current.get())
+        g._query_stats = stats
+        g._query_stats_token = _current.set(stats)
+
+    def report_query_stats(response):
+        stats = g.get("_query_stats")
+        if stats is None:
+            return response
+        if mode == "headers":
+            repeated, repeats = stats.most_repeated()
+            response.headers["X-DB-Queries"] = str(stats.count)
+            response.headers["X-DB-Time-Ms"] = f"{stats.total_ms:.2f}"
+            response.headers["X-DB-Slowest-Ms"] = f"{stats.slowest_ms:.2f}"
+            response.headers["X-DB-Repeated"] = str(repeats)
+            if stats.slowest_statement:
+                preview = _preview(stats.slowest_statement)
+                response.headers["X-DB-Slowest"] = preview.encode("latin-1", "replace").decode("latin-1")
+            response.headers.add("Server-Timing", f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"')
+        elif stats.count >= min_queries or stats.total_ms >= min_ms:
+            data = stats.as_dict()
+            logger.info(
+                "sql %s %s: %d queries, %.1f ms (mais lento %.1f ms: %s; mais repetido %dx: %s)",
+                request.method,
+                request.path,
+                data["queries"],
+                data["db_ms"],
+                data["slowest_ms"],
+                data["slowest_statement"],
+                data["most_repeated"],
+                data["most_repeated_statement"],
+            )
+        return response
+
+    def stop_query_stats(exc):
+        token = g.pop("_query_stats_token", None)
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:  # teardown em outro contexto (não deveria acontecer)
+                _current.set(None)
+
+    app.before_request(start_query_stats)
+    app.after_request(report_query_stats)
+    app.teardown_request(stop_query_stats)
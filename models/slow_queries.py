@@ -0,0 +1,302 @@
+"""Log de consultas lentas com EXPLAIN automático.
+
+Todo statement acima de SLOW_QUERY_MS (medido nos eventos do engine, primário
+e réplica) entra num buffer em memória agrupado por impressão digital: o SQL
+normalizado (literais e parâmetros viram `?`, listas de IN colapsam), então o
+mesmo filtro com valores diferentes conta como uma entrada só. Cada entrada
+guarda o SQL, o formato dos parâmetros (só tipos, nunca valores), endpoints,
+contagem e tempos, e o plano da primeira ocorrência:
+- SQLite: EXPLAIN QUERY PLAN;
+- Postgres: EXPLAIN (sem ANALYZE: não executa de novo), dentro de um
+  SAVEPOINT para não abortar a transação do request se falhar.
+
+O buffer é limitado (SLOW_QUERY_LOG_SIZE, sai o menos recente) e cada processo
+grava o seu em SLOW_QUERY_DIR (`slow_queries_<pid>.json`, padrão
+instance/slow_queries); `flask --app app slow-queries show` soma os arquivos
+dos workers.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIX = "slow_queries_"
+STATEMENT_MAX_LEN = 4000
+EXPLAIN_PREFIXES = ("select", "with", "update", "delete")
+SORT_KEYS = {"total": "total_ms", "max": "max_ms", "count": "count"}
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\?|(?<!:):\w+|\$\d+")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """SQL sem literais/parâmetros: a mesma consulta com valores diferentes fica igual."""
+    text = _STRING_RE.sub("?", statement or "")
+    text = _PARAM_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("(?+)", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize_statement(statement).encode("utf-8")).hexdigest()[:12]
+
+
+def parameter_shape(parameters) -> str:
+    """Tipos dos parâmetros (sem valores): `(int, str, date)` ou `{user_id: int}`."""
+    if parameters is None:
+        return "()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        names = [type(value).__name__ for value in parameters]
+        if len(names) > 20:
+            return "(" + ", ".join(f"{name} x{count}" for name, count in Counter(names).most_common()) + ")"
+        return "(" + ", ".join(names) + ")"
+    return type(parameters).__name__
+
+
+def _sqlite_plan(cursor, statement, parameters) -> list[str]:
+    cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ())
+    depth: dict[int, int] = {}
+    lines = []
+    for node_id, parent, _unused, detail in cursor.fetchall():
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def _postgres_plan(cursor, statement, parameters) -> list[str]:
+    cursor.execute("SAVEPOINT slow_query_explain")
+    try:
+        cursor.execute("EXPLAIN " + statement, parameters)
+        lines = [row[0] for row in cursor.fetchall()]
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+        raise
+    finally:
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    return lines
+
+
+def explain(connection, dialect_name: str, statement: str, parameters) -> list[str]:
+    """Plano do statement na mesma conexão DBAPI (não passa pelos eventos do engine)."""
+    cursor = connection.cursor()
+    try:
+        if dialect_name == "sqlite":
+            return _sqlite_plan(cursor, statement, parameters)
+        if dialect_name == "postgresql":
+            return _postgres_plan(cursor, statement, parameters)
+        raise NotImplementedError(f"EXPLAIN não suportado para {dialect_name}")
+    finally:
+        cursor.close()
+
+
+def is_full_scan(plan: list[str]) -> bool:
+    for line in plan:
+        detail = line.strip()
+        if (detail.startswith("SCAN ") and "CONSTANT ROW" not in detail) or "Seq Scan" in detail:
+            return True
+    return False
+
+
+class SlowQueryLog:
+    """Buffer limitado de consultas lentas, por impressão digital."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._last_flush = 0.0
+        self.configure({})
+
+    def configure(self, config, directory: str | None = None) -> None:
+        self.threshold_ms = float(config.get("SLOW_QUERY_MS", 200))
+        self.explain = bool(config.get("SLOW_QUERY_EXPLAIN", True))
+        self.size = max(1, int(config.get("SLOW_QUERY_LOG_SIZE", 200)))
+        self.flush_seconds = float(config.get("SLOW_QUERY_FLUSH_SECONDS", 10))
+        self.directory = directory
+
+    def record(self, statement, parameters, elapsed_ms, *, endpoint, bind, plan_source=None) -> dict:
+        key = fingerprint(statement)
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            entry = self._entries.get(key)
+            is_new = entry is None
+            if is_new:
+                entry = self._entries[key] = {
+                    "fingerprint": key,
+                    "statement": statement[:STATEMENT_MAX_LEN],
+                    "normalized": normalize_statement(statement)[:STATEMENT_MAX_LEN],
+                    "parameters": parameter_shape(parameters),
+                    "bind": bind,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "first_seen": now,
+                    "endpoints": {},
+                    "plan": None,
+                    "plan_error": None,
+                    "full_scan": None,
+                }
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + elapsed_ms, 2)
+            entry["max_ms"] = round(max(entry["max_ms"], elapsed_ms), 2)
+            entry["last_ms"] = round(elapsed_ms, 2)
+            entry["last_seen"] = now
+            entry["endpoints"][endpoint] = entry["endpoints"].get(endpoint, 0) + 1
+        if is_new:
+            # plano e log fora do lock; só na primeira ocorrência
+            if self.explain and plan_source is not None:
+                try:
+                    entry["plan"] = plan_source()
+                    entry["full_scan"] = is_full_scan(entry["plan"])
+                except Exception as exc:  # plano é diagnóstico: nunca derruba o request
+                    entry["plan_error"] = f"{type(exc).__name__}: {exc}"[:300]
+            logger.warning(
+                "consulta lenta %.1f ms (%s, %s) [%s]: %s | params %s | plano: %s",
+                elapsed_ms,
+                endpoint,
+                bind,
+                key,
+                entry["normalized"][:500],
+                entry["parameters"],
+                " / ".join(entry["plan"] or []) or entry["plan_error"] or "-",
+            )
+        if self.directory and (is_new or time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+        return entry
+
+    def entries(self) -> list[dict]:
+        with self._lock:
+            return [dict(entry, endpoints=dict(entry["endpoints"])) for entry in self._entries.values()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def flush(self) -> bool:
+        """Grava o buffer deste processo (`slow_queries_<pid>.json`)."""
+        if not self.directory:
+            return False
+        self._last_flush = time.monotonic()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{FILE_PREFIX}{os.getpid()}.json")
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"pid": os.getpid(), "entries": self.entries()}, fh, ensure_ascii=False)
+            os.replace(tmp, path)
+            return True
+        except OSError:
+            logger.warning("Falha ao gravar o log de consultas lentas", exc_info=True)
+            return False
+
+
+SLOW_QUERIES = SlowQueryLog()
+
+
+def slow_query_dir(app) -> str:
+    return app.config.get("SLOW_QUERY_DIR") or os.path.join(app.instance_path, "slow_queries")
+
+
+def read_slow_queries(directory: str, *, sort: str = "total") -> list[dict]:
+    """Soma as entradas gravadas por todos os processos, por impressão digital."""
+    merged: dict[str, dict] = {}
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.startswith(FILE_PREFIX) and name.endswith(".json"))
+    except FileNotFoundError:
+        return []
+    for name in names:
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as fh:
+                entries = json.load(fh).get("entries", [])
+        except (OSError, ValueError):
+            continue
+        for entry in entries:
+            current = merged.get(entry["fingerprint"])
+            if current is None:
+                merged[entry["fingerprint"]] = dict(entry, endpoints=dict(entry["endpoints"]))
+                continue
+            current["count"] += entry["count"]
+            current["total_ms"] = round(current["total_ms"] + entry["total_ms"], 2)
+            current["max_ms"] = max(current["max_ms"], entry["max_ms"])
+            current["first_seen"] = min(current["first_seen"], entry["first_seen"])
+            if entry["last_seen"] > current["last_seen"]:
+                current["last_seen"], current["last_ms"] = entry["last_seen"], entry["last_ms"]
+            for endpoint, count in entry["endpoints"].items():
+                current["endpoints"][endpoint] = current["endpoints"].get(endpoint, 0) + count
+            if current.get("plan") is None and entry.get("plan") is not None:
+                current["plan"], current["full_scan"] = entry["plan"], entry["full_scan"]
+    key = SORT_KEYS.get(sort, "total_ms")
+    return sorted(merged.values(), key=lambda entry: entry[key], reverse=True)
+
+
+def clear_slow_queries(directory: str) -> int:
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if name.startswith(FILE_PREFIX):
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    return removed
+
+
+def _current_endpoint() -> str:
+    if has_request_context():
+        return request.endpoint or "unmatched"
+    return "-"
+
+
+def install_slow_query_log(engine, config, directory: str | None = None, bind: str = "primary") -> bool:
+    """Mede os statements do engine e registra os que passam de SLOW_QUERY_MS."""
+    if not config.get("SLOW_QUERY_LOG_ENABLED", True):
+        return False
+    SLOW_QUERIES.configure(config, directory)
+    dialect_name = engine.dialect.name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _slow_query_started(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _slow_query_finished(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < SLOW_QUERIES.threshold_ms:
+            return
+        plan_source = None
+        if not executemany and statement.lstrip().lower().startswith(EXPLAIN_PREFIXES):
+            plan_source = functools.partial(explain, conn.connection, dialect_name, statement, parameters)
+
+        SLOW_QUERIES.record(
+            statement, parameters, elapsed_ms, endpoint=_current_endpoint(), bind=bind, plan_source=plan_source
+        )
+
+    return True
@@ -0,0 +1,70 @@
+"""Perfil de performance do SQLite aplicado por conexão.
+
+PRAGMAs como synchronous, busy_timeout e cache_size valem só para a conexão
+em que foram executados. Registrando no evento "connect" do engine, toda
+conexão nova do pool nasce configurada (e não só a usada na migração).
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SYNCHRONOUS_VALUES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+TEMP_STORE_VALUES = {"DEFAULT", "FILE", "MEMORY"}
+
+
+def build_sqlite_pragmas(config) -> list[str]:
+    """Monta a lista de PRAGMAs a partir da config (valores validados)."""
+    pragmas: list[str] = []
+
+    synchronous = str(config.get("SQLITE_SYNCHRONOUS") or "NORMAL").strip().upper()
+    if synchronous in SYNCHRONOUS_VALUES:
+        pragmas.append(f"PRAGMA synchronous={synchronous}")
+    else:
+        logger.warning("SQLITE_SYNCHRONOUS invalido: %s", synchronous)
+
+    for key, pragma in (
+        ("SQLITE_BUSY_TIMEOUT_MS", "busy_timeout"),
+        ("SQLITE_CACHE_SIZE", "cache_size"),
+        ("SQLITE_MMAP_SIZE", "mmap_size"),
+    ):
+        value = config.get(key)
+        if value is None:
+            continue
+        try:
+            pragmas.append(f"PRAGMA {pragma}={int(value)}")
+        except (TypeError, ValueError):
+            logger.warning("%s invalido: %s", key, value)
+
+    temp_store = str(config.get("SQLITE_TEMP_STORE") or "DEFAULT").strip().upper()
+    if temp_store in TEMP_STORE_VALUES:
+        pragmas.append(f"PRAGMA temp_store={temp_store}")
+    else:
+        logger.warning("SQLITE_TEMP_STORE invalido: %s", temp_store)
+
+    foreign_keys = "ON" if config.get("SQLITE_FOREIGN_KEYS") else "OFF"
+    pragmas.append(f"PRAGMA foreign_keys={foreign_keys}")
+    return pragmas
+
+
+def install_sqlite_profile(engine, config) -> list[str]:
+    """Registra os PRAGMAs no evento "connect" do engine (somente SQLite)."""
+    if engine.dialect.name != "sqlite" or not config.get("SQLITE_PROFILE_ENABLED", True):
+        return []
+
+    pragmas = build_sqlite_pragmas(config)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in pragmas:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    return pragmas
@@ -0,0 +1,267 @@
+"""Caminho de escrita serializado para SQLite.
+
+Com vários workers, escritas concorrentes disputam o único lock de escrita do
+SQLite. No modo padrão do pysqlite o BEGIN é DEFERRED e só pede o lock no
+primeiro INSERT/UPDATE; quem perde a disputa fica preso no busy_timeout (até
+30 s) e depois falha com "database is locked".
+
+Aqui o lock é pedido logo no início, com BEGIN IMMEDIATE, antes de qualquer
+flush. O busy_timeout dessa tentativa é curto, e em caso de lock há retry com
+backoff exponencial + jitter. Como nada foi enviado ao banco ainda, repetir o
+BEGIN é seguro: os objetos pendentes na sessão continuam lá.
+
+Uso nas rotas (transação curta; leituras/validação antes do bloco):
+
+    with write_transaction():
+        db.session.add(entry)
+        db.session.flush()
+
+Jobs em background usam a fila de escritor único (get_write_queue).
+Em Postgres, ou com SQLITE_WRITE_SERIALIZATION=0, vira um commit comum.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from queue import Queue
+from threading import Lock, Thread
+
+from flask import current_app
+
+from models.extensions import db
+
+logger = logging.getLogger(__name__)
+
+LOCK_ERROR_MARKERS = ("database is locked", "database table is locked", "database is busy")
+
+
+class DatabaseBusyError(Exception):
+    """Lock de escrita não obtido após todas as tentativas."""
+
+    retry_after = 1
+
+
+def is_lock_error(exc: BaseException) -> bool:
+    """True para erros de lock do SQLite (sqlite3 ou embrulhados pelo SQLAlchemy)."""
+    orig = getattr(exc, "orig", None) or exc
+    message = str(orig).lower()
+    return any(marker in message for marker in LOCK_ERROR_MARKERS)
+
+
+class _WriteStats:
+    """Contadores por processo e amostras recentes de espera pelo lock."""
+
+    def __init__(self, max_samples: int = 4096):
+        self._lock = Lock()
+        self._waits_ms: deque[float] = deque(maxlen=max_samples)
+        self._counters = {"transactions": 0, "retries": 0, "busy_failures": 0}
+
+    def record(self, wait_ms: float, retries: int) -> None:
+        with self._lock:
+            self._counters["transactions"] += 1
+            self._counters["retries"] += retries
+            self._waits_ms.append(wait_ms)
+
+    def record_failure(self, retries: int) -> None:
+        with self._lock:
+            self._counters["busy_failures"] += 1
+            self._counters["retries"] += retries
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits_ms)
+            data = dict(self._counters)
+        data["samples"] = len(waits)
+        for pct in (50, 95, 99):
+            if waits:
+                idx = min(len(waits) - 1, int(round(pct / 100 * (len(waits) - 1))))
+                data[f"lock_wait_p{pct}_ms"] = round(waits[idx], 2)
+            else:
+                data[f"lock_wait_p{pct}_ms"] = 0.0
+        data["lock_wait_max_ms"] = round(waits[-1], 2) if waits else 0.0
+        return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self._waits_ms.clear()
+            for key in self._counters:
+                self._counters[key] = 0
+
+
+_stats = _WriteStats()
+
+
+def write_stats() -> dict:
+    return _stats.snapshot()
+
+
+def reset_write_stats() -> None:
+    _stats.reset()
+
+
+def _serialization_enabled(session) -> bool:
+    if not current_app.config.get("SQLITE_WRITE_SERIALIZATION", True):
+        return False
+    return session.get_bind().dialect.name == "sqlite"
+
+
+def _backoff_seconds(attempt: int, base_ms: int, cap_ms: int) -> float:
+    # "full jitter": espera aleatória em [0, min(cap, base * 2^n)]
+    ceiling = min(cap_ms, base_ms * (2 ** attempt))
+    return random.uniform(0, ceiling) / 1000
+
+
+def _set_busy_timeout(dbapi_connection, timeout_ms: int) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout={int(timeout_ms)}")
+    finally:
+        cursor.close()
+
+
+def begin_write(session=None) -> float:
+    """Garante o lock de escrita (BEGIN IMMEDIATE) antes de qualquer flush.
+
+    Retorna a espera em ms. Levanta DatabaseBusyError se esgotar os retries.
+    Não faz nada fora do SQLite ou se a conexão já estiver em transação.
+    """
+    session = session or db.session
+    if not _serialization_enabled(session):
+        return 0.0
+
+    dbapi_connection = session.connection().connection.dbapi_connection
+    if dbapi_connection.in_transaction:
+        return 0.0
+
+    config = current_app.config
+    max_retries = max(0, int(config.get("SQLITE_WRITE_RETRIES", 5)))
+    lock_timeout_ms = int(config.get("SQLITE_WRITE_LOCK_TIMEOUT_MS", 1000))
+    base_ms = int(config.get("SQLITE_WRITE_BACKOFF_MS", 25))
+    cap_ms = int(config.get("SQLITE_WRITE_BACKOFF_MAX_MS", 500))
+    default_timeout_ms = int(config.get("SQLITE_BUSY_TIMEOUT_MS", 30000))
+
+    started = time.perf_counter()
+    attempt = 0
+    _set_busy_timeout(dbapi_connection, lock_timeout_ms)
+    try:
+        while True:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                break
+            except Exception as exc:
+                if not is_lock_error(exc):
+                    raise
+                if attempt >= max_retries:
+                    _stats.record_failure(attempt)
+                    logger.warning("Lock de escrita não obtido após %s tentativas", attempt + 1)
+                    raise DatabaseBusyError("database_busy") from exc
+                attempt += 1
+                time.sleep(_backoff_seconds(attempt, base_ms, cap_ms))
+            finally:
+                cursor.close()
+    finally:
+        _set_busy_timeout(dbapi_connection, default_timeout_ms)
+
+    wait_ms = (time.perf_counter() - started) * 1000
+    _stats.record(wait_ms, attempt)
+    return wait_ms
+
+
+@contextmanager
+def write_transaction(session=None):
+    """Transação de escrita curta: BEGIN IMMEDIATE, commit na saída, rollback em erro."""
+    session = session or db.session
+    begin_write(session)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+
+def commit_write(session=None) -> None:
+    """Commit de mudanças ainda não enviadas ao banco (pega o lock antes do flush)."""
+    session = session or db.session
+    try:
+        begin_write(session)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+
+class WriteQueue:
+    """Fila com uma única thread escritora por processo, para jobs em background.
+
+    Cada job roda inteiro dentro de write_transaction: faça as leituras pesadas
+    antes e envie só a parte que escreve. submit() devolve um Future.
+    """
+
+    def __init__(self, app, maxsize: int = 1000):
+        self.app = app
+        self._queue: Queue = Queue(maxsize=maxsize)
+        self._thread: Thread | None = None
+        self._start_lock = Lock()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            fn, args, kwargs, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self.app.app_context():
+                try:
+                    with write_transaction():
+                        result = fn(*args, **kwargs)
+                except BaseException as exc:
+                    logger.exception("Falha em job de escrita em background")
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+                finally:
+                    db.session.remove()
+
+
+def get_write_queue(app=None) -> WriteQueue:
+    """Fila do app (criada sob demanda; a thread só sobe no primeiro submit,
+    então um master do gunicorn com preload não herda thread para os workers)."""
+    app = app or current_app._get_current_object()
+    queue = app.extensions.get("sqlite_write_queue")
+    if queue is None:
+        queue = WriteQueue(app)
+        app.extensions["sqlite_write_queue"] = queue
+    return queue
+
@@ -5,6 +5,7 @@ import io
 import json
 import os
 import unicodedata
+import time
 from datetime import date, datetime, timedelta
 
 from sqlalchemy import func
@@ -16,11 +17,16 @@ from models.extensions import db
 from models.entrada_model import Entrada
 from models.projection_scenario_model import ProjectionScenario
 from models.recurrence_model import Recurrence, RecurrenceExecution
-from services.projection_engine import compute_projection
+from services.compact_payload import compact_chart_line, compact_projection, wants_compact
+from services.projection_engine import compare_scenarios, compute_projection, get_projection_baseline
+from services.projection_optimizer import optimize_baseline
+from services.projection_simulation import run_simulation
 from services.plans import PLANS, is_valid_plan
 from services.feature_gate import require_feature
 from services.permissions import require_api_access, json_error, require_verified_email
-from services.security import safe_redirect_path
+from services.metrics import EXPORT_DURATION
+from services.report_renderers import get_renderer
+from services.security import safe_redirect_path, sanitize_export_row
 from services.checkout_store import (
     create_order,
     set_order_billing_id,
@@ -32,7 +38,6 @@ from services.checkout_store import (
 from services.abacatepay import create_plan_billing, get_billing_status, AbacatePayError, payment_warning_message
 from services.date_utils import last_day_of_month
 from services.subscription import apply_paid_order
-from services.reports_pdf import render_reports_pdf
 from services.document_validation import (
     normalize_cpf,
     normalize_phone,
@@ -1003,49 +1008,56 @@ def charts_data():
         },
     )
 
-    return jsonify(
-        {
-            "period": {
-                "type": period_meta["type"],
-                "year": period_meta["year"],
-                "month": period_meta["month"],
-                "quarter": period_meta["quarter"],
-                "start": start.isoformat(),
-                "end": end.isoformat(),
-                "label": period_meta["label"],
-            },
-            "summary": summary,
-            "comparison": comparison,
-            "line": {
-                "labels": [bucket["label"] for bucket in buckets],
-                "buckets": [
-                    {
-                        "label": bucket["label"],
-                        "start": bucket["start"].isoformat(),
-                        "end": bucket["end"].isoformat(),
-                    }
-                    for bucket in buckets
-                ],
-                "granularity": granularity,
-                "receitas": [round(v, 2) for v in bucket_receitas],
-                "despesas": [round(v, 2) for v in bucket_despesas],
-                "saldo": saldo_series,
-                "saldo_acumulado": saldo_acumulado,
-            },
-            "categories": {
-                "expense": expense_categories,
-                "income": income_categories,
-            },
-            "statuses": {
-                "pago": round(status_totais["pago"], 2),
-                "em_andamento": round(status_totais["em_andamento"], 2),
-                "nao_pago": round(status_totais["nao_pago"], 2),
-            },
-            "highlights": highlights,
-            "insights": insights,
-            "updated_at": date.today().isoformat(),
-        }
-    )
+    line = {
+        "labels": [bucket["label"] for bucket in buckets],
+        "granularity": granularity,
+        "receitas": [round(v, 2) for v in bucket_receitas],
+        "despesas": [round(v, 2) for v in bucket_despesas],
+        "saldo": saldo_series,
+        "saldo_acumulado": saldo_acumulado,
+    }
+    compact = wants_compact(request.args)
+    if compact:
+        line = compact_chart_line(line, start=start, end=end)
+    else:
+        line["buckets"] = [
+            {
+                "label": bucket["label"],
+                "start": bucket["start"].isoformat(),
+                "end": bucket["end"].isoformat(),
+            }
+            for bucket in buckets
+        ]
+
+    data_out = {
+        "period": {
+            "type": period_meta["type"],
+            "year": period_meta["year"],
+            "month": period_meta["month"],
+            "quarter": period_meta["quarter"],
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "label": period_meta["label"],
+        },
+        "summary": summary,
+        "comparison": comparison,
+        "line": line,
+        "categories": {
+            "expense": expense_categories,
+            "income": income_categories,
+        },
+        "statuses": {
+            "pago": round(status_totais["pago"], 2),
+            "em_andamento": round(status_totais["em_andamento"], 2),
+            "nao_pago": round(status_totais["nao_pago"], 2),
+        },
+        "highlights": highlights,
+        "insights": insights,
+        "updated_at": date.today().isoformat(),
+    }
+    if compact:
+        data_out["format"] = "compact"
+    return jsonify(data_out)
 
 
 @analytics_bp.get("/app/charts/drilldown")
@@ -1185,13 +1197,10 @@ def projection_page():
 
 
 
-@analytics_bp.route("/app/projection/data", methods=["GET", "POST"])
-@require_api_access(feature="projection")
-def projection_data():
-    payload = request.get_json(silent=True) if request.method == "POST" else request.args
+def _projection_params(payload) -> tuple[date, date, bool, float]:
+    """Período, include_recurring e reserva mínima comuns aos endpoints de projeção."""
     start_str = (payload.get("start") if payload else None) or None
     end_str = (payload.get("end") if payload else None) or None
-    mode = (payload.get("mode") if payload else None) or "cash"
 
     include_recurring = True
     if payload and payload.get("include_recurring") is not None:
@@ -1204,6 +1213,24 @@ def projection_data():
         except (TypeError, ValueError):
             reserve_min = 0.0
 
+    # datas
+    try:
+        start_dt = date.fromisoformat(start_str) if start_str else date.today()
+    except Exception:
+        start_dt = date.today()
+    try:
+        end_dt = date.fromisoformat(end_str) if end_str else (start_dt + timedelta(days=60))
+    except Exception:
+        end_dt = start_dt + timedelta(days=60)
+
+    # segurança: não permite período invertido
+    if end_dt < start_dt:
+        start_dt, end_dt = end_dt, start_dt
+    return start_dt, end_dt, include_recurring, reserve_min
+
+
+def _projection_overrides(payload):
+    """Overrides do payload (overrides/scenario_overrides) ou do cenário salvo (scenario_id)."""
     scenario_id = None
     if payload and payload.get("scenario_id"):
         try:
@@ -1227,20 +1254,17 @@ def projection_data():
                 overrides = json.loads(sc.data_json or "{}")
             except Exception:
                 overrides = {}
+    return overrides
 
-    # datas
-    try:
-        start_dt = date.fromisoformat(start_str) if start_str else date.today()
-    except Exception:
-        start_dt = date.today()
-    try:
-        end_dt = date.fromisoformat(end_str) if end_str else (start_dt + timedelta(days=60))
-    except Exception:
-        end_dt = start_dt + timedelta(days=60)
 
-    # segurança: não permite período invertido
-    if end_dt < start_dt:
-        start_dt, end_dt = end_dt, start_dt
+@analytics_bp.route("/app/projection/data", methods=["GET", "POST"])
+@require_api_access(feature="projection")
+def projection_data():
+    payload = request.get_json(silent=True) if request.method == "POST" else request.args
+    mode = (payload.get("mode") if payload else None) or "cash"
+    start_dt, end_dt, include_recurring, reserve_min = _projection_params(payload)
+
+    overrides = _projection_overrides(payload)
 
     data_out = compute_projection(
         user_id=current_user.id,
@@ -1254,6 +1278,181 @@ def projection_data():
 
     # devolve também o cenário ativo (para o front persistir)
     data_out["active_overrides"] = overrides if isinstance(overrides, dict) else {}
+    if wants_compact(payload):
+        data_out = compact_projection(data_out)
+    return jsonify(data_out)
+
+
+@analytics_bp.post("/app/projection/compare")
+@require_api_access(feature="projection")
+def projection_compare():
+    """Compara cenários salvos e/ou overrides avulsos nos modos pedidos.
+
+    Payload: start, end, include_recurring, reserve_min, modes (["cash",
+    "accrual"]), include_base (true), scenario_ids [..] e/ou variants
+    [{"label", "overrides"} | {"scenario_id"}]. Resposta só com os resumos
+    (saldo final, mínimo, quebra, cobertura) de cada variante x modo.
+    """
+    payload = request.get_json(silent=True) or {}
+    start_dt, end_dt, include_recurring, reserve_min = _projection_params(payload)
+
+    modes = payload.get("modes") or ["cash", "accrual"]
+    if not isinstance(modes, list):
+        modes = [modes]
+    modes = [str(m).strip().lower() for m in modes if str(m).strip().lower() in {"cash", "accrual"}]
+    if not modes:
+        return json_error("invalid_modes", 422)
+
+    raw_variants = payload.get("variants") or []
+    if not isinstance(raw_variants, list):
+        return json_error("invalid_variants", 422)
+    scenario_ids = payload.get("scenario_ids") or []
+    if not isinstance(scenario_ids, list):
+        return json_error("invalid_variants", 422)
+    raw_variants = [{"scenario_id": sid} for sid in scenario_ids] + raw_variants
+
+    # Cenários salvos: uma query só
+    wanted_ids = set()
+    for raw in raw_variants:
+        if isinstance(raw, dict) and raw.get("scenario_id") is not None and raw.get("overrides") is None:
+            try:
+                wanted_ids.add(int(raw.get("scenario_id")))
+            except (TypeError, ValueError):
+                continue
+    saved = {}
+    if wanted_ids:
+        rows = (
+            db.session.query(ProjectionScenario)
+            .filter(ProjectionScenario.user_id == current_user.id, ProjectionScenario.id.in_(wanted_ids))
+            .all()
+        )
+        saved = {r.id: r for r in rows}
+
+    variants = []
+    if str(payload.get("include_base", True)).lower() not in {"0", "false", "no", "off"}:
+        variants.append({"key": "base", "label": "Atual", "overrides": {}})
+
+    missing = []
+    custom_count = 0
+    for raw in raw_variants:
+        if not isinstance(raw, dict):
+            continue
+        overrides = raw.get("overrides")
+        if overrides is None and raw.get("scenario_id") is not None:
+            try:
+                sc = saved.get(int(raw.get("scenario_id")))
+            except (TypeError, ValueError):
+                sc = None
+            if not sc:
+                missing.append(raw.get("scenario_id"))
+                continue
+            try:
+                overrides = json.loads(sc.data_json or "{}")
+            except Exception:
+                overrides = {}
+            variants.append({"key": f"scenario-{sc.id}", "label": sc.name, "scenario_id": sc.id, "overrides": overrides})
+            continue
+        custom_count += 1
+        label = str(raw.get("label") or f"Variante {custom_count}")[:80]
+        variants.append({"key": f"custom-{custom_count}", "label": label, "overrides": overrides if isinstance(overrides, dict) else {}})
+
+    max_variants = int(current_app.config.get("PROJECTION_COMPARE_MAX_VARIANTS", 12))
+    if not variants:
+        return json_error("no_variants", 422)
+    if len(variants) > max_variants:
+        return json_error("too_many_variants", 422)
+
+    results = compare_scenarios(
+        user_id=current_user.id,
+        start=start_dt,
+        end=end_dt,
+        variants=variants,
+        modes=tuple(modes),
+        include_recurring=include_recurring,
+        reserve_min=reserve_min,
+    )
+    return jsonify(
+        {
+            "range": {"start": start_dt.isoformat(), "end": end_dt.isoformat()},
+            "modes": list(dict.fromkeys(modes)),
+            "include_recurring": bool(include_recurring),
+            "variants": results,
+            "missing_scenarios": missing,
+        }
+    )
+
+
+@analytics_bp.post("/app/projection/simulate")
+@require_api_access(feature="projection")
+def projection_simulate():
+    """Projeção estocástica: faixas P10/P50/P90, chance de saldo negativo por dia
+    e reserva para 95% de confiança. Aceita os mesmos campos de /data, mais
+    paths e seed (mesma seed = mesmo resultado)."""
+    payload = request.get_json(silent=True) or {}
+    mode = payload.get("mode") or "cash"
+    start_dt, end_dt, include_recurring, reserve_min = _projection_params(payload)
+    overrides = _projection_overrides(payload)
+
+    try:
+        paths = int(payload["paths"]) if payload.get("paths") is not None else None
+        seed = int(payload.get("seed") or 0)
+    except (TypeError, ValueError):
+        return json_error("invalid_simulation_params", 422)
+    if paths is not None and not 1 <= paths <= 20000:
+        return json_error("invalid_simulation_params", 422)
+
+    data_out = run_simulation(
+        user_id=current_user.id,
+        start=start_dt,
+        end=end_dt,
+        mode=mode,
+        include_recurring=include_recurring,
+        reserve_min=reserve_min,
+        overrides=overrides if isinstance(overrides, dict) else {},
+        paths=paths,
+        seed=seed,
+    )
+    return jsonify(data_out)
+
+
+@analytics_bp.post("/app/projection/optimize")
+@require_api_access(feature="projection")
+def projection_optimize():
+    """Sugere adiamentos/parcelamentos que mantêm o saldo acima da reserva.
+
+    Parte do cenário atual (overrides/scenario_id) e devolve `suggested` e
+    `overrides` (cenário atual + sugestões) no formato de /data.
+    """
+    payload = request.get_json(silent=True) or {}
+    mode = payload.get("mode") or "cash"
+    start_dt, end_dt, include_recurring, reserve_min = _projection_params(payload)
+    overrides = _projection_overrides(payload)
+
+    cfg = current_app.config
+    try:
+        max_shift_days = int(payload.get("max_shift_days", cfg.get("PROJECTION_OPTIMIZER_MAX_SHIFT_DAYS", 30)))
+        max_parts = int(payload.get("max_parts", cfg.get("PROJECTION_OPTIMIZER_MAX_PARTS", 6)))
+    except (TypeError, ValueError):
+        return json_error("invalid_optimizer_params", 422)
+    if not 0 <= max_shift_days <= 365 or not 2 <= max_parts <= 24:
+        return json_error("invalid_optimizer_params", 422)
+    allow_splits = str(payload.get("allow_splits", True)).lower() not in {"0", "false", "no", "off"}
+
+    baseline = get_projection_baseline(
+        user_id=current_user.id,
+        start=start_dt,
+        end=end_dt,
+        mode=mode,
+        include_recurring=include_recurring,
+    )
+    data_out = optimize_baseline(
+        baseline,
+        reserve_min=reserve_min,
+        overrides=overrides if isinstance(overrides, dict) else {},
+        max_shift_days=max_shift_days,
+        max_parts=max_parts,
+        allow_splits=allow_splits,
+    )
     return jsonify(data_out)
 
 
@@ -1692,14 +1891,22 @@ def _build_reports_payload(
         .filter(Recurrence.user_id == current_user.id, Recurrence.tipo == "receita")
         .all()
     )
+    # Execuções de todas as recorrências numa query só (antes: um COUNT por recorrência)
+    exec_counts = {}
+    if recurrences:
+        exec_counts = dict(
+            db.session.query(RecurrenceExecution.recurrence_id, func.count(RecurrenceExecution.id))
+            .filter(
+                RecurrenceExecution.user_id == current_user.id,
+                RecurrenceExecution.recurrence_id.in_([rec.id for rec in recurrences]),
+            )
+            .group_by(RecurrenceExecution.recurrence_id)
+            .all()
+        )
     recurring_items = []
     monthly_estimate = 0.0
     for rec in recurrences:
-        exec_count = (
-            RecurrenceExecution.query
-            .filter(RecurrenceExecution.user_id == current_user.id, RecurrenceExecution.recurrence_id == rec.id)
-            .count()
-        )
+        exec_count = exec_counts.get(rec.id, 0)
         reliability = min(95, 50 + (exec_count * 5)) if rec.is_enabled else 50
         frequency = rec.frequency or "mensal"
         if frequency == "monthly":
@@ -1914,7 +2121,10 @@ def reports_export_pdf():
     }
 
     try:
-        pdf_bytes = render_reports_pdf(payload, sections, detail, meta)
+        # reportlab só é carregado na primeira exportação de PDF.
+        render_reports_pdf = get_renderer("pdf")
+        with EXPORT_DURATION.time(format="pdf"):
+            pdf_bytes = render_reports_pdf(payload, sections, detail, meta)
     except Exception as e:
         current_app.logger.exception("Falha ao gerar PDF de relatorios")
         return jsonify({"error": str(e)}), 500
@@ -1930,11 +2140,6 @@ def reports_export_pdf():
     )
 
 
-EXCEL_DATE_FORMAT = "dd/mm/yyyy"
-EXCEL_CURRENCY_FORMAT = "R$ #,##0.00"
-EXCEL_PERCENT_FORMAT = "0.0%"
-
-
 def _reports_to_float(value, default=None):
     try:
         return float(value)
@@ -1956,35 +2161,6 @@ def _reports_fmt_date(value: str | None) -> str:
         return str(value)
 
 
-def _reports_excel_date(value) -> date | datetime | None:
-    if isinstance(value, (date, datetime)):
-        return value
-    if not value:
-        return None
-    try:
-        raw = str(value)
-        if "T" in raw:
-            return datetime.fromisoformat(raw)
-        return date.fromisoformat(raw)
-    except Exception:
-        return None
-
-
-def _sanitize_export_cell(value):
-    if value is None:
-        return ""
-    if isinstance(value, (int, float, date, datetime)):
-        return value
-    text = str(value)
-    if text and text[0] in {"=", "+", "-", "@"}:
-        return "'" + text
-    return text
-
-
-def _sanitize_export_row(values):
-    return [_sanitize_export_cell(v) for v in values]
-
-
 def _build_reports_excel_workbook(
     payload: dict,
     sections: set[str],
@@ -1992,168 +2168,15 @@ def _build_reports_excel_workbook(
     user_label: str,
     period_label: str,
 ):
-    from openpyxl import Workbook
-    from openpyxl.styles import Alignment, Font, PatternFill
-    from openpyxl.utils import get_column_letter
-
-    def pct_value(value):
-        num = _reports_to_float(value)
-        if num is None:
-            return None
-        return num / 100
-
-    wb = Workbook()
-    wb.remove(wb.active)
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="1B7F4A")
-    title_font = Font(bold=True, size=13)
-
-    def add_sheet(title: str):
-        ws = wb.create_sheet(title)
-        ws.page_setup.fitToWidth = 1
-        return ws
-
-    def style_header(ws, headers: list[str]):
-        for col_idx, label in enumerate(headers, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=label)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal="left")
-        ws.freeze_panes = "A2"
-        ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}1"
-
-    def write_row(ws, row_idx: int, values, formats=None, bold=False):
-        for col_idx, value in enumerate(values, start=1):
-            cell_value = _sanitize_export_cell(value)
-            cell = ws.cell(row=row_idx, column=col_idx, value=cell_value)
-            if formats and col_idx - 1 < len(formats) and formats[col_idx - 1]:
-                cell.number_format = formats[col_idx - 1]
-            if bold:
-                cell.font = Font(bold=True)
-
-    def set_col_widths(ws, widths: dict[str, float]):
-        for col, width in widths.items():
-            ws.column_dimensions[col].width = width
-
-    summary_pct = pct_value(payload.get("summary", {}).get("economy_pct"))
-
-    if "summary" in sections:
-        ws = add_sheet("Resumo")
-        ws["A1"] = "Relatorio financeiro"
-        ws["A1"].font = title_font
-        ws.append(_sanitize_export_row(["Usuario", user_label]))
-        ws.append(_sanitize_export_row(["Periodo", period_label]))
-        ws.append(_sanitize_export_row(["Regime", MODE_LABELS.get(mode, mode.title())]))
-        ws.append([])
-        write_row(ws, 6, ["Resumo executivo"], bold=True)
-        ws.append(_sanitize_export_row(["Total receitas", payload["summary"]["income"]]))
-        ws.append(_sanitize_export_row(["Total despesas", payload["summary"]["expense"]]))
-        ws.append(_sanitize_export_row(["Resultado liquido", payload["summary"]["net"]]))
-        ws.append(_sanitize_export_row(["% economia", summary_pct]))
-        ws["B7"].number_format = EXCEL_CURRENCY_FORMAT
-        ws["B8"].number_format = EXCEL_CURRENCY_FORMAT
-        ws["B9"].number_format = EXCEL_CURRENCY_FORMAT
-        ws["B10"].number_format = EXCEL_PERCENT_FORMAT
-        set_col_widths(ws, {"A": 22, "B": 26})
-
-    if "dre" in sections:
-        ws = add_sheet("DRE")
-        headers = ["Categoria", "Receitas", "Despesas", "Resultado"]
-        style_header(ws, headers)
-        row_idx = 2
-        for row in payload["dre"]["rows"]:
-            write_row(ws, row_idx, [row["label"], row["income"], row["expense"], row["net"]])
-            for col in (2, 3, 4):
-                ws.cell(row=row_idx, column=col).number_format = EXCEL_CURRENCY_FORMAT
-            row_idx += 1
-        write_row(
-            ws,
-            row_idx,
-            ["Resultado total", payload["dre"]["total"]["income"], payload["dre"]["total"]["expense"], payload["dre"]["total"]["net"]],
-            bold=True,
-        )
-        for col in (2, 3, 4):
-            ws.cell(row=row_idx, column=col).number_format = EXCEL_CURRENCY_FORMAT
-        set_col_widths(ws, {"A": 32, "B": 16, "C": 16, "D": 16})
-
-    if "flow" in sections:
-        ws = add_sheet("Fluxo")
-        headers = ["Data", "Descricao", "Categoria", "Metodo", "Entrada", "Saida", "Saldo"]
-        style_header(ws, headers)
-        row_idx = 2
-        for row in payload["flow"]["rows"]:
-            write_row(
-                ws,
-                row_idx,
-                [
-                    _reports_excel_date(row.get("date")),
-                    row.get("description", ""),
-                    row.get("category", ""),
-                    row.get("method", ""),
-                    row.get("income") or None,
-                    row.get("expense") or None,
-                    row.get("balance"),
-                ],
-            )
-            ws.cell(row=row_idx, column=1).number_format = EXCEL_DATE_FORMAT
-            for col in (5, 6, 7):
-                ws.cell(row=row_idx, column=col).number_format = EXCEL_CURRENCY_FORMAT
-            row_idx += 1
-        write_row(ws, row_idx, ["Saldo final", "", "", "", "", "", payload["flow"]["final_balance"]], bold=True)
-        ws.cell(row=row_idx, column=7).number_format = EXCEL_CURRENCY_FORMAT
-        set_col_widths(ws, {"A": 12, "B": 40, "C": 20, "D": 16, "E": 14, "F": 14, "G": 14})
-
-    if "categories" in sections:
-        ws = add_sheet("Categorias")
-        headers = ["Categoria", "Total", "%", "Variacao"]
-        style_header(ws, headers)
-        row_idx = 2
-        for row in payload["categories"]["rows"]:
-            percent_value = pct_value(row.get("percent"))
-            delta_value = pct_value(row.get("delta"))
-            write_row(ws, row_idx, [row["label"], row["total"], percent_value, delta_value])
-            ws.cell(row=row_idx, column=2).number_format = EXCEL_CURRENCY_FORMAT
-            ws.cell(row=row_idx, column=3).number_format = EXCEL_PERCENT_FORMAT
-            ws.cell(row=row_idx, column=4).number_format = EXCEL_PERCENT_FORMAT
-            row_idx += 1
-        set_col_widths(ws, {"A": 32, "B": 16, "C": 10, "D": 12})
-
-    if "recurring" in sections:
-        ws = add_sheet("Recorrencias")
-        headers = ["Nome", "Frequencia", "Valor medio", "Confiabilidade"]
-        style_header(ws, headers)
-        row_idx = 2
-        for item in payload["recurring"]["items"]:
-            reliability_value = pct_value(item.get("reliability"))
-            write_row(ws, row_idx, [item["name"], item["frequency"], item["value"], reliability_value])
-            ws.cell(row=row_idx, column=3).number_format = EXCEL_CURRENCY_FORMAT
-            ws.cell(row=row_idx, column=4).number_format = EXCEL_PERCENT_FORMAT
-            row_idx += 1
-        set_col_widths(ws, {"A": 28, "B": 16, "C": 16, "D": 16})
-
-    if "pending" in sections:
-        ws = add_sheet("Pendencias")
-        headers = ["Vencimento", "Descricao", "Categoria", "Valor", "Dias atraso"]
-        style_header(ws, headers)
-        row_idx = 2
-        for item in payload["pending"]["items"]:
-            write_row(
-                ws,
-                row_idx,
-                [
-                    _reports_excel_date(item.get("date")),
-                    item.get("description", ""),
-                    item.get("category", ""),
-                    item.get("value"),
-                    item.get("days_overdue"),
-                ],
-            )
-            ws.cell(row=row_idx, column=1).number_format = EXCEL_DATE_FORMAT
-            ws.cell(row=row_idx, column=4).number_format = EXCEL_CURRENCY_FORMAT
-            row_idx += 1
-        set_col_widths(ws, {"A": 12, "B": 40, "C": 20, "D": 14, "E": 12})
-
-    return wb
+    # openpyxl só é carregado na primeira exportação (ImportError cai no CSV).
+    build_workbook = get_renderer("xlsx")
+    return build_workbook(
+        payload=payload,
+        sections=sections,
+        mode_label=MODE_LABELS.get(mode, mode.title()),
+        user_label=user_label,
+        period_label=period_label,
+    )
 
 
 @analytics_bp.get("/app/reports/export/excel")
@@ -2192,6 +2215,7 @@ def reports_export_excel():
     )
     user_label = getattr(current_user, "full_name", None) or current_user.email
 
+    export_started = time.perf_counter()
     try:
         wb = _build_reports_excel_workbook(
             payload=payload,
@@ -2205,31 +2229,31 @@ def reports_export_excel():
         writer = csv.writer(output, delimiter=";")
 
         economy_pct = _reports_to_float(payload.get("summary", {}).get("economy_pct"), 0.0)
-        writer.writerow(_sanitize_export_row(["Relatorio financeiro"]))
-        writer.writerow(_sanitize_export_row(["Usuario", user_label]))
-        writer.writerow(_sanitize_export_row(["Periodo", period_label]))
-        writer.writerow(_sanitize_export_row(["Regime", MODE_LABELS.get(mode, mode.title())]))
+        writer.writerow(sanitize_export_row(["Relatorio financeiro"]))
+        writer.writerow(sanitize_export_row(["Usuario", user_label]))
+        writer.writerow(sanitize_export_row(["Periodo", period_label]))
+        writer.writerow(sanitize_export_row(["Regime", MODE_LABELS.get(mode, mode.title())]))
         writer.writerow([])
 
         if "summary" in sections:
-            writer.writerow(_sanitize_export_row(["Resumo executivo"]))
-            writer.writerow(_sanitize_export_row(["Total receitas", _reports_fmt_brl(payload["summary"]["income"])]))
-            writer.writerow(_sanitize_export_row(["Total despesas", _reports_fmt_brl(payload["summary"]["expense"])]))
-            writer.writerow(_sanitize_export_row(["Resultado liquido", _reports_fmt_brl(payload["summary"]["net"])]))
-            writer.writerow(_sanitize_export_row(["% economia", f"{economy_pct}%"]))
+            writer.writerow(sanitize_export_row(["Resumo executivo"]))
+            writer.writerow(sanitize_export_row(["Total receitas", _reports_fmt_brl(payload["summary"]["income"])]))
+            writer.writerow(sanitize_export_row(["Total despesas", _reports_fmt_brl(payload["summary"]["expense"])]))
+            writer.writerow(sanitize_export_row(["Resultado liquido", _reports_fmt_brl(payload["summary"]["net"])]))
+            writer.writerow(sanitize_export_row(["% economia", f"{economy_pct}%"]))
             writer.writerow([])
 
         if "dre" in sections:
-            writer.writerow(_sanitize_export_row(["DRE"]))
-            writer.writerow(_sanitize_export_row(["Categoria", "Receitas", "Despesas", "Resultado"]))
+            writer.writerow(sanitize_export_row(["DRE"]))
+            writer.writerow(sanitize_export_row(["Categoria", "Receitas", "Despesas", "Resultado"]))
             for row in payload["dre"]["rows"]:
-                writer.writerow(_sanitize_export_row([
+                writer.writerow(sanitize_export_row([
                     row["label"],
                     _reports_fmt_brl(row["income"]),
                     _reports_fmt_brl(row["expense"]),
                     _reports_fmt_brl(row["net"]),
                 ]))
-            writer.writerow(_sanitize_export_row([
+            writer.writerow(sanitize_export_row([
                 "Resultado total",
                 _reports_fmt_brl(payload["dre"]["total"]["income"]),
                 _reports_fmt_brl(payload["dre"]["total"]["expense"]),
@@ -2238,10 +2262,10 @@ def reports_export_excel():
             writer.writerow([])
 
         if "flow" in sections:
-            writer.writerow(_sanitize_export_row(["Fluxo de caixa"]))
-            writer.writerow(_sanitize_export_row(["Data", "Descricao", "Categoria", "Metodo", "Entrada", "Saida", "Saldo"]))
+            writer.writerow(sanitize_export_row(["Fluxo de caixa"]))
+            writer.writerow(sanitize_export_row(["Data", "Descricao", "Categoria", "Metodo", "Entrada", "Saida", "Saldo"]))
             for row in payload["flow"]["rows"]:
-                writer.writerow(_sanitize_export_row([
+                writer.writerow(sanitize_export_row([
                     _reports_fmt_date(row.get("date")),
                     row.get("description", ""),
                     row.get("category", ""),
@@ -2250,7 +2274,7 @@ def reports_export_excel():
                     _reports_fmt_brl(row["expense"]) if row.get("expense") else "",
                     _reports_fmt_brl(row.get("balance")),
                 ]))
-            writer.writerow(_sanitize_export_row([
+            writer.writerow(sanitize_export_row([
                 "Saldo final",
                 "",
                 "",
@@ -2262,12 +2286,12 @@ def reports_export_excel():
             writer.writerow([])
 
         if "categories" in sections:
-            writer.writerow(_sanitize_export_row(["Categorias"]))
-            writer.writerow(_sanitize_export_row(["Categoria", "Total", "%", "Variacao"]))
+            writer.writerow(sanitize_export_row(["Categorias"]))
+            writer.writerow(sanitize_export_row(["Categoria", "Total", "%", "Variacao"]))
             for row in payload["categories"]["rows"]:
                 percent_val = _reports_to_float(row.get("percent"), 0.0)
                 delta_val = _reports_to_float(row.get("delta"))
-                writer.writerow(_sanitize_export_row([
+                writer.writerow(sanitize_export_row([
                     row["label"],
                     _reports_fmt_brl(row["total"]),
                     f"{percent_val}%",
@@ -2276,11 +2300,11 @@ def reports_export_excel():
             writer.writerow([])
 
         if "recurring" in sections:
-            writer.writerow(_sanitize_export_row(["Recorrencias (receitas)"]))
-            writer.writerow(_sanitize_export_row(["Nome", "Frequencia", "Valor medio", "Confiabilidade"]))
+            writer.writerow(sanitize_export_row(["Recorrencias (receitas)"]))
+            writer.writerow(sanitize_export_row(["Nome", "Frequencia", "Valor medio", "Confiabilidade"]))
             for item in payload["recurring"]["items"]:
                 reliability = _reports_to_float(item.get("reliability"), 0.0)
-                writer.writerow(_sanitize_export_row([
+                writer.writerow(sanitize_export_row([
                     item["name"],
                     item["frequency"],
                     _reports_fmt_brl(item["value"]),
@@ -2289,10 +2313,10 @@ def reports_export_excel():
             writer.writerow([])
 
         if "pending" in sections:
-            writer.writerow(_sanitize_export_row(["Pendencias"]))
-            writer.writerow(_sanitize_export_row(["Vencimento", "Descricao", "Categoria", "Valor", "Dias atraso"]))
+            writer.writerow(sanitize_export_row(["Pendencias"]))
+            writer.writerow(sanitize_export_row(["Vencimento", "Descricao", "Categoria", "Valor", "Dias atraso"]))
             for item in payload["pending"]["items"]:
-                writer.writerow(_sanitize_export_row([
+                writer.writerow(sanitize_export_row([
                     _reports_fmt_date(item.get("date")),
                     item.get("description", ""),
                     item.get("category", ""),
@@ -2300,6 +2324,7 @@ def reports_export_excel():
                     item.get("days_overdue"),
                 ]))
 
+        EXPORT_DURATION.observe(time.perf_counter() - export_started, format="csv")
         response = make_response(output.getvalue())
         response.headers["Content-Disposition"] = "attachment; filename=relatorio.csv"
         response.headers["Content-Type"] = "text/csv; charset=utf-8"
@@ -2311,6 +2336,7 @@ def reports_export_excel():
     output = io.BytesIO()
     wb.save(output)
     output.seek(0)
+    EXPORT_DURATION.observe(time.perf_counter() - export_started, format="xlsx")
     response = make_response(output.getvalue())
     response.headers["Content-Disposition"] = "attachment; filename=relatorio.xlsx"
     response.headers["Content-Type"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
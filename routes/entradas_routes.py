@@ -7,6 +7,7 @@ from flask_login import current_user
 
 from models.extensions import db
 from models.entrada_model import Entrada
+from models.sqlite_writes import write_transaction
 from services.date_utils import last_day_of_month
 from services.rules_engine import apply_rules_to_entry, normalize_tags
 from services.permissions import require_api_access, json_error
@@ -135,14 +136,15 @@ def dados():
         "entradas": [
             {
                 "id": e.id,
-                "data": e.data.isoformat(),
+                # datas vão direto: o provider JSON serializa em ISO 8601
+                "data": e.data,
                 "tipo": e.tipo,
                 "descricao": e.descricao,
                 "categoria": _normalize_categoria(e.tipo, e.categoria),
                 "valor": float(e.valor),
                 "status": e.status,
-                "paid_at": e.paid_at.isoformat() if e.paid_at else None,
-                "received_at": e.received_at.isoformat() if e.received_at else None,
+                "paid_at": e.paid_at,
+                "received_at": e.received_at,
                 "metodo": e.metodo,
                 "tags": e.tags,
             }
@@ -204,10 +206,10 @@ def add():
         priority=priority,
     )
 
-    db.session.add(e)
-    db.session.flush()
-    apply_rules_to_entry(e, current_user, trigger="create", dry_run=False)
-    db.session.commit()
+    with write_transaction():
+        db.session.add(e)
+        db.session.flush()
+        apply_rules_to_entry(e, current_user, trigger="create", dry_run=False)
 
     return jsonify({"ok": True})
 
@@ -6,18 +6,22 @@ from datetime import date, datetime
 
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required
+from sqlalchemy.exc import IntegrityError
 
 from models.extensions import db
 from models.notification_model import Notification
 from models.automation_rule_model import RuleExecution, AutomationRule
 from models.entrada_model import Entrada
 from models.reminder_model import Reminder
+from models.db_routing import use_primary
+from models.sqlite_writes import write_transaction
 from services.reminder_runner import fetch_reminder_entries
 from services.subscription import subscription_context
 from services.plans import PLANS
 from services.permissions import require_api_access, json_error
 from services.feature_gate import user_has_feature
 from services.date_utils import last_day_of_month
+from services.projection_alerts import ALERT_TYPE as PROJECTION_ALERT_TYPE
 from routes.analytics_routes import build_period_alerts
 
 
@@ -27,6 +31,7 @@ MAX_FEED_ITEMS = 40
 RULE_EXECUTION_LIMIT = 20
 REMINDER_LIMIT = 12
 INSIGHT_ALERT_LIMIT = 3
+PROJECTION_ALERT_LIMIT = 3
 
 
 def _now() -> datetime:
@@ -179,29 +184,20 @@ def _build_insight_events(user_id: int) -> list[dict]:
     return events
 
 
-def _sync_notifications(user_id: int, events: list[dict]) -> list[Notification]:
-    if not events:
-        return []
-
-    unique_events: list[dict] = []
-    seen_keys: set[str] = set()
-    for event in events:
-        source_key = event.get("source_key")
-        if not source_key or source_key in seen_keys:
-            continue
-        seen_keys.add(source_key)
-        unique_events.append(event)
-
-    source_keys = [event["source_key"] for event in unique_events]
-    existing = (
+def _existing_notifications(user_id: int, source_keys: list[str]) -> dict[str, Notification]:
+    rows = (
         Notification.query
         .filter(Notification.user_id == user_id, Notification.source_key.in_(source_keys))
+        .populate_existing()
         .all()
     )
-    existing_map = {item.source_key: item for item in existing}
+    return {item.source_key: item for item in rows}
+
 
+def _apply_events(user_id: int, events: list[dict], existing_map: dict[str, Notification]) -> bool:
+    """Cria/atualiza as notificações dos eventos na sessão. True se algo mudou."""
     changed = False
-    for event in unique_events:
+    for event in events:
         source_key = event["source_key"]
         item = existing_map.get(source_key)
         if not item:
@@ -217,26 +213,68 @@ def _sync_notifications(user_id: int, events: list[dict]) -> list[Notification]:
             db.session.add(item)
             existing_map[source_key] = item
             changed = True
-        else:
-            if item.type != event["type"]:
-                item.type = event["type"]
-                changed = True
-            if item.title != event["title"]:
-                item.title = event["title"]
-                changed = True
-            if item.message != event.get("message"):
-                item.message = event.get("message")
-                changed = True
-            if item.href != event.get("href"):
-                item.href = event.get("href")
+            continue
+        for field, value in (("type", event["type"]), ("title", event["title"]),
+                             ("message", event.get("message")), ("href", event.get("href"))):
+            if getattr(item, field) != value:
+                setattr(item, field, value)
                 changed = True
+    return changed
 
-    if changed:
-        db.session.commit()
+
+def _needs_write(events: list[dict], existing_map: dict[str, Notification]) -> bool:
+    for event in events:
+        item = existing_map.get(event["source_key"])
+        if item is None or (item.type, item.title, item.message, item.href) != (
+            event["type"], event["title"], event.get("message"), event.get("href")
+        ):
+            return True
+    return False
+
+
+def _sync_notifications(user_id: int, events: list[dict]) -> list[Notification]:
+    if not events:
+        return []
+
+    unique_events: list[dict] = []
+    seen_keys: set[str] = set()
+    for event in events:
+        source_key = event.get("source_key")
+        if not source_key or source_key in seen_keys:
+            continue
+        seen_keys.add(source_key)
+        unique_events.append(event)
+
+    source_keys = [event["source_key"] for event in unique_events]
+    # Lido do primário: decide o que inserir (réplica atrasada duplicaria).
+    with use_primary():
+        existing_map = _existing_notifications(user_id, source_keys)
+        if _needs_write(unique_events, existing_map):
+            # Polls simultâneos do mesmo usuário: a leitura acima pode estar
+            # velha. Relê sob o lock de escrita (BEGIN IMMEDIATE no SQLite) e,
+            # se outro request ainda assim inserir antes (Postgres), usa as
+            # linhas gravadas por ele.
+            try:
+                with write_transaction():
+                    existing_map = _existing_notifications(user_id, source_keys)
+                    _apply_events(user_id, unique_events, existing_map)
+            except IntegrityError:
+                existing_map = _existing_notifications(user_id, source_keys)
 
     return [existing_map[key] for key in source_keys if key in existing_map]
 
 
+def _stored_projection_records(user_id: int) -> list[Notification]:
+    # Gravados pelo lote de alertas (services/projection_alerts.py), não pelo feed.
+    return (
+        Notification.query
+        .filter(Notification.user_id == user_id, Notification.type == PROJECTION_ALERT_TYPE)
+        .order_by(Notification.created_at.desc(), Notification.id.desc())
+        .limit(PROJECTION_ALERT_LIMIT)
+        .all()
+    )
+
+
 @notifications_bp.get("/app/notifications/data")
 @require_api_access()
 @login_required
@@ -254,10 +292,13 @@ def notifications_data():
     if user_has_feature(current_user, "insights") or user_has_feature(current_user, "charts"):
         events.extend(_build_insight_events(current_user.id))
 
-    if not events:
+    records = _sync_notifications(current_user.id, events)
+    if user_has_feature(current_user, "projection"):
+        records.extend(_stored_projection_records(current_user.id))
+
+    if not records:
         return jsonify({"items": [], "unread_count": 0})
 
-    records = _sync_notifications(current_user.id, events)
     records_sorted = sorted(
         records,
         key=lambda item: item.created_at or datetime.min,
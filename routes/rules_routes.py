@@ -11,6 +11,7 @@ from models.entrada_model import Entrada
 from models.recurrence_model import Recurrence
 from models.reminder_model import Reminder
 from models.extensions import db
+from models.sqlite_writes import write_transaction
 from services.permissions import require_api_access, json_error
 from services.input_validation import (
     MAX_DESCRIPTION_LEN,
@@ -508,8 +509,8 @@ def run_recurrence(recurrence_id: int):
     if not rec.is_enabled:
         return json_error("disabled", 422)
 
-    created, entry = run_recurrence_once(rec, current_user)
-    db.session.commit()
+    with write_transaction():
+        created, entry = run_recurrence_once(rec, current_user)
     return jsonify({"ok": True, "created": created, "entry_id": entry.id})
 
 
@@ -0,0 +1,242 @@
+"""Apoio aos benchmarks HTTP: banco temporário, seed, gunicorn local e login.
+
+Usado por scripts/*_bench.py. Tudo roda em localhost, sem rede externa.
+
+Seed isolado (útil para depurar):
+    python scripts/bench_support.py seed --users 5 --entries 300
+"""
+
+import argparse
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_PASSWORD = "Bench123!@#"
+CSRF_META_RE = re.compile(r'<meta name="csrf-token" content="([^"]+)"')
+
+
+def bench_env(db_path: str | None = None, **overrides) -> dict:
+    """Env para app/gunicorn de benchmark (SQLite temporário, sem e-mail)."""
+    if not db_path:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db")
+    env = dict(os.environ)
+    env.update(
+        {
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            # development: cookies sem Secure (o cliente fala HTTP puro)
+            "APP_ENV": "development",
+            "FLASK_ENV": "development",
+            "DEBUG": "0",
+            "SECRET_KEY": "bench-secret-key-please-change-32chars+",
+            "APP_BASE_URL": "http://127.0.0.1",
+            "ABACATEPAY_WEBHOOK_SECRET": "benchsecret",
+            "EMAIL_SEND_ENABLED": "0",
+            "RATE_LIMIT_LOGIN": "100000",
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+    )
+    env.update({k: str(v) for k, v in overrides.items()})
+    return env
+
+
+def seed_database(env: dict, *, users: int, entries: int, years: int = 2) -> list[str]:
+    """Popula o banco de `env` em um processo separado. Retorna os usernames."""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            os.path.join(ROOT, "scripts", "bench_support.py"),
+            "seed",
+            "--users",
+            str(users),
+            "--entries",
+            str(entries),
+            "--years",
+            str(years),
+        ],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"seed falhou:\n{proc.stderr[-2000:]}")
+    return [f"bench{i}" for i in range(users)]
+
+
+def _seed_main(users: int, entries: int, years: int) -> None:
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    from app import app
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+
+    rng = random.Random(42)
+    today = date.today()
+    span_days = max(1, years * 365)
+    with app.app_context():
+        for i in range(users):
+            user = User(username=f"bench{i}", email=f"bench{i}@example.test")
+            user.set_password(BENCH_PASSWORD)
+            user.is_verified = True
+            user.plan = "pro"
+            user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+            db.session.add(user)
+            db.session.flush()
+
+            rows = []
+            for _ in range(entries):
+                tipo = "receita" if rng.random() < 0.3 else "despesa"
+                day = today - timedelta(days=rng.randint(-60, span_days))
+                status = None
+                paid_at = None
+                received_at = None
+                if tipo == "despesa":
+                    status = "pago" if day < today else "em_andamento"
+                    paid_at = day if status == "pago" else None
+                elif day < today:
+                    status = "recebido"
+                    received_at = day
+                rows.append(
+                    {
+                        "user_id": user.id,
+                        "data": day,
+                        "tipo": tipo,
+                        "descricao": f"Bench {tipo} {rng.randint(1, 999)}",
+                        "categoria": rng.choice(["moradia", "mercado", "transporte", "servicos", "outros"])
+                        if tipo == "despesa"
+                        else rng.choice(["salario", "extras"]),
+                        "valor": round(rng.uniform(10, 3000), 2),
+                        "status": status,
+                        "paid_at": paid_at,
+                        "received_at": received_at,
+                        "priority": "media",
+                    }
+                )
+            if rows:
+                db.session.execute(db.insert(Entrada), rows)
+        db.session.commit()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env: dict, *, workers: int = 2, threads: int = 4, port: int | None = None, timeout: float = 30.0):
+    """Sobe o gunicorn local e espera /healthz. Retorna (processo, base_url)."""
+    import requests
+
+    port = port or free_port()
+    cmd = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "app:app",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(workers),
+        "--threads",
+        str(threads),
+        "--worker-class",
+        "gthread" if threads > 1 else "sync",
+        "--log-level",
+        "warning",
+    ]
+    # O pool do banco é dimensionado pelas mesmas variáveis (config.py).
+    env = dict(env, GUNICORN_THREADS=str(threads), GUNICORN_WORKER_CLASS="gthread" if threads > 1 else "sync")
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn encerrou durante o boot")
+        try:
+            if requests.get(f"{base_url}/healthz", timeout=1).status_code == 200:
+                return proc, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    stop_server(proc)
+    raise RuntimeError("gunicorn não respondeu /healthz a tempo")
+
+
+def stop_server(proc) -> None:
+    if proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def login(base_url: str, username: str, password: str = BENCH_PASSWORD):
+    """Login com CSRF. Retorna (requests.Session, csrf_token)."""
+    import requests
+
+    session = requests.Session()
+    resp = session.get(f"{base_url}/login", timeout=10)
+    match = CSRF_META_RE.search(resp.text)
+    if not match:
+        raise RuntimeError("csrf-token não encontrado em /login")
+    csrf = match.group(1)
+    resp = session.post(
+        f"{base_url}/login",
+        data={"login_id": username, "password": password, "csrf_token": csrf},
+        allow_redirects=False,
+        timeout=10,
+    )
+    if resp.status_code not in {302, 303}:
+        raise RuntimeError(f"login falhou para {username}: {resp.status_code}")
+    session.headers["X-CSRF-Token"] = csrf
+    return session, csrf
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def summarize_latencies(latencies_ms: list[float], errors: int, elapsed_s: float) -> dict:
+    count = len(latencies_ms)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count * 100, 2) if count else 0.0,
+        "rps": round(count / elapsed_s, 1) if elapsed_s else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 1),
+        "p95_ms": round(percentile(latencies_ms, 95), 1),
+        "p99_ms": round(percentile(latencies_ms, 99), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    seed = sub.add_parser("seed")
+    seed.add_argument("--users", type=int, default=5)
+    seed.add_argument("--entries", type=int, default=300)
+    seed.add_argument("--years", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.cmd == "seed":
+        _seed_main(args.users, args.entries, args.years)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="compact_payload_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'compact.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+    return root
+
+
+def _strip_none(rows):
+    return [{k: v for k, v in row.items() if v is not None} for row in rows]
+
+
+_NODE_DECODER = """
+global.window = {};
+require(process.argv[1]);
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const out = {
+  projection: window.CompactPayload.decodeProjection(input.projection),
+  charts: input.charts.map((c) => window.CompactPayload.decodeCharts(c)),
+};
+process.stdout.write(JSON.stringify(out));
+"""
+
+
+def main():
+    root = _setup_env()
+
+    import app as app_module
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.recurrence_model import Recurrence
+    from models.user_model import User
+    from services.compact_payload import change_points, expand_change_points, expand_chart_line, expand_projection
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    check("change_points_roundtrip", expand_change_points(change_points([1, 1, 2, 2, 2, 0, 1])) == [1, 1, 2, 2, 2, 0, 1])
+    check("change_points_flat", change_points([5.0] * 30) == {"n": 30, "at": [0], "v": [5.0]})
+    check("change_points_empty", expand_change_points(change_points([])) == [])
+
+    today = date.today()
+    with app.app_context():
+        user = User(username="compacto", email="compacto@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+        categorias = ["mercado", "moradia", "transporte", "lazer", "outros"]
+        split_id = None
+        for i in range(400):
+            day = today + timedelta(days=(i * 7) % 540 - 60)
+            tipo = "receita" if i % 5 == 0 else "despesa"
+            entry = Entrada(
+                user_id=user.id,
+                data=day,
+                tipo=tipo,
+                descricao=f"item {i}",
+                categoria=categorias[i % len(categorias)],
+                valor=100.0 + (i % 13) * 25,
+                status=("pago" if day < today else "nao_pago") if tipo == "despesa" else None,
+                paid_at=day if tipo == "despesa" and day < today else None,
+                priority=("alta", "media", "baixa")[i % 3],
+            )
+            db.session.add(entry)
+            db.session.flush()
+            if split_id is None and tipo == "despesa" and day > today:
+                split_id = entry.id
+        db.session.add(
+            Recurrence(
+                user_id=user.id, name="aluguel", tipo="despesa", descricao="aluguel",
+                categoria="moradia", valor=1200.0, day_of_month=5, is_enabled=True,
+            )
+        )
+        db.session.commit()
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    resp = client.post(
+        "/login",
+        data={"login_id": "compacto", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+    check("login_ok", resp.status_code in {302, 303})
+    headers = {"X-CSRF-Token": csrf}
+
+    body = {
+        "start": today.isoformat(),
+        "end": (today + timedelta(days=365)).isoformat(),
+        "overrides": {
+            "splits": [{"entrada_id": split_id, "parts": 3}],
+            "extras": [{"date": (today + timedelta(days=9)).isoformat(), "tipo": "receita", "valor": 50, "descricao": "extra"}],
+        },
+    }
+    full_resp = client.post("/app/projection/data", json=body, headers=headers)
+    compact_resp = client.post("/app/projection/data", json={**body, "format": "compact"}, headers=headers)
+    full = full_resp.get_json()
+    compact = compact_resp.get_json()
+    check("projection_compact_flag", compact.get("format") == "compact" and "format" not in full)
+    expanded = expand_projection(compact)
+    check("projection_daily_parity", expanded["daily"] == full["daily"])
+    check("projection_events_parity", expanded["events"] == _strip_none(full["events"]))
+    check(
+        "projection_scalars_parity",
+        {k: v for k, v in expanded.items() if k not in {"daily", "events"}}
+        == {k: v for k, v in full.items() if k not in {"daily", "events"}},
+    )
+    check("projection_has_installments", "installment" in compact["events"]["enums"]["kind"])
+    check("projection_flat_stretches_collapsed", len(compact["daily"]["saldo"]["at"]) < len(full["daily"]))
+    full_bytes, compact_bytes = len(full_resp.data), len(compact_resp.data)
+    check("projection_smaller", compact_bytes < full_bytes * 0.6)
+
+    charts_queries = [
+        "period=month",
+        "period=quarter&year=%d&quarter=%d" % (today.year, (today.month - 1) // 3 + 1),
+        "period=custom&start=%s&end=%s" % ((today - timedelta(days=20)).isoformat(), (today + timedelta(days=10)).isoformat()),
+        "period=custom&start=%s&end=%s" % ((today - timedelta(days=90)).isoformat(), (today + timedelta(days=100)).isoformat()),
+    ]
+    charts_compact = []
+    for query in charts_queries:
+        verbose = client.get(f"/app/charts/data?{query}").get_json()
+        packed = client.get(f"/app/charts/data?{query}&format=compact").get_json()
+        charts_compact.append(packed)
+        label = query.split("&")[0].split("=")[1]
+        check(f"charts_line_parity_{label}_{len(verbose['line']['labels'])}", expand_chart_line(packed["line"]) == verbose["line"])
+        check(
+            f"charts_rest_parity_{label}_{len(verbose['line']['labels'])}",
+            {k: v for k, v in packed.items() if k not in {"line", "format"}}
+            == {k: v for k, v in verbose.items() if k != "line"},
+        )
+
+    # decodificador do front (Node, se disponível) deve produzir a resposta completa
+    node = shutil.which("node")
+    if node:
+        decoder = os.path.join(root, "static", "js", "compact_payload.js")
+        proc = subprocess.run(
+            [node, "-e", _NODE_DECODER, decoder],
+            input=json.dumps({"projection": compact, "charts": charts_compact}),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        decoded = json.loads(proc.stdout)
+        check("js_projection_parity", decoded["projection"] == expand_projection(compact))
+        check(
+            "js_charts_parity",
+            [c["line"] for c in decoded["charts"]] == [expand_chart_line(c["line"]) for c in charts_compact],
+        )
+
+    # custo de serialização (jsonify) do resultado de 5 anos
+    long_body = {**body, "end": (today + timedelta(days=5 * 365)).isoformat()}
+    timings = {}
+    for name, extra in (("full", {}), ("compact", {"format": "compact"})):
+        client.post("/app/projection/data", json={**long_body, **extra}, headers=headers)  # aquece o cache
+        started = time.perf_counter()
+        for _ in range(5):
+            resp = client.post("/app/projection/data", json={**long_body, **extra}, headers=headers)
+        timings[name] = ((time.perf_counter() - started) / 5 * 1000, len(resp.data))
+
+    print(
+        "OK - compact payload smoke tests passed "
+        f"(1 ano: {full_bytes} -> {compact_bytes} bytes; 5 anos: "
+        f"{timings['full'][1]} bytes/{timings['full'][0]:.1f} ms -> "
+        f"{timings['compact'][1]} bytes/{timings['compact'][0]:.1f} ms{'' if node else '; sem node'}):"
+    )
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
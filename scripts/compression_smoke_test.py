@@ -0,0 +1,142 @@
+import gzip
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="compression_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'compression.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    today = date.today()
+    with app.app_context():
+        user = User(username="compressao", email="compressao@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+        for i in range(300):
+            db.session.add(
+                Entrada(
+                    user_id=user.id,
+                    data=today - timedelta(days=i % 25),
+                    tipo="despesa" if i % 4 else "receita",
+                    descricao=f"lançamento {i}",
+                    categoria="mercado",
+                    valor=10.0 + i,
+                )
+            )
+        db.session.commit()
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    client.post(
+        "/login",
+        data={"login_id": "compressao", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+    gz = {"Accept-Encoding": "gzip, deflate"}
+
+    plain = client.get("/dados")
+    packed = client.get("/dados", headers=gz)
+    check("json_plain_without_accept", plain.headers.get("Content-Encoding") is None)
+    check("json_vary", "Accept-Encoding" in packed.headers.get("Vary", ""))
+    check("json_gzip", packed.headers.get("Content-Encoding") == "gzip")
+    check("json_gzip_roundtrip", gzip.decompress(packed.data) == plain.data)
+    check("json_gzip_smaller", len(packed.data) < len(plain.data) / 3)
+
+    refused = client.get("/dados", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    check("q0_not_compressed", refused.headers.get("Content-Encoding") is None)
+
+    small = client.get("/dados?limit=1", headers=gz)
+    check("below_threshold_plain", len(small.data) < 1024 and small.headers.get("Content-Encoding") is None)
+
+    html = client.get("/app/projection", headers=gz)
+    check("html_gzip", html.status_code == 200 and html.headers.get("Content-Encoding") == "gzip")
+
+    pdf = client.get("/app/reports/export/pdf", headers=gz)
+    check("pdf_not_recompressed", pdf.mimetype == "application/pdf" and pdf.headers.get("Content-Encoding") is None)
+    xlsx = client.get("/app/reports/export/excel", headers=gz)
+    check("xlsx_not_recompressed", xlsx.status_code == 200 and xlsx.headers.get("Content-Encoding") is None)
+
+    # estático sem pré-compressão: comprimido na hora, ETag da variante
+    css_path = os.path.join(app.static_folder, "css", "projection.css")
+    with open(css_path, "rb") as fh:
+        css_bytes = fh.read()
+    raw = client.get("/static/css/projection.css")
+    check("static_plain_etag", raw.headers.get("ETag") and raw.headers.get("Content-Encoding") is None)
+    onfly = client.get("/static/css/projection.css", headers=gz)
+    etag = onfly.headers.get("ETag")
+    check("static_gzip_on_the_fly", onfly.headers.get("Content-Encoding") == "gzip" and gzip.decompress(onfly.data) == css_bytes)
+    check("static_etag_per_variant", etag != raw.headers.get("ETag") and etag.endswith('-gzip"'))
+    cached = client.get("/static/css/projection.css", headers={**gz, "If-None-Match": etag})
+    check("static_variant_304", cached.status_code == 304 and not cached.data)
+    mismatch = client.get("/static/css/projection.css", headers={**gz, "If-None-Match": raw.headers.get("ETag")})
+    # cópia identity em cache continua válida: 304 sem Content-Encoding
+    check("static_plain_etag_304_identity", mismatch.status_code == 304 and mismatch.headers.get("Content-Encoding") is None)
+
+    # estático pré-comprimido (gerado no build)
+    variant_path = css_path + ".gz"
+    prebuilt = gzip.compress(css_bytes, compresslevel=9, mtime=0)
+    try:
+        with open(variant_path, "wb") as fh:
+            fh.write(prebuilt)
+        stat = os.stat(css_path)
+        os.utime(variant_path, (stat.st_atime, stat.st_mtime))
+        served = client.get("/static/css/projection.css", headers=gz)
+        check("precompressed_served", served.data == prebuilt and served.headers.get("Content-Encoding") == "gzip")
+        check("precompressed_content_type", served.mimetype == "text/css")
+        check("precompressed_vary", "Accept-Encoding" in served.headers.get("Vary", ""))
+        again = client.get("/static/css/projection.css", headers={**gz, "If-None-Match": served.headers.get("ETag")})
+        check("precompressed_304", again.status_code == 304)
+        identity = client.get("/static/css/projection.css")
+        check("precompressed_identity_fallback", identity.get_data() == css_bytes)
+
+        os.utime(variant_path, (stat.st_atime, stat.st_mtime - 60))
+        stale = client.get("/static/css/projection.css", headers=gz)
+        check("stale_variant_ignored", stale.data != prebuilt and gzip.decompress(stale.data) == css_bytes)
+    finally:
+        if os.path.exists(variant_path):
+            os.remove(variant_path)
+
+    print(
+        "OK - compression smoke tests passed "
+        f"(/dados: {len(plain.data)} -> {len(packed.data)} bytes):"
+    )
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Benchmark por função com baseline em JSON e detecção de regressão.
+
+Gera um usuário sintético por tamanho (scripts/synthetic_data.py: N anos de
+histórico, recorrências, regras, lembretes, cenários) num SQLite temporário
+e mede, para cada tamanho:
+- _build_reports_payload (ano, caixa, detalhado);
+- compute_projection (90 dias, sem cache);
+- apply_rules_to_entry (100 lançamentos novos, dry_run; rollback ao final);
+- render_reports_pdf (payload do ano, resumido);
+- _summary_for_period (mês atual).
+
+Cada medição: 1 aquecimento + --repeat execuções; guarda mediana e mínimo.
+
+    python scripts/function_bench.py run --years 1,5,10 --save instance/bench/functions.json
+    python scripts/function_bench.py run --compare instance/bench/functions.json
+    python scripts/function_bench.py compare base.json novo.json --threshold 0.25
+
+Regressão: mediana acima de (1 + threshold) x baseline e pelo menos
+--min-delta-ms mais lenta (ruído de funções de poucos ms). Sai com código 1
+se houver regressão, para uso em CI. Baselines só são comparáveis na mesma
+máquina.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in (root, os.path.join(root, "scripts")):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    tmpdir = tempfile.mkdtemp(prefix="function_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+    # o benchmark mede as funções, não a instrumentação
+    os.environ.setdefault("QUERY_STATS_MODE", "off")
+    os.environ.setdefault("SLOW_QUERY_LOG_ENABLED", "0")
+    return root
+
+
+def _timed(fn, repeat: int) -> dict:
+    fn()  # aquecimento (imports preguiçosos, caches de statement)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "runs": repeat,
+    }
+
+
+def _bench_cases(user, db):
+    """(nome, função sem argumentos) medidos dentro de um request logado como user."""
+    from models.entrada_model import Entrada
+    from routes.analytics_routes import DEFAULT_REPORT_SECTIONS, _build_reports_payload, _summary_for_period
+    from services.projection_engine import compute_projection
+    from services.report_renderers import get_renderer
+    from services.rules_engine import apply_rules_to_entry
+
+    today = date.today()
+    month_start = today.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+    def reports_payload():
+        return _build_reports_payload(
+            period="year", mode="cash", type_filter="all", status_filter="all", categories=set(), methods=set(),
+            start_str=None, end_str=None, flow_limit=500, detail="detalhado",
+        )
+
+    def projection():
+        return compute_projection(user_id=user.id, start=today, end=today + timedelta(days=90), use_cache=False)
+
+    new_entries = [
+        Entrada(user_id=user.id, data=today, tipo="despesa", descricao=descricao, categoria="outros",
+                valor=valor, metodo=metodo)
+        for descricao, valor, metodo in [
+            ("Uber centro", 23.5, "credito"), ("iFood jantar", 80.0, "credito"), ("Posto BR", 210.0, "debito"),
+            ("Farmácia", 45.0, "pix"), ("Geladeira nova", 3200.0, "boleto"),
+        ] * 20
+    ]
+
+    def rules():
+        for entry in new_entries:
+            apply_rules_to_entry(entry, user, "create", dry_run=True)
+        db.session.rollback()
+
+    try:
+        render_pdf = get_renderer("pdf")
+    except ImportError:
+        render_pdf = None
+    pdf_payload = reports_payload() if render_pdf else None
+    pdf_meta = {
+        "title": "Relatorio Financeiro", "user_name": user.email, "period_label": str(today.year),
+        "mode_label": "Caixa", "type_label": "Ambos", "status_label": "Todos", "detail_label": "Resumido",
+        "generated_at": datetime.now().strftime("%d/%m/%Y %H:%M"), "logo_path": None,
+    }
+
+    cases = [
+        ("_build_reports_payload", reports_payload),
+        ("compute_projection", projection),
+        ("apply_rules_to_entry_x100", rules),
+        ("_summary_for_period", lambda: _summary_for_period(month_start, month_end)),
+    ]
+    if render_pdf:
+        cases.insert(3, ("render_reports_pdf", lambda: render_pdf(pdf_payload, set(DEFAULT_REPORT_SECTIONS), "resumido", pdf_meta)))
+    return cases
+
+
+def _git_commit(root: str) -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_suite(years_list: list[float], per_month: int, repeat: int, only: set[str] | None = None) -> dict:
+    root = _setup_env()
+
+    from flask_login import login_user
+
+    import app as app_module
+    from models.extensions import db
+    from models.user_model import User
+    from synthetic_data import generate_user
+
+    app = app_module.app
+    results: dict[str, dict] = {}
+    sizes = {}
+    for years in years_list:
+        label = f"{years:g}y"
+        with app.app_context():
+            stats = generate_user(f"bench_{label}", years=years, entries_per_month=per_month, seed=7)
+        sizes[label] = stats["entries"]
+        print(f"[{label}] {stats['entries']} entradas", file=sys.stderr)
+        with app.test_request_context("/app/reports"):
+            user = db.session.get(User, stats["user_id"])
+            login_user(user)
+            for name, fn in _bench_cases(user, db):
+                if only and name not in only:
+                    continue
+                result = _timed(fn, repeat)
+                result["entries"] = stats["entries"]
+                results[f"{name}@{label}"] = result
+                print(f"  {name:<28} {result['median_ms']:>10.2f} ms (min {result['min_ms']:.2f})", file=sys.stderr)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(root),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "per_month": per_month,
+            "repeat": repeat,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+
+
+def compare_results(base: dict, current: dict, *, threshold: float, min_delta_ms: float) -> list[dict]:
+    rows = []
+    for key, now in sorted(current["results"].items()):
+        before = base["results"].get(key)
+        if before is None:
+            rows.append({"case": key, "status": "novo", "base_ms": None, "current_ms": now["median_ms"], "ratio": None})
+            continue
+        ratio = now["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        delta = now["median_ms"] - before["median_ms"]
+        if ratio > 1 + threshold and delta >= min_delta_ms:
+            status = "REGRESSÃO"
+        elif ratio < 1 - threshold and -delta >= min_delta_ms:
+            status = "melhora"
+        else:
+            status = "ok"
+        rows.append(
+            {"case": key, "status": status, "base_ms": before["median_ms"], "current_ms": now["median_ms"],
+             "ratio": round(ratio, 3)}
+        )
+    for key in sorted(set(base["results"]) - set(current["results"])):
+        rows.append({"case": key, "status": "ausente", "base_ms": base["results"][key]["median_ms"],
+                     "current_ms": None, "ratio": None})
+    return rows
+
+
+def _print_comparison(rows: list[dict]) -> int:
+    for row in rows:
+        base = f"{row['base_ms']:.2f}" if row["base_ms"] is not None else "-"
+        current = f"{row['current_ms']:.2f}" if row["current_ms"] is not None else "-"
+        ratio = f"x{row['ratio']:.2f}" if row["ratio"] is not None else ""
+        print(f"{row['status']:<10} {row['case']:<36} {base:>10} -> {current:>10} ms  {ratio}")
+    regressions = [row for row in rows if row["status"] == "REGRESSÃO"]
+    print(f"{len(regressions)} regressão(ões) em {len(rows)} caso(s).")
+    return 1 if regressions else 0
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    run = sub.add_parser("run", help="Mede as funções e opcionalmente salva/compara.")
+    run.add_argument("--years", default="1,3,10", help="Tamanhos em anos de histórico (lista).")
+    run.add_argument("--per-month", type=int, default=60)
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--only", default="", help="Só estes casos (lista separada por vírgula).")
+    run.add_argument("--save", help="Grava o resultado neste JSON (baseline).")
+    run.add_argument("--compare", help="Compara com este baseline.")
+    for cmd in (run, sub.add_parser("compare", help="Compara dois JSON gravados.")):
+        cmd.add_argument("--threshold", type=float, default=0.25, help="Tolerância relativa (0.25 = 25%%).")
+        cmd.add_argument("--min-delta-ms", type=float, default=2.0, help="Diferença mínima absoluta.")
+    sub.choices["compare"].add_argument("base")
+    sub.choices["compare"].add_argument("current")
+    args = parser.parse_args()
+
+    if args.cmd == "compare":
+        rows = compare_results(_load(args.base), _load(args.current), threshold=args.threshold, min_delta_ms=args.min_delta_ms)
+        return _print_comparison(rows)
+
+    years_list = [float(item) for item in args.years.split(",") if item.strip()]
+    only = {item.strip() for item in args.only.split(",") if item.strip()} or None
+    report = run_suite(years_list, args.per_month, args.repeat, only)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+        print(f"Baseline gravado em {args.save}", file=sys.stderr)
+    if args.compare:
+        base = _load(args.compare)
+        if only:
+            base["results"] = {key: value for key, value in base["results"].items() if key.split("@")[0] in only}
+        rows = compare_results(base, report, threshold=args.threshold, min_delta_ms=args.min_delta_ms)
+        return _print_comparison(rows)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
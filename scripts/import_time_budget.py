@@ -0,0 +1,147 @@
+"""Orçamento de boot: tempo de import e RSS de `import app`.
+
+Roda `python -X importtime -c "import app"` em um processo limpo, soma os
+tempos e falha (exit 1) quando o boot passa do orçamento ou quando módulos
+pesados (reportlab/openpyxl) entram no import do app.
+
+Orçamentos via env:
+- IMPORT_BUDGET_MS (padrão 2500)
+- IMPORT_RSS_BUDGET_MB (padrão 150)
+- IMPORT_TOP (quantos módulos listar, padrão 15)
+
+O setup do banco fica desligado (DB_AUTO_SETUP=0): mede só o custo de import.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("reportlab", "openpyxl")
+
+
+def _root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _child_env() -> dict:
+    tmpdir = tempfile.mkdtemp(prefix="import_budget_")
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'import_budget.db')}")
+    env.setdefault("APP_ENV", "production")
+    env.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    env.setdefault("APP_BASE_URL", "https://example.test")
+    env.setdefault("MARKETING_BASE_URL", "https://example.test")
+    env.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    env.setdefault("EMAIL_SEND_ENABLED", "0")
+    env["DB_AUTO_SETUP"] = "0"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Converte a saída de -X importtime em [{module, self_us, cumulative_us, depth}]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            # cabeçalho: "self [us] | cumulative | imported package"
+            continue
+        raw_name = parts[2].rstrip()
+        name = raw_name.lstrip()
+        depth = (len(raw_name) - len(name) - 1) // 2
+        rows.append(
+            {
+                "module": name,
+                "self_us": self_us,
+                "cumulative_us": cumulative_us,
+                "depth": max(depth, 0),
+            }
+        )
+    return rows
+
+
+def _measure_importtime(env: dict) -> list[dict]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=_root(),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import app falhou:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def _measure_rss_mb(env: dict) -> float | None:
+    code = (
+        "import resource, sys\n"
+        "import app\n"
+        "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "print(rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024)\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=_root(),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        # Windows não tem o módulo resource: mede só o tempo.
+        return None
+    try:
+        return float(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return None
+
+
+def main():
+    budget_ms = float(os.getenv("IMPORT_BUDGET_MS", "2500"))
+    budget_rss_mb = float(os.getenv("IMPORT_RSS_BUDGET_MB", "150"))
+    top_n = int(os.getenv("IMPORT_TOP", "15"))
+
+    env = _child_env()
+    rows = _measure_importtime(env)
+    rss_mb = _measure_rss_mb(env)
+
+    total_ms = sum(r["self_us"] for r in rows) / 1000
+    app_row = next((r for r in rows if r["module"] == "app"), None)
+    app_ms = app_row["cumulative_us"] / 1000 if app_row else total_ms
+    heavy = sorted({r["module"] for r in rows if r["module"].split(".")[0] in HEAVY_MODULES})
+
+    print(f"import app: {app_ms:.1f} ms (total {total_ms:.1f} ms, {len(rows)} módulos)")
+    if rss_mb is not None:
+        print(f"RSS máximo: {rss_mb:.1f} MB")
+    print(f"Top {top_n} por tempo acumulado:")
+    for r in sorted(rows, key=lambda item: item["cumulative_us"], reverse=True)[:top_n]:
+        print(f"  {r['cumulative_us'] / 1000:9.1f} ms  {r['module']}")
+
+    failures = []
+    if app_ms > budget_ms:
+        failures.append(f"tempo de import {app_ms:.1f} ms > orçamento {budget_ms:.0f} ms")
+    if rss_mb is not None and rss_mb > budget_rss_mb:
+        failures.append(f"RSS {rss_mb:.1f} MB > orçamento {budget_rss_mb:.0f} MB")
+    if heavy:
+        failures.append(f"módulos pesados no boot: {', '.join(heavy[:5])}")
+
+    if failures:
+        print("FAIL - import budget:")
+        for item in failures:
+            print(f"- {item}")
+        return 1
+
+    print("OK - import budget respeitado.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
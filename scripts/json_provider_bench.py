@@ -0,0 +1,180 @@
+"""Serialização JSON: resposta do /dados com 10k entradas.
+
+1. Paridade: orjson, fallback stdlib do provider e o provider padrão do Flask
+   (datas convertidas à mão, como antes) decodificam para o mesmo JSON; datas
+   saem em ISO 8601.
+2. Custo: mediana só da serialização (payload já montado; no provider padrão
+   inclui o `.isoformat()` que a rota fazia) e do request completo
+   (`GET /dados`, com banco) em cada backend.
+
+Parâmetros via env: JSON_BENCH_ENTRIES (10000), JSON_BENCH_RUNS (15).
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="json_provider_bench_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'json.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+    # sem compressão: o bench mede só a serialização
+    os.environ.setdefault("COMPRESSION_ENABLED", "0")
+
+
+def _timed(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def _seed(db, User, Entrada, total: int, rng: random.Random) -> None:
+    user = User(username="serializa", email="serializa@example.test")
+    user.set_password("Secret123!@#")
+    user.is_verified = True
+    user.plan = "pro"
+    user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+    db.session.add(user)
+    db.session.flush()
+    today = date.today()
+    rows = []
+    for i in range(total):
+        tipo = rng.choice(["receita", "despesa", "despesa"])
+        day = today - timedelta(days=rng.randint(0, 3 * 365))
+        status = rng.choice(["pago", "em_andamento", None]) if tipo == "despesa" else rng.choice(["recebido", None])
+        rows.append(
+            {
+                "user_id": user.id,
+                "data": day,
+                "tipo": tipo,
+                "descricao": f"lançamento {i} – café/mercado",
+                "categoria": rng.choice(["mercado", "moradia", "outros", "salario"]),
+                "valor": round(rng.uniform(5, 3000), 2),
+                "status": status,
+                "paid_at": day + timedelta(days=rng.randint(0, 5)) if status == "pago" else None,
+                "received_at": day if status == "recebido" else None,
+                "metodo": rng.choice(["pix", "cartao", None]),
+                "tags": rng.choice(["casa,fixo", "", None]),
+            }
+        )
+    db.session.execute(Entrada.__table__.insert(), rows)
+    db.session.commit()
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from flask.json.provider import DefaultJSONProvider
+
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+    from services import json_provider
+
+    total = int(os.getenv("JSON_BENCH_ENTRIES", "10000"))
+    runs = int(os.getenv("JSON_BENCH_RUNS", "15"))
+    app = app_module.app
+    app.debug = False
+
+    with app.app_context():
+        _seed(db, User, Entrada, total, random.Random(11))
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    client.post(
+        "/login",
+        data={"login_id": "serializa", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+
+    flask_default = DefaultJSONProvider(app)
+    providers = [("stdlib", json_provider.FastJSONProvider(app, use_orjson=False))]
+    if json_provider.orjson is not None:
+        providers.append(("orjson", json_provider.FastJSONProvider(app, use_orjson=True)))
+
+    failures = []
+    rows = []
+    original = app.json
+    try:
+        app.json = providers[0][1]
+        reference = client.get("/dados").get_json()["entradas"]
+        if len(reference) != total:
+            failures.append(f"/dados devolveu {len(reference)} entradas (esperado {total})")
+        payload = {"entradas": [
+            {**item, "data": date.fromisoformat(item["data"]),
+             "paid_at": date.fromisoformat(item["paid_at"]) if item["paid_at"] else None,
+             "received_at": date.fromisoformat(item["received_at"]) if item["received_at"] else None}
+            for item in reference
+        ]}
+        # como as rotas faziam antes: datas convertidas à mão
+        handmade = {"entradas": reference}
+
+        def handmade_dumps():
+            # conversão à mão (antes feita na rota) + dumps do provider padrão
+            converted = [
+                {**item, "data": item["data"].isoformat(),
+                 "paid_at": item["paid_at"].isoformat() if item["paid_at"] else None,
+                 "received_at": item["received_at"].isoformat() if item["received_at"] else None}
+                for item in payload["entradas"]
+            ]
+            return flask_default.dumps({"entradas": converted}, separators=(",", ":"))
+
+        base_ms = _timed(handmade_dumps, runs)
+        base_size = len(flask_default.dumps(handmade, separators=(",", ":")).encode("utf-8"))
+        if flask_default.loads(flask_default.dumps(handmade)) != handmade:
+            failures.append("provider padrão do Flask não reproduz o payload")
+
+        for name, provider in providers:
+            app.json = provider
+            body = provider.dumps_bytes(payload)
+            if provider.loads(body) != handmade:
+                failures.append(f"{name}: JSON diverge do payload com datas ISO")
+            resp = client.get("/dados")
+            if resp.get_json() != {"entradas": reference}:
+                failures.append(f"{name}: GET /dados diverge")
+            dumps_ms = _timed(lambda: provider.dumps_bytes(payload), runs)
+            request_ms = _timed(lambda: client.get("/dados"), max(3, runs // 3))
+            rows.append((name, dumps_ms, request_ms, len(body)))
+    finally:
+        app.json = original
+
+    print(f"Paridade: {len(providers) + 1 - len(failures)}/{len(providers) + 1} backends iguais")
+    for item in failures:
+        print(f"  - {item}")
+    print(f"/dados com {total} entradas (mediana de {runs}):")
+    print(f"  {'Flask padrão (isoformat à mão)':<32} dumps {base_ms:8.2f} ms  {base_size / 1024:8.1f} KiB")
+    for name, dumps_ms, request_ms, size in rows:
+        print(
+            f"  {f'provider {name}':<32} dumps {dumps_ms:8.2f} ms  {size / 1024:8.1f} KiB  "
+            f"request {request_ms:8.2f} ms  ({base_ms / dumps_ms:.1f}x)"
+        )
+    if json_provider.orjson is None:
+        print("  (orjson não instalado: só o fallback stdlib)")
+
+    if failures:
+        print("FAIL - serialização diverge")
+        return 1
+    print("OK - json provider bench")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""Teste de carga ponta a ponta: gunicorn local + mix realista de requests.
+
+Sobe o app no gunicorn em 127.0.0.1 contra um banco semeado com
+scripts/synthetic_data.py (SQLite temporário ou um Postgres local), loga
+--users usuários sintéticos (CSRF incluso) e dispara --clients usuários
+virtuais por --seconds segundos, cada um sorteando a próxima ação pelo mix:
+
+- dashboard:     GET  /app
+- dados:         GET  /dados?limit=200
+- add:           POST /add
+- notifications: GET  /app/notifications/data (polling)
+- charts:        GET  /app/charts/data (mês ou ano)
+- projection:    GET  /app/projection/data
+- projection_edit: POST /app/projection/data com overrides (redução/extra)
+- priority:      POST /app/projection/entry/<id>/priority
+- pdf:           GET  /app/reports/export/pdf
+
+Imprime throughput total e, por ação, req/s, p50/p95/p99, erros e status
+HTTP. Erro = exceção ou status >= 400. Sai com código 1 se a taxa de erro
+total passar de --max-error-rate.
+
+    python scripts/load_harness_bench.py --users 20 --clients 40 --seconds 60
+    python scripts/load_harness_bench.py --mix notifications=50,dados=30,pdf=1
+    python scripts/load_harness_bench.py --database-url postgresql://app@localhost/carga --json carga.json
+
+Sem rede externa: o servidor escuta só em 127.0.0.1 e --database-url precisa
+apontar para localhost (o banco é semeado com usuários de prefixo próprio da
+execução, então pode ser reaproveitado).
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_support import (  # noqa: E402
+    ROOT,
+    bench_env,
+    login,
+    start_server,
+    stop_server,
+    summarize_latencies,
+)
+from synthetic_data import DEFAULT_PASSWORD  # noqa: E402
+
+DEFAULT_MIX = {
+    "dashboard": 8,
+    "dados": 18,
+    "add": 10,
+    "notifications": 25,
+    "charts": 12,
+    "projection": 8,
+    "projection_edit": 8,
+    "priority": 5,
+    "pdf": 2,
+}
+LOCAL_HOSTS = {"", "localhost", "127.0.0.1", "::1"}
+CATEGORIES = ["mercado", "transporte", "lazer", "moradia", "servicos", "outros"]
+
+
+class VirtualUser:
+    """Um cliente: sessão própria (requests.Session não é thread-safe), rng e ids
+    de lançamentos futuros vistos em /dados (para editar prioridade)."""
+
+    def __init__(self, session, rng: random.Random):
+        self.session = session
+        self.rng = rng
+        self.entry_ids: list[int] = []
+
+    def remember_entries(self, payload: dict) -> None:
+        today = date.today().isoformat()
+        ids = [row["id"] for row in payload.get("entradas", []) if str(row.get("data") or "")[:10] >= today]
+        if ids:
+            self.entry_ids = ids[:50]
+
+
+def _entry_payload(rng: random.Random) -> dict:
+    day = date.today() + timedelta(days=rng.randint(-30, 30))
+    tipo = "receita" if rng.random() < 0.2 else "despesa"
+    if tipo == "despesa":
+        status = "pago" if day <= date.today() else "em_andamento"
+    else:
+        status = "recebido" if day <= date.today() else None
+    return {
+        "tipo": tipo,
+        "data": day.isoformat(),
+        "descricao": f"Carga {tipo} {rng.randint(1, 9999)}",
+        "categoria": rng.choice(CATEGORIES) if tipo == "despesa" else "extras",
+        "valor": round(rng.uniform(5, 800), 2),
+        "status": status,
+        "priority": rng.choice(["alta", "media", "baixa"]),
+    }
+
+
+def _projection_overrides(rng: random.Random) -> dict:
+    overrides = {"reductions": [{"categoria": rng.choice(CATEGORIES), "percent": rng.choice([10, 20, 30])}]}
+    if rng.random() < 0.5:
+        overrides["extras"] = [
+            {
+                "date": (date.today() + timedelta(days=rng.randint(1, 60))).isoformat(),
+                "valor": rng.choice([300, 800, 1500]),
+                "tipo": rng.choice(["receita", "despesa"]),
+                "descricao": "Ajuste de carga",
+            }
+        ]
+    return overrides
+
+
+def _perform(action: str, user: VirtualUser, base_url: str):
+    """Executa a ação; retorna a resposta (para status e corpo)."""
+    session, rng = user.session, user.rng
+    if action == "dashboard":
+        return session.get(f"{base_url}/app", timeout=60)
+    if action == "dados":
+        resp = session.get(f"{base_url}/dados", params={"limit": 200}, timeout=60)
+        if resp.status_code == 200:
+            user.remember_entries(resp.json())
+        return resp
+    if action == "add":
+        return session.post(f"{base_url}/add", json=_entry_payload(rng), timeout=60)
+    if action == "notifications":
+        return session.get(f"{base_url}/app/notifications/data", timeout=60)
+    if action == "charts":
+        return session.get(f"{base_url}/app/charts/data", params={"period": rng.choice(["month", "year"])}, timeout=60)
+    if action == "projection":
+        return session.get(f"{base_url}/app/projection/data", timeout=60)
+    if action == "projection_edit":
+        payload = {"mode": rng.choice(["cash", "accrual"]), "overrides": _projection_overrides(rng)}
+        return session.post(f"{base_url}/app/projection/data", json=payload, timeout=60)
+    if action == "priority":
+        if not user.entry_ids:
+            return _perform("dados", user, base_url)
+        entry_id = rng.choice(user.entry_ids)
+        payload = {"priority": rng.choice(["alta", "media", "baixa"])}
+        return session.post(f"{base_url}/app/projection/entry/{entry_id}/priority", json=payload, timeout=60)
+    if action == "pdf":
+        return session.get(f"{base_url}/app/reports/export/pdf", params={"period": "month"}, timeout=120)
+    raise ValueError(f"ação desconhecida: {action}")
+
+
+def run_load(users: list[VirtualUser], base_url: str, *, mix: dict, seconds: float, think_ms: float) -> dict:
+    """Uma thread por VirtualUser até o prazo; latências e status agregados por ação."""
+    actions = list(mix)
+    weights = [mix[name] for name in actions]
+    latencies = {name: [] for name in actions}
+    errors = Counter()
+    statuses = {name: Counter() for name in actions}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def worker(idx: int):
+        user = users[idx]
+        rng = user.rng
+        local = {name: [] for name in actions}
+        local_errors = Counter()
+        local_statuses = {name: Counter() for name in actions}
+        while time.monotonic() < stop_at:
+            action = rng.choices(actions, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = _perform(action, user, base_url).status_code
+            except Exception as exc:  # conexão recusada, timeout etc. contam como erro
+                status = type(exc).__name__
+            local[action].append((time.perf_counter() - started) * 1000)
+            local_statuses[action][status] += 1
+            if not isinstance(status, int) or status >= 400:
+                local_errors[action] += 1
+            if think_ms:
+                time.sleep(rng.uniform(0, 2 * think_ms) / 1000)
+        with lock:
+            for name in actions:
+                latencies[name].extend(local[name])
+                statuses[name].update(local_statuses[name])
+            errors.update(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(users))]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    endpoints = {}
+    for name in actions:
+        stats = summarize_latencies(latencies[name], errors[name], elapsed)
+        stats["status"] = {str(code): count for code, count in sorted(statuses[name].items(), key=str)}
+        endpoints[name] = stats
+    all_latencies = [value for name in actions for value in latencies[name]]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total": summarize_latencies(all_latencies, sum(errors.values()), elapsed),
+        "endpoints": endpoints,
+    }
+
+
+def parse_mix(raw: str) -> dict:
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in raw.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"ação desconhecida no mix: {name} (use {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    mix = {name: weight for name, weight in mix.items() if weight > 0}
+    if not mix:
+        raise ValueError("mix vazio")
+    return mix
+
+
+def _check_local_database(url: str) -> None:
+    host = urlsplit(url).hostname or ""
+    if host not in LOCAL_HOSTS:
+        raise ValueError(f"--database-url precisa ser local (host {host!r}); o harness não usa rede externa")
+
+
+def _seed(env: dict, *, users: int, years: float, per_month: int, prefix: str) -> list[str]:
+    """Semeia em processo separado (synthetic_data.py usa o DATABASE_URL do env)."""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            os.path.join(ROOT, "scripts", "synthetic_data.py"),
+            "--users", str(users),
+            "--years", str(years),
+            "--per-month", str(per_month),
+            "--prefix", prefix,
+        ],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"seed falhou:\n{proc.stderr[-2000:]}")
+    return [json.loads(line)["username"] for line in proc.stdout.splitlines() if line.startswith("{")]
+
+
+def _print_report(report: dict) -> None:
+    total = report["total"]
+    print(
+        f"\nTotal: {total['requests']} requests em {report['elapsed_s']:.1f}s = {total['rps']:.1f} req/s, "
+        f"p50 {total['p50_ms']:.1f} ms, p95 {total['p95_ms']:.1f} ms, p99 {total['p99_ms']:.1f} ms, "
+        f"erros {total['errors']} ({total['error_rate']}%)"
+    )
+    print(f"\n{'ação':<16} {'reqs':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'erros':>7}  status")
+    for name, stats in sorted(report["endpoints"].items(), key=lambda item: -item[1]["requests"]):
+        status = " ".join(f"{code}x{count}" for code, count in stats["status"].items())
+        print(
+            f"{name:<16} {stats['requests']:>6} {stats['rps']:>7.1f} {stats['p50_ms']:>8.1f} "
+            f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['error_rate']:>6.1f}%  {status}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="Usuários sintéticos semeados e logados.")
+    parser.add_argument("--clients", type=int, default=0, help="Usuários virtuais simultâneos (padrão: 2x --users).")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--think-ms", type=float, default=0, help="Pausa média entre ações de um cliente.")
+    parser.add_argument("--mix", default="", help="Pesos por ação, ex.: dados=20,add=10 (padrão: mix realista).")
+    parser.add_argument("--years", type=float, default=2, help="Histórico por usuário no seed.")
+    parser.add_argument("--per-month", type=int, default=40, help="Entradas por mês no seed.")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--database-url", help="Postgres local (padrão: SQLite temporário).")
+    parser.add_argument("--json", dest="json_path", help="Grava o relatório neste arquivo.")
+    parser.add_argument("--max-error-rate", type=float, default=1.0, help="Erro total aceitável, em %%.")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+        if args.database_url:
+            _check_local_database(args.database_url)
+    except ValueError as exc:
+        parser.error(str(exc))
+    clients = args.clients or args.users * 2
+
+    # banco SQLite, slow queries e snapshots de métricas no diretório temporário da execução
+    run_dir = tempfile.mkdtemp(prefix="load_harness_")
+    overrides = {
+        "SLOW_QUERY_DIR": os.path.join(run_dir, "slow_queries"),
+        "METRICS_MULTIPROC_DIR": os.path.join(run_dir, "metrics"),
+    }
+    if args.database_url:
+        overrides["DATABASE_URL"] = args.database_url
+    env = bench_env(os.path.join(run_dir, "bench.db"), **overrides)
+    prefix = f"carga{int(time.time()) % 1_000_000}u"
+    print(
+        f"Seed: {args.users} usuários x {args.years:g} anos x {args.per_month}/mês "
+        f"({'postgres' if args.database_url else 'sqlite'})...",
+        file=sys.stderr,
+    )
+    usernames = _seed(env, users=args.users, years=args.years, per_month=args.per_month, prefix=prefix)
+
+    proc, base_url = start_server(env, workers=args.workers, threads=args.threads)
+    try:
+        users = []
+        for idx in range(clients):
+            # clientes além de --users reaproveitam o usuário, com outra sessão (login próprio)
+            session, _csrf = login(base_url, usernames[idx % len(usernames)], DEFAULT_PASSWORD)
+            user = VirtualUser(session, random.Random(idx))
+            _perform("dados", user, base_url)  # aquece e guarda ids para as edições de prioridade
+            users.append(user)
+        print(
+            f"Carga: {clients} clientes, {args.seconds:.0f}s, gunicorn {args.workers}x{args.threads} threads, "
+            f"mix {mix}",
+            file=sys.stderr,
+        )
+        report = run_load(users, base_url, mix=mix, seconds=args.seconds, think_ms=args.think_ms)
+    finally:
+        stop_server(proc)
+
+    report["meta"] = {
+        "users": args.users,
+        "clients": clients,
+        "seconds": args.seconds,
+        "think_ms": args.think_ms,
+        "workers": args.workers,
+        "threads": args.threads,
+        "database": "postgres" if args.database_url else "sqlite",
+        "years": args.years,
+        "per_month": args.per_month,
+        "mix": mix,
+    }
+    _print_report(report)
+    if args.json_path:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json_path)), exist_ok=True)
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+        print(f"Relatório gravado em {args.json_path}", file=sys.stderr)
+    return 1 if report["total"]["error_rate"] > args.max_error_rate else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="memory_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'memory.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def _login(client) -> None:
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    client.post(
+        "/login",
+        data={"login_id": "memoria", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+
+
+# "vazamento" controlado entre dois snapshots
+_LEAK = []
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from config import Config
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+    from services.memory_profiling import diff_snapshots, list_memory_files, recent_measurements
+    from services.metrics import MEMORY_OVER_BUDGET, MEMORY_PEAK
+
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    directory = tempfile.mkdtemp(prefix="memory_files_")
+
+    class MemoryConfig(Config):
+        MEMORY_PROFILING_ENABLED = True
+        MEMORY_PROFILING_DIR = directory
+        MEMORY_PROFILING_BUDGET_MB = 1000
+        PROFILING_TOKEN = "segredo-memoria"
+
+    app = app_module.create_app(MemoryConfig)
+
+    with app.app_context():
+        user = User(username="memoria", email="memoria@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+        for i in range(4000):
+            db.session.add(
+                Entrada(user_id=user.id, data=date.today() - timedelta(days=i % 300), tipo="despesa" if i % 4 else "receita",
+                        descricao=f"item {i}", categoria=f"cat{i % 12}", valor=10.0 + i % 90)
+            )
+        db.session.commit()
+
+    client = app.test_client()
+    _login(client)
+
+    plain = client.get("/dados")
+    check("unlisted_endpoint_not_measured", plain.status_code == 200 and "X-Memory-Peak-KB" not in plain.headers)
+    check("tracing_off_between_requests", not tracemalloc.is_tracing())
+
+    report = client.get("/app/reports/data?period=year")
+    check("reports_measured", report.status_code == 200 and float(report.headers["X-Memory-Peak-KB"]) > 0)
+    check("under_budget_not_flagged", "X-Memory-Over-Budget" not in report.headers)
+    check("tracing_stopped_after_request", not tracemalloc.is_tracing())
+    last = recent_measurements()[-1]
+    check("record_fields", last["endpoint"] == "analytics.reports_data" and last["status"] == 200 and last["rss_kb"] > 0)
+    check("top_sites", bool(last["top_sites"]) and all(":" in site["site"] and site["kb"] > 0 for site in last["top_sites"]))
+    check("peak_histogram", MEMORY_PEAK.count(endpoint="analytics.reports_data") == 1)
+    check("nothing_written_under_budget", not list_memory_files(directory)["records"])
+
+    # orçamento estourado: log, contador, header e registro em disco
+    records = []
+
+    class _Collect(logging.Handler):
+        def emit(self, record):
+            records.append(record.getMessage())
+
+    handler = _Collect()
+    mem_logger = logging.getLogger("services.memory_profiling")
+    mem_logger.addHandler(handler)
+
+    class TightConfig(MemoryConfig):
+        MEMORY_PROFILING_BUDGET_MB = 0.01
+        DB_AUTO_SETUP = False
+
+    tight_app = app_module.create_app(TightConfig)
+    tight = tight_app.test_client()
+    _login(tight)
+    try:
+        excel = tight.get("/app/reports/export/excel?period=year")
+    finally:
+        mem_logger.removeHandler(handler)
+    check("excel_measured", excel.status_code == 200 and excel.headers.get("X-Memory-Over-Budget") == "1")
+    check("over_budget_logged", any("/app/reports/export/excel" in msg and "orçamento" in msg for msg in records))
+    check("over_budget_counter", MEMORY_OVER_BUDGET.value(endpoint="analytics.reports_export_excel") == 1)
+    saved = list_memory_files(directory)["records"]
+    check("over_budget_record", len(saved) == 1 and saved[0]["endpoint"] == "analytics.reports_export_excel")
+
+    projection = tight.get("/app/projection/data")
+    check("projection_measured", projection.status_code == 200 and "X-Memory-Peak-KB" in projection.headers)
+
+    # snapshots manuais: só com token; diferença entre dois snapshots mostra o crescimento
+    check("snapshot_requires_token", client.get("/debug/memory/snapshot").status_code == 404)
+    token = {"X-Profile-Token": "segredo-memoria"}
+    first = client.get("/debug/memory/snapshot", headers=token).get_json()
+    check("snapshot_starts_tracing", first["tracing"] and tracemalloc.is_tracing() and first["growth_since_previous"] is None)
+    _LEAK.extend(bytearray(1024) for _ in range(3000))
+    # com tracing contínuo, a medição por request compara com o estado anterior e não desliga o tracemalloc
+    measured = client.get("/app/reports/data?period=year")
+    check("continuous_measure", "X-Memory-Peak-KB" in measured.headers and tracemalloc.is_tracing())
+    second = client.get("/debug/memory/snapshot", headers=token).get_json()
+    growth = second["growth_since_previous"]
+    check("snapshot_growth", any("memory_profiling_smoke_test.py" in row["site"] and row["kb"] > 2000 for row in growth))
+    stopped = client.get("/debug/memory/snapshot?stop=1", headers=token).get_json()
+    check("snapshot_stop", stopped["tracing"] is False and not tracemalloc.is_tracing())
+
+    runner = app.test_cli_runner()
+    out = runner.invoke(args=["memory", "list"])
+    check("cli_list", out.exit_code == 0 and saved[0]["id"] in out.output and first["snapshot"] in out.output)
+    out = runner.invoke(args=["memory", "diff", first["snapshot"], second["snapshot"][:-2], "--top", "5"])
+    check("cli_diff", out.exit_code == 0 and "memory_profiling_smoke_test.py" in out.output)
+    out = runner.invoke(args=["memory", "diff", "nao-existe", first["snapshot"]])
+    check("cli_diff_missing", out.exit_code != 0 and "não encontrado" in out.output)
+    rows = diff_snapshots(directory, first["snapshot"], second["snapshot"], top=3)
+    check("diff_api", 0 < len(rows) <= 3)
+
+    with open(os.path.join(directory, saved[0]["id"] + ".json"), encoding="utf-8") as fh:
+        check("record_json", json.load(fh)["over_budget"] is True)
+
+    print("OK - memory profiling smoke tests passed:")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
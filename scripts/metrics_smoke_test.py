@@ -0,0 +1,198 @@
+import json
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="metrics_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'metrics.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def _sample(text: str, name: str, **labels) -> float | None:
+    """Valor de uma amostra na exposição texto (labels em qualquer ordem)."""
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = re.match(r"^([a-zA-Z_:][\w:]*)(?:\{(.*)\})? (\S+)$", line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        if all(found.get(key) == str(value) for key, value in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+def _child_worker(app_module, directory):
+    # outro "worker": conta um request próprio e grava o snapshot
+    from services.metrics import HTTP_REQUESTS, flush_metrics
+
+    HTTP_REQUESTS.inc(endpoint="worker.filho", method="GET", status=200)
+    app_module.app.config["METRICS_MULTIPROC_DIR"] = directory
+    flush_metrics(app_module.app)
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from config import Config
+    from models.automation_rule_model import AutomationRule
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+    from services.metrics import read_snapshots, render_metrics, track_external, write_snapshot
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    with app.app_context():
+        user = User(username="metricas", email="metricas@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+        for i in range(10):
+            db.session.add(
+                Entrada(user_id=user.id, data=date.today() - timedelta(days=i), tipo="despesa",
+                        descricao=f"item {i}", categoria="mercado", valor=10.0 + i)
+            )
+        db.session.add(
+            AutomationRule(
+                user_id=user.id,
+                name="Uber é transporte",
+                conditions_json=json.dumps([{"field": "descricao", "op": "contains", "value": "uber"}]),
+                actions_json=json.dumps([{"type": "set_category", "value": "transporte"}]),
+            )
+        )
+        db.session.commit()
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    client.post(
+        "/login",
+        data={"login_id": "metricas", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+
+    for _ in range(3):
+        client.get("/dados")
+    client.get("/app/reports/data?period=month")
+    client.get("/nao-existe")
+    for descricao in ("Uber centro", "Padaria"):
+        client.post(
+            "/add",
+            json={"tipo": "despesa", "data": date.today().isoformat(), "descricao": descricao, "valor": 20},
+            headers={"X-CSRF-Token": csrf},
+        )
+    client.get("/app/reports/export/pdf")
+    with track_external("resend", "send_email") as call:
+        call.status = 202
+    try:
+        with track_external("abacatepay", "billing_create"):
+            raise ConnectionError("sem rede")
+    except ConnectionError:
+        pass
+
+    scraped = client.get("/metrics")
+    text = scraped.get_data(as_text=True)
+    check("metrics_ok", scraped.status_code == 200 and scraped.content_type.startswith("text/plain; version=0.0.4"))
+    check("help_and_type", "# TYPE http_request_duration_seconds histogram" in text)
+    check("latency_histogram",
+          _sample(text, "http_request_duration_seconds_bucket", endpoint="entradas.dados", method="GET", le="+Inf") == 3)
+    check("latency_count_matches",
+          _sample(text, "http_request_duration_seconds_count", endpoint="entradas.dados", method="GET") == 3)
+    check("requests_total_status",
+          _sample(text, "http_requests_total", endpoint="entradas.dados", method="GET", status=200) == 3)
+    check("unmatched_404", _sample(text, "http_requests_total", endpoint="unmatched", method="GET", status=404) == 1)
+    check("in_flight_back_to_zero", _sample(text, "http_requests_in_flight", endpoint="entradas.dados") == 0)
+    check("in_flight_counts_scrape", _sample(text, "http_requests_in_flight", endpoint="metrics") == 1)
+    check("db_queries_per_endpoint", (_sample(text, "db_queries_total", endpoint="entradas.dados") or 0) >= 3)
+    check("db_seconds_histogram", _sample(text, "http_request_db_seconds_count", endpoint="entradas.dados") == 3)
+    check("pool_metrics", _sample(text, "db_pool_checkouts_total") is not None)
+    check("write_metrics", _sample(text, "sqlite_write_transactions_total") is not None)
+    check("projection_cache_metrics", _sample(text, "projection_cache_items", cache="result") is not None)
+    check("rules_matched", _sample(text, "rules_evaluations_total", trigger="create", result="matched") == 1)
+    check("rules_not_matched", _sample(text, "rules_evaluations_total", trigger="create", result="not_matched") == 1)
+    check("export_duration", _sample(text, "report_export_duration_seconds_count", format="pdf") == 1)
+    check("external_ok", _sample(text, "external_request_duration_seconds_count",
+                                 service="resend", operation="send_email", outcome="2xx") == 1)
+    check("external_exception", _sample(text, "external_request_duration_seconds_count",
+                                        service="abacatepay", operation="billing_create", outcome="exception") == 1)
+
+    # acesso: fora do loopback só com token
+    remote = {"REMOTE_ADDR": "10.1.2.3"}
+    check("remote_denied", client.get("/metrics", environ_base=remote).status_code == 404)
+    app.config["METRICS_TOKEN"] = "segredo-local"
+    try:
+        check("remote_wrong_token", client.get("/metrics", environ_base=remote,
+                                               headers={"Authorization": "Bearer outro"}).status_code == 404)
+        check("remote_token_ok", client.get("/metrics", environ_base=remote,
+                                            headers={"Authorization": "Bearer segredo-local"}).status_code == 200)
+    finally:
+        app.config["METRICS_TOKEN"] = None
+
+    # multiprocesso: snapshots de dois processos somados; gauge de processo morto descartado
+    directory = tempfile.mkdtemp(prefix="metrics_multiproc_")
+    ctx = multiprocessing.get_context("fork")
+    child = ctx.Process(target=_child_worker, args=(app_module, directory))
+    child.start()
+    child.join(30)
+    check("child_snapshot", child.exitcode == 0 and any(name.startswith("metrics_") for name in os.listdir(directory)))
+    dead = {
+        "pid": 2 ** 22 + 12345,
+        "families": [
+            {"name": "http_requests_total", "type": "counter", "help": "x",
+             "samples": [["http_requests_total", [["endpoint", "entradas.dados"], ["method", "GET"], ["status", "200"]], 5]]},
+            {"name": "http_requests_in_flight", "type": "gauge", "help": "x",
+             "samples": [["http_requests_in_flight", [["endpoint", "morto"]], 7]]},
+        ],
+    }
+    with open(os.path.join(directory, f"metrics_{dead['pid']}.json"), "w", encoding="utf-8") as fh:
+        json.dump(dead, fh)
+
+    class MultiprocConfig(Config):
+        METRICS_MULTIPROC_DIR = directory
+        DB_AUTO_SETUP = False
+
+    multi_app = app_module.create_app(MultiprocConfig)
+    merged = multi_app.test_client().get("/metrics").get_data(as_text=True)
+    check("merged_child_counter", _sample(merged, "http_requests_total", endpoint="worker.filho", method="GET", status=200) == 1)
+    # 3 deste processo + 5 do worker morto (o filho herdou os 3 do fork: soma 11)
+    check("merged_sums_processes",
+          _sample(merged, "http_requests_total", endpoint="entradas.dados", method="GET", status=200) == 11)
+    check("dead_gauge_dropped", _sample(merged, "http_requests_in_flight", endpoint="morto") is None)
+
+    write_snapshot(directory, [])
+    check("render_roundtrip", render_metrics(read_snapshots(directory)).endswith("\n"))
+
+    print("OK - metrics smoke tests passed:")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Pré-compressão dos estáticos (passo de build/deploy).
+
+Gera `<arquivo>.gz` (gzip nível 9) e, se o pacote brotli estiver instalado,
+`<arquivo>.br` (qualidade 11) ao lado de cada CSS/JS/SVG/JSON em static/ com
+pelo menos COMPRESSION_MIN_SIZE bytes. services/compression.py serve essas
+variantes direto quando o cliente aceita e elas não são mais antigas que o
+original. Variantes que não ficam menores são descartadas.
+
+Uso:
+    python scripts/precompress_static.py           # gera/atualiza
+    python scripts/precompress_static.py --clean   # remove .gz/.br
+"""
+
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+EXTENSIONS = (".css", ".js", ".svg", ".json", ".html", ".txt")
+SUFFIXES = (".gz", ".br")
+
+
+def _static_root() -> str:
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+
+def _iter_sources(root: str):
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.endswith(EXTENSIONS):
+                yield os.path.join(dirpath, name)
+
+
+def _write_variant(source: str, suffix: str, payload: bytes, original_size: int) -> int:
+    target = source + suffix
+    if len(payload) >= original_size:
+        if os.path.exists(target):
+            os.remove(target)
+        return 0
+    with open(target, "wb") as fh:
+        fh.write(payload)
+    # mesmo mtime do original: o servidor só usa variantes não mais antigas
+    stat = os.stat(source)
+    os.utime(target, (stat.st_atime, stat.st_mtime))
+    return len(payload)
+
+
+def clean(root: str) -> int:
+    removed = 0
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith(SUFFIXES):
+                os.remove(os.path.join(dirpath, name))
+                removed += 1
+    return removed
+
+
+def precompress(root: str, min_size: int) -> dict:
+    totals = {"files": 0, "original": 0, "gzip": 0, "br": 0}
+    for source in _iter_sources(root):
+        with open(source, "rb") as fh:
+            data = fh.read()
+        if len(data) < min_size:
+            continue
+        totals["files"] += 1
+        totals["original"] += len(data)
+        totals["gzip"] += _write_variant(source, ".gz", gzip.compress(data, compresslevel=9, mtime=0), len(data))
+        if brotli is not None:
+            totals["br"] += _write_variant(source, ".br", brotli.compress(data, quality=11), len(data))
+    return totals
+
+
+def main():
+    root = _static_root()
+    if "--clean" in sys.argv[1:]:
+        print(f"{clean(root)} variantes removidas.")
+        return 0
+    min_size = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    totals = precompress(root, min_size)
+    print(
+        f"{totals['files']} arquivos: {totals['original'] / 1024:.0f} KB -> "
+        f"gzip {totals['gzip'] / 1024:.0f} KB"
+        + (f", brotli {totals['br'] / 1024:.0f} KB" if brotli is not None else " (brotli não instalado)")
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
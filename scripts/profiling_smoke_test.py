@@ -0,0 +1,150 @@
+import json
+import os
+import pstats
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="profiling_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'profiling.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def _login(client) -> None:
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    client.post(
+        "/login",
+        data={"login_id": "perfil", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from config import Config
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+    from services.profiling import diff_profiles, enforce_disk_budget, list_profiles
+
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    directory = tempfile.mkdtemp(prefix="profiles_")
+
+    class ProfilingConfig(Config):
+        PROFILING_TOKEN = "segredo-perfil"
+        PROFILING_DIR = directory
+        PROFILING_SAMPLE_INTERVAL_MS = 1
+
+    app = app_module.create_app(ProfilingConfig)
+
+    with app.app_context():
+        user = User(username="perfil", email="perfil@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+        for i in range(3000):
+            db.session.add(
+                Entrada(user_id=user.id, data=date.today() - timedelta(days=i % 400), tipo="despesa",
+                        descricao=f"item {i}", categoria="mercado", valor=10.0 + i % 50)
+            )
+        db.session.commit()
+
+    client = app.test_client()
+    _login(client)
+
+    plain = client.get("/dados")
+    check("no_header_no_profile", plain.status_code == 200 and "X-Profile-Id" not in plain.headers)
+    wrong = client.get("/dados", headers={"X-Profile": "cprofile", "X-Profile-Token": "errado"})
+    check("wrong_token_ignored", wrong.status_code == 200 and "X-Profile-Id" not in wrong.headers)
+    check("nothing_written", not os.listdir(directory))
+
+    token = {"X-Profile-Token": "segredo-perfil"}
+    profiled = client.get("/dados", headers={"X-Profile": "cprofile", **token})
+    capture_id = profiled.headers.get("X-Profile-Id")
+    check("cprofile_header", profiled.status_code == 200 and bool(capture_id))
+    check("pstats_file", os.path.exists(os.path.join(directory, f"{capture_id}.pstats")))
+    stats = pstats.Stats(os.path.join(directory, f"{capture_id}.pstats"))
+    check("pstats_has_view", any(name == "dados" for (_f, _l, name) in stats.stats))
+    with open(os.path.join(directory, f"{capture_id}.json"), encoding="utf-8") as fh:
+        meta = json.load(fh)
+    check("metadata", meta["endpoint"] == "entradas.dados" and meta["status"] == 200
+          and meta["trigger"] == "header" and meta["user_id"] is not None and meta["duration_ms"] > 0)
+    check("metadata_db", meta.get("db", {}).get("queries", 0) >= 1)
+
+    sampled = client.get("/dados", headers={"X-Profile": "sample", **token})
+    sample_id = sampled.headers["X-Profile-Id"]
+    with open(os.path.join(directory, f"{sample_id}.collapsed"), encoding="utf-8") as fh:
+        lines = fh.read().splitlines()
+    check("collapsed_file", bool(lines) and all(line.rpartition(" ")[2].isdigit() for line in lines))
+    check("collapsed_starts_at_view", all(not line.startswith("dispatch_request (profiling.py") for line in lines))
+
+    listed = list_profiles(directory)
+    check("list_newest_first", [item["id"] for item in listed[:2]] == [sample_id, capture_id])
+
+    # amostragem por endpoint: 100% em entradas.dados, nada nos demais
+    class SampledConfig(ProfilingConfig):
+        PROFILING_TOKEN = None
+        PROFILING_SAMPLE_RATE = 1.0
+        PROFILING_ENDPOINTS = ["entradas.dados"]
+        PROFILING_MODE = "cprofile"
+        DB_AUTO_SETUP = False
+
+    sampled_app = app_module.create_app(SampledConfig)
+    sampled_client = sampled_app.test_client()
+    _login(sampled_client)
+    auto = sampled_client.get("/dados")
+    check("sample_rate_profiles", "X-Profile-Id" in auto.headers)
+    check("other_endpoint_skipped", "X-Profile-Id" not in sampled_client.get("/app/reports/data?period=month").headers)
+    check("header_needs_token", "X-Profile-Id" not in sampled_client.get("/app/reports/data", headers={"X-Profile": "1", **token}).headers)
+    auto_meta = [item for item in list_profiles(directory) if item["id"] == auto.headers["X-Profile-Id"]][0]
+    check("sample_rate_trigger", auto_meta["trigger"] == "sample_rate")
+
+    report = diff_profiles(directory, capture_id, auto.headers["X-Profile-Id"], top=5)
+    check("diff_rows", 0 < len(report["rows"]) <= 5 and all("delta_pct" in row for row in report["rows"]))
+
+    runner = app.test_cli_runner()
+    out = runner.invoke(args=["profiles", "list", "--endpoint", "entradas.dados"])
+    check("cli_list", out.exit_code == 0 and capture_id in out.output and sample_id in out.output)
+    out = runner.invoke(args=["profiles", "diff", capture_id[:-2], auto.headers["X-Profile-Id"], "--top", "3"])
+    check("cli_diff", out.exit_code == 0 and " pp " in out.output)
+    out = runner.invoke(args=["profiles", "diff", "nao-existe", capture_id])
+    check("cli_diff_missing", out.exit_code != 0 and "não encontrada" in out.output)
+
+    # orçamento de disco: sobra só a captura mais recente
+    newest = list_profiles(directory)[0]
+    newest_size = sum(
+        os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory) if name.startswith(newest["id"])
+    )
+    removed = enforce_disk_budget(directory, newest_size)
+    check("disk_budget_prunes", removed == 2 and [item["id"] for item in list_profiles(directory)] == [newest["id"]])
+
+    print("OK - profiling smoke tests passed:")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="projection_alerts_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'alerts.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.notification_model import Notification
+    from models.recurrence_model import Recurrence
+    from models.user_model import User
+    from services.projection_alerts import ALERT_TYPE, run_projection_alerts
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    today = date.today()
+    users = {}
+    with app.app_context():
+        def add_user(name, plan="pro", active=True, verified=True):
+            user = User(username=name, email=f"{name}@example.test")
+            user.set_password("Secret123!@#")
+            user.is_verified = verified
+            user.plan = plan
+            user.plan_expires_at = datetime.utcnow() + timedelta(days=30 if active else -1)
+            db.session.add(user)
+            db.session.flush()
+            users[name] = user.id
+            return user.id
+
+        def add(user_id, tipo, valor, day):
+            db.session.add(
+                Entrada(
+                    user_id=user_id,
+                    data=day,
+                    tipo=tipo,
+                    descricao=f"{tipo}-{valor}",
+                    categoria="outros",
+                    valor=valor,
+                    status="recebido" if tipo == "receita" and day <= today else None,
+                    received_at=day if tipo == "receita" and day <= today else None,
+                )
+            )
+
+        # quebra no dia 5 por lançamento
+        uid = add_user("quebra")
+        add(uid, "receita", 500.0, today - timedelta(days=2))
+        add(uid, "despesa", 800.0, today + timedelta(days=5))
+        # quebra só pela recorrência expandida
+        uid = add_user("recorrente")
+        add(uid, "receita", 100.0, today - timedelta(days=2))
+        rec_day = today + timedelta(days=3)
+        db.session.add(
+            Recurrence(
+                user_id=uid,
+                name="aluguel",
+                tipo="despesa",
+                descricao="aluguel",
+                categoria="moradia",
+                valor=900.0,
+                day_of_month=rec_day.day,
+                is_enabled=True,
+            )
+        )
+        # saldo folgado
+        uid = add_user("folgado")
+        add(uid, "receita", 5000.0, today - timedelta(days=2))
+        add(uid, "despesa", 800.0, today + timedelta(days=5))
+        # quebra fora da janela de 14 dias
+        uid = add_user("distante")
+        add(uid, "despesa", 800.0, today + timedelta(days=40))
+        # não elegíveis (quebrariam)
+        for name, kw in (("vencido", {"active": False}), ("basico", {"plan": "basic"}), ("naoverificado", {"verified": False})):
+            uid = add_user(name, **kw)
+            add(uid, "despesa", 800.0, today + timedelta(days=2))
+        # volume para exercitar vários lotes
+        for i in range(40):
+            uid = add_user(f"lote{i}")
+            add(uid, "receita", 1000.0, today - timedelta(days=1))
+            add(uid, "despesa", 900.0 + (i % 3) * 100, today + timedelta(days=1 + i % 10))
+        db.session.commit()
+
+    def alerts_for(name):
+        return Notification.query.filter_by(user_id=users[name], type=ALERT_TYPE).all()
+
+    with app.app_context():
+        dry = run_projection_alerts(workers=1, chunk_size=7, dry_run=True, db_budget=0)
+        check("dry_run_scans_only_eligible", dry.users == 44)
+        check("dry_run_writes_nothing", dry.created == 0 and Notification.query.count() == 0)
+
+        report = run_projection_alerts(workers=2, chunk_size=7, db_budget=0)
+        stats = report.as_dict()
+        check("pool_scans_all_chunks", report.users == 44 and report.chunks == 7 and report.errors == 0)
+        check("pool_matches_inline", report.breaks == dry.breaks)
+        check("throughput_reported", stats["users_per_second"] > 0 and stats["db_seconds"] > 0)
+
+        quebra = alerts_for("quebra")
+        check("break_alert_created", len(quebra) == 1)
+        check(
+            "break_alert_keyed_by_date",
+            quebra[0].source_key == f"projection:break:{(today + timedelta(days=5)).isoformat()}"
+            and quebra[0].href == "/app/projection",
+        )
+        check("recurrence_break_alert", len(alerts_for("recorrente")) == 1)
+        check("healthy_user_no_alert", not alerts_for("folgado"))
+        check("outside_horizon_no_alert", not alerts_for("distante"))
+        check(
+            "ineligible_users_skipped",
+            not alerts_for("vencido") and not alerts_for("basico") and not alerts_for("naoverificado"),
+        )
+
+        again = run_projection_alerts(workers=1, chunk_size=50, db_budget=0)
+        check("rerun_idempotent", again.created == 0 and again.breaks == report.breaks)
+
+        wide = run_projection_alerts(workers=1, horizon_days=60, db_budget=0)
+        check("wider_horizon_adds_alert", len(alerts_for("distante")) == 1 and wide.created == 1)
+
+        # orçamento apertado: a carga média fica dentro do limite
+        budgeted = run_projection_alerts(workers=2, chunk_size=5, db_budget=0.2, dry_run=True)
+        check("budget_throttles", budgeted.throttled_s > 0)
+        check("budget_respected", budgeted.db_load <= 0.2 * 1.5)
+
+    runner = app.test_cli_runner()
+    out = runner.invoke(args=["projection-alerts", "--workers", "1", "--dry-run"])
+    check("cli_ok", out.exit_code == 0 and "usuários/s" in out.output)
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    client.post(
+        "/login",
+        data={"login_id": "quebra", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+    feed = client.get("/app/notifications/data").get_json() or {}
+    items = [item for item in feed.get("items") or [] if item["type"] == ALERT_TYPE]
+    check("feed_shows_alert", len(items) == 1 and items[0]["read_at"] is None)
+    check("feed_unread_count", feed.get("unread_count", 0) >= 1)
+
+    print(f"OK - projection alerts smoke tests passed ({stats['users_per_second']} usuários/s):")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Projeção: paridade com o cálculo antigo e custo x tamanho do histórico.
+
+1. Paridade: compara saldo inicial e eventos da janela do compute_projection
+   com a implementação de referência (carrega todas as entradas e soma em
+   Python), nos modos cash e accrual, em várias janelas.
+2. Custo: projeção de 60 dias para uma conta com 10 anos de histórico e para
+   uma conta nova; as duas devem custar praticamente o mesmo.
+3. What-if: com o baseline em cache, aplicar overrides (shift, redução,
+   parcelamento, extra) deve dar o mesmo resultado do cálculo sem cache e
+   responder em poucos milissegundos.
+4. Cache de resultado: a segunda chamada igual vem do cache (mesmo
+   resultado, bem mais rápida) e qualquer nova entrada invalida.
+5. Janelas longas: 30 dias, 1 ano e 5 anos, separando o tempo total (banco +
+   série) do tempo só da série/cobertura sobre o baseline.
+
+Parâmetros via env: PROJ_BENCH_YEARS (10), PROJ_BENCH_PER_MONTH (40),
+PROJ_BENCH_RUNS (20).
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="projection_bench_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'projection.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def _seed_user(db, User, Entrada, username: str, *, years: int, per_month: int, rng: random.Random) -> int:
+    user = User(username=username, email=f"{username}@example.test")
+    user.set_password("Secret123!@#")
+    user.is_verified = True
+    user.plan = "pro"
+    user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+    db.session.add(user)
+    db.session.flush()
+
+    today = date.today()
+    rows = []
+    total = int(years * 12 * per_month)
+    for _ in range(total):
+        tipo = rng.choice(["receita", "despesa", "despesa"])
+        day = today - timedelta(days=rng.randint(-120, max(1, years * 365)))
+        status = rng.choice(
+            ["pago", "em_andamento", "nao_pago", None] if tipo == "despesa" else ["recebido", None, "", "pendente"]
+        )
+        paid_at = received_at = None
+        # pagamentos/recebimentos fora da data original cruzam as bordas da janela
+        if status == "pago" and rng.random() < 0.9:
+            paid_at = day + timedelta(days=rng.randint(-20, 20))
+        if status == "recebido" and rng.random() < 0.9:
+            received_at = day + timedelta(days=rng.randint(-20, 20))
+        rows.append(
+            {
+                "user_id": user.id,
+                "data": day,
+                "tipo": tipo,
+                "descricao": "bench",
+                "categoria": "outros",
+                "valor": round(rng.uniform(1, 2500), 2),
+                "status": status,
+                "paid_at": paid_at,
+                "received_at": received_at,
+                "priority": rng.choice(["alta", "media", "baixa"]),
+            }
+        )
+    if rows:
+        db.session.execute(db.insert(Entrada), rows)
+    db.session.commit()
+    return user.id
+
+
+def _reference(db, Entrada, engine, user_id: int, start: date, end: date, mode: str):
+    """Cálculo antigo: todas as entradas do usuário em memória."""
+    saldo = 0.0
+    uids = set()
+    for e in db.session.query(Entrada).filter(Entrada.user_id == user_id).all():
+        ev_date = engine._resolve_entry_date(e, mode)
+        valor = float(e.valor or 0.0)
+        if ev_date < start:
+            if not engine._should_count_before_start(e, mode):
+                continue
+            saldo += valor if e.tipo == "receita" else -valor
+            continue
+        if start <= ev_date <= end:
+            uids.add(f"entry-{e.id}")
+    return round(saldo, 2), uids
+
+
+def _timed(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+    from services import projection_engine as engine
+
+    years = int(os.getenv("PROJ_BENCH_YEARS", "10"))
+    per_month = int(os.getenv("PROJ_BENCH_PER_MONTH", "40"))
+    runs = int(os.getenv("PROJ_BENCH_RUNS", "20"))
+    rng = random.Random(7)
+    failures = []
+
+    with app_module.app.app_context():
+        old_id = _seed_user(db, User, Entrada, "veterano", years=years, per_month=per_month, rng=rng)
+        new_id = _seed_user(db, User, Entrada, "novato", years=0, per_month=0, rng=rng)
+        for _ in range(10):
+            db.session.add(
+                Entrada(user_id=new_id, data=date.today(), tipo="despesa", descricao="x", categoria="outros", valor=10.0)
+            )
+        db.session.commit()
+
+        today = date.today()
+        windows = [
+            (today, today + timedelta(days=59)),
+            (today - timedelta(days=365), today - timedelta(days=300)),
+            (today - timedelta(days=5 * 365), today - timedelta(days=5 * 365 - 30)),
+        ]
+        checks = 0
+        for mode in ("cash", "accrual"):
+            for start, end in windows:
+                ref_saldo, ref_uids = _reference(db, Entrada, engine, old_id, start, end, mode)
+                result = engine.compute_projection(
+                    user_id=old_id, start=start, end=end, mode=mode, include_recurring=False
+                )
+                uids = {ev["uid"] for ev in result["events"]}
+                checks += 1
+                if abs(result["saldo_inicial"] - ref_saldo) > 0.011 or uids != ref_uids:
+                    failures.append(
+                        f"{mode} {start}..{end}: saldo {result['saldo_inicial']} x {ref_saldo}, "
+                        f"eventos {len(uids)} x {len(ref_uids)}"
+                    )
+
+        start, end = today, today + timedelta(days=59)
+
+        def project(user_id):
+            return lambda: engine.compute_projection(
+                user_id=user_id, start=start, end=end, mode="cash", use_cache=False
+            )
+
+        old_ms = _timed(project(old_id), runs)
+        new_ms = _timed(project(new_id), runs)
+        ref_ms = _timed(lambda: _reference(db, Entrada, engine, old_id, start, end, "cash"), max(3, runs // 4))
+        total_rows = db.session.query(Entrada).filter(Entrada.user_id == old_id).count()
+
+        # What-if sobre o baseline em cache
+        window_ids = [
+            ev["id"]
+            for ev in engine.compute_projection(user_id=old_id, start=start, end=end, use_cache=False)["events"]
+            if ev.get("source") == "entry" and ev.get("tipo") == "despesa"
+        ]
+        scenarios = [
+            {},
+            {"reserve": 500},
+            {"reductions": [{"categoria": "outros", "percent": 30}]},
+            {
+                "shifts": [{"entrada_id": eid, "new_date": (end - timedelta(days=i)).isoformat()} for i, eid in enumerate(window_ids[:5])],
+                "splits": [{"entrada_id": eid, "parts": 3} for eid in window_ids[5:8]],
+                "extras": [{"date": (start + timedelta(days=3)).isoformat(), "valor": 900, "tipo": "receita"}],
+            },
+        ]
+        for overrides in scenarios:
+            cold = engine.compute_projection(
+                user_id=old_id, start=start, end=end, mode="cash", overrides=overrides, use_cache=False
+            )
+            warm = engine.compute_projection(user_id=old_id, start=start, end=end, mode="cash", overrides=overrides)
+            checks += 1
+            if cold != warm:
+                failures.append(f"what-if {sorted(overrides)}: cache diverge do cálculo completo")
+
+        whatif_state = {"i": 0}
+
+        def whatif():
+            whatif_state["i"] += 1
+            pct = whatif_state["i"] % 90 + 1
+            engine.compute_projection(
+                user_id=old_id,
+                start=start,
+                end=end,
+                mode="cash",
+                overrides={"reductions": [{"categoria": "outros", "percent": pct}]},
+            )
+
+        whatif_ms = _timed(whatif, runs)
+
+        # Cache de resultado (sem overrides, como ao reabrir a página)
+        engine._result_cache.clear()
+        started = time.perf_counter()
+        first = engine.compute_projection(user_id=old_id, start=start, end=end, mode="cash")
+        miss_ms = (time.perf_counter() - started) * 1000
+        hit_ms = _timed(lambda: engine.compute_projection(user_id=old_id, start=start, end=end, mode="cash"), runs)
+        second = engine.compute_projection(user_id=old_id, start=start, end=end, mode="cash")
+        checks += 1
+        if second != first or engine.projection_cache_stats()["result"]["hits"] < 1:
+            failures.append("cache de resultado: hit diverge do cálculo")
+        db.session.add(
+            Entrada(user_id=old_id, data=start, tipo="receita", descricao="nova", categoria="outros", valor=123.0)
+        )
+        db.session.commit()
+        third = engine.compute_projection(user_id=old_id, start=start, end=end, mode="cash")
+        checks += 1
+        if round(third["saldo_final"] - first["saldo_final"], 2) != 123.0:
+            failures.append("cache de resultado: nova entrada não invalidou")
+        cache_stats = engine.projection_cache_stats()["result"]
+
+        # Janelas longas (terminando hoje, onde o histórico é denso)
+        range_rows = []
+        for label, days in (("30 dias", 30), ("1 ano", 365), ("5 anos", 5 * 365)):
+            r_start, r_end = today - timedelta(days=days - 1), today
+            total_ms = _timed(
+                lambda: engine.compute_projection(
+                    user_id=old_id, start=r_start, end=r_end, mode="cash", use_cache=False
+                ),
+                runs,
+            )
+            baseline = engine.build_projection_baseline(user_id=old_id, start=r_start, end=r_end, mode="cash")
+            overrides = {"reductions": [{"categoria": "outros", "percent": 20}]}
+            series_ms = _timed(lambda: engine.project_baseline(baseline, overrides=overrides), runs)
+            range_rows.append((label, len(baseline.events), total_ms, series_ms))
+
+    print(f"Paridade: {checks - len(failures)}/{checks} janelas iguais à referência")
+    for item in failures:
+        print(f"  - {item}")
+    print(f"Projeção 60 dias (mediana de {runs}):")
+    print(f"  {f'conta com {years} anos ({total_rows} entradas)':<45} {old_ms:8.2f} ms")
+    print(f"  {'conta nova':<45} {new_ms:8.2f} ms")
+    print(f"  {'referência (carrega todo o histórico)':<45} {ref_ms:8.2f} ms")
+    print(f"  {'what-if com baseline em cache':<45} {whatif_ms:8.2f} ms")
+    print(f"Cache de resultado: miss {miss_ms:.2f} ms, hit {hit_ms:.2f} ms, "
+          f"{cache_stats['items']} itens / {cache_stats['bytes'] / 1024:.1f} KiB")
+    print("Janelas longas:")
+    for label, n_events, total_ms, series_ms in range_rows:
+        print(f"  {f'{label} ({n_events} eventos)':<30} total {total_ms:8.2f} ms  série {series_ms:8.2f} ms")
+
+    if failures:
+        print("FAIL - projeção diverge da referência")
+        return 1
+    print("OK - projection bench")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="projection_compare_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'compare.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.projection_scenario_model import ProjectionScenario
+    from models.user_model import User
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    today = date.today()
+    with app.app_context():
+        user = User(username="compare", email="compare@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+        rows = [
+            ("receita", 3000.0, today + timedelta(days=5), "salario", None),
+            ("despesa", 1800.0, today + timedelta(days=2), "moradia", "nao_pago"),
+            ("despesa", 900.0, today + timedelta(days=10), "mercado", "nao_pago"),
+            ("despesa", 2500.0, today + timedelta(days=20), "outros", "nao_pago"),
+        ]
+        entry_ids = []
+        for tipo, valor, day, categoria, status in rows:
+            e = Entrada(
+                user_id=user.id, data=day, tipo=tipo, descricao=categoria, categoria=categoria, valor=valor, status=status
+            )
+            db.session.add(e)
+            db.session.flush()
+            entry_ids.append(e.id)
+        scenario = ProjectionScenario(
+            user_id=user.id,
+            name="Adiar aluguel",
+            data_json='{"shifts": [{"entrada_id": %d, "new_date": "%s"}]}'
+            % (entry_ids[1], (today + timedelta(days=6)).isoformat()),
+        )
+        db.session.add(scenario)
+        db.session.commit()
+        scenario_id = scenario.id
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    resp = client.post(
+        "/login",
+        data={"login_id": "compare", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+    check("login_ok", resp.status_code in {302, 303})
+    headers = {"X-CSRF-Token": csrf}
+
+    start, end = today.isoformat(), (today + timedelta(days=30)).isoformat()
+    reduction = {"reductions": [{"categoria": "outros", "percent": 50}]}
+    resp = client.post(
+        "/app/projection/compare",
+        json={
+            "start": start,
+            "end": end,
+            "scenario_ids": [scenario_id, 999999],
+            "variants": [{"label": "Cortar outros", "overrides": reduction}],
+        },
+        headers=headers,
+    )
+    check("compare_ok", resp.status_code == 200)
+    data = resp.get_json() or {}
+    variants = data.get("variants") or []
+    check("compare_variants", [v.get("key") for v in variants] == ["base", f"scenario-{scenario_id}", "custom-1"])
+    check("compare_missing_scenario", data.get("missing_scenarios") == [999999])
+    check("compare_both_modes", all(set(v["results"]) == {"cash", "accrual"} for v in variants))
+
+    # Cada resumo bate com a projeção completa do mesmo cenário
+    for variant, overrides in zip(variants, [None, None, reduction]):
+        for mode in ("cash", "accrual"):
+            body = {"start": start, "end": end, "mode": mode}
+            if variant.get("scenario_id"):
+                body["scenario_id"] = variant["scenario_id"]
+            elif overrides is not None:
+                body["overrides"] = overrides
+            full = client.post("/app/projection/data", json=body, headers=headers).get_json() or {}
+            summary = variant["results"][mode]
+            check(
+                f"summary_matches_full_{variant['key']}_{mode}",
+                summary["saldo_final"] == full.get("saldo_final")
+                and summary["min_saldo"] == full.get("min_saldo")
+                and summary["min_saldo_date"] == full.get("min_saldo_date")
+                and summary["break_date"] == full.get("break_date")
+                and summary["coverage"] == full.get("coverage"),
+            )
+
+    base_cash = variants[0]["results"]["cash"]
+    check("base_breaks", base_cash["break_date"] == (today + timedelta(days=2)).isoformat())
+    check("shift_avoids_break_day", variants[1]["results"]["cash"]["break_date"] != base_cash["break_date"])
+
+    resp = client.post("/app/projection/compare", json={"modes": ["bogus"]}, headers=headers)
+    check("invalid_modes_422", resp.status_code == 422)
+    resp = client.post(
+        "/app/projection/compare",
+        json={"variants": [{"overrides": {}}] * 50},
+        headers=headers,
+    )
+    check("too_many_variants_422", resp.status_code == 422)
+
+    print("OK - projection compare smoke tests passed:")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="projection_optimizer_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'optimizer.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    today = date.today()
+    with app.app_context():
+        user = User(username="otimizador", email="otimizador@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+
+        def add(tipo, valor, day, priority="media", **kw):
+            e = Entrada(
+                user_id=user.id,
+                data=day,
+                tipo=tipo,
+                descricao=f"{tipo}-{valor}",
+                categoria="outros",
+                valor=valor,
+                priority=priority,
+                **kw,
+            )
+            db.session.add(e)
+            db.session.flush()
+            return e.id
+
+        add("receita", 1000.0, today - timedelta(days=3), status="recebido", received_at=today - timedelta(days=3))
+        flexible_id = add("despesa", 1500.0, today + timedelta(days=2), priority="baixa", status="nao_pago")
+        fixed_id = add("despesa", 800.0, today + timedelta(days=3), priority="alta", status="nao_pago")
+        add("receita", 3000.0, today + timedelta(days=10))
+        db.session.commit()
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    resp = client.post(
+        "/login",
+        data={"login_id": "otimizador", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+    check("login_ok", resp.status_code in {302, 303})
+    headers = {"X-CSRF-Token": csrf}
+    body = {"start": today.isoformat(), "end": (today + timedelta(days=30)).isoformat()}
+
+    before = client.post("/app/projection/data", json=body, headers=headers).get_json() or {}
+    check("baseline_breaks", before.get("break_date") == (today + timedelta(days=2)).isoformat())
+
+    resp = client.post("/app/projection/optimize", json=body, headers=headers)
+    check("optimize_ok", resp.status_code == 200)
+    data = resp.get_json() or {}
+    check("optimize_resolved", data.get("resolved") is True)
+    check(
+        "optimize_minimal_shift",
+        data["suggested"]
+        == {
+            "shifts": [{"entrada_id": flexible_id, "new_date": (today + timedelta(days=10)).isoformat()}],
+            "splits": [],
+        },
+    )
+    check("high_priority_untouched", all(c["entrada_id"] != fixed_id for c in data.get("changes") or []))
+    check("after_summary_no_break", data["after"]["break_date"] is None)
+
+    # Overrides sugeridos funcionam em /data e podem ser salvos como cenário
+    after = client.post("/app/projection/data", json={**body, "overrides": data["overrides"]}, headers=headers).get_json()
+    check("overrides_apply_in_data", after.get("break_date") is None and after.get("min_saldo", -1) >= 0)
+    resp = client.post(
+        "/app/projection/scenarios", json={"name": "Sugestão", "overrides": data["overrides"]}, headers=headers
+    )
+    check("overrides_saved_as_scenario", resp.status_code == 200)
+
+    # Adiamento curto sem parcelar: melhora, mas não resolve
+    resp = client.post(
+        "/app/projection/optimize",
+        json={**body, "max_shift_days": 5, "allow_splits": False},
+        headers=headers,
+    )
+    data = resp.get_json() or {}
+    check("short_shift_unresolved", data.get("resolved") is False)
+    check("short_shift_within_limit", all(c.get("to") <= (today + timedelta(days=7)).isoformat() for c in data["changes"]))
+
+    resp = client.post("/app/projection/optimize", json={**body, "max_parts": 1}, headers=headers)
+    check("invalid_params_422", resp.status_code == 422)
+
+    # Adiamento curto basta: saldo 100, despesa de 150 no dia 5, receita de 180 no dia 10.
+    # A despesa já está descontada nos saldos: ir para o dia 10 resolve (sem parcelar).
+    with app.app_context():
+        short = User(username="otimizador2", email="otimizador2@example.test")
+        short.set_password("Secret123!@#")
+        short.is_verified = True
+        short.plan = "pro"
+        short.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(short)
+        db.session.flush()
+        db.session.add(Entrada(user_id=short.id, data=today - timedelta(days=1), tipo="receita", descricao="saldo",
+                               categoria="outros", valor=100.0, status="recebido", received_at=today - timedelta(days=1)))
+        expense = Entrada(user_id=short.id, data=today + timedelta(days=5), tipo="despesa", descricao="conta",
+                          categoria="outros", valor=150.0, priority="media", status="nao_pago")
+        db.session.add(expense)
+        db.session.add(Entrada(user_id=short.id, data=today + timedelta(days=10), tipo="receita", descricao="extra",
+                               categoria="outros", valor=180.0))
+        db.session.commit()
+        expense_id = expense.id
+
+    second = app.test_client()
+    second.get("/login")
+    with second.session_transaction() as sess:
+        csrf2 = sess.get("_csrf_token")
+    second.post("/login", data={"login_id": "otimizador2", "password": "Secret123!@#", "csrf_token": csrf2})
+    expected = {"shifts": [{"entrada_id": expense_id, "new_date": (today + timedelta(days=10)).isoformat()}], "splits": []}
+    for label, extra in (("short_shift_preferred_over_split", {}), ("short_shift_without_splits", {"allow_splits": False})):
+        data = second.post("/app/projection/optimize", json={**body, **extra}, headers={"X-CSRF-Token": csrf2}).get_json()
+        check(label, data["resolved"] is True and data["suggested"] == expected)
+
+    # Déficit posterior independente (despesa "alta", imóvel, no dia 20) não impede o adiamento curto.
+    with app.app_context():
+        later = User(username="otimizador3", email="otimizador3@example.test")
+        later.set_password("Secret123!@#")
+        later.is_verified = True
+        later.plan = "pro"
+        later.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(later)
+        db.session.flush()
+        db.session.add(Entrada(user_id=later.id, data=today - timedelta(days=1), tipo="receita", descricao="saldo",
+                               categoria="outros", valor=100.0, status="recebido", received_at=today - timedelta(days=1)))
+        expense = Entrada(user_id=later.id, data=today + timedelta(days=5), tipo="despesa", descricao="conta",
+                          categoria="outros", valor=150.0, priority="media", status="nao_pago")
+        db.session.add(expense)
+        db.session.add(Entrada(user_id=later.id, data=today + timedelta(days=10), tipo="receita", descricao="extra",
+                               categoria="outros", valor=180.0))
+        db.session.add(Entrada(user_id=later.id, data=today + timedelta(days=20), tipo="despesa", descricao="imposto",
+                               categoria="outros", valor=500.0, priority="alta", status="nao_pago"))
+        db.session.commit()
+        later_expense_id = expense.id
+
+    third = app.test_client()
+    third.get("/login")
+    with third.session_transaction() as sess:
+        csrf3 = sess.get("_csrf_token")
+    third.post("/login", data={"login_id": "otimizador3", "password": "Secret123!@#", "csrf_token": csrf3})
+    data = third.post("/app/projection/optimize", json=body, headers={"X-CSRF-Token": csrf3}).get_json()
+    check("later_deficit_independent", data["suggested"]["shifts"][:1] == [
+        {"entrada_id": later_expense_id, "new_date": (today + timedelta(days=10)).isoformat()}
+    ] and not data["suggested"]["splits"] and data["first_violation"] == (today + timedelta(days=20)).isoformat())
+
+    print("OK - projection optimizer smoke tests passed:")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
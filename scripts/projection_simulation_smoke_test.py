@@ -0,0 +1,145 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="projection_sim_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'simulation.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    today = date.today()
+    rng = random.Random(11)
+    with app.app_context():
+        user = User(username="simulacao", email="simulacao@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+
+        rows = []
+        # histórico: mercado quase todo dia, extras de vez em quando
+        for back in range(1, 181):
+            day = today - timedelta(days=back)
+            if rng.random() < 0.6:
+                rows.append(("despesa", "mercado", day, round(rng.lognormvariate(4.0, 0.5), 2)))
+            if rng.random() < 0.05:
+                rows.append(("receita", "extras", day, round(rng.uniform(200, 600), 2)))
+        rows.append(("receita", "salario", today + timedelta(days=5), 4000.0))
+        rows.append(("despesa", "moradia", today + timedelta(days=10), 1800.0))
+        # já lançado no futuro: sai do baseline e vira simulação
+        rows.append(("despesa", "mercado", today + timedelta(days=3), 5000.0))
+        for tipo, categoria, day, valor in rows:
+            db.session.add(
+                Entrada(
+                    user_id=user.id,
+                    data=day,
+                    tipo=tipo,
+                    descricao=categoria,
+                    categoria=categoria,
+                    valor=valor,
+                    status="pago" if tipo == "despesa" and day <= today else None,
+                    paid_at=day if tipo == "despesa" and day <= today else None,
+                )
+            )
+        db.session.commit()
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    resp = client.post(
+        "/login",
+        data={"login_id": "simulacao", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+    check("login_ok", resp.status_code in {302, 303})
+    headers = {"X-CSRF-Token": csrf}
+
+    body = {"start": today.isoformat(), "end": (today + timedelta(days=59)).isoformat(), "seed": 7}
+    started = time.perf_counter()
+    resp = client.post("/app/projection/simulate", json=body, headers=headers)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    check("simulate_ok", resp.status_code == 200)
+    data = resp.get_json() or {}
+    days = data.get("days") or []
+    check("simulate_days", len(days) == 60)
+    check("bands_ordered", all(d["p10"] <= d["p50"] <= d["p90"] for d in days))
+    check("p_negative_range", all(0.0 <= d["p_negative"] <= 1.0 for d in days))
+    fitted = {(s["tipo"], s["categoria"]) for s in data.get("streams") or []}
+    check("streams_fitted", ("despesa", "mercado") in fitted and ("receita", "extras") in fitted)
+    check("stream_without_history_skipped", ("despesa", "transporte") not in fitted)
+    check("reserve_95_non_negative", data.get("reserve_95", -1) >= 0)
+    check("p_break_range", 0.0 <= data.get("p_break", -1) <= 1.0)
+    # reserva sugerida é relativa à reserva mínima pedida (o P5 do mínimo nunca passa do saldo inicial)
+    floor = 1_000_000.0
+    floored = client.post("/app/projection/simulate", json={**body, "reserve_min": floor}, headers=headers).get_json() or {}
+    check("reserve_95_respects_reserve_min", floored["reserve_95"] >= floor - data["saldo_inicial"] - 0.01)
+    check("today_is_deterministic", days[0]["p10"] == days[0]["p90"])
+    check("future_spreads", days[-1]["p10"] < days[-1]["p90"])
+    # o mercado lançado no futuro (5000) foi trocado pela simulação
+    full = client.post("/app/projection/data", json=body, headers=headers).get_json() or {}
+    check("planned_variable_replaced", days[3]["p50"] > full["daily"][3]["saldo"] + 4000)
+
+    again = client.post("/app/projection/simulate", json=body, headers=headers).get_json() or {}
+    check("same_seed_same_result", again.get("days") == days)
+
+    capped = client.post("/app/projection/simulate", json={**body, "paths": 20000}, headers=headers).get_json() or {}
+    check("paths_capped", capped.get("paths") == app.config["PROJECTION_SIM_PATHS"])
+
+    resp = client.post("/app/projection/simulate", json={**body, "paths": 0}, headers=headers)
+    check("invalid_paths_422", resp.status_code == 422)
+
+    # Conta nova (30 dias de histórico, mercado dia sim, dia não): frequência sobre 30 dias, não 180
+    from services.projection_simulation import fit_stream_models
+
+    with app.app_context():
+        novo = User(username="simulacao_nova", email="simulacao_nova@example.test")
+        novo.set_password("Secret123!@#")
+        db.session.add(novo)
+        db.session.flush()
+        for back in range(2, 31, 2):
+            day = today - timedelta(days=back)
+            db.session.add(Entrada(user_id=novo.id, data=day, tipo="despesa", descricao="mercado",
+                                   categoria="mercado", valor=50.0 + back, status="pago", paid_at=day))
+        db.session.commit()
+        fitted_new = fit_stream_models(novo.id, [("despesa", "mercado")], until=today, lookback_days=180)
+    check("new_account_frequency", len(fitted_new) == 1 and abs(fitted_new[0].p_day - 15 / 30) < 1e-9)
+
+    print(f"OK - projection simulation smoke tests passed ({data.get('paths')} caminhos, {elapsed_ms:.0f} ms):")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
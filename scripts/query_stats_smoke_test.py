@@ -0,0 +1,173 @@
+import logging
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="query_stats_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'queries.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def _seed_user(db, User, Entrada, Recurrence, RecurrenceExecution, username: str, recurrences: int) -> None:
+    user = User(username=username, email=f"{username}@example.test")
+    user.set_password("Secret123!@#")
+    user.is_verified = True
+    user.plan = "pro"
+    user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+    db.session.add(user)
+    db.session.flush()
+    today = date.today()
+    for i in range(20):
+        db.session.add(
+            Entrada(
+                user_id=user.id,
+                data=today - timedelta(days=i),
+                tipo="despesa" if i % 3 else "receita",
+                descricao=f"item {i}",
+                categoria="mercado",
+                valor=50.0 + i,
+            )
+        )
+    for i in range(recurrences):
+        rec = Recurrence(
+            user_id=user.id,
+            name=f"salário {i}",
+            tipo="receita",
+            descricao=f"salário {i}",
+            valor=1000.0 + i,
+        )
+        db.session.add(rec)
+        db.session.flush()
+        for _ in range(i % 4):
+            db.session.add(RecurrenceExecution(recurrence_id=rec.id, user_id=user.id))
+
+
+def _login(client, username: str) -> None:
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    client.post(
+        "/login",
+        data={"login_id": username, "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from config import Config
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.query_stats import QueryBudgetExceeded, collect_queries, query_budget
+    from models.recurrence_model import Recurrence, RecurrenceExecution
+    from models.user_model import User
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    with app.app_context():
+        _seed_user(db, User, Entrada, Recurrence, RecurrenceExecution, "poucas", recurrences=1)
+        _seed_user(db, User, Entrada, Recurrence, RecurrenceExecution, "muitas", recurrences=15)
+        db.session.commit()
+
+    few, many = app.test_client(), app.test_client()
+    _login(few, "poucas")
+    _login(many, "muitas")
+
+    resp = few.get("/dados")
+    check("headers_in_dev", resp.status_code == 200 and int(resp.headers["X-DB-Queries"]) >= 1)
+    check("db_time_header", float(resp.headers["X-DB-Time-Ms"]) >= float(resp.headers["X-DB-Slowest-Ms"]) >= 0)
+    check("slowest_statement_header", "SELECT" in resp.headers.get("X-DB-Slowest", ""))
+    check("server_timing", resp.headers.get("Server-Timing", "").startswith("db;dur="))
+
+    # relatório: número de queries não cresce com o número de recorrências (sem N+1)
+    few_reports = few.get("/app/reports/data?period=month")
+    many_reports = many.get("/app/reports/data?period=month")
+    check("reports_ok", few_reports.status_code == 200 and many_reports.status_code == 200)
+    check("reports_no_n_plus_one", few_reports.headers["X-DB-Queries"] == many_reports.headers["X-DB-Queries"])
+    check("reports_no_repeats", int(many_reports.headers["X-DB-Repeated"]) <= 2)
+    with query_budget(int(many_reports.headers["X-DB-Queries"]), max_repeats=2) as stats:
+        many.get("/app/reports/data?period=month")
+    check("budget_respected", stats.count == int(many_reports.headers["X-DB-Queries"]))
+
+    try:
+        with query_budget(1):
+            many.get("/app/reports/data?period=month")
+    except QueryBudgetExceeded as exc:
+        check("budget_exceeded_raises", exc.stats.count > 1 and "orçamento 1" in str(exc))
+    else:
+        raise AssertionError("budget_exceeded_raises")
+
+    # N+1 sintético: mesmo SELECT por item estoura max_repeats
+    with app.app_context():
+        ids = [row.id for row in Recurrence.query.all()]
+        try:
+            with query_budget(100, max_repeats=3):
+                for rec_id in ids:
+                    RecurrenceExecution.query.filter_by(recurrence_id=rec_id).count()
+        except QueryBudgetExceeded as exc:
+            check("repeats_detected", f"repetido {len(ids)}x" in str(exc))
+        else:
+            raise AssertionError("repeats_detected")
+
+        with collect_queries() as outer:
+            with collect_queries() as inner:
+                User.query.count()
+            User.query.count()
+        check("nested_collectors", inner.count == 1 and outer.count == 2)
+
+    # produção: sem headers, log só acima do limite
+    class LogConfig(Config):
+        QUERY_STATS_MODE = "log"
+        QUERY_STATS_LOG_MIN_QUERIES = 3
+        DB_AUTO_SETUP = False
+
+    log_app = app_module.create_app(LogConfig)
+    records = []
+
+    class _Collect(logging.Handler):
+        def emit(self, record):
+            records.append(record.getMessage())
+
+    handler = _Collect()
+    qs_logger = logging.getLogger("models.query_stats")
+    qs_logger.addHandler(handler)
+    qs_logger.setLevel(logging.INFO)
+    try:
+        log_client = log_app.test_client()
+        _login(log_client, "muitas")
+        records.clear()
+        logged = log_client.get("/app/reports/data?period=month")
+        check("log_mode_no_headers", logged.status_code == 200 and "X-DB-Queries" not in logged.headers)
+        check("log_mode_logs", any("/app/reports/data" in msg and "queries" in msg for msg in records))
+        records.clear()
+        log_client.get("/static/css/projection.css")
+        check("log_mode_below_threshold_silent", not records)
+    finally:
+        qs_logger.removeHandler(handler)
+
+    print("OK - query stats smoke tests passed:")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
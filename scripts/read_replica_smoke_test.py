@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="replica_smoke_")
+    primary_path = os.path.join(tmpdir, "primary.db")
+    replica_path = os.path.join(tmpdir, "replica.db")
+    # Réplica local: um segundo arquivo SQLite, copiado do primário (fica "atrasado").
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{primary_path}")
+    os.environ.setdefault("DATABASE_READ_URL", f"sqlite:///{replica_path}")
+    os.environ.setdefault("READ_YOUR_WRITES_SECONDS", "30")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+    return primary_path, replica_path
+
+
+def _snapshot(primary_path: str, replica_path: str) -> None:
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+def main():
+    primary_path, replica_path = _setup_env()
+
+    import app as app_module
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.user_model import User
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    today = date.today()
+    with app.app_context():
+        user = User(username="replica", email="replica@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(
+            Entrada(
+                user_id=user.id,
+                data=today,
+                tipo="receita",
+                descricao="Salario",
+                categoria="salario",
+                valor=1000.0,
+                status="recebido",
+                received_at=today,
+            )
+        )
+        db.session.commit()
+        check("replica_bind_configured", "replica" in db.engines)
+
+    _snapshot(primary_path, replica_path)
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    resp = client.post(
+        "/login",
+        data={"login_id": "replica", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+    check("login_ok", resp.status_code in {302, 303})
+
+    def receitas_total():
+        resp = client.get("/app/charts/data?period=month")
+        data = resp.get_json() or {}
+        return round(float((data.get("summary") or {}).get("receitas", 0)), 2)
+
+    check("replica_read_before_write", receitas_total() == 1000.0)
+
+    resp = client.post(
+        "/add",
+        json={
+            "tipo": "receita",
+            "data": today.isoformat(),
+            "descricao": "Extra",
+            "categoria": "extras",
+            "valor": 500,
+            "status": "recebido",
+        },
+        headers={"X-CSRF-Token": csrf},
+    )
+    check("write_ok", resp.status_code == 200)
+
+    # Dentro da janela: lê o que acabou de escrever (primário).
+    check("read_your_writes_primary", receitas_total() == 1500.0)
+
+    # Fora da janela: volta para a réplica (ainda sem a escrita nova).
+    with client.session_transaction() as sess:
+        sess.pop("_db_primary_until", None)
+    check("window_expired_reads_replica", receitas_total() == 1000.0)
+
+    # Endpoint fora da lista continua no primário.
+    resp = client.get("/dados")
+    items = resp.get_json() or []
+    if isinstance(items, dict):
+        items = items.get("items") or items.get("entradas") or []
+    check("non_listed_endpoint_primary", len(items) == 2)
+
+    # Feed de notificações grava (sync) e relê o que gravou: fora da lista padrão.
+    with client.session_transaction() as sess:
+        sess.pop("_db_primary_until", None)
+    resp = client.get("/app/notifications/data")
+    check("notifications_poll_primary", resp.status_code == 200 and (resp.get_json() or {}).get("items"))
+
+    # Mesmo listado, depois do flush/commit do request as leituras ficam no
+    # primário: a réplica atrasada não tem as linhas recém-inseridas.
+    from config import Config
+    from models.notification_model import Notification
+
+    class ListedConfig(Config):
+        READ_REPLICA_ENDPOINTS = Config.READ_REPLICA_ENDPOINTS + ["notifications.notifications_data"]
+
+    listed_app = app_module.create_app(ListedConfig)
+    with listed_app.app_context():
+        Notification.query.delete()
+        db.session.commit()
+    listed = listed_app.test_client()
+    listed.get("/login")
+    with listed.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    listed.post("/login", data={"login_id": "replica", "password": "Secret123!@#", "csrf_token": csrf})
+    with listed.session_transaction() as sess:
+        sess.pop("_db_primary_until", None)
+    resp = listed.get("/app/notifications/data")
+    check("notifications_poll_stale_replica", resp.status_code == 200 and (resp.get_json() or {}).get("items"))
+
+    print("OK - read replica smoke tests passed:")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -168,7 +168,8 @@ def main():
     _setup_env()
 
     from services.reports_pdf import render_reports_pdf
-    from routes.analytics_routes import _build_reports_excel_workbook, EXCEL_DATE_FORMAT
+    from routes.analytics_routes import _build_reports_excel_workbook
+    from services.reports_excel import EXCEL_DATE_FORMAT
 
     sections = {"summary", "dre", "flow", "categories", "recurring", "pending"}
     meta = {
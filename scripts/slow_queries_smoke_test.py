@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="slow_queries_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'slow.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from config import Config
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.slow_queries import SLOW_QUERIES, fingerprint, normalize_statement, parameter_shape, read_slow_queries
+    from models.user_model import User
+
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    # normalização: mesmos filtros com valores/tamanhos de IN diferentes = mesma impressão digital
+    check("fingerprint_literals", fingerprint("SELECT * FROM t WHERE id = 5 AND nome = 'a''b'")
+          == fingerprint("select *  from t where id = 70 and nome = 'x'"))
+    check("fingerprint_in_lists", fingerprint("SELECT a FROM t WHERE id IN (?, ?, ?)")
+          == fingerprint("SELECT a FROM t WHERE id IN (?, ?)"))
+    check("fingerprint_param_styles", normalize_statement("x = %(user_id_1)s AND y = :p AND z = $1 AND c::text = ?")
+          == "x = ? and y = ? and z = ? and c::text = ?")
+    check("fingerprint_keeps_identifiers", normalize_statement("SELECT t1.col2 FROM t1") == "select t1.col2 from t1")
+    check("fingerprint_distinct", fingerprint("SELECT a FROM t") != fingerprint("SELECT b FROM t"))
+    check("parameter_shape", parameter_shape((1, "segredo", date.today())) == "(int, str, date)"
+          and parameter_shape({"user_id": 3}) == "{user_id: int}" and "x300" in parameter_shape(tuple(range(300))))
+
+    directory = tempfile.mkdtemp(prefix="slow_files_")
+
+    class SlowConfig(Config):
+        SLOW_QUERY_MS = 0
+        SLOW_QUERY_DIR = directory
+        SLOW_QUERY_FLUSH_SECONDS = 0
+
+    records = []
+
+    class _Collect(logging.Handler):
+        def emit(self, record):
+            records.append(record.getMessage())
+
+    handler = _Collect()
+    slow_logger = logging.getLogger("models.slow_queries")
+    slow_logger.addHandler(handler)
+
+    app = app_module.create_app(SlowConfig)
+    with app.app_context():
+        user = User(username="lento", email="lento@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.flush()
+        for i in range(300):
+            db.session.add(
+                Entrada(user_id=user.id, data=date.today() - timedelta(days=i), tipo="despesa" if i % 3 else "receita",
+                        descricao=f"item {i}", categoria="mercado", valor=10.0 + i)
+            )
+        db.session.commit()
+    SLOW_QUERIES.clear()
+    records.clear()
+
+    client = app.test_client()
+    client.get("/login")
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    client.post("/login", data={"login_id": "lento", "password": "Secret123!@#", "csrf_token": csrf})
+
+    de, ate = (date.today() - timedelta(days=60)).isoformat(), date.today().isoformat()
+    first = client.get(f"/resumo-periodo?de={de}&ate={ate}")
+    distinct_after_first = len([e for e in SLOW_QUERIES.entries() if "entradas.resumo_periodo" in e["endpoints"]])
+    client.get(f"/resumo-periodo?de={(date.today() - timedelta(days=10)).isoformat()}&ate={ate}")
+    charts = client.get("/app/charts/data?period=month")
+    slow_logger.removeHandler(handler)
+    check("requests_ok", first.status_code == 200 and charts.status_code == 200)
+
+    entries = SLOW_QUERIES.entries()
+    like = [entry for entry in entries if "like" in entry["normalized"] and "resumo_periodo" in "".join(entry["endpoints"])]
+    check("like_filter_captured", bool(like))
+    check("dedup_by_fingerprint", all(entry["count"] >= 2 for entry in like)
+          and len([e for e in entries if "entradas.resumo_periodo" in e["endpoints"]]) == distinct_after_first)
+    check("endpoint_recorded", any("analytics.charts_data" in entry["endpoints"] for entry in entries))
+    check("explain_plan", all(entry["plan"] and entry["plan_error"] is None for entry in like))
+    check("plan_is_sqlite_eqp", any(line.strip().startswith(("SEARCH", "SCAN")) for line in like[0]["plan"]))
+    check("param_shape_no_values", like[0]["parameters"].startswith("(") and "lento" not in like[0]["parameters"]
+          and de not in like[0]["parameters"])
+    check("first_occurrence_logged_once", sum(like[0]["fingerprint"] in msg for msg in records) == 1)
+    check("insert_not_explained", all(entry["plan"] is None for entry in entries if entry["normalized"].startswith("insert")))
+
+    # buffer limitado: sai o menos recente
+    SLOW_QUERIES.size = 3
+    with app.app_context():
+        for column in ("id", "descricao", "valor", "data"):
+            db.session.execute(db.text(f"SELECT {column} FROM entradas LIMIT 1"))
+    SLOW_QUERIES.size = 200
+    kept = [entry["normalized"] for entry in SLOW_QUERIES.entries()]
+    check("ring_buffer_bounded", len(kept) == 3 and kept[-1] == "select data from entradas limit ?")
+
+    # arquivo por processo, somado pela CLI
+    stored = read_slow_queries(directory, sort="count")
+    check("flushed_to_disk", os.path.exists(os.path.join(directory, f"slow_queries_{os.getpid()}.json")) and stored)
+    other = dict(stored[0], count=5, total_ms=1.0, endpoints={"outro.endpoint": 5})
+    with open(os.path.join(directory, "slow_queries_999999.json"), "w", encoding="utf-8") as fh:
+        json.dump({"pid": 999999, "entries": [other]}, fh)
+    merged = {entry["fingerprint"]: entry for entry in read_slow_queries(directory)}
+    check("merge_processes", merged[other["fingerprint"]]["count"] == stored[0]["count"] + 5
+          and "outro.endpoint" in merged[other["fingerprint"]]["endpoints"])
+
+    runner = app.test_cli_runner()
+    out = runner.invoke(args=["slow-queries", "show", "--sort", "max", "--limit", "50"])
+    check("cli_show", out.exit_code == 0 and "select data from entradas limit ?" in out.output and "| " in out.output)
+    out = runner.invoke(args=["slow-queries", "show", "--json", "--endpoint", "outro.endpoint"])
+    check("cli_json", out.exit_code == 0 and [e["fingerprint"] for e in json.loads(out.output)] == [other["fingerprint"]])
+    out = runner.invoke(args=["slow-queries", "clear"])
+    check("cli_clear", out.exit_code == 0 and not read_slow_queries(directory))
+
+    print("OK - slow queries smoke tests passed:")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Benchmark de /add + /dados com e sem o perfil de PRAGMAs do SQLite.
+
+Sobe o gunicorn (gthread) contra um SQLite temporário, loga N usuários e
+dispara escritas (/add) e leituras (/dados) concorrentes por alguns segundos.
+Roda uma vez com SQLITE_PROFILE_ENABLED=0 e outra com 1 e imprime req/s,
+erros e p50/p95/p99 de cada operação.
+
+Parâmetros via env:
+- BENCH_SECONDS (padrão 10)
+- BENCH_CLIENTS (threads cliente, padrão 16)
+- BENCH_WORKERS / BENCH_THREADS (gunicorn, padrão 2 / 8)
+- BENCH_WRITE_RATIO (fração de /add, padrão 0.3)
+- BENCH_ENTRIES (lançamentos por usuário no seed, padrão 500)
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_support import (  # noqa: E402
+    bench_env,
+    login,
+    seed_database,
+    start_server,
+    stop_server,
+    summarize_latencies,
+)
+
+
+def _entry_payload(rng: random.Random) -> dict:
+    day = date.today() - timedelta(days=rng.randint(0, 90))
+    return {
+        "tipo": "despesa",
+        "data": day.isoformat(),
+        "descricao": f"Bench add {rng.randint(1, 9999)}",
+        "categoria": "mercado",
+        "valor": round(rng.uniform(5, 500), 2),
+        "status": "pago",
+        "priority": "media",
+    }
+
+
+def _run_load(sessions, base_url: str, *, seconds: float, clients: int, write_ratio: float) -> dict:
+    results = {"add": [], "dados": []}
+    errors = {"add": 0, "dados": 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def worker(idx: int):
+        rng = random.Random(idx)
+        session = sessions[idx % len(sessions)]
+        local = {"add": [], "dados": []}
+        local_errors = {"add": 0, "dados": 0}
+        while time.monotonic() < stop_at:
+            op = "add" if rng.random() < write_ratio else "dados"
+            started = time.perf_counter()
+            try:
+                if op == "add":
+                    resp = session.post(f"{base_url}/add", json=_entry_payload(rng), timeout=60)
+                else:
+                    resp = session.get(f"{base_url}/dados", params={"limit": 200}, timeout=60)
+                ok = resp.status_code == 200
+            except Exception:
+                ok = False
+            local[op].append((time.perf_counter() - started) * 1000)
+            if not ok:
+                local_errors[op] += 1
+        with lock:
+            for key in results:
+                results[key].extend(local[key])
+                errors[key] += local_errors[key]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    return {op: summarize_latencies(results[op], errors[op], elapsed) for op in results}
+
+
+def _bench_variant(label: str, profile_enabled: bool, opts: dict) -> dict:
+    env = bench_env(SQLITE_PROFILE_ENABLED="1" if profile_enabled else "0")
+    users = seed_database(env, users=opts["users"], entries=opts["entries"])
+    proc, base_url = start_server(env, workers=opts["workers"], threads=opts["threads"])
+    try:
+        sessions = [login(base_url, username)[0] for username in users]
+        summary = _run_load(
+            sessions,
+            base_url,
+            seconds=opts["seconds"],
+            clients=opts["clients"],
+            write_ratio=opts["write_ratio"],
+        )
+    finally:
+        stop_server(proc)
+
+    print(f"\n[{label}]")
+    for op, stats in summary.items():
+        print(
+            f"  /{op:<6} {stats['rps']:>7.1f} req/s  "
+            f"p50 {stats['p50_ms']:>7.1f} ms  p95 {stats['p95_ms']:>7.1f} ms  "
+            f"p99 {stats['p99_ms']:>7.1f} ms  erros {stats['errors']} ({stats['error_rate']}%)"
+        )
+    return summary
+
+
+def main():
+    opts = {
+        "seconds": float(os.getenv("BENCH_SECONDS", "10")),
+        "clients": int(os.getenv("BENCH_CLIENTS", "16")),
+        "workers": int(os.getenv("BENCH_WORKERS", "2")),
+        "threads": int(os.getenv("BENCH_THREADS", "8")),
+        "write_ratio": float(os.getenv("BENCH_WRITE_RATIO", "0.3")),
+        "entries": int(os.getenv("BENCH_ENTRIES", "500")),
+    }
+    opts["users"] = min(opts["clients"], 8)
+
+    print(
+        "SQLite profile bench: "
+        f"{opts['seconds']:.0f}s, {opts['clients']} clientes, "
+        f"gunicorn {opts['workers']}x{opts['threads']} threads, escrita {opts['write_ratio']:.0%}"
+    )
+    baseline = _bench_variant("sem perfil (SQLITE_PROFILE_ENABLED=0)", False, opts)
+    tuned = _bench_variant("com perfil (SQLITE_PROFILE_ENABLED=1)", True, opts)
+
+    print("\nGanho de throughput:")
+    for op in ("add", "dados"):
+        before = baseline[op]["rps"] or 1.0
+        print(f"  /{op:<6} {tuned[op]['rps'] / before:.2f}x")
+
+    failed = any(stats["errors"] for summary in (baseline, tuned) for stats in summary.values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Teste de carga de escritas concorrentes no SQLite (lock de escrita).
+
+Simula vários workers (processos) com várias threads gravando lançamentos no
+mesmo arquivo SQLite, mais um job em background por processo usando a fila de
+escritor único. Roda duas vezes:
+
+- legado: SQLITE_WRITE_SERIALIZATION=0 (BEGIN DEFERRED + busy_timeout)
+- serializado: SQLITE_WRITE_SERIALIZATION=1 (BEGIN IMMEDIATE + retry com jitter)
+
+Imprime escritas/s, erros, latência da transação e percentis de espera pelo
+lock (só no modo serializado, medido em begin_write).
+
+Parâmetros via env:
+- LOAD_SECONDS (padrão 8)
+- LOAD_PROCESSES (padrão 4)
+- LOAD_THREADS (threads por processo, padrão 4)
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_support import ROOT, bench_env, percentile, seed_database  # noqa: E402
+
+
+def _child(seconds: float, threads: int, user_offset: int) -> dict:
+    sys.path.insert(0, ROOT)
+
+    from app import app
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.sqlite_writes import begin_write, get_write_queue, is_lock_error, write_stats
+
+    latencies: list[float] = []
+    waits: list[float] = []
+    errors = {"lock": 0, "other": 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def _write_entry(user_id: int, label: str) -> None:
+        # padrão das rotas: lê, insere, flush e ajusta o registro (como as regras)
+        Entrada.query.filter_by(user_id=user_id).count()
+        entry = Entrada(
+            user_id=user_id,
+            data=date.today(),
+            tipo="despesa",
+            descricao=label,
+            categoria="outros",
+            valor=10.0,
+            status="pago",
+            paid_at=date.today(),
+        )
+        db.session.add(entry)
+        db.session.flush()
+        entry.tags = "load"
+
+    def worker(idx: int) -> None:
+        user_id = user_offset + (idx % 2) + 1
+        local_lat, local_wait = [], []
+        local_errors = {"lock": 0, "other": 0}
+        with app.app_context():
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                try:
+                    local_wait.append(begin_write())
+                    _write_entry(user_id, f"load {idx}")
+                    db.session.commit()
+                except Exception as exc:
+                    db.session.rollback()
+                    local_errors["lock" if is_lock_error(exc) or type(exc).__name__ == "DatabaseBusyError" else "other"] += 1
+                local_lat.append((time.perf_counter() - started) * 1000)
+            db.session.remove()
+        with lock:
+            latencies.extend(local_lat)
+            waits.extend(local_wait)
+            for key in errors:
+                errors[key] += local_errors[key]
+
+    def background() -> None:
+        queue = get_write_queue(app)
+        while time.monotonic() < stop_at:
+            future = queue.submit(_write_entry, user_offset + 1, "background job")
+            try:
+                future.result(timeout=60)
+            except Exception as exc:
+                with lock:
+                    errors["lock" if is_lock_error(exc) else "other"] += 1
+            time.sleep(0.01)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    pool.append(threading.Thread(target=background))
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    return {
+        "latencies_ms": latencies,
+        "waits_ms": waits,
+        "errors": errors,
+        "stats": write_stats(),
+    }
+
+
+def _run_mode(label: str, serialized: bool, opts: dict) -> dict:
+    db_path = os.path.join(tempfile.mkdtemp(prefix="write_load_"), "load.db")
+    env = bench_env(db_path, SQLITE_WRITE_SERIALIZATION="1" if serialized else "0", DB_AUTO_SETUP="1")
+    seed_database(env, users=opts["processes"] * 2, entries=0)
+    env["DB_AUTO_SETUP"] = "0"
+
+    procs = []
+    for i in range(opts["processes"]):
+        procs.append(
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--child",
+                    str(opts["seconds"]),
+                    str(opts["threads"]),
+                    str(i * 2),
+                ],
+                cwd=ROOT,
+                env=env,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+        )
+
+    latencies, waits = [], []
+    errors = {"lock": 0, "other": 0}
+    retries = 0
+    for proc in procs:
+        out, _ = proc.communicate()
+        data = json.loads(out.strip().splitlines()[-1])
+        latencies.extend(data["latencies_ms"])
+        waits.extend(data["waits_ms"])
+        retries += data["stats"]["retries"]
+        for key in errors:
+            errors[key] += data["errors"][key]
+
+    total = len(latencies)
+    print(f"\n[{label}]")
+    print(
+        f"  escritas {total}  ({total / opts['seconds']:.1f}/s)  "
+        f"erros lock {errors['lock']}  outros {errors['other']}  retries {retries}"
+    )
+    print(
+        "  transação  "
+        f"p50 {percentile(latencies, 50):8.1f} ms  p95 {percentile(latencies, 95):8.1f} ms  "
+        f"p99 {percentile(latencies, 99):8.1f} ms  max {max(latencies or [0]):8.1f} ms"
+    )
+    if serialized:
+        print(
+            "  espera lock "
+            f"p50 {percentile(waits, 50):7.1f} ms  p95 {percentile(waits, 95):8.1f} ms  "
+            f"p99 {percentile(waits, 99):8.1f} ms  max {max(waits or [0]):8.1f} ms"
+        )
+    return {"errors": errors, "total": total}
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        result = _child(float(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]))
+        print(json.dumps(result))
+        return 0
+
+    opts = {
+        "seconds": float(os.getenv("LOAD_SECONDS", "8")),
+        "processes": int(os.getenv("LOAD_PROCESSES", "4")),
+        "threads": int(os.getenv("LOAD_THREADS", "4")),
+    }
+    print(
+        f"Carga de escrita SQLite: {opts['processes']} processos x {opts['threads']} threads "
+        f"+ 1 job em background por processo, {opts['seconds']:.0f}s"
+    )
+    _run_mode("legado (SQLITE_WRITE_SERIALIZATION=0)", False, opts)
+    serialized = _run_mode("serializado (SQLITE_WRITE_SERIALIZATION=1)", True, opts)
+
+    if serialized["errors"]["other"]:
+        print("FAIL - erros inesperados no modo serializado")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import gzip
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+
+def _setup_env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    tmpdir = tempfile.mkdtemp(prefix="static_assets_smoke_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'assets.db')}")
+    os.environ.setdefault("APP_ENV", "development")
+    os.environ.setdefault("SECRET_KEY", "test-secret-key-please-change-32chars+")
+    os.environ.setdefault("APP_BASE_URL", "http://example.test")
+    os.environ.setdefault("ABACATEPAY_WEBHOOK_SECRET", "testsecret")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+
+
+STATIC_REF = re.compile(r"""(?:src|href)=["'](/static/[^"']+)["']""")
+HASHED = re.compile(r"\.[0-9a-f]{12}\.[a-z0-9]+$")
+
+
+def main():
+    _setup_env()
+
+    import app as app_module
+    from models.extensions import db
+    from models.user_model import User
+
+    app = app_module.app
+    results = []
+
+    def check(label, condition):
+        if not condition:
+            raise AssertionError(label)
+        results.append(label)
+
+    with app.app_context():
+        user = User(username="estaticos", email="estaticos@example.test")
+        user.set_password("Secret123!@#")
+        user.is_verified = True
+        user.plan = "pro"
+        user.plan_expires_at = datetime.utcnow() + timedelta(days=30)
+        db.session.add(user)
+        db.session.commit()
+
+    client = app.test_client()
+    public_refs = set(STATIC_REF.findall(client.get("/login").get_data(as_text=True)))
+    with client.session_transaction() as sess:
+        csrf = sess.get("_csrf_token")
+    client.post(
+        "/login",
+        data={"login_id": "estaticos", "password": "Secret123!@#", "csrf_token": csrf},
+        follow_redirects=False,
+    )
+
+    refs = set(public_refs)
+    for page in ("/app", "/app/projection", "/app/charts", "/app/reports", "/app/filters", "/app/account", "/app/entradas"):
+        resp = client.get(page)
+        check(f"page_ok_{page}", resp.status_code == 200)
+        refs |= set(STATIC_REF.findall(resp.get_data(as_text=True)))
+
+    check("pages_reference_static", len(refs) >= 10)
+    unhashed = sorted(ref for ref in refs if not HASHED.search(ref))
+    check("all_static_refs_hashed", not unhashed)
+
+    # todo estático referenciado volta com cache imutável: recarga sem requests
+    for ref in sorted(refs):
+        resp = client.get(ref)
+        cache = resp.cache_control
+        ok = resp.status_code == 200 and cache.immutable and cache.public and cache.max_age == 31536000
+        if not ok:
+            raise AssertionError(f"immutable_{ref}: {resp.status_code} {resp.headers.get('Cache-Control')}")
+    results.append("hashed_assets_immutable")
+
+    plain = client.get("/static/css/projection.css")
+    check("plain_name_not_immutable", plain.status_code == 200 and not plain.cache_control.immutable)
+    stale = client.get("/static/css/projection.0123456789ab.css")
+    check("stale_hash_served_without_immutable", stale.status_code == 200 and not stale.cache_control.immutable)
+    check("stale_hash_same_content", stale.get_data() == plain.get_data())
+    check("unknown_asset_404", client.get("/static/css/nao-existe.0123456789ab.css").status_code == 404)
+
+    with app.test_request_context():
+        from flask import url_for
+
+        from services.static_assets import asset_url, get_manifest
+
+        hashed_url = url_for("static", filename="css/projection.css")
+        check("url_for_hashed", HASHED.search(hashed_url) is not None)
+        check("asset_url_matches_url_for", asset_url("/static/css/projection.css") == hashed_url)
+        check("asset_url_relative", asset_url("css/projection.css") == hashed_url)
+        check("manifest_lists_assets", get_manifest().as_dict()["css/projection.css"] == hashed_url[len("/static/"):])
+
+    # revalidação (If-None-Match) do nome com hash mantém os headers imutáveis
+    first = client.get(hashed_url)
+    again = client.get(hashed_url, headers={"If-None-Match": first.headers.get("ETag")})
+    check("hashed_304_keeps_immutable", again.status_code == 304 and again.cache_control.immutable)
+
+    # nome com hash + variante pré-comprimida do build
+    css_path = os.path.join(app.static_folder, "css", "projection.css")
+    variant_path = css_path + ".gz"
+    with open(css_path, "rb") as fh:
+        prebuilt = gzip.compress(fh.read(), compresslevel=9, mtime=0)
+    try:
+        with open(variant_path, "wb") as fh:
+            fh.write(prebuilt)
+        stat = os.stat(css_path)
+        os.utime(variant_path, (stat.st_atime, stat.st_mtime))
+        served = client.get(hashed_url, headers={"Accept-Encoding": "gzip"})
+        check(
+            "hashed_precompressed",
+            served.data == prebuilt and served.headers.get("Content-Encoding") == "gzip" and served.cache_control.immutable,
+        )
+    finally:
+        if os.path.exists(variant_path):
+            os.remove(variant_path)
+
+    print(f"OK - static assets smoke tests passed ({len(refs)} assets referenciados):")
+    for item in results:
+        print(f"- {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""Gerador de dados sintéticos realistas para benchmarks e testes de carga.
+
+Cada usuário ganha N anos de histórico (mais 2 meses futuros):
+- recorrências (salário, aluguel, contas, assinaturas) materializadas mês a
+  mês como entradas com recurrence_id e RecurrenceExecution;
+- compras avulsas com categoria, método, tags e valores por categoria
+  (mercado/transporte frequentes e baratos, moradia rara e cara), status
+  coerente com a data (passado pago/recebido, com alguns atrasos; futuro em
+  andamento) e paid_at/received_at deslocados da data original;
+- regras de automação, lembretes e cenários de projeção (reduções, extras,
+  adiamentos e parcelamentos apontando para entradas futuras reais).
+
+Determinístico por seed. Uso em código (dentro de app_context):
+
+    from synthetic_data import generate_user
+    stats = generate_user("bench0", years=5, entries_per_month=60, seed=1)
+
+Linha de comando (nunca usa o database.db do repositório por acidente):
+
+    python scripts/synthetic_data.py --database /tmp/synth.db --users 3 --years 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PASSWORD = "Synth123!@#"
+
+# (descrição, categoria, método, valor mediano, peso)
+PURCHASES = [
+    ("Supermercado Pão de Açúcar", "mercado", "credito", 280.0, 10),
+    ("Feira livre", "mercado", "pix", 90.0, 6),
+    ("Padaria", "mercado", "debito", 25.0, 9),
+    ("iFood", "mercado", "credito", 65.0, 8),
+    ("Uber", "transporte", "credito", 28.0, 10),
+    ("Posto Shell", "transporte", "debito", 220.0, 5),
+    ("Estacionamento", "transporte", "pix", 30.0, 3),
+    ("Farmácia", "outros", "debito", 75.0, 4),
+    ("Presente aniversário", "outros", "credito", 150.0, 1),
+    ("Cinema", "outros", "credito", 60.0, 2),
+    ("Manutenção do carro", "transporte", "boleto", 900.0, 1),
+    ("Material de limpeza", "moradia", "debito", 80.0, 2),
+    ("Conserto hidráulica", "moradia", "pix", 450.0, 1),
+    ("Consulta médica", "servicos", "pix", 350.0, 1),
+]
+EXTRA_INCOME = [
+    ("Freelance site", "extras", "pix", 1800.0),
+    ("Reembolso", "outros", "pix", 120.0),
+    ("Venda usados", "extras", "pix", 300.0),
+]
+# (nome, tipo, categoria, método, dia, valor, tags)
+RECURRENCES = [
+    ("Salário", "receita", "salario", "pix", 5, 7800.0, None),
+    ("Aluguel", "despesa", "moradia", "boleto", 10, 2400.0, "fixo"),
+    ("Condomínio", "despesa", "moradia", "boleto", 10, 650.0, "fixo"),
+    ("Energia elétrica", "despesa", "servicos", "boleto", 15, 210.0, "contas"),
+    ("Internet", "despesa", "servicos", "debito", 20, 120.0, "contas"),
+    ("Academia", "despesa", "outros", "credito", 3, 110.0, "saude"),
+    ("Streaming", "despesa", "servicos", "credito", 12, 55.9, "assinatura"),
+]
+RULES = [
+    ("Uber é transporte", [{"field": "descricao", "op": "contains", "value": "uber"}],
+     [{"type": "set_category", "value": "transporte"}, {"type": "set_method", "value": "credito"}], False),
+    ("iFood no mercado", [{"field": "descricao", "op": "contains", "value": "ifood"}],
+     [{"type": "set_category", "value": "mercado"}, {"type": "set_tags", "value": "delivery"}], False),
+    ("Contas no boleto", [{"field": "metodo", "op": "eq", "value": "boleto"}, {"field": "tipo", "op": "eq", "value": "despesa"}],
+     [{"type": "set_tags", "value": "contas"}], False),
+    ("Gasto alto", [{"field": "valor", "op": "gte", "value": 1000}],
+     [{"type": "set_tags", "value": "alto-valor"}, {"type": "set_description_prefix", "value": "[!] "}], False),
+    ("Farmácia é saúde", [{"field": "descricao", "op": "contains", "value": "farmácia"}],
+     [{"type": "set_tags", "value": "saude"}], True),
+    ("Pix pequeno pago", [{"field": "metodo", "op": "eq", "value": "pix"}, {"field": "valor", "op": "lte", "value": 50}],
+     [{"type": "set_status", "value": "pago"}], False),
+    ("Posto", [{"field": "descricao", "op": "contains", "value": "posto"}],
+     [{"type": "set_category", "value": "transporte"}], False),
+    ("Assinaturas", [{"field": "tags", "op": "contains", "value": "assinatura"}],
+     [{"type": "set_category", "value": "servicos"}], False),
+]
+REMINDERS = [
+    ("Contas da casa", 3, "despesa", "moradia", None, None),
+    ("Boletos grandes", 5, "despesa", None, 500.0, None),
+    ("Serviços", 2, "despesa", "servicos", None, 400.0),
+    ("Recebimentos", 1, "receita", None, None, None),
+]
+
+
+def _month_starts(first: date, last: date):
+    current = date(first.year, first.month, 1)
+    while current <= last:
+        yield current
+        current = date(current.year + (current.month == 12), current.month % 12 + 1, 1)
+
+
+def _day_in_month(month: date, day: int) -> date:
+    next_month = date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return date(month.year, month.month, min(day, last.day))
+
+
+def _settlement(tipo: str, day: date, today: date, rng: random.Random) -> tuple[str | None, date | None, date | None]:
+    """Status, paid_at e received_at coerentes com a data."""
+    if day > today:
+        return ("em_andamento" if tipo == "despesa" else None), None, None
+    late = rng.random()
+    if tipo == "despesa":
+        if late < 0.04 and (today - day).days < 90:
+            return "nao_pago", None, None
+        return "pago", min(today, day + timedelta(days=rng.choice([0, 0, 0, 1, 2, 5]))), None
+    if late < 0.03 and (today - day).days < 60:
+        return None, None, None
+    return "recebido", None, min(today, day + timedelta(days=rng.choice([0, 0, 1, 3])))
+
+
+def _lognormal(rng: random.Random, median: float, spread: float = 0.45) -> float:
+    return round(max(1.0, rng.lognormvariate(math.log(median), spread)), 2)
+
+
+def generate_user(
+    username: str,
+    *,
+    years: float = 2,
+    entries_per_month: int = 60,
+    seed: int = 42,
+    password: str = DEFAULT_PASSWORD,
+    plan: str = "pro",
+) -> dict:
+    """Cria um usuário com histórico completo. Requer app_context. Retorna contagens."""
+    from models.automation_rule_model import AutomationRule
+    from models.entrada_model import Entrada
+    from models.extensions import db
+    from models.projection_scenario_model import ProjectionScenario
+    from models.recurrence_model import Recurrence, RecurrenceExecution
+    from models.reminder_model import Reminder
+    from models.user_model import User
+
+    rng = random.Random(f"{seed}:{username}")
+    today = date.today()
+    first_day = today - timedelta(days=int(years * 365))
+    last_day = today + timedelta(days=60)
+
+    user = User(username=username, email=f"{username}@example.test")
+    user.set_password(password)
+    user.is_verified = True
+    user.plan = plan
+    user.plan_expires_at = datetime.utcnow() + timedelta(days=365)
+    db.session.add(user)
+    db.session.flush()
+
+    recurrences = []
+    for index, (name, tipo, categoria, metodo, day, valor, tags) in enumerate(RECURRENCES):
+        rec = Recurrence(
+            user_id=user.id,
+            name=name,
+            is_enabled=index < len(RECURRENCES) - 1 or rng.random() < 0.5,
+            day_of_month=day,
+            tipo=tipo,
+            descricao=name,
+            categoria=categoria,
+            valor=round(valor * rng.uniform(0.8, 1.25), 2),
+            status="em_andamento" if tipo == "despesa" else None,
+            metodo=metodo,
+            tags=tags,
+        )
+        db.session.add(rec)
+        recurrences.append(rec)
+    db.session.flush()
+
+    weights = [item[4] for item in PURCHASES]
+    rows = []
+    months = list(_month_starts(first_day, last_day))
+    for month in months:
+        for rec in recurrences:
+            day = _day_in_month(month, rec.day_of_month)
+            if not rec.is_enabled or not first_day <= day <= last_day:
+                continue
+            status, paid_at, received_at = _settlement(rec.tipo, day, today, rng)
+            # reajuste anual leve
+            valor = round(rec.valor * (1 - 0.05 * (today - day).days / 365), 2)
+            rows.append(
+                {
+                    "user_id": user.id, "data": day, "tipo": rec.tipo, "descricao": rec.descricao,
+                    "categoria": rec.categoria, "valor": max(1.0, valor), "metodo": rec.metodo, "tags": rec.tags,
+                    "priority": "alta" if rec.categoria == "moradia" else "media", "recurrence_id": rec.id,
+                    "status": status, "paid_at": paid_at, "received_at": received_at,
+                }
+            )
+        avulsas = max(0, entries_per_month - len(recurrences))
+        month_end = _day_in_month(month, 31)
+        for _ in range(rng.randint(int(avulsas * 0.8), max(1, int(avulsas * 1.2)))):
+            day = month + timedelta(days=rng.randint(0, (month_end - month).days))
+            if not first_day <= day <= last_day:
+                continue
+            if rng.random() < 0.06:
+                descricao, categoria, metodo, median = rng.choice(EXTRA_INCOME)
+                tipo, weight_tags = "receita", None
+            else:
+                descricao, categoria, metodo, median, _weight = rng.choices(PURCHASES, weights)[0]
+                tipo, weight_tags = "despesa", rng.choice([None, None, None, "familia", "trabalho", "lazer"])
+            status, paid_at, received_at = _settlement(tipo, day, today, rng)
+            rows.append(
+                {
+                    "user_id": user.id, "data": day, "tipo": tipo, "descricao": descricao, "categoria": categoria,
+                    "valor": _lognormal(rng, median), "metodo": metodo if rng.random() < 0.9 else None,
+                    "tags": weight_tags, "priority": rng.choice(["alta", "media", "media", "baixa"]),
+                    "recurrence_id": None, "status": status, "paid_at": paid_at, "received_at": received_at,
+                }
+            )
+    if rows:
+        db.session.execute(db.insert(Entrada), rows)
+
+    recurring_entries = (
+        db.session.query(Entrada.id, Entrada.recurrence_id)
+        .filter(Entrada.user_id == user.id, Entrada.recurrence_id.isnot(None), Entrada.data <= today)
+        .all()
+    )
+    if recurring_entries:
+        db.session.execute(
+            db.insert(RecurrenceExecution),
+            [{"recurrence_id": rec_id, "entry_id": entry_id, "user_id": user.id} for entry_id, rec_id in recurring_entries],
+        )
+
+    for priority, (name, conditions, actions, stop) in enumerate(RULES, start=1):
+        db.session.add(
+            AutomationRule(
+                user_id=user.id,
+                name=name,
+                priority=priority * 10,
+                is_enabled=rng.random() < 0.9,
+                apply_on_create=True,
+                apply_on_import=rng.random() < 0.5,
+                apply_on_edit=rng.random() < 0.3,
+                stop_after_apply=stop,
+                conditions_json=json.dumps(conditions, ensure_ascii=False),
+                actions_json=json.dumps(actions, ensure_ascii=False),
+                run_count=rng.randint(0, 200),
+            )
+        )
+
+    for name, days_before, tipo, categoria, min_value, max_value in REMINDERS:
+        db.session.add(
+            Reminder(
+                user_id=user.id, name=name, days_before=days_before, tipo=tipo, categoria=categoria,
+                min_value=min_value, max_value=max_value,
+            )
+        )
+
+    future_ids = [
+        row.id
+        for row in db.session.query(Entrada.id)
+        .filter(Entrada.user_id == user.id, Entrada.tipo == "despesa", Entrada.data > today)
+        .order_by(Entrada.valor.desc())
+        .limit(6)
+    ]
+    scenarios = [
+        ("Cortar mercado e lazer", {"reductions": [{"categoria": "mercado", "percent": 20}, {"categoria": "outros", "percent": 35}]}),
+        ("Bônus e viagem", {"extras": [
+            {"date": (today + timedelta(days=20)).isoformat(), "tipo": "receita", "valor": 5000, "descricao": "Bônus"},
+            {"date": (today + timedelta(days=45)).isoformat(), "tipo": "despesa", "valor": 3800, "descricao": "Viagem"},
+        ], "reserve": 1000}),
+        ("Adiar e parcelar", {
+            "shifts": [{"entrada_id": eid, "new_date": (today + timedelta(days=55)).isoformat()} for eid in future_ids[:2]],
+            "splits": [{"entrada_id": eid, "parts": 3, "frequency": "monthly"} for eid in future_ids[2:4]],
+        }),
+    ]
+    for name, overrides in scenarios:
+        db.session.add(ProjectionScenario(user_id=user.id, name=name, data_json=json.dumps(overrides, ensure_ascii=False)))
+
+    db.session.commit()
+    return {
+        "user_id": user.id,
+        "username": username,
+        "entries": len(rows),
+        "recurrences": len(recurrences),
+        "executions": len(recurring_entries),
+        "rules": len(RULES),
+        "reminders": len(REMINDERS),
+        "scenarios": len(scenarios),
+    }
+
+
+def generate_dataset(*, users: int, years: float, entries_per_month: int, seed: int = 42,
+                     prefix: str = "synth", password: str = DEFAULT_PASSWORD) -> list[dict]:
+    """Vários usuários `<prefix><i>` (requer app_context)."""
+    return [
+        generate_user(f"{prefix}{i}", years=years, entries_per_month=entries_per_month, seed=seed, password=password)
+        for i in range(users)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="Arquivo SQLite de destino (ou DATABASE_URL no ambiente).")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--per-month", type=int, default=60, help="Entradas por mês, por usuário.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="synth")
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.database)}"
+    elif not os.getenv("DATABASE_URL"):
+        parser.error("informe --database ou DATABASE_URL (o database.db do repositório não é usado)")
+    os.environ.setdefault("EMAIL_SEND_ENABLED", "0")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    from app import app
+
+    with app.app_context():
+        for stats in generate_dataset(
+            users=args.users, years=args.years, entries_per_month=args.per_month, seed=args.seed, prefix=args.prefix
+        ):
+            print(json.dumps(stats, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
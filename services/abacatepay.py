@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional
 import requests
 from flask import current_app
 
+from services.metrics import track_external
 from services.plans import PLANS
 
 logger = logging.getLogger(__name__)
@@ -167,12 +168,14 @@ def create_plan_billing(
         payload["customer"] = customer_payload
 
     url = f"{_api_base()}/v1/billing/create"
-    resp = requests.post(
-        url,
-        json=payload,
-        headers={"Authorization": f"Bearer {_api_key()}", "Content-Type": "application/json"},
-        timeout=25,
-    )
+    with track_external("abacatepay", "billing_create") as call:
+        resp = requests.post(
+            url,
+            json=payload,
+            headers={"Authorization": f"Bearer {_api_key()}", "Content-Type": "application/json"},
+            timeout=25,
+        )
+        call.status = resp.status_code
 
     try:
         body = resp.json()
@@ -291,10 +294,12 @@ def get_billing_status(billing_id: str | None, external_id: str | None = None) -
 
     for method, url, payload in attempts:
         try:
-            if method == "GET":
-                resp = requests.get(url, params=payload, headers=headers, timeout=20)
-            else:
-                resp = requests.post(url, json=payload, headers=headers, timeout=20)
+            with track_external("abacatepay", "billing_status") as call:
+                if method == "GET":
+                    resp = requests.get(url, params=payload, headers=headers, timeout=20)
+                else:
+                    resp = requests.post(url, json=payload, headers=headers, timeout=20)
+                call.status = resp.status_code
         except requests.RequestException as exc:
             last_error = str(exc)
             logger.warning("AbacatePay: falha na requisicao %s %s", method, url, exc_info=True)
@@ -325,7 +330,9 @@ def get_billing_status(billing_id: str | None, external_id: str | None = None) -
     # Fallback em dev: listar cobrancas e filtrar por id/externalId.
     if current_app.config.get("ABACATEPAY_DEV_MODE"):
         try:
-            resp = requests.get(f"{base}/v1/billing/list", headers=headers, timeout=20)
+            with track_external("abacatepay", "billing_list") as call:
+                resp = requests.get(f"{base}/v1/billing/list", headers=headers, timeout=20)
+                call.status = resp.status_code
             body = resp.json()
         except requests.RequestException as exc:
             logger.warning("AbacatePay: falha ao listar cobrancas (dev)", exc_info=True)
@@ -358,7 +365,9 @@ def list_billings() -> list[dict]:
     headers = {"Authorization": f"Bearer {_api_key()}", "Content-Type": "application/json"}
     url = f"{_api_base()}/v1/billing/list"
     try:
-        resp = requests.get(url, headers=headers, timeout=20)
+        with track_external("abacatepay", "billing_list") as call:
+            resp = requests.get(url, headers=headers, timeout=20)
+            call.status = resp.status_code
         body = resp.json()
     except requests.RequestException as exc:
         logger.warning("AbacatePay: falha ao listar cobrancas", exc_info=True)
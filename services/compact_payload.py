@@ -0,0 +1,184 @@
+"""Formato compacto (opt-in, `format=compact`) para payloads grandes de projeção e gráficos.
+
+- séries por dia/bucket: data inicial + passo implícito, sem repetir datas;
+- séries em pontos de mudança: só os índices em que o valor muda, então
+  trechos de saldo parado viram um único ponto;
+- listas de dicts viram colunas; campos de enum (categoria, status, ...) são
+  codificados por dicionário (índice numa lista de valores distintos) e datas
+  viram deslocamento em dias a partir do início do período.
+
+Valores None/ausentes não são distinguidos (o decodificador omite o campo).
+O decodificador do front fica em static/js/compact_payload.js; os `expand_*`
+daqui são o espelho em Python.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Iterable, Sequence
+
+FORMAT = "compact"
+FORMAT_VERSION = 1
+
+# campos de evento da projeção codificados por dicionário
+PROJECTION_EVENT_ENUMS = ("source", "kind", "categoria", "tipo", "status", "priority")
+# séries do bloco `line` de /app/charts/data
+CHART_LINE_SERIES = ("receitas", "despesas", "saldo", "saldo_acumulado")
+
+
+def wants_compact(payload: Any) -> bool:
+    """True quando o request pede `format=compact` (query string ou corpo JSON)."""
+    if not payload:
+        return False
+    return str(payload.get("format") or "").strip().lower() == FORMAT
+
+
+def change_points(values: Sequence[Any]) -> dict[str, Any]:
+    """Série -> {"n", "at", "v"}: índices onde o valor muda e o novo valor."""
+    at: list[int] = []
+    v: list[Any] = []
+    previous = object()
+    for i, value in enumerate(values):
+        if value != previous:
+            at.append(i)
+            v.append(value)
+            previous = value
+    return {"n": len(values), "at": at, "v": v}
+
+
+def expand_change_points(encoded: dict[str, Any]) -> list[Any]:
+    out: list[Any] = []
+    at, v, n = encoded["at"], encoded["v"], encoded["n"]
+    for k, idx in enumerate(at):
+        stop = at[k + 1] if k + 1 < len(at) else n
+        out.extend([v[k]] * (stop - idx))
+    return out
+
+
+def encode_columns(
+    rows: Iterable[dict[str, Any]],
+    *,
+    enums: Iterable[str] = (),
+    day_fields: Iterable[str] = (),
+    origin: date | None = None,
+) -> dict[str, Any]:
+    """Lista de dicts -> colunas. `day_fields` (ISO) viram dias a partir de `origin`."""
+    rows = list(rows)
+    enums = set(enums)
+    day_fields = set(day_fields) if origin is not None else set()
+    keys: dict[str, None] = {}
+    for row in rows:
+        keys.update(dict.fromkeys(row))
+
+    cols: dict[str, list[Any]] = {}
+    dictionaries: dict[str, list[Any]] = {}
+    for key in keys:
+        column = [row.get(key) for row in rows]
+        if key in day_fields:
+            column = [None if value is None else (date.fromisoformat(value) - origin).days for value in column]
+        elif key in enums:
+            index: dict[Any, int] = {}
+            for value in column:
+                if value is not None and value not in index:
+                    index[value] = len(index)
+            dictionaries[key] = list(index)
+            column = [None if value is None else index[value] for value in column]
+        cols[key] = column
+
+    encoded: dict[str, Any] = {"n": len(rows), "cols": cols, "enums": dictionaries}
+    if day_fields:
+        encoded["days"] = sorted(day_fields & set(keys))
+    return encoded
+
+
+def expand_columns(encoded: dict[str, Any], *, origin: date | None = None) -> list[dict[str, Any]]:
+    cols, dictionaries = encoded["cols"], encoded.get("enums") or {}
+    day_fields = set(encoded.get("days") or [])
+    rows: list[dict[str, Any]] = [{} for _ in range(encoded["n"])]
+    for key, column in cols.items():
+        lookup = dictionaries.get(key)
+        for row, value in zip(rows, column):
+            if value is None:
+                continue
+            if key in day_fields:
+                value = (origin + timedelta(days=value)).isoformat()
+            elif lookup is not None:
+                value = lookup[value]
+            row[key] = value
+    return rows
+
+
+def compact_projection(result: dict[str, Any]) -> dict[str, Any]:
+    """Saída de compute_projection -> formato compacto (demais campos intactos)."""
+    start = date.fromisoformat(result["range"]["start"])
+    out = {key: value for key, value in result.items() if key not in {"daily", "events"}}
+    out["format"] = FORMAT
+    out["format_version"] = FORMAT_VERSION
+    daily = result.get("daily") or []
+    out["daily"] = {
+        "start": start.isoformat(),
+        "step": 1,
+        "saldo": change_points([row["saldo"] for row in daily]),
+    }
+    out["events"] = encode_columns(
+        result.get("events") or [],
+        enums=PROJECTION_EVENT_ENUMS,
+        day_fields=("date",),
+        origin=start,
+    )
+    return out
+
+
+def expand_projection(compact: dict[str, Any]) -> dict[str, Any]:
+    out = {key: value for key, value in compact.items() if key not in {"format", "format_version"}}
+    start = date.fromisoformat(compact["daily"]["start"])
+    step = int(compact["daily"].get("step") or 1)
+    saldos = expand_change_points(compact["daily"]["saldo"])
+    out["daily"] = [
+        {"date": (start + timedelta(days=i * step)).isoformat(), "saldo": saldo}
+        for i, saldo in enumerate(saldos)
+    ]
+    out["events"] = expand_columns(compact["events"], origin=start)
+    return out
+
+
+def compact_chart_line(line: dict[str, Any], *, start: date, end: date) -> dict[str, Any]:
+    """Bloco `line` de /app/charts/data: buckets implícitos (início + granularidade)."""
+    out = {
+        "labels": line["labels"],
+        "granularity": line["granularity"],
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+    }
+    for key in CHART_LINE_SERIES:
+        out[key] = change_points(line.get(key) or [])
+    return out
+
+
+def _bucket_bounds(start: date, end: date, granularity: str, count: int) -> list[tuple[date, date]]:
+    bounds: list[tuple[date, date]] = []
+    current = date(start.year, start.month, 1) if granularity == "month" else start
+    for _ in range(count):
+        if granularity == "month":
+            following = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        else:
+            following = current + timedelta(days=7 if granularity == "week" else 1)
+        bounds.append((current, min(following - timedelta(days=1), end)))
+        current = following
+    return bounds
+
+
+def expand_chart_line(compact: dict[str, Any]) -> dict[str, Any]:
+    start, end = date.fromisoformat(compact["start"]), date.fromisoformat(compact["end"])
+    labels = compact["labels"]
+    out: dict[str, Any] = {
+        "labels": labels,
+        "buckets": [
+            {"label": label, "start": b_start.isoformat(), "end": b_end.isoformat()}
+            for label, (b_start, b_end) in zip(labels, _bucket_bounds(start, end, compact["granularity"], len(labels)))
+        ],
+        "granularity": compact["granularity"],
+    }
+    for key in CHART_LINE_SERIES:
+        out[key] = expand_change_points(compact[key])
+    return out
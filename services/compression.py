@@ -0,0 +1,170 @@
+"""Compressão de respostas (gzip e, se instalado, brotli).
+
+- Respostas dinâmicas: after_request comprime JSON/HTML/CSS/JS/SVG/CSV acima de
+  COMPRESSION_MIN_SIZE, conforme o Accept-Encoding (brotli antes de gzip).
+  PDF, XLSX e outros binários já comprimidos ficam de fora.
+- Estáticos: se existir `<arquivo>.br`/`.gz` gerado no build
+  (scripts/precompress_static.py) e não mais antigo que o original, ele é
+  servido direto, sem custo de CPU no request. Sem pré-compressão, o arquivo
+  é comprimido na hora (mesmas regras das respostas dinâmicas).
+- ETag: a variante comprimida ganha sufixo (`"abc-gzip"`), então caches não
+  misturam representações; If-None-Match com a ETag da variante vira 304.
+
+brotli é opcional (fora do requirements.txt); sem ele só há gzip.
+"""
+
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+
+from flask import Flask, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    "application/json",
+    "text/html",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+    "text/plain",
+    "text/csv",
+    "image/svg+xml",
+)
+
+# Nunca comprimir de novo (formatos já comprimidos).
+SKIP_MIMETYPES = (
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/zip",
+    "application/gzip",
+)
+
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def brotli_enabled() -> bool:
+    return brotli is not None
+
+
+def _supported_encodings() -> list[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def choose_encoding() -> str | None:
+    """Melhor codificação aceita pelo cliente (q > 0), na ordem de preferência do servidor."""
+    accepted = request.accept_encodings
+    for encoding in _supported_encodings():
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    cfg = current_app.config
+    if encoding == "br":
+        return brotli.compress(data, quality=int(cfg.get("COMPRESSION_BROTLI_QUALITY", 5)))
+    # mtime=0: mesma entrada, mesmos bytes (ETag/caches estáveis)
+    return gzip.compress(data, compresslevel=int(cfg.get("COMPRESSION_GZIP_LEVEL", 6)), mtime=0)
+
+
+def _add_vary(response) -> None:
+    response.vary.add("Accept-Encoding")
+
+
+def _compressible(response) -> bool:
+    if response.status_code != 200:
+        return False
+    # send_file (passthrough) tem tamanho conhecido; streaming de verdade fica de fora
+    if response.is_streamed and not response.direct_passthrough:
+        return False
+    if "Content-Encoding" in response.headers or "Content-Range" in response.headers:
+        return False
+    mimetype = response.mimetype or ""
+    if mimetype in SKIP_MIMETYPES:
+        return False
+    allowed = current_app.config.get("COMPRESSION_MIMETYPES") or DEFAULT_MIMETYPES
+    return mimetype in allowed
+
+
+def compress_response(response):
+    """after_request: comprime a resposta se o tipo, o tamanho e o cliente permitirem."""
+    if not current_app.config.get("COMPRESSION_ENABLED", True) or not _compressible(response):
+        return response
+
+    _add_vary(response)
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.direct_passthrough:
+        # send_file sem pré-compressão: lê o arquivo (estáticos são pequenos)
+        response.direct_passthrough = False
+    data = response.get_data()
+    if len(data) < int(current_app.config.get("COMPRESSION_MIN_SIZE", 1024)):
+        return response
+
+    etag, weak = response.get_etag()
+    if etag and request.if_none_match.contains_weak(f"{etag}-{encoding}"):
+        # o send_file comparou com a ETag original; aqui vale a da variante
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+        response.status_code = 304
+        response.set_data(b"")
+        response.headers.pop("Content-Length", None)
+        return response
+
+    compressed = compress_bytes(data, encoding)
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
+
+
+def _precompressed_static_view(app: Flask, original_view):
+    static_folder = app.static_folder
+
+    def static(filename: str):
+        mimetype = mimetypes.guess_type(filename)[0] or ""
+        allowed = app.config.get("COMPRESSION_MIMETYPES") or DEFAULT_MIMETYPES
+        source = safe_join(static_folder, filename)
+        if mimetype not in allowed or not source or not os.path.isfile(source):
+            return original_view(filename=filename)
+
+        accepted = request.accept_encodings
+        # .br do build serve mesmo sem o módulo brotli instalado
+        for enc in ("br", "gzip"):
+            if accepted[enc] <= 0:
+                continue
+            variant = source + PRECOMPRESSED_SUFFIXES[enc]
+            if not os.path.isfile(variant) or os.path.getmtime(variant) < os.path.getmtime(source):
+                continue
+            response = send_from_directory(
+                static_folder,
+                filename + PRECOMPRESSED_SUFFIXES[enc],
+                mimetype=mimetype,
+                max_age=app.get_send_file_max_age(filename),
+            )
+            response.headers["Content-Encoding"] = enc
+            _add_vary(response)
+            return response
+        return original_view(filename=filename)
+
+    return static
+
+
+def install_compression(app: Flask) -> None:
+    """Liga o after_request e a entrega de estáticos pré-comprimidos."""
+    if not app.config.get("COMPRESSION_ENABLED", True):
+        return
+    app.after_request(compress_response)
+    if app.config.get("COMPRESSION_PRECOMPRESSED_STATIC", True) and "static" in app.view_functions:
+        app.view_functions["static"] = _precompressed_static_view(app, app.view_functions["static"])
@@ -4,6 +4,7 @@ import requests
 from flask import current_app, session, has_request_context
 
 from models.user_model import User
+from services.metrics import track_external
 
 logger = logging.getLogger(__name__)
 
@@ -66,15 +67,17 @@ def send_verification_email(user: User) -> bool:
     }
 
     try:
-        r = requests.post(
-            "https://api.resend.com/emails",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=20,
-        )
+        with track_external("resend", "send_email") as call:
+            r = requests.post(
+                "https://api.resend.com/emails",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                },
+                json=payload,
+                timeout=20,
+            )
+            call.status = r.status_code
 
         if r.status_code >= 400:
             logger.warning("Falha ao enviar e-mail (Resend): %s %s", r.status_code, r.text)
@@ -0,0 +1,117 @@
+"""Provider JSON do Flask com orjson (se instalado) e fallback na stdlib.
+
+Usado por jsonify, `request.get_json()` e pelo filtro `tojson` dos templates.
+Os dois backends geram a mesma saída:
+
+- `date`/`datetime`/`time` viram ISO 8601 (`2026-03-01`, `2026-03-01T10:00:00`),
+  como as rotas faziam à mão com `.isoformat()` (o padrão do Flask é data HTTP);
+- `set`/`frozenset` viram lista (ordenada quando possível), `Decimal` vira
+  string (como no Flask), `Enum` vira o valor;
+- chaves na ordem de inserção (sem sort_keys) e UTF-8 sem escapes `\\uXXXX`.
+
+orjson é opcional (fora do requirements.txt). Se o orjson recusar algum valor
+(ex.: inteiro acima de 64 bits), a serialização cai para a stdlib.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import decimal
+import enum
+import json
+import uuid
+from datetime import date, time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+
+def _default(obj):
+    """Tipos extras comuns aos dois backends (o orjson já trata datas, UUID e dataclasses)."""
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        try:
+            return sorted(obj)
+        except TypeError:
+            return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider com orjson no caminho quente (dumps/loads/response)."""
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def __init__(self, app: Flask, *, use_orjson: bool = True):
+        super().__init__(app)
+        self.use_orjson = bool(use_orjson and orjson is not None)
+
+    @property
+    def backend(self) -> str:
+        return "orjson" if self.use_orjson else "json"
+
+    def _orjson_option(self, *, indent: bool = False) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_stdlib(self, obj, *, indent: bool = False) -> str:
+        if indent:
+            return super().dumps(obj, indent=2)
+        return super().dumps(obj, separators=(",", ":"))
+
+    def dumps_bytes(self, obj, *, indent: bool = False) -> bytes:
+        """Serializa direto para UTF-8 (sem passar por str quando há orjson)."""
+        if self.use_orjson:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_option(indent=indent))
+            except TypeError:
+                pass
+        return self._dumps_stdlib(obj, indent=indent).encode("utf-8")
+
+    def dumps(self, obj, **kwargs) -> str:
+        # argumentos próprios da stdlib (cls, default, separators...) vão para a stdlib
+        indent = kwargs.get("indent")
+        if not self.use_orjson or set(kwargs) - {"indent"} or indent not in (None, 2):
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_option(indent=bool(indent))).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype)
+
+
+def install_json_provider(app: Flask) -> None:
+    """Troca o provider padrão do Flask (JSON_PROVIDER: auto | stdlib)."""
+    backend = (app.config.get("JSON_PROVIDER") or "auto").strip().lower()
+    app.json = FastJSONProvider(app, use_orjson=backend != "stdlib")
@@ -0,0 +1,350 @@
+"""Memória por request (tracemalloc) nos endpoints pesados, opt-in.
+
+Com MEMORY_PROFILING_ENABLED, cada request aos MEMORY_PROFILING_ENDPOINTS
+(relatórios, exportações, projeção) é medido:
+- pico de memória alocada (tracemalloc.reset_peak no início do request);
+- memória retida ao final (o que o request deixou vivo: caches, vazamentos);
+- principais linhas de alocação, de um snapshot tirado perto do pico por uma
+  thread que acompanha a memória traçada (as listas grandes já foram
+  liberadas quando a view retorna);
+- RSS do processo, para dimensionar os workers.
+
+Acima de MEMORY_PROFILING_BUDGET_MB o request é sinalizado: log WARNING com
+as linhas de alocação, metadados em MEMORY_PROFILING_DIR (padrão
+instance/memory) e o contador http_request_memory_over_budget_total. Fora de
+produção a resposta traz X-Memory-Peak-KB / X-Memory-Retained-KB.
+
+Vazamentos: GET /debug/memory/snapshot com `X-Profile-Token: <PROFILING_TOKEN>`
+liga o tracemalloc no processo (se preciso), grava um snapshot e devolve a
+diferença para o snapshot anterior do mesmo processo; `?stop=1` desliga.
+`flask --app app memory diff A B` compara dois snapshots gravados.
+
+tracemalloc é global no processo: só um request é medido por vez, e enquanto
+ele está ligado toda alocação custa mais (opt-in; use em staging ou em um
+worker isolado).
+"""
+
+from __future__ import annotations
+
+import hmac
+import json
+import linecache
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timezone
+
+from flask import Flask, abort, g, jsonify, request
+from flask_login import current_user
+
+from services.metrics import MEMORY_OVER_BUDGET, MEMORY_PEAK
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIX = ".snapshot"
+RECORD_SUFFIX = ".json"
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# tracemalloc é global: uma medição (ou snapshot manual) por vez.
+_trace_lock = threading.Lock()
+_state = {"continuous": False, "last_snapshot": None}
+# últimas medições deste processo (também devolvidas no /debug/memory/snapshot)
+_recent: deque = deque(maxlen=50)
+
+
+def process_rss_bytes() -> int | None:
+    """RSS atual do processo (Linux); None onde /proc não existe."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory_dir(app: Flask) -> str:
+    return app.config.get("MEMORY_PROFILING_DIR") or os.path.join(app.instance_path, "memory")
+
+
+def recent_measurements() -> list[dict]:
+    return list(_recent)
+
+
+# Alocações do próprio tracemalloc e deste módulo não interessam.
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, linecache.__file__),
+)
+
+
+def _site(frame, root: str) -> str:
+    filename = frame.filename
+    if filename.startswith(root + os.sep):
+        filename = os.path.relpath(filename, root)
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    return f"{filename}:{frame.lineno}"
+
+
+def top_sites(snapshot, baseline=None, *, limit: int = 10, root: str = "", key_type: str = "lineno") -> list[dict]:
+    """Linhas que mais alocaram (ou mais cresceram em relação a baseline)."""
+    snapshot = snapshot.filter_traces(_SNAPSHOT_FILTERS)
+    if baseline is not None:
+        stats = snapshot.compare_to(baseline.filter_traces(_SNAPSHOT_FILTERS), key_type)
+        rows = [(stat.traceback, stat.size_diff, stat.count_diff) for stat in stats if stat.size_diff > 0]
+    else:
+        rows = [(stat.traceback, stat.size, stat.count) for stat in snapshot.statistics(key_type)]
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return [
+        {
+            "site": " <- ".join(_site(frame, root) for frame in traceback),
+            "kb": round(size / 1024, 1),
+            "blocks": count,
+        }
+        for traceback, size, count in rows[:limit]
+    ]
+
+
+class PeakWatcher:
+    """Thread que tira um snapshot sempre que a memória traçada cresce step_ratio."""
+
+    def __init__(self, interval_s: float = 0.01, step_ratio: float = 1.25, min_step: int = 1024 * 1024):
+        self.interval_s = interval_s
+        self.step_ratio = step_ratio
+        self.min_step = min_step
+        self.snapshot = None
+        self.snapshot_size = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-peak-watcher", daemon=True)
+
+    def start(self, base_size: int) -> "PeakWatcher":
+        self._base_size = base_size
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.snapshot
+
+    def _run(self) -> None:
+        threshold = self._base_size + self.min_step
+        while not self._stop.wait(self.interval_s):
+            if not tracemalloc.is_tracing():
+                return
+            current = tracemalloc.get_traced_memory()[0]
+            if current < threshold:
+                continue
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+            threshold = max(int(current * self.step_ratio), current + self.min_step)
+
+
+def _prune(directory: str, suffix: str, keep: int) -> None:
+    names = sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+    for name in names[: max(0, len(names) - keep)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def _stamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+
+def list_memory_files(directory: str) -> dict:
+    """Registros de requests acima do orçamento e snapshots gravados (mais recentes primeiro)."""
+    try:
+        names = sorted(os.listdir(directory), reverse=True)
+    except FileNotFoundError:
+        return {"records": [], "snapshots": []}
+    records = []
+    for name in names:
+        if name.endswith(RECORD_SUFFIX):
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8") as fh:
+                    records.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+    snapshots = [name[: -len(SNAPSHOT_SUFFIX)] for name in names if name.endswith(SNAPSHOT_SUFFIX)]
+    return {"records": records, "snapshots": snapshots}
+
+
+def _resolve_snapshot(directory: str, snapshot_id: str) -> str:
+    matches = [name for name in list_memory_files(directory)["snapshots"] if name.startswith(snapshot_id)]
+    if snapshot_id in matches:
+        return os.path.join(directory, snapshot_id + SNAPSHOT_SUFFIX)
+    if not matches:
+        raise KeyError(f"Snapshot não encontrado: {snapshot_id}")
+    if len(matches) > 1:
+        raise KeyError(f"Prefixo ambíguo: {snapshot_id} ({len(matches)} snapshots)")
+    return os.path.join(directory, matches[0] + SNAPSHOT_SUFFIX)
+
+
+def diff_snapshots(directory: str, base_id: str, other_id: str, *, top: int = 20, key_type: str = "lineno",
+                   root: str = "") -> list[dict]:
+    """Linhas cuja memória viva mais cresceu entre dois snapshots gravados."""
+    base = tracemalloc.Snapshot.load(_resolve_snapshot(directory, base_id))
+    other = tracemalloc.Snapshot.load(_resolve_snapshot(directory, other_id))
+    return top_sites(other, base, limit=top, root=root, key_type=key_type)
+
+
+def _token_ok(token: str | None) -> bool:
+    return bool(token) and hmac.compare_digest(request.headers.get("X-Profile-Token") or "", token)
+
+
+def install_memory_profiling(app: Flask) -> None:
+    """Mede os endpoints configurados e registra /debug/memory/snapshot."""
+    if not app.config.get("MEMORY_PROFILING_ENABLED", False):
+        return
+    endpoints = set(app.config.get("MEMORY_PROFILING_ENDPOINTS") or [])
+    budget_bytes = int(float(app.config.get("MEMORY_PROFILING_BUDGET_MB", 64)) * 1024 * 1024)
+    top = int(app.config.get("MEMORY_PROFILING_TOP", 10))
+    frames = max(1, int(app.config.get("MEMORY_PROFILING_FRAMES", 1)))
+    keep_snapshots = int(app.config.get("MEMORY_PROFILING_KEEP_SNAPSHOTS", 10))
+    keep_records = int(app.config.get("MEMORY_PROFILING_KEEP_RECORDS", 200))
+    headers = not app.config.get("IS_PRODUCTION")
+    token = app.config.get("PROFILING_TOKEN") or None
+    directory = memory_dir(app)
+    root = app.root_path
+
+    def start_memory_measure():
+        if request.endpoint not in endpoints or not _trace_lock.acquire(blocking=False):
+            return
+        baseline = None
+        if tracemalloc.is_tracing():
+            # tracing contínuo (snapshot manual): compara com o estado de antes do request
+            baseline = tracemalloc.take_snapshot()
+        else:
+            tracemalloc.start(frames)
+        tracemalloc.reset_peak()
+        start_size = tracemalloc.get_traced_memory()[0]
+        g._memory_measure = {
+            "baseline": baseline,
+            "start_size": start_size,
+            "watcher": PeakWatcher().start(start_size),
+            "started": time.perf_counter(),
+        }
+
+    def finish_memory_measure(response):
+        measure = g.pop("_memory_measure", None)
+        if measure is None:
+            return response
+        try:
+            peak_snapshot = measure["watcher"].stop()
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = peak_snapshot or tracemalloc.take_snapshot()
+            sites = top_sites(snapshot, measure["baseline"], limit=top, root=root)
+            if not _state["continuous"]:
+                tracemalloc.stop()
+        finally:
+            _trace_lock.release()
+
+        endpoint = request.endpoint
+        peak_bytes = max(0, peak - measure["start_size"])
+        record = {
+            "id": f"{_stamp()}-{_SAFE_NAME_RE.sub('_', endpoint)[:60]}-{secrets.token_hex(3)}",
+            "endpoint": endpoint,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "user_id": current_user.get_id() if current_user.is_authenticated else None,
+            "peak_kb": round(peak_bytes / 1024, 1),
+            "retained_kb": round((current - measure["start_size"]) / 1024, 1),
+            "rss_kb": round((process_rss_bytes() or 0) / 1024),
+            "duration_ms": round((time.perf_counter() - measure["started"]) * 1000, 2),
+            "over_budget": peak_bytes > budget_bytes,
+            "pid": os.getpid(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "top_sites": sites,
+        }
+        _recent.append(record)
+        MEMORY_PEAK.observe(peak_bytes, endpoint=endpoint)
+        if headers:
+            response.headers["X-Memory-Peak-KB"] = str(record["peak_kb"])
+            response.headers["X-Memory-Retained-KB"] = str(record["retained_kb"])
+        if record["over_budget"]:
+            MEMORY_OVER_BUDGET.inc(endpoint=endpoint)
+            if headers:
+                response.headers["X-Memory-Over-Budget"] = "1"
+            logger.warning(
+                "memoria %s %s: pico %.1f MB (orçamento %.1f MB), retido %.1f MB; alocações: %s",
+                request.method,
+                request.path,
+                peak_bytes / 1024 / 1024,
+                budget_bytes / 1024 / 1024,
+                record["retained_kb"] / 1024,
+                "; ".join(f"{site['site']} {site['kb']} KB" for site in sites[:5]),
+            )
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, record["id"] + RECORD_SUFFIX), "w", encoding="utf-8") as fh:
+                    json.dump(record, fh, ensure_ascii=False, indent=2)
+                _prune(directory, RECORD_SUFFIX, keep_records)
+            except OSError:
+                logger.warning("Falha ao gravar registro de memória %s", record["id"], exc_info=True)
+        return response
+
+    def abort_memory_measure(exc):
+        # after_request não roda quando a view levanta exceção não tratada
+        measure = g.pop("_memory_measure", None)
+        if measure is None:
+            return
+        measure["watcher"].stop()
+        if not _state["continuous"]:
+            tracemalloc.stop()
+        _trace_lock.release()
+
+    def memory_snapshot():
+        if not _token_ok(token):
+            abort(404)
+        if not _trace_lock.acquire(timeout=30):
+            return jsonify({"error": "busy"}), 503
+        try:
+            if request.args.get("stop"):
+                _state["continuous"] = False
+                _state["last_snapshot"] = None
+                tracemalloc.stop()
+                return jsonify({"tracing": False, "pid": os.getpid()})
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            _state["continuous"] = True
+            snapshot = tracemalloc.take_snapshot()
+            snapshot_id = f"{_stamp()}-{os.getpid()}-{secrets.token_hex(3)}"
+            os.makedirs(directory, exist_ok=True)
+            snapshot.dump(os.path.join(directory, snapshot_id + SNAPSHOT_SUFFIX))
+            _prune(directory, SNAPSHOT_SUFFIX, keep_snapshots)
+            previous = _state["last_snapshot"]
+            _state["last_snapshot"] = snapshot
+            current, peak = tracemalloc.get_traced_memory()
+            return jsonify(
+                {
+                    "tracing": True,
+                    "pid": os.getpid(),
+                    "snapshot": snapshot_id,
+                    "traced_kb": round(current / 1024, 1),
+                    "traced_peak_kb": round(peak / 1024, 1),
+                    "rss_kb": round((process_rss_bytes() or 0) / 1024),
+                    "growth_since_previous": top_sites(snapshot, previous, limit=top, root=root)
+                    if previous is not None
+                    else None,
+                    "recent_requests": [
+                        {key: item[key] for key in ("endpoint", "peak_kb", "retained_kb", "over_budget", "created_at")}
+                        for item in _recent
+                    ],
+                }
+            )
+        finally:
+            _trace_lock.release()
+
+    app.before_request(start_memory_measure)
+    app.after_request(finish_memory_measure)
+    app.teardown_request(abort_memory_measure)
+    app.add_url_rule("/debug/memory/snapshot", endpoint="memory_snapshot", view_func=memory_snapshot, methods=["GET"])
@@ -0,0 +1,594 @@
+"""Métricas no formato texto do Prometheus (GET /metrics).
+
+Contadores, gauges e histogramas em memória, um Lock curto por métrica
+(só somas num dict). O que já existe em outros módulos (pool do banco,
+escritas serializadas do SQLite, cache da projeção) é lido na hora da coleta.
+
+Expostos:
+- http_request_duration_seconds{endpoint,method} (histograma),
+  http_requests_total{endpoint,method,status}, http_requests_in_flight{endpoint};
+- http_request_db_seconds{endpoint} e db_queries_total{endpoint}, a partir de
+  models/query_stats.py (requer QUERY_STATS_MODE diferente de "off");
+- db_pool_*, sqlite_write_*, projection_cache_*;
+- rules_evaluations_total{trigger,result}, report_export_duration_seconds{format},
+  external_request_duration_seconds{service,operation,outcome} (AbacatePay, Resend);
+- process_resident_memory_bytes e, com services/memory_profiling.py ligado,
+  http_request_memory_peak_bytes{endpoint} e
+  http_request_memory_over_budget_total{endpoint}.
+
+Vários workers do gunicorn: com METRICS_MULTIPROC_DIR cada processo grava um
+snapshot (`metrics_<pid>.json`) a cada METRICS_FLUSH_SECONDS e o /metrics,
+atendido por qualquer worker, soma os arquivos. Contadores de workers mortos
+continuam somando; gauges deles são descartados.
+
+Acesso: só dos IPs/redes de METRICS_ALLOWED_IPS (padrão: loopback) ou com
+`Authorization: Bearer <METRICS_TOKEN>`. Nada depende de serviço externo; um
+Prometheus local basta.
+"""
+
+from __future__ import annotations
+
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Flask, Response, abort, g, request
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SNAPSHOT_PREFIX = "metrics_"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def family(name: str, kind: str, documentation: str, samples: list) -> dict:
+    """Família de métricas no formato interno: samples = [(nome, ((label, valor), ...), valor)]."""
+    return {"name": name, "type": kind, "help": documentation, "samples": samples}
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: labels esperados {self.labelnames}, recebidos {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> tuple:
+        return tuple(zip(self.labelnames, key))
+
+    def collect(self) -> dict:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def collect(self) -> dict:
+        with self._lock:
+            items = list(self._values.items())
+        return family(self.name, self.kind, self.documentation, [(self.name, self._labels(k), v) for k, v in items])
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def collect(self) -> dict:
+        with self._lock:
+            items = list(self._values.items())
+        return family(self.name, self.kind, self.documentation, [(self.name, self._labels(k), v) for k, v in items])
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # contagem por faixa (não acumulada) + [soma, total]
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0
+
+    def collect(self) -> dict:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        samples = []
+        for key, state in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, hits in zip(self.buckets + (float("inf"),), state):
+                cumulative += hits
+                samples.append((f"{self.name}_bucket", labels + (("le", _format_value(bound)),), cumulative))
+            samples.append((f"{self.name}_sum", labels, state[-2]))
+            samples.append((f"{self.name}_count", labels, state[-1]))
+        return family(self.name, self.kind, self.documentation, samples)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list = []
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, tuple(labelnames), **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrica {name} já registrada como {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector) -> None:
+        """collector() -> lista de famílias (ver family()), chamado a cada coleta."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def collect(self) -> list[dict]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception:
+                logger.warning("Coletor de métricas falhou: %s", getattr(collector, "__name__", collector), exc_info=True)
+        return families
+
+    def reset(self) -> None:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Requests atendidos por endpoint, método e status.", ("endpoint", "method", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Latência dos requests por endpoint.", ("endpoint", "method")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests em andamento por endpoint.", ("endpoint",))
+HTTP_DB_SECONDS = REGISTRY.histogram(
+    "http_request_db_seconds", "Tempo de banco por request, por endpoint.", ("endpoint",)
+)
+DB_QUERIES = REGISTRY.counter("db_queries_total", "Statements SQL executados, por endpoint.", ("endpoint",))
+RULES_EVALUATIONS = REGISTRY.counter(
+    "rules_evaluations_total", "Regras de automação avaliadas contra lançamentos.", ("trigger", "result")
+)
+EXPORT_DURATION = REGISTRY.histogram(
+    "report_export_duration_seconds",
+    "Tempo de geração das exportações de relatório.",
+    ("format",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+EXTERNAL_DURATION = REGISTRY.histogram(
+    "external_request_duration_seconds",
+    "Latência das chamadas a serviços externos (AbacatePay, Resend).",
+    ("service", "operation", "outcome"),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0),
+)
+MEMORY_PEAK = REGISTRY.histogram(
+    "http_request_memory_peak_bytes",
+    "Pico de memória alocada durante o request (tracemalloc), por endpoint medido.",
+    ("endpoint",),
+    buckets=tuple(mb * 1024 * 1024 for mb in (1, 4, 16, 32, 64, 128, 256, 512, 1024)),
+)
+MEMORY_OVER_BUDGET = REGISTRY.counter(
+    "http_request_memory_over_budget_total", "Requests acima de MEMORY_PROFILING_BUDGET_MB.", ("endpoint",)
+)
+
+
+class _ExternalCall:
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status: int | None = None
+
+
+@contextmanager
+def track_external(service: str, operation: str):
+    """Mede uma chamada HTTP externa; `call.status = resp.status_code` define o outcome (2xx/4xx/5xx)."""
+    call = _ExternalCall()
+    started = time.perf_counter()
+    outcome = "exception"
+    try:
+        yield call
+        outcome = f"{call.status // 100}xx" if call.status else "ok"
+    finally:
+        EXTERNAL_DURATION.observe(time.perf_counter() - started, service=service, operation=operation, outcome=outcome)
+
+
+# ---------------------------------------------------------------------------
+# Coletores de estado já mantido em outros módulos
+# ---------------------------------------------------------------------------
+
+_POOL_COUNTERS = (
+    ("checkouts", "db_pool_checkouts_total", "Checkouts de conexão do pool."),
+    ("overflow_checkouts", "db_pool_overflow_checkouts_total", "Checkouts atendidos pelo overflow."),
+    ("timeouts", "db_pool_timeouts_total", "Timeouts esperando conexão."),
+    ("invalidations", "db_pool_invalidations_total", "Conexões invalidadas."),
+    ("disconnects", "db_pool_disconnects_total", "Erros classificados como desconexão."),
+    ("ping_failures", "db_pool_ping_failures_total", "Pings de conexão ociosa que falharam."),
+)
+_POOL_GAUGES = (
+    ("pool_size", "db_pool_size", "Tamanho configurado do pool."),
+    ("checked_out", "db_pool_checked_out", "Conexões em uso."),
+    ("overflow", "db_pool_overflow", "Conexões de overflow abertas."),
+)
+
+
+def _pool_families() -> list[dict]:
+    from models.db_pool import pool_stats
+    from models.extensions import db
+
+    stats = pool_stats(db.engine)
+    families = [
+        family(name, "counter", doc, [(name, (), stats.get(key, 0))]) for key, name, doc in _POOL_COUNTERS
+    ]
+    families.append(
+        family(
+            "db_pool_checkout_wait_seconds_total",
+            "counter",
+            "Tempo total esperando conexão do pool.",
+            [("db_pool_checkout_wait_seconds_total", (), stats.get("checkout_wait_total_ms", 0.0) / 1000)],
+        )
+    )
+    families.extend(
+        family(name, "gauge", doc, [(name, (), stats[key])]) for key, name, doc in _POOL_GAUGES if key in stats
+    )
+    return families
+
+
+def _write_families() -> list[dict]:
+    from models.sqlite_writes import write_stats
+
+    stats = write_stats()
+    return [
+        family(name, "counter", doc, [(name, (), stats.get(key, 0))])
+        for key, name, doc in (
+            ("transactions", "sqlite_write_transactions_total", "Transações de escrita serializadas."),
+            ("retries", "sqlite_write_retries_total", "Novas tentativas por lock de escrita."),
+            ("busy_failures", "sqlite_write_busy_failures_total", "Escritas que desistiram do lock."),
+        )
+    ]
+
+
+def _projection_cache_families() -> list[dict]:
+    from services.projection_engine import projection_cache_stats
+
+    stats = projection_cache_stats()
+    families = []
+    for key, kind, doc in (
+        ("items", "gauge", "Itens no cache da projeção."),
+        ("bytes", "gauge", "Bytes ocupados pelo cache da projeção."),
+        ("hits", "counter", "Acertos do cache da projeção."),
+        ("misses", "counter", "Faltas do cache da projeção."),
+        ("evictions", "counter", "Remoções do cache da projeção."),
+    ):
+        name = f"projection_cache_{key}" + ("_total" if kind == "counter" else "")
+        samples = [(name, (("cache", cache),), values.get(key, 0)) for cache, values in sorted(stats.items())]
+        families.append(family(name, kind, doc, samples))
+    return families
+
+
+def _process_families() -> list[dict]:
+    from services.memory_profiling import process_rss_bytes
+
+    rss = process_rss_bytes()
+    if rss is None:
+        return []
+    return [
+        family(
+            "process_resident_memory_bytes",
+            "gauge",
+            "Memória residente (RSS) do processo.",
+            [("process_resident_memory_bytes", (), rss)],
+        )
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Multiprocesso (gunicorn): um snapshot por worker, somados na coleta
+# ---------------------------------------------------------------------------
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_snapshot(directory: str, families: list[dict]) -> None:
+    path = os.path.join(directory, f"{SNAPSHOT_PREFIX}{os.getpid()}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump({"pid": os.getpid(), "families": families}, fh, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def read_snapshots(directory: str) -> list[dict]:
+    """Soma os snapshots de todos os processos (gauges só de processos vivos)."""
+    merged: dict[str, dict] = {}
+    sums: dict[str, dict[tuple, float]] = {}
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+    for filename in names:
+        if not (filename.startswith(SNAPSHOT_PREFIX) and filename.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, filename), encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        alive = _pid_alive(int(data.get("pid") or 0))
+        for fam in data.get("families") or []:
+            if fam["type"] == "gauge" and not alive:
+                continue
+            merged.setdefault(fam["name"], {key: fam[key] for key in ("name", "type", "help")})
+            bucket = sums.setdefault(fam["name"], {})
+            for sample_name, labels, value in fam["samples"]:
+                key = (sample_name, tuple(tuple(pair) for pair in labels))
+                bucket[key] = bucket.get(key, 0) + value
+    families = []
+    for name, fam in merged.items():
+        samples = [(sample_name, labels, value) for (sample_name, labels), value in sums[name].items()]
+        families.append(family(fam["name"], fam["type"], fam["help"], samples))
+    return families
+
+
+def clear_snapshots(directory: str) -> int:
+    """Apaga snapshots antigos (no start do master do gunicorn)."""
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    for filename in names:
+        if filename.startswith(SNAPSHOT_PREFIX):
+            os.remove(os.path.join(directory, filename))
+            removed += 1
+    return removed
+
+
+class _Flusher:
+    """Thread daemon que grava o snapshot do processo (recriada após fork)."""
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure(self, app: Flask) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            interval = float(app.config.get("METRICS_FLUSH_SECONDS", 5))
+            thread = threading.Thread(target=self._run, args=(app, interval), name="metrics-flush", daemon=True)
+            thread.start()
+
+    def _run(self, app: Flask, interval: float) -> None:
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(interval)
+            try:
+                flush_metrics(app)
+            except Exception:
+                logger.warning("Falha ao gravar snapshot de métricas", exc_info=True)
+
+
+_flusher = _Flusher()
+
+
+def flush_metrics(app: Flask) -> bool:
+    """Grava o snapshot deste processo (modo multiprocesso). False se desligado."""
+    directory = app.config.get("METRICS_MULTIPROC_DIR")
+    if not directory:
+        return False
+    with app.app_context():
+        families = REGISTRY.collect()
+    write_snapshot(directory, families)
+    return True
+
+
+def render_metrics(families: list[dict]) -> str:
+    lines = []
+    for fam in sorted(families, key=lambda item: item["name"]):
+        if not fam["samples"]:
+            continue
+        lines.append(f"# HELP {fam['name']} {_escape(fam['help'])}")
+        lines.append(f"# TYPE {fam['name']} {fam['type']}")
+        for sample_name, labels, value in fam["samples"]:
+            if labels:
+                rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+                lines.append(f"{sample_name}{{{rendered}}} {_format_value(value)}")
+            else:
+                lines.append(f"{sample_name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Flask: hooks de request e /metrics
+# ---------------------------------------------------------------------------
+
+def _parse_networks(raw) -> list:
+    items = raw if isinstance(raw, (list, tuple)) else str(raw or "").split(",")
+    networks = []
+    for item in items:
+        item = str(item).strip()
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            logger.warning("METRICS_ALLOWED_IPS invalido: %s", item)
+    return networks
+
+
+def _scrape_allowed(app: Flask, networks: list) -> bool:
+    token = app.config.get("METRICS_TOKEN")
+    if token:
+        auth = request.headers.get("Authorization", "")
+        if auth.startswith("Bearer ") and hmac.compare_digest(auth[len("Bearer "):].strip(), token):
+            return True
+    try:
+        address = ipaddress.ip_address(request.remote_addr or "")
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def install_metrics(app: Flask) -> None:
+    """Hooks de latência/in-flight e a rota /metrics. Instalar logo após install_query_stats."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    from models.query_stats import current_query_stats
+
+    networks = _parse_networks(app.config.get("METRICS_ALLOWED_IPS"))
+    multiproc_dir = app.config.get("METRICS_MULTIPROC_DIR")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+    REGISTRY.register_collector(_pool_families)
+    REGISTRY.register_collector(_write_families)
+    REGISTRY.register_collector(_projection_cache_families)
+    REGISTRY.register_collector(_process_families)
+
+    def start_request_metrics():
+        endpoint = request.endpoint or "unmatched"
+        g._metrics_endpoint = endpoint
+        g._metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(endpoint=endpoint)
+        if multiproc_dir:
+            _flusher.ensure(app)
+
+    def record_response(response):
+        g._metrics_status = response.status_code
+        stats = current_query_stats()
+        if stats is not None:
+            g._metrics_db = (stats.count, stats.total_ms)
+        return response
+
+    def finish_request_metrics(exc):
+        started = g.pop("_metrics_started", None)
+        if started is None:
+            return
+        endpoint = g.pop("_metrics_endpoint")
+        HTTP_IN_FLIGHT.dec(endpoint=endpoint)
+        status = g.get("_metrics_status") or (500 if exc is not None else 200)
+        HTTP_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=status)
+        db_stats = g.get("_metrics_db")
+        if db_stats is not None:
+            DB_QUERIES.inc(db_stats[0], endpoint=endpoint)
+            HTTP_DB_SECONDS.observe(db_stats[1] / 1000, endpoint=endpoint)
+
+    def metrics():
+        if not _scrape_allowed(app, networks):
+            abort(404)
+        if multiproc_dir:
+            flush_metrics(app)
+            families = read_snapshots(multiproc_dir)
+        else:
+            families = REGISTRY.collect()
+        return Response(render_metrics(families), content_type=CONTENT_TYPE)
+
+    app.before_request(start_request_metrics)
+    app.after_request(record_response)
+    app.teardown_request(finish_request_metrics)
+    app.add_url_rule("/metrics", endpoint="metrics", view_func=metrics, methods=["GET"])
@@ -0,0 +1,337 @@
+"""Profiling sob demanda de requests lentos (cProfile ou amostrador de pilhas).
+
+Disparo (só um request perfilado por vez em cada processo):
+- header `X-Profile: cprofile|sample` (`1` = PROFILING_MODE) junto com
+  `X-Profile-Token: <PROFILING_TOKEN>`; sem token configurado o header é
+  ignorado;
+- amostragem: PROFILING_SAMPLE_RATE (0..1) dos requests aos endpoints de
+  PROFILING_ENDPOINTS, no modo PROFILING_MODE.
+
+Modos:
+- cprofile: cProfile em volta da view; grava `<id>.pstats`
+  (`python -m pstats`, snakeviz);
+- sample: uma thread lê a pilha da thread do request a cada
+  PROFILING_SAMPLE_INTERVAL_MS e grava `<id>.collapsed` (formato "folded" do
+  flamegraph.pl/speedscope). Custo baixo, serve para produção.
+
+Cada captura tem `<id>.json` com os metadados do request (endpoint, path,
+usuário, status, duração, queries). PROFILING_MAX_BYTES limita o diretório:
+as capturas mais antigas saem primeiro. A resposta perfilada traz
+`X-Profile-Id`.
+
+CLI: `flask --app app profiles list` e `flask --app app profiles diff A B`.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hmac
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from flask import Flask, g, request
+from flask_login import current_user
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = {"cprofile", "sample"}
+PROFILE_SUFFIXES = {"cprofile": ".pstats", "sample": ".collapsed"}
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# cProfile não aceita dois perfis ativos ao mesmo tempo; vale para os dois modos.
+_capture_lock = threading.Lock()
+
+
+def _frame_label(code, cache: dict) -> str:
+    label = cache.get(code)
+    if label is None:
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        # ";" separa os frames no formato collapsed
+        label = cache[code] = label.replace(";", ":")
+    return label
+
+
+def _stack_depth(frame) -> int:
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+class StackSampler:
+    """Amostra a pilha de uma thread em intervalo fixo (contagem por pilha)."""
+
+    def __init__(self, thread_id: int, interval_s: float, skip_frames: int = 0):
+        self.thread_id = thread_id
+        self.interval_s = max(0.0005, interval_s)
+        self.skip_frames = skip_frames
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._labels: dict = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            codes = codes[self.skip_frames:]
+            if not codes:
+                continue
+            self.stacks[";".join(_frame_label(code, self._labels) for code in codes)] += 1
+            self.samples += 1
+
+
+def write_collapsed(path: str, stacks: Counter[str]) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        for stack, count in stacks.most_common():
+            fh.write(f"{stack} {count}\n")
+
+
+def profile_dir(app: Flask) -> str:
+    return app.config.get("PROFILING_DIR") or os.path.join(app.instance_path, "profiles")
+
+
+def _capture_id(endpoint: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return f"{stamp}-{_SAFE_NAME_RE.sub('_', endpoint)[:60]}-{secrets.token_hex(3)}"
+
+
+def list_profiles(directory: str) -> list[dict]:
+    """Metadados das capturas, da mais recente para a mais antiga."""
+    items = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as fh:
+                items.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    items.sort(key=lambda item: item.get("created_at") or "", reverse=True)
+    return items
+
+
+def _capture_files(directory: str, capture_id: str) -> list[str]:
+    return [
+        os.path.join(directory, capture_id + suffix)
+        for suffix in (".json", *PROFILE_SUFFIXES.values())
+        if os.path.exists(os.path.join(directory, capture_id + suffix))
+    ]
+
+
+def enforce_disk_budget(directory: str, max_bytes: int) -> int:
+    """Remove as capturas mais antigas até caber em max_bytes. Retorna quantas saíram."""
+    captures = []
+    total = 0
+    for meta in list_profiles(directory):
+        files = _capture_files(directory, meta["id"])
+        size = sum(os.path.getsize(path) for path in files)
+        captures.append((meta["id"], files, size))
+        total += size
+    removed = 0
+    while captures and total > max_bytes:
+        _capture_id_, files, size = captures.pop()
+        for path in files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def load_profile(directory: str, capture_id: str) -> dict:
+    """Metadados de uma captura (aceita prefixo único do id)."""
+    matches = [meta for meta in list_profiles(directory) if meta["id"].startswith(capture_id)]
+    if not matches:
+        raise KeyError(f"Captura não encontrada: {capture_id}")
+    exact = [meta for meta in matches if meta["id"] == capture_id]
+    if len(exact) == 1:
+        return exact[0]
+    if len(matches) > 1:
+        raise KeyError(f"Prefixo ambíguo: {capture_id} ({len(matches)} capturas)")
+    return matches[0]
+
+
+def function_costs(directory: str, meta: dict) -> dict[str, float]:
+    """Custo próprio por função, em fração do total (comparável entre modos e durações)."""
+    path = os.path.join(directory, meta["id"] + PROFILE_SUFFIXES[meta["mode"]])
+    costs: Counter[str] = Counter()
+    if meta["mode"] == "cprofile":
+        stats = pstats.Stats(path).stats
+        for (filename, line, name), (_cc, _nc, tottime, _ct, _callers) in stats.items():
+            costs[f"{name} ({os.path.basename(filename)}:{line})"] += tottime
+    else:
+        with open(path, encoding="utf-8") as fh:
+            for row in fh:
+                stack, _, count = row.rstrip("\n").rpartition(" ")
+                if stack:
+                    costs[stack.rsplit(";", 1)[-1]] += int(count)
+    total = sum(costs.values()) or 1
+    return {name: value / total for name, value in costs.items()}
+
+
+def diff_profiles(directory: str, base_id: str, other_id: str, top: int = 20) -> dict:
+    """Funções cuja fatia do tempo mais mudou entre duas capturas."""
+    base = load_profile(directory, base_id)
+    other = load_profile(directory, other_id)
+    base_costs = function_costs(directory, base)
+    other_costs = function_costs(directory, other)
+    rows = []
+    for name in set(base_costs) | set(other_costs):
+        before, after = base_costs.get(name, 0.0), other_costs.get(name, 0.0)
+        rows.append(
+            {
+                "function": name,
+                "before_pct": round(before * 100, 2),
+                "after_pct": round(after * 100, 2),
+                "delta_pct": round((after - before) * 100, 2),
+                # fração aplicada à duração de cada request
+                "before_ms": round(before * base.get("duration_ms", 0.0), 2),
+                "after_ms": round(after * other.get("duration_ms", 0.0), 2),
+            }
+        )
+    rows.sort(key=lambda row: abs(row["delta_pct"]), reverse=True)
+    return {"base": base, "other": other, "rows": rows[:top]}
+
+
+def _requested_mode(app: Flask, token: str | None) -> str | None:
+    raw = (request.headers.get("X-Profile") or "").strip().lower()
+    if not raw or not token:
+        return None
+    if not hmac.compare_digest(request.headers.get("X-Profile-Token") or "", token):
+        return None
+    if raw in {"1", "true", "yes"}:
+        return app.config.get("PROFILING_MODE") or "sample"
+    return raw if raw in PROFILE_MODES else None
+
+
+def install_profiling(app: Flask) -> None:
+    """Envolve a view (app.dispatch_request) quando um perfil é pedido ou sorteado."""
+    token = app.config.get("PROFILING_TOKEN") or None
+    rate = float(app.config.get("PROFILING_SAMPLE_RATE", 0) or 0)
+    endpoints = set(app.config.get("PROFILING_ENDPOINTS") or [])
+    if not app.config.get("PROFILING_ENABLED", True) or (not token and (rate <= 0 or not endpoints)):
+        return
+
+    default_mode = app.config.get("PROFILING_MODE") or "sample"
+    if default_mode not in PROFILE_MODES:
+        logger.warning("PROFILING_MODE invalido: %s (usando 'sample')", default_mode)
+        default_mode = "sample"
+    interval_s = float(app.config.get("PROFILING_SAMPLE_INTERVAL_MS", 5)) / 1000
+    max_bytes = int(app.config.get("PROFILING_MAX_BYTES", 50 * 1024 * 1024))
+    directory = profile_dir(app)
+    original_dispatch = app.dispatch_request
+
+    def choose_mode() -> tuple[str, str] | None:
+        mode = _requested_mode(app, token)
+        if mode:
+            return mode, "header"
+        if rate > 0 and request.endpoint in endpoints and random.random() < rate:
+            return default_mode, "sample_rate"
+        return None
+
+    def dispatch_request():
+        choice = choose_mode()
+        if choice is None or not _capture_lock.acquire(blocking=False):
+            return original_dispatch()
+        mode, trigger = choice
+        capture_id = _capture_id(request.endpoint or "unmatched")
+        started = time.perf_counter()
+        profiler = sampler = None
+        try:
+            if mode == "cprofile":
+                profiler = cProfile.Profile()
+                return profiler.runcall(original_dispatch)
+            # pula os frames de werkzeug/flask acima da view
+            sampler = StackSampler(threading.get_ident(), interval_s, skip_frames=_stack_depth(sys._getframe()))
+            sampler.start()
+            return original_dispatch()
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            try:
+                os.makedirs(directory, exist_ok=True)
+                data_path = os.path.join(directory, capture_id + PROFILE_SUFFIXES[mode])
+                extra = {}
+                if profiler is not None:
+                    profiler.dump_stats(data_path)
+                else:
+                    stacks = sampler.stop()
+                    write_collapsed(data_path, stacks)
+                    extra = {"samples": sampler.samples, "interval_ms": round(interval_s * 1000, 3)}
+                g._profile_capture = {
+                    "id": capture_id,
+                    "mode": mode,
+                    "trigger": trigger,
+                    "endpoint": request.endpoint,
+                    "method": request.method,
+                    "path": request.path,
+                    "args": sorted(request.args.keys()),
+                    "user_id": current_user.get_id() if current_user.is_authenticated else None,
+                    "duration_ms": round(duration_ms, 2),
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "pid": os.getpid(),
+                    **extra,
+                }
+            except Exception:
+                logger.warning("Falha ao gravar perfil %s", capture_id, exc_info=True)
+            finally:
+                _capture_lock.release()
+
+    def tag_response(response):
+        capture = g.get("_profile_capture")
+        if capture is not None:
+            capture["status"] = response.status_code
+            response.headers["X-Profile-Id"] = capture["id"]
+        return response
+
+    def save_capture(exc):
+        capture = g.pop("_profile_capture", None)
+        if capture is None:
+            return
+        from models.query_stats import current_query_stats
+
+        stats = current_query_stats()
+        if stats is not None:
+            capture["db"] = {"queries": stats.count, "db_ms": round(stats.total_ms, 2)}
+        capture.setdefault("status", 500 if exc is not None else None)
+        try:
+            with open(os.path.join(directory, capture["id"] + ".json"), "w", encoding="utf-8") as fh:
+                json.dump(capture, fh, ensure_ascii=False, indent=2)
+            enforce_disk_budget(directory, max_bytes)
+        except OSError:
+            logger.warning("Falha ao gravar metadados do perfil %s", capture["id"], exc_info=True)
+
+    app.dispatch_request = dispatch_request
+    app.after_request(tag_response)
+    app.teardown_request(save_capture)
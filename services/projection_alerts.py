@@ -0,0 +1,322 @@
+"""Alertas de saldo negativo em lote (rodar via cron: `flask --app app projection-alerts`).
+
+Percorre os usuários com a projeção liberada (plano com a feature, e-mail
+verificado, assinatura ativa) em lotes por keyset de id. Para cada um monta o
+baseline da projeção (saldo inicial agregado no banco + entradas da janela +
+recorrências expandidas) de hoje até hoje + N dias e, se houver break_date,
+grava uma Notification "projection" (uma por data de quebra).
+
+Os lotes rodam em um pool de processos (fork); as notificações são gravadas
+no processo principal pela fila de escritor único (models/sqlite_writes.py),
+uma transação curta por lote, enquanto os próximos lotes seguem sendo
+processados. O ritmo de envio de
+lotes respeita um orçamento de carga no banco: segundos de consulta por
+segundo de relógio, somados entre os processos.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Iterator
+
+from flask import Flask, current_app
+
+from models.extensions import db
+from models.notification_model import Notification
+from models.sqlite_writes import get_write_queue
+from models.user_model import User
+from services.plans import PLANS
+from services.projection_engine import build_projection_baseline, summarize_baseline
+
+logger = logging.getLogger(__name__)
+
+ALERT_TYPE = "projection"
+ALERT_HREF = "/app/projection"
+FEATURE = "projection"
+
+# app herdado pelos processos do pool (fork)
+_worker_app: Flask | None = None
+
+
+@dataclass
+class AlertRunReport:
+    users: int = 0
+    chunks: int = 0
+    breaks: int = 0
+    created: int = 0
+    errors: int = 0
+    workers: int = 1
+    elapsed_s: float = 0.0
+    db_seconds: float = 0.0
+    throttled_s: float = 0.0
+    db_budget: float = 0.0
+    dry_run: bool = False
+
+    @property
+    def users_per_second(self) -> float:
+        return self.users / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    @property
+    def db_load(self) -> float:
+        """Segundos de banco por segundo de relógio (comparar com db_budget)."""
+        return self.db_seconds / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "users": self.users,
+            "chunks": self.chunks,
+            "breaks": self.breaks,
+            "created": self.created,
+            "errors": self.errors,
+            "workers": self.workers,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "users_per_second": round(self.users_per_second, 1),
+            "db_seconds": round(self.db_seconds, 3),
+            "db_load": round(self.db_load, 3),
+            "db_budget": self.db_budget,
+            "throttled_s": round(self.throttled_s, 3),
+            "dry_run": self.dry_run,
+        }
+
+
+def _plans_with_feature(feature: str) -> list[str]:
+    return [key for key, plan in PLANS.items() if feature in plan.get("features", set())]
+
+
+def iter_user_chunks(chunk_size: int, *, now: datetime | None = None) -> Iterator[list[int]]:
+    """Ids dos usuários elegíveis em lotes (keyset por id, sem OFFSET)."""
+    now = now or datetime.utcnow()
+    plans = _plans_with_feature(FEATURE)
+    last_id = 0
+    while True:
+        ids = [
+            row[0]
+            for row in db.session.query(User.id)
+            .filter(
+                User.id > last_id,
+                User.plan.in_(plans),
+                User.is_verified == True,  # noqa: E712
+                User.plan_expires_at >= now,
+            )
+            .order_by(User.id)
+            .limit(chunk_size)
+            .all()
+        ]
+        # encerra a transação de leitura antes das escritas do lote
+        db.session.rollback()
+        if not ids:
+            return
+        yield ids
+        if len(ids) < chunk_size:
+            return
+        last_id = ids[-1]
+
+
+def scan_users(user_ids: list[int], *, today: date, horizon_days: int) -> dict[str, Any]:
+    """Projeta cada usuário e devolve os que quebram na janela (sem escrever)."""
+    end = today + timedelta(days=horizon_days)
+    breaks: list[dict[str, Any]] = []
+    db_seconds = 0.0
+    errors = 0
+    for user_id in user_ids:
+        started = time.perf_counter()
+        try:
+            baseline = build_projection_baseline(
+                user_id=user_id, start=today, end=end, mode="cash", include_recurring=True
+            )
+        except Exception:
+            logger.exception("projection_alerts: falha ao projetar user_id=%s", user_id)
+            db.session.rollback()
+            errors += 1
+            continue
+        finally:
+            db_seconds += time.perf_counter() - started
+        summary = summarize_baseline(baseline)
+        if summary["break_date"]:
+            breaks.append(
+                {
+                    "user_id": user_id,
+                    "break_date": summary["break_date"],
+                    "min_saldo": summary["min_saldo"],
+                    "min_saldo_date": summary["min_saldo_date"],
+                }
+            )
+    db.session.rollback()
+    return {"users": len(user_ids), "breaks": breaks, "db_seconds": db_seconds, "errors": errors}
+
+
+def _init_worker() -> None:
+    # Conexões herdadas do processo pai não podem ser reusadas aqui.
+    with _worker_app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def _scan_chunk(user_ids: list[int], today: date, horizon_days: int) -> dict[str, Any]:
+    with _worker_app.app_context():
+        return scan_users(user_ids, today=today, horizon_days=horizon_days)
+
+
+def _fmt_brl(value: float) -> str:
+    return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _alert_event(item: dict[str, Any], today: date) -> dict[str, Any]:
+    break_date = date.fromisoformat(item["break_date"])
+    days = (break_date - today).days
+    when = "hoje" if days <= 0 else ("amanhã" if days == 1 else f"em {days} dias")
+    return {
+        "source_key": f"projection:break:{item['break_date']}",
+        "title": f"Saldo pode ficar negativo {when}",
+        "message": (
+            f"Previsto para {break_date.strftime('%d/%m/%Y')} · "
+            f"mínimo de {_fmt_brl(item['min_saldo'])} em "
+            f"{date.fromisoformat(item['min_saldo_date']).strftime('%d/%m/%Y')}"
+        ),
+    }
+
+
+def store_alerts(breaks: list[dict[str, Any]], *, today: date) -> int:
+    """Grava as notificações que ainda não existem. Job da fila de escrita:
+    roda dentro de write_transaction (uma transação por lote).
+
+    A nova data de quebra substitui a anterior: alertas "projection" não lidos
+    do mesmo usuário são marcados como lidos.
+    """
+    if not breaks:
+        return 0
+    events = {item["user_id"]: _alert_event(item, today) for item in breaks}
+    now = datetime.utcnow()
+    created = 0
+    session = db.session
+    existing = set(
+        session.query(Notification.user_id, Notification.source_key)
+        .filter(
+            Notification.user_id.in_(list(events)),
+            Notification.source_key.in_({ev["source_key"] for ev in events.values()}),
+        )
+        .all()
+    )
+    fresh = [uid for uid, ev in events.items() if (uid, ev["source_key"]) not in existing]
+    if fresh:
+        session.query(Notification).filter(
+            Notification.user_id.in_(fresh),
+            Notification.type == ALERT_TYPE,
+            Notification.read_at.is_(None),
+        ).update({"read_at": now}, synchronize_session=False)
+    for uid in fresh:
+        ev = events[uid]
+        session.add(
+            Notification(
+                user_id=uid,
+                source_key=ev["source_key"],
+                type=ALERT_TYPE,
+                title=ev["title"],
+                message=ev["message"],
+                href=ALERT_HREF,
+                created_at=now,
+            )
+        )
+        created += 1
+    return created
+
+
+def run_projection_alerts(
+    *,
+    horizon_days: int | None = None,
+    workers: int | None = None,
+    chunk_size: int | None = None,
+    db_budget: float | None = None,
+    dry_run: bool = False,
+    today: date | None = None,
+) -> AlertRunReport:
+    """Executa uma rodada completa. Precisa de app context."""
+    global _worker_app
+
+    app = current_app._get_current_object()
+    cfg = app.config
+    horizon_days = max(1, int(horizon_days if horizon_days is not None else cfg.get("PROJECTION_ALERTS_HORIZON_DAYS", 14)))
+    workers = max(1, int(workers if workers is not None else cfg.get("PROJECTION_ALERTS_WORKERS", 2)))
+    chunk_size = max(1, int(chunk_size if chunk_size is not None else cfg.get("PROJECTION_ALERTS_CHUNK_SIZE", 200)))
+    db_budget = max(0.0, float(db_budget if db_budget is not None else cfg.get("PROJECTION_ALERTS_DB_BUDGET", 1.0)))
+    today = today or date.today()
+
+    if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        workers = 1
+
+    report = AlertRunReport(workers=workers, db_budget=db_budget, dry_run=dry_run)
+    started = time.perf_counter()
+
+    def pace() -> None:
+        # segura o próximo lote até a carga média voltar ao orçamento
+        if db_budget <= 0:
+            return
+        wait_s = report.db_seconds / db_budget - (time.perf_counter() - started)
+        if wait_s > 0:
+            time.sleep(wait_s)
+            report.throttled_s += wait_s
+
+    # Gravação pela fila de escritor único: o próximo lote não espera o commit.
+    # Com o pool (fork), todos os processos sobem no primeiro submit, antes da
+    # primeira gravação; a thread escritora para no fim da rodada.
+    queue = get_write_queue(app)
+    writes: list = []
+
+    def collect(block: bool) -> None:
+        while writes and (block or writes[0].done()):
+            created, write_seconds = writes.pop(0).result()
+            report.created += created
+            report.db_seconds += write_seconds
+
+    def handle(result: dict[str, Any]) -> None:
+        report.chunks += 1
+        report.users += result["users"]
+        report.breaks += len(result["breaks"])
+        report.errors += result["errors"]
+        report.db_seconds += result["db_seconds"]
+        collect(block=False)
+        if not dry_run and result["breaks"]:
+            writes.append(queue.submit(_timed_store, result["breaks"], today))
+
+    try:
+        chunks = iter_user_chunks(chunk_size)
+        if workers == 1:
+            for ids in chunks:
+                pace()
+                handle(scan_users(ids, today=today, horizon_days=horizon_days))
+        else:
+            _worker_app = app
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_worker,
+            )
+            with pool:
+                pending: set = set()
+                for ids in chunks:
+                    while len(pending) >= workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            handle(future.result())
+                    pace()
+                    pending.add(pool.submit(_scan_chunk, ids, today, horizon_days))
+                for future in wait(pending).done:
+                    handle(future.result())
+            _worker_app = None
+    finally:
+        collect(block=True)
+        queue.stop()
+
+    report.elapsed_s = time.perf_counter() - started
+    logger.info("projection_alerts: %s", report.as_dict())
+    return report
+
+
+def _timed_store(breaks: list[dict[str, Any]], today: date) -> tuple[int, float]:
+    started = time.perf_counter()
+    return store_alerts(breaks, today=today), time.perf_counter() - started
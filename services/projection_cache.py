@@ -0,0 +1,99 @@
+"""Caches em memória (por processo) da projeção.
+
+Cada item guarda a versão dos dados do usuário (projection_data_version);
+versão diferente = item inválido, então qualquer mudança em entradas ou
+recorrências invalida o cache em todos os workers sem precisar de sinal
+entre processos. LRU por quantidade e, opcionalmente, por bytes + TTL.
+Não é persistido nem compartilhado: cada worker aquece o seu, e um
+restart começa vazio.
+
+Resultados completos ficam serializados (JSON + zlib): ocupam uma fração
+do dict original e cada hit devolve uma cópia nova, que o chamador pode
+alterar à vontade.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+import zlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+
+def encode_payload(payload: Any) -> bytes:
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, 1)
+
+
+def decode_payload(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+def overrides_digest(overrides: Any) -> str:
+    """Hash estável dos overrides (ordem das chaves não importa)."""
+    raw = json.dumps(overrides or {}, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class VersionedLRUCache:
+    """LRU com TTL em que cada item vale só para a versão de dados com que foi gravado."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._items: OrderedDict[tuple, tuple[tuple, float, Any, int]] = OrderedDict()
+        self._lock = Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple, version: tuple, ttl: float) -> Any | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] != version or (time.monotonic() - item[1]) > ttl:
+                if item is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[2]
+
+    def put(self, key: tuple, version: tuple, value: Any, maxsize: int, max_bytes: int = 0) -> None:
+        size = len(value) if isinstance(value, (bytes, bytearray)) else 0
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._items[key] = (version, time.monotonic(), value, size)
+            self._bytes += size
+            while self._items and (
+                len(self._items) > maxsize or (max_bytes > 0 and self._bytes > max_bytes)
+            ):
+                self._drop(next(iter(self._items)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, key: tuple) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._bytes -= item[3]
@@ -5,9 +5,14 @@ from datetime import date, timedelta
 import logging
 from typing import Any
 
+from flask import current_app, has_app_context
+from sqlalchemy import and_, case, func, literal, or_
+
 from models.extensions import db
 from models.entrada_model import Entrada
 from models.recurrence_model import Recurrence
+from services.projection_cache import VersionedLRUCache, decode_payload, encode_payload, overrides_digest
+from services.projection_series import balance_series, bin_deltas, grouped_totals
 
 
 logger = logging.getLogger(__name__)
@@ -25,14 +30,8 @@ def _clamp_day(year: int, month: int, day: int) -> date:
     return date(year, month, min(day, last.day))
 
 
-def _daterange(start: date, end: date):
-    d = start
-    while d <= end:
-        yield d
-        d += timedelta(days=1)
-
-
-def _parse_priority(value: str | None) -> str:
+def parse_priority(value: str | None) -> str:
+    """alta/media/baixa; qualquer outro valor vira media."""
     v = (value or "").strip().lower()
     return v if v in {"alta", "media", "baixa"} else "media"
 
@@ -61,6 +60,72 @@ def _should_count_before_start(e: Entrada, mode: str) -> bool:
     return True
 
 
+# Versões SQL de _resolve_entry_date / _should_count_before_start.
+# Mantenha as duas em sincronia: o saldo inicial sai do banco, os eventos do Python.
+def _resolved_date_sql(mode: str):
+    if mode != "cash":
+        return Entrada.data
+    return case(
+        (
+            and_(Entrada.tipo == "despesa", Entrada.status == "pago", Entrada.paid_at.isnot(None)),
+            Entrada.paid_at,
+        ),
+        (
+            and_(Entrada.tipo == "receita", Entrada.status == "recebido", Entrada.received_at.isnot(None)),
+            Entrada.received_at,
+        ),
+        else_=Entrada.data,
+    )
+
+
+def _counts_before_start_sql(mode: str):
+    if mode != "cash":
+        return literal(True)
+    return or_(
+        and_(Entrada.tipo == "despesa", Entrada.status == "pago"),
+        and_(
+            Entrada.tipo == "receita",
+            or_(Entrada.status.is_(None), Entrada.status == "", Entrada.status == "recebido"),
+        ),
+        Entrada.tipo.notin_(["despesa", "receita"]),
+    )
+
+
+def compute_opening_balance(user_id: int, start: date, mode: str = "cash") -> float:
+    """Saldo antes de `start` com um único SUM no banco (respeita o modo cash)."""
+    signed = case((Entrada.tipo == "receita", Entrada.valor), else_=-Entrada.valor)
+    total = (
+        db.session.query(func.coalesce(func.sum(signed), 0.0))
+        .filter(
+            Entrada.user_id == user_id,
+            _resolved_date_sql(mode) < start,
+            _counts_before_start_sql(mode),
+        )
+        .scalar()
+    )
+    return float(total or 0.0)
+
+
+def fetch_window_entries(user_id: int, start: date, end: date, mode: str = "cash") -> list[Entrada]:
+    """Entradas cuja data resolvida cai em [start, end].
+
+    O filtro usa as colunas de data diretamente (data/paid_at/received_at) para
+    aproveitar índices; a data resolvida final é conferida em Python.
+    """
+    query = db.session.query(Entrada).filter(Entrada.user_id == user_id)
+    if mode == "cash":
+        query = query.filter(
+            or_(
+                Entrada.data.between(start, end),
+                Entrada.paid_at.between(start, end),
+                Entrada.received_at.between(start, end),
+            )
+        )
+    else:
+        query = query.filter(Entrada.data.between(start, end))
+    return [e for e in query.all() if start <= _resolve_entry_date(e, mode) <= end]
+
+
 def generate_recurrence_events(rec: Recurrence, start: date, end: date) -> list[dict[str, Any]]:
     # Somente monthly por enquanto (já é o que o modelo suporta)
     events: list[dict[str, Any]] = []
@@ -107,18 +172,35 @@ def generate_recurrence_events(rec: Recurrence, start: date, end: date) -> list[
     return events
 
 
-def apply_overrides(events: list[dict[str, Any]], overrides: dict[str, Any]) -> tuple[list[dict[str, Any]], float | None]:
-    # overrides: shifts, reductions, extras, splits, reserve
+@dataclass
+class ParsedOverrides:
+    """Overrides de cenário já validados (saída de parse_overrides)."""
+
+    reserve: float | None
+    shift_map: dict[int, date]
+    red_map: dict[str, float]
+    split_map: dict[int, dict[str, Any]]
+    extras: list[dict[str, Any]]
+
+    @property
+    def touches_events(self) -> bool:
+        return bool(self.shift_map or self.red_map or self.split_map or self.extras)
+
+
+def parse_overrides(overrides: dict[str, Any] | None) -> ParsedOverrides:
+    """Valida os overrides do cenário (shifts, reductions, extras, splits, reserve)."""
+    if not isinstance(overrides, dict):
+        overrides = {}
+
     reserve_override = None
-    if isinstance(overrides, dict):
-        if overrides.get("reserve") is not None:
-            try:
-                reserve_override = float(overrides.get("reserve"))
-            except (TypeError, ValueError):
-                reserve_override = None
+    if overrides.get("reserve") is not None:
+        try:
+            reserve_override = float(overrides.get("reserve"))
+        except (TypeError, ValueError):
+            reserve_override = None
 
     # shifts (por entrada_id)
-    shifts = overrides.get("shifts") if isinstance(overrides, dict) else None
+    shifts = overrides.get("shifts")
     shift_map: dict[int, date] = {}
     if isinstance(shifts, list):
         for s in shifts:
@@ -135,9 +217,11 @@ def apply_overrides(events: list[dict[str, Any]], overrides: dict[str, Any]) ->
 
     # reductions: por categoria (somente despesas)
     red_map: dict[str, float] = {}
-    reductions = overrides.get("reductions") if isinstance(overrides, dict) else None
+    reductions = overrides.get("reductions")
     if isinstance(reductions, list):
         for r in reductions:
+            if not isinstance(r, dict):
+                continue
             cat = str(r.get("categoria") or "").strip().lower()
             if not cat:
                 continue
@@ -150,7 +234,7 @@ def apply_overrides(events: list[dict[str, Any]], overrides: dict[str, Any]) ->
                 red_map[cat] = pct
 
     # splits: parcelar uma despesa (somente entradas)
-    splits = overrides.get("splits") if isinstance(overrides, dict) else None
+    splits = overrides.get("splits")
     split_map: dict[int, dict[str, Any]] = {}
     if isinstance(splits, list):
         for sp in splits:
@@ -167,64 +251,9 @@ def apply_overrides(events: list[dict[str, Any]], overrides: dict[str, Any]) ->
                 logger.warning("Projecao: override de split invalido: %s", exc)
                 continue
 
-    new_events: list[dict[str, Any]] = []
-    for ev in events:
-        # shift
-        if ev.get("source") == "entry":
-            try:
-                eid = int(ev.get("id"))
-                if eid in shift_map:
-                    ev = dict(ev)
-                    ev["date"] = shift_map[eid]
-            except (TypeError, ValueError):
-                pass
-
-        # reductions
-        if ev.get("tipo") == "despesa":
-            cat = str(ev.get("categoria") or "").strip().lower()
-            if cat in red_map:
-                pct = red_map[cat]
-                ev = dict(ev)
-                ev["valor"] = round(float(ev["valor"]) * (1.0 - pct / 100.0), 2)
-                ev["delta"] = -abs(float(ev["valor"]))
-
-        # splits (parcelar)
-        if ev.get("source") == "entry":
-            try:
-                eid = int(ev.get("id"))
-            except (TypeError, ValueError):
-                eid = None
-            if eid is not None and eid in split_map and ev.get("tipo") == "despesa":
-                parts = int(split_map[eid]["parts"])
-                base_date = ev["date"]
-                per = round(abs(float(ev["valor"])) / parts, 2)
-                # Ajuste centavos no último
-                total = round(per * parts, 2)
-                diff = round(abs(float(ev["valor"])) - total, 2)
-
-                for i in range(parts):
-                    # mensal
-                    y = base_date.year + ((base_date.month - 1 + i) // 12)
-                    m = ((base_date.month - 1 + i) % 12) + 1
-                    occ = _clamp_day(y, m, base_date.day)
-                    amount = per + (diff if i == parts - 1 else 0.0)
-                    new_events.append(
-                        {
-                            **{k: v for k, v in ev.items() if k not in {"uid"}},
-                            "uid": f"split-{eid}-{i+1}-{occ.isoformat()}",
-                            "kind": "installment",
-                            "date": occ,
-                            "valor": round(amount, 2),
-                            "delta": -round(amount, 2),
-                            "descricao": f"{ev.get('descricao')} (Parcela {i+1}/{parts})",
-                        }
-                    )
-                continue
-
-        new_events.append(ev)
-
     # extras (eventos manuais do cenário)
-    extras = overrides.get("extras") if isinstance(overrides, dict) else None
+    extras_out: list[dict[str, Any]] = []
+    extras = overrides.get("extras")
     if isinstance(extras, list):
         for ex in extras:
             if not isinstance(ex, dict):
@@ -237,9 +266,8 @@ def apply_overrides(events: list[dict[str, Any]], overrides: dict[str, Any]) ->
                 if tipo not in {"receita", "despesa"}:
                     tipo = "receita"
                 delta = valor if tipo == "receita" else -abs(valor)
-                new_events.append(
+                extras_out.append(
                     {
-                        "uid": f"extra-{d.isoformat()}-{len(new_events)+1}",
                         "source": "scenario",
                         "kind": "extra",
                         "date": d,
@@ -256,67 +284,167 @@ def apply_overrides(events: list[dict[str, Any]], overrides: dict[str, Any]) ->
                 logger.warning("Projecao: override extra invalido: %s", exc)
                 continue
 
-    return new_events, reserve_override
+    return ParsedOverrides(reserve_override, shift_map, red_map, split_map, extras_out)
 
 
-def compute_projection(
+def entry_id(ev: dict[str, Any]) -> int | None:
+    """Id da Entrada por trás do evento (None para recorrências e extras)."""
+    if ev.get("source") != "entry":
+        return None
+    try:
+        return int(ev.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_affected(ev: dict[str, Any], parsed: ParsedOverrides) -> bool:
+    eid = entry_id(ev)
+    if eid is not None and (eid in parsed.shift_map or eid in parsed.split_map):
+        return True
+    if ev.get("tipo") == "despesa" and parsed.red_map:
+        return str(ev.get("categoria") or "").strip().lower() in parsed.red_map
+    return False
+
+
+def _transform_event(ev: dict[str, Any], parsed: ParsedOverrides) -> list[dict[str, Any]]:
+    """Aplica shift -> redução -> parcelamento em um evento. Nunca altera `ev`."""
+    eid = entry_id(ev)
+
+    # shift
+    if eid is not None and eid in parsed.shift_map:
+        ev = dict(ev)
+        ev["date"] = parsed.shift_map[eid]
+
+    # reductions
+    if ev.get("tipo") == "despesa":
+        cat = str(ev.get("categoria") or "").strip().lower()
+        if cat in parsed.red_map:
+            pct = parsed.red_map[cat]
+            ev = dict(ev)
+            ev["valor"] = round(float(ev["valor"]) * (1.0 - pct / 100.0), 2)
+            ev["delta"] = -abs(float(ev["valor"]))
+
+    # splits (parcelar)
+    if eid is not None and eid in parsed.split_map and ev.get("tipo") == "despesa":
+        parts = int(parsed.split_map[eid]["parts"])
+        base_date = ev["date"]
+        per = round(abs(float(ev["valor"])) / parts, 2)
+        # Ajuste centavos no último
+        total = round(per * parts, 2)
+        diff = round(abs(float(ev["valor"])) - total, 2)
+
+        installments = []
+        for i in range(parts):
+            # mensal
+            y = base_date.year + ((base_date.month - 1 + i) // 12)
+            m = ((base_date.month - 1 + i) % 12) + 1
+            occ = _clamp_day(y, m, base_date.day)
+            amount = per + (diff if i == parts - 1 else 0.0)
+            installments.append(
+                {
+                    **{k: v for k, v in ev.items() if k not in {"uid"}},
+                    "uid": f"split-{eid}-{i+1}-{occ.isoformat()}",
+                    "kind": "installment",
+                    "date": occ,
+                    "valor": round(amount, 2),
+                    "delta": -round(amount, 2),
+                    "descricao": f"{ev.get('descricao')} (Parcela {i+1}/{parts})",
+                }
+            )
+        return installments
+
+    return [ev]
+
+
+def split_event(ev: dict[str, Any], parts: int, frequency: str = "monthly") -> list[tuple[date, float]]:
+    """(data, delta) das parcelas de `ev` se fosse parcelado em `parts` (sem outros overrides)."""
+    only_split = ParsedOverrides(None, {}, {}, {int(ev["id"]): {"parts": parts, "freq": frequency}}, [])
+    return [(inst["date"], float(inst["delta"])) for inst in _transform_event(ev, only_split)]
+
+
+def _extra_events(parsed: ParsedOverrides, existing_count: int) -> list[dict[str, Any]]:
+    out = []
+    for ex in parsed.extras:
+        out.append({"uid": f"extra-{ex['date'].isoformat()}-{existing_count + len(out) + 1}", **ex})
+    return out
+
+
+def apply_overrides(events: list[dict[str, Any]], overrides: dict[str, Any]) -> tuple[list[dict[str, Any]], float | None]:
+    parsed = parse_overrides(overrides)
+    new_events: list[dict[str, Any]] = []
+    for ev in events:
+        if _is_affected(ev, parsed):
+            new_events.extend(_transform_event(ev, parsed))
+        else:
+            new_events.append(ev)
+    new_events.extend(_extra_events(parsed, len(new_events)))
+    return new_events, parsed.reserve
+
+
+@dataclass
+class ProjectionBaseline:
+    """Parte da projeção que vem do banco (sem overrides de cenário).
+
+    daily_deltas[i] é a soma dos deltas do dia start + i. Tratar como somente
+    leitura: a mesma instância é reaproveitada entre requests pelo cache.
+    """
+
+    user_id: int
+    start: date
+    end: date
+    mode: str
+    include_recurring: bool
+    saldo_inicial: float
+    events: list[dict[str, Any]]
+    daily_deltas: list[float]
+
+
+def _normalize_mode(mode: str | None) -> str:
+    mode = (mode or "cash").strip().lower()
+    return mode if mode in {"cash", "accrual"} else "cash"
+
+
+def _add_daily_delta(daily: list[float], start: date, ev: dict[str, Any], sign: float) -> None:
+    offset = (ev["date"] - start).days
+    if 0 <= offset < len(daily):
+        daily[offset] += sign * float(ev["delta"])
+
+
+def build_projection_baseline(
     *,
     user_id: int,
     start: date,
     end: date,
     mode: str = "cash",
     include_recurring: bool = True,
-    reserve_min: float = 0.0,
-    overrides: dict[str, Any] | None = None,
-) -> dict[str, Any]:
-    mode = (mode or "cash").strip().lower()
-    if mode not in {"cash", "accrual"}:
-        mode = "cash"
+) -> ProjectionBaseline:
+    mode = _normalize_mode(mode)
 
-    reserve_min = float(reserve_min or 0.0)
-    reserve_min = max(0.0, reserve_min)
-
-    entries: list[Entrada] = (
-        db.session.query(Entrada)
-        .filter(Entrada.user_id == user_id)
-        .all()
-    )
-
-    saldo_inicial = 0.0
+    # Saldo inicial agregado no banco (um SUM); só as entradas da janela viram
+    # objetos Python, então anos de histórico não pesam no cálculo.
+    saldo_inicial = compute_opening_balance(user_id, start, mode)
     base_events: list[dict[str, Any]] = []
 
-    for e in entries:
+    for e in fetch_window_entries(user_id, start, end, mode):
         ev_date = _resolve_entry_date(e, mode)
         valor = float(e.valor or 0.0)
-
-        if ev_date < start:
-            if not _should_count_before_start(e, mode):
-                continue
-            if e.tipo == "receita":
-                saldo_inicial += valor
-            else:
-                # despesa
-                saldo_inicial -= valor
-            continue
-
-        if start <= ev_date <= end:
-            delta = valor if e.tipo == "receita" else -valor
-            base_events.append(
-                {
-                    "uid": f"entry-{e.id}",
-                    "id": e.id,
-                    "source": "entry",
-                    "kind": "normal",
-                    "date": ev_date,
-                    "descricao": e.descricao,
-                    "categoria": e.categoria or "outros",
-                    "tipo": e.tipo,
-                    "valor": valor,
-                    "delta": delta,
-                    "status": e.status or ("previsto" if e.tipo == "despesa" else "previsto"),
-                    "priority": _parse_priority(getattr(e, "priority", None)),
-                }
-            )
+        delta = valor if e.tipo == "receita" else -valor
+        base_events.append(
+            {
+                "uid": f"entry-{e.id}",
+                "id": e.id,
+                "source": "entry",
+                "kind": "normal",
+                "date": ev_date,
+                "descricao": e.descricao,
+                "categoria": e.categoria or "outros",
+                "tipo": e.tipo,
+                "valor": valor,
+                "delta": delta,
+                "status": e.status or ("previsto" if e.tipo == "despesa" else "previsto"),
+                "priority": parse_priority(getattr(e, "priority", None)),
+            }
+        )
 
     # Recorrências
     if include_recurring:
@@ -328,119 +456,278 @@ def compute_projection(
         for rec in recs:
             base_events.extend(generate_recurrence_events(rec, start, end))
 
-    # overrides
-    active_overrides = overrides or {}
-    events, reserve_override = apply_overrides(base_events, active_overrides)
+    daily_deltas = bin_deltas(
+        [(ev["date"] - start).days for ev in base_events],
+        [float(ev["delta"]) for ev in base_events],
+        (end - start).days + 1,
+    )
+
+    return ProjectionBaseline(
+        user_id=user_id,
+        start=start,
+        end=end,
+        mode=mode,
+        include_recurring=bool(include_recurring),
+        saldo_inicial=saldo_inicial,
+        events=base_events,
+        daily_deltas=daily_deltas,
+    )
+
+
+def projection_data_version(user_id: int) -> tuple:
+    """Versão barata dos dados que alimentam a projeção (entradas + recorrências).
+
+    Qualquer inclusão, edição (updated_at) ou exclusão muda a tupla.
+    """
+    entries = (
+        db.session.query(func.count(Entrada.id), func.max(Entrada.updated_at))
+        .filter(Entrada.user_id == user_id)
+        .one()
+    )
+    recs = (
+        db.session.query(func.count(Recurrence.id), func.max(Recurrence.updated_at))
+        .filter(Recurrence.user_id == user_id)
+        .one()
+    )
+    return (tuple(entries), tuple(recs))
+
+
+_baseline_cache = VersionedLRUCache("projection_baseline")
+_result_cache = VersionedLRUCache("projection_result")
+
+
+def _cache_settings(prefix: str, default_size: int, default_ttl: int) -> tuple[int, float]:
+    if not has_app_context():
+        return 0, 0.0
+    size = int(current_app.config.get(f"{prefix}_SIZE", default_size) or 0)
+    ttl = float(current_app.config.get(f"{prefix}_TTL", default_ttl) or 0)
+    return size, ttl
+
+
+def projection_cache_stats() -> dict[str, dict[str, int]]:
+    return {"baseline": _baseline_cache.stats(), "result": _result_cache.stats()}
+
+
+def get_projection_baseline(
+    *,
+    user_id: int,
+    start: date,
+    end: date,
+    mode: str = "cash",
+    include_recurring: bool = True,
+    use_cache: bool = True,
+    version: tuple | None = None,
+) -> ProjectionBaseline:
+    """Baseline do cache quando a versão dos dados do usuário não mudou."""
+    mode = _normalize_mode(mode)
+    size, ttl = _cache_settings("PROJECTION_BASELINE_CACHE", 256, 300)
+    if not use_cache or size <= 0 or ttl <= 0:
+        return build_projection_baseline(
+            user_id=user_id, start=start, end=end, mode=mode, include_recurring=include_recurring
+        )
+
+    key = (user_id, start, end, mode, bool(include_recurring))
+    if version is None:
+        version = projection_data_version(user_id)
+    baseline = _baseline_cache.get(key, version, ttl)
+    if baseline is None:
+        baseline = build_projection_baseline(
+            user_id=user_id, start=start, end=end, mode=mode, include_recurring=include_recurring
+        )
+        _baseline_cache.put(key, version, baseline, size)
+    return baseline
+
+
+def _events_with_overrides(
+    baseline: ProjectionBaseline, overrides: dict[str, Any] | None
+) -> tuple[list[dict[str, Any]], list[float], float | None]:
+    """Eventos e deltas diários do cenário, partindo do baseline.
+
+    Só os eventos atingidos por override são transformados; os deltas diários
+    do baseline são corrigidos (sai o evento original, entram os novos).
+    """
+    parsed = parse_overrides(overrides)
+    if not parsed.touches_events:
+        return baseline.events, baseline.daily_deltas, parsed.reserve
+
+    events: list[dict[str, Any]] = []
+    daily = list(baseline.daily_deltas)
+    for ev in baseline.events:
+        if not _is_affected(ev, parsed):
+            events.append(ev)
+            continue
+        _add_daily_delta(daily, baseline.start, ev, -1.0)
+        for new_ev in _transform_event(ev, parsed):
+            events.append(new_ev)
+            _add_daily_delta(daily, baseline.start, new_ev, 1.0)
+
+    for ex in _extra_events(parsed, len(events)):
+        events.append(ex)
+        _add_daily_delta(daily, baseline.start, ex, 1.0)
+    return events, daily, parsed.reserve
+
+
+def _event_sort_key(ev: dict[str, Any]):
+    # Ordenação: por data, depois receitas primeiro, depois maior prioridade
+    income_first = 0 if ev["delta"] > 0 else 1
+    pr = PRIORITY_ORDER.get(parse_priority(ev.get("priority")), 1)
+    return (ev["date"], income_first, pr, abs(float(ev["delta"])) * -1)
+
+
+def scenario_inputs(
+    baseline: ProjectionBaseline, reserve_min: float, overrides: dict[str, Any] | None
+) -> tuple[list[dict[str, Any]], list[float], float]:
+    """Eventos do cenário (no range e ordenados), deltas diários e reserva efetiva."""
+    reserve_min = float(reserve_min or 0.0)
+    reserve_min = max(0.0, reserve_min)
+
+    events, daily_deltas, reserve_override = _events_with_overrides(baseline, overrides or {})
     if reserve_override is not None:
         reserve_min = max(0.0, float(reserve_override))
 
     # Filtra novamente por range (shifts/extras/splits podem mover)
-    events = [e for e in events if start <= e["date"] <= end]
+    events = [e for e in events if baseline.start <= e["date"] <= baseline.end]
+    events.sort(key=_event_sort_key)
+    return events, daily_deltas, reserve_min
 
-    # Ordenação: por data, depois receitas primeiro, depois maior prioridade
-    def sort_key(ev: dict[str, Any]):
-        income_first = 0 if ev["delta"] > 0 else 1
-        pr = PRIORITY_ORDER.get(_parse_priority(ev.get("priority")), 1)
-        return (ev["date"], income_first, pr, abs(float(ev["delta"])) * -1)
 
-    events.sort(key=sort_key)
+@dataclass
+class _Coverage:
+    covered_count: int
+    total_expenses: int
+    uncovered: list[dict[str, Any]]
+    covered_by_uid: dict[Any, bool]
 
-    # Cálculo pay-all e daily series
-    saldo_payall = saldo_inicial
-    saldo_min = saldo_payall
-    saldo_min_date = start
-    break_date = None
+    @property
+    def percent(self) -> float:
+        return round((self.covered_count / self.total_expenses * 100.0), 1) if self.total_expenses else 100.0
 
-    daily = []
-    by_day: dict[date, list[dict[str, Any]]] = {}
-    for ev in events:
-        by_day.setdefault(ev["date"], []).append(ev)
 
-    # Para tabela, precisamos saldo após em modo payall
-    table_events: list[dict[str, Any]] = []
+def _run_coverage(events: list[dict[str, Any]], saldo_inicial: float, reserve_min: float) -> _Coverage:
+    """Cobertura (não deixa ir abaixo de reserve_min): sequencial só nas despesas.
 
-    for d in _daterange(start, end):
-        day_events = by_day.get(d, [])
-        for ev in day_events:
-            saldo_payall += float(ev["delta"])
-            table_events.append(
+    `events` já está em (data, prioridade, maior valor) dentro das despesas; as
+    receitas de cada dia entram no saldo antes das despesas do mesmo dia.
+    """
+    incomes = [ev for ev in events if float(ev["delta"]) > 0]
+    expenses = [ev for ev in events if float(ev["delta"]) < 0]
+
+    saldo_cover = saldo_inicial
+    covered_count = 0
+    uncovered: list[dict[str, Any]] = []
+    covered_by_uid: dict[Any, bool] = {}
+    next_income = 0
+
+    for ev in expenses:
+        while next_income < len(incomes) and incomes[next_income]["date"] <= ev["date"]:
+            saldo_cover += float(incomes[next_income]["delta"])
+            next_income += 1
+
+        needed = abs(float(ev["delta"]))
+        if (saldo_cover - needed) >= reserve_min:
+            saldo_cover -= needed
+            covered = True
+            covered_count += 1
+        else:
+            covered = False
+            uncovered.append(
                 {
-                    **{k: v for k, v in ev.items() if k != "date"},
                     "date": ev["date"].isoformat(),
-                    "saldo_after": round(saldo_payall, 2),
-                    "covered": None,  # preencheremos abaixo
+                    "descricao": ev.get("descricao"),
+                    "categoria": ev.get("categoria"),
+                    "valor": round(needed, 2),
+                    "priority": parse_priority(ev.get("priority")),
+                    "reason": "Saldo insuficiente para cobrir sem quebrar a reserva",
                 }
             )
+        covered_by_uid[ev.get("uid")] = covered
 
-        if saldo_payall < saldo_min:
-            saldo_min = saldo_payall
-            saldo_min_date = d
-
-        if break_date is None and saldo_payall < 0:
-            break_date = d
+    # receitas: always covered
+    for ev in incomes:
+        covered_by_uid[ev.get("uid")] = True
 
-        daily.append({"date": d.isoformat(), "saldo": round(saldo_payall, 2)})
+    return _Coverage(covered_count, len(expenses), uncovered, covered_by_uid)
 
-    # Cobertura (não deixa ir abaixo de reserve_min)
-    saldo_cover = saldo_inicial
-    covered_count = 0
-    total_expenses = 0
-
-    # index table events by uid for marking covered
-    uid_to_idx = {}
-    for i, tev in enumerate(table_events):
-        uid_to_idx[tev.get("uid")] = i
 
-    uncovered: list[dict[str, Any]] = []
-
-    for d in _daterange(start, end):
-        day_events = by_day.get(d, [])
-        incomes = [ev for ev in day_events if float(ev["delta"]) > 0]
-        expenses = [ev for ev in day_events if float(ev["delta"]) < 0]
+def summarize_baseline(
+    baseline: ProjectionBaseline,
+    *,
+    reserve_min: float = 0.0,
+    overrides: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Resumo compacto de um cenário (sem série diária nem tabela de eventos).
 
-        for ev in incomes:
-            saldo_cover += float(ev["delta"])
+    Não toca no banco: pode rodar fora do request/app context.
+    """
+    events, daily_deltas, reserve_min = scenario_inputs(baseline, reserve_min, overrides)
+    saldos, saldo_min, min_idx, break_idx = balance_series(baseline.saldo_inicial, daily_deltas)
+    coverage = _run_coverage(events, baseline.saldo_inicial, reserve_min)
+    return {
+        "reserve_min": round(reserve_min, 2),
+        "saldo_final": round(saldos[-1] if saldos else baseline.saldo_inicial, 2),
+        "min_saldo": round(saldo_min, 2),
+        "min_saldo_date": (baseline.start + timedelta(days=min_idx or 0)).isoformat(),
+        "break_date": (baseline.start + timedelta(days=break_idx)).isoformat() if break_idx is not None else None,
+        "coverage": {
+            "covered_count": coverage.covered_count,
+            "total_expenses": coverage.total_expenses,
+            "percent": coverage.percent,
+        },
+        "uncovered_count": len(coverage.uncovered),
+    }
 
-        expenses.sort(key=lambda ev: (PRIORITY_ORDER.get(_parse_priority(ev.get("priority")), 1), abs(float(ev["delta"])) * -1))
 
-        for ev in expenses:
-            total_expenses += 1
-            needed = abs(float(ev["delta"]))
-            if (saldo_cover - needed) >= reserve_min:
-                saldo_cover -= needed
-                covered = True
-                covered_count += 1
-            else:
-                covered = False
-                uncovered.append(
-                    {
-                        "date": ev["date"].isoformat(),
-                        "descricao": ev.get("descricao"),
-                        "categoria": ev.get("categoria"),
-                        "valor": round(needed, 2),
-                        "priority": _parse_priority(ev.get("priority")),
-                        "reason": "Saldo insuficiente para cobrir sem quebrar a reserva",
-                    }
-                )
-            # marca na tabela
-            idx = uid_to_idx.get(ev.get("uid"))
-            if idx is not None:
-                table_events[idx]["covered"] = covered
+def project_baseline(
+    baseline: ProjectionBaseline,
+    *,
+    reserve_min: float = 0.0,
+    overrides: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Projeção completa (série diária, cobertura, riscos) a partir do baseline."""
+    start, end, mode = baseline.start, baseline.end, baseline.mode
+    saldo_inicial = baseline.saldo_inicial
 
-        # marca receitas como always covered
-        for ev in incomes:
-            idx = uid_to_idx.get(ev.get("uid"))
-            if idx is not None:
-                table_events[idx]["covered"] = True
+    events, daily_deltas, reserve_min = scenario_inputs(baseline, reserve_min, overrides)
 
-    coverage_percent = round((covered_count / total_expenses * 100.0), 1) if total_expenses else 100.0
+    # Tabela: saldo após cada evento em modo payall
+    table_events: list[dict[str, Any]] = []
+    uid_to_idx: dict[Any, int] = {}
+    saldo_payall = saldo_inicial
+    for ev in events:
+        saldo_payall += float(ev["delta"])
+        row = dict(ev)
+        row["date"] = ev["date"].isoformat()
+        row["saldo_after"] = round(saldo_payall, 2)
+        row["covered"] = None  # preencheremos abaixo
+        uid_to_idx[ev.get("uid")] = len(table_events)
+        table_events.append(row)
+
+    # Série diária: saldo acumulado dos deltas por dia
+    saldos, saldo_min, min_idx, break_idx = balance_series(saldo_inicial, daily_deltas)
+    saldo_min_date = start + timedelta(days=min_idx) if min_idx is not None else start
+    break_date = start + timedelta(days=break_idx) if break_idx is not None else None
+    first_day = start.toordinal()
+    daily = [
+        {"date": date.fromordinal(first_day + i).isoformat(), "saldo": saldo}
+        for i, saldo in enumerate(saldos)
+    ]
+
+    coverage = _run_coverage(events, saldo_inicial, reserve_min)
+    for uid, covered in coverage.covered_by_uid.items():
+        idx = uid_to_idx.get(uid)
+        if idx is not None:
+            table_events[idx]["covered"] = covered
+    covered_count = coverage.covered_count
+    total_expenses = coverage.total_expenses
+    uncovered = coverage.uncovered
+    coverage_percent = coverage.percent
 
     # categorias (para redução)
-    cat_totals: dict[str, float] = {}
-    for ev in events:
-        if ev["tipo"] == "despesa":
-            key = str(ev.get("categoria") or "outros").strip().lower()
-            cat_totals[key] = round(cat_totals.get(key, 0.0) + abs(float(ev["delta"])), 2)
+    expense_rows = [ev for ev in events if ev["tipo"] == "despesa"]
+    cat_totals = grouped_totals(
+        (str(ev.get("categoria") or "outros").strip().lower() for ev in expense_rows),
+        (abs(float(ev["delta"])) for ev in expense_rows),
+    )
 
     categories = [{"key": k, "label": k.capitalize(), "total": v} for k, v in cat_totals.items()]
     categories.sort(key=lambda x: x["total"], reverse=True)
@@ -485,7 +772,7 @@ def compute_projection(
     return {
         "range": {"start": start.isoformat(), "end": end.isoformat()},
         "mode": mode,
-        "include_recurring": bool(include_recurring),
+        "include_recurring": baseline.include_recurring,
         "reserve_min": round(reserve_min, 2),
         "saldo_inicial": round(saldo_inicial, 2),
         "saldo_final": round(daily[-1]["saldo"] if daily else saldo_inicial, 2),
@@ -503,3 +790,104 @@ def compute_projection(
         "categories": categories,
         "risks": risks,
     }
+
+
+def compute_projection(
+    *,
+    user_id: int,
+    start: date,
+    end: date,
+    mode: str = "cash",
+    include_recurring: bool = True,
+    reserve_min: float = 0.0,
+    overrides: dict[str, Any] | None = None,
+    use_cache: bool = True,
+) -> dict[str, Any]:
+    """Projeção completa. Com cache, o resultado fica serializado por
+    (usuário, período, modo, reserva, recorrências, hash dos overrides) e vale
+    enquanto a versão dos dados do usuário não mudar."""
+    mode = _normalize_mode(mode)
+    size, ttl = _cache_settings("PROJECTION_RESULT_CACHE", 512, 600)
+    if not use_cache or size <= 0 or ttl <= 0:
+        baseline = get_projection_baseline(
+            user_id=user_id,
+            start=start,
+            end=end,
+            mode=mode,
+            include_recurring=include_recurring,
+            use_cache=use_cache,
+        )
+        return project_baseline(baseline, reserve_min=reserve_min, overrides=overrides)
+
+    version = projection_data_version(user_id)
+    key = (
+        user_id,
+        start,
+        end,
+        mode,
+        bool(include_recurring),
+        round(float(reserve_min or 0.0), 2),
+        overrides_digest(overrides),
+    )
+    blob = _result_cache.get(key, version, ttl)
+    if blob is not None:
+        return decode_payload(blob)
+
+    baseline = get_projection_baseline(
+        user_id=user_id,
+        start=start,
+        end=end,
+        mode=mode,
+        include_recurring=include_recurring,
+        version=version,
+    )
+    result = project_baseline(baseline, reserve_min=reserve_min, overrides=overrides)
+    max_bytes = int(current_app.config.get("PROJECTION_RESULT_CACHE_MAX_BYTES", 0) or 0)
+    _result_cache.put(key, version, encode_payload(result), size, max_bytes)
+    return result
+
+
+def compare_scenarios(
+    *,
+    user_id: int,
+    start: date,
+    end: date,
+    variants: list[dict[str, Any]],
+    modes: tuple[str, ...] = ("cash", "accrual"),
+    include_recurring: bool = True,
+    reserve_min: float = 0.0,
+    use_cache: bool = True,
+) -> list[dict[str, Any]]:
+    """Resumos lado a lado de vários cenários, em um ou nos dois modos.
+
+    O baseline sai do banco uma vez por modo; cada variante ({"key", "label",
+    "overrides"}) só aplica o seu delta sobre ele. A avaliação é sequencial:
+    é Python puro (GIL) e custa poucos ms por variante, então threads não
+    aceleram e processos custariam mais para serializar o baseline.
+    """
+    baselines = {
+        mode: get_projection_baseline(
+            user_id=user_id,
+            start=start,
+            end=end,
+            mode=mode,
+            include_recurring=include_recurring,
+            use_cache=use_cache,
+        )
+        for mode in dict.fromkeys(_normalize_mode(m) for m in modes)
+    }
+
+    out = []
+    for variant in variants:
+        overrides = variant.get("overrides")
+        item = {k: variant[k] for k in ("key", "label", "scenario_id") if k in variant}
+        item["results"] = {
+            mode: summarize_baseline(
+                baseline,
+                reserve_min=reserve_min,
+                overrides=overrides if isinstance(overrides, dict) else {},
+            )
+            for mode, baseline in baselines.items()
+        }
+        out.append(item)
+    return out
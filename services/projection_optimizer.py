@@ -0,0 +1,200 @@
+"""Otimizador de cenário: sugere adiamentos/parcelamentos que mantêm o saldo acima da reserva.
+
+Varredura na linha do tempo com heap de prioridade:
+
+1. acha o primeiro dia em que o saldo (pay-all) fica abaixo de reserve_min;
+2. entram no heap as despesas movíveis até esse dia (lançamentos, futuras,
+   não pagas, prioridade diferente de "alta", sem override do usuário),
+   ordenadas por prioridade (baixa antes de média) e maior valor primeiro,
+   o que resolve o déficit com o menor número de itens;
+3. a do topo é adiada para o primeiro dia, dentro de max_shift_days e da
+   janela, fora do déficit e em que o saldo comporta o valor desde a data
+   original (déficits posteriores, independentes, ficam para as próximas
+   voltas); se não houver, tenta
+   parcelar (menor número de parcelas que resolve o dia) e, por último,
+   adiar o máximo permitido. Só entra mudança que empurra o primeiro dia
+   abaixo da reserva para depois, então o laço sempre termina;
+4. repete até não haver dia abaixo da reserva ou acabarem os candidatos.
+
+A saída vem no formato de `overrides` (shifts/splits), pronta para salvar
+como ProjectionScenario.
+"""
+
+from __future__ import annotations
+
+import heapq
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Any
+
+from services.projection_engine import (
+    PRIORITY_ORDER,
+    ParsedOverrides,
+    ProjectionBaseline,
+    entry_id,
+    parse_overrides,
+    parse_priority,
+    scenario_inputs,
+    split_event,
+    summarize_baseline,
+)
+
+# tolerância de centavo nas comparações com a reserva
+_EPS = 0.005
+
+
+def _balances(saldo_inicial: float, daily: list[float]) -> list[float]:
+    return list(accumulate(daily, initial=saldo_inicial))[1:]
+
+
+def _first_violation(balances: list[float], reserve_min: float) -> int | None:
+    for i, saldo in enumerate(balances):
+        if saldo < reserve_min - _EPS:
+            return i
+    return None
+
+
+def _movable(ev: dict[str, Any], parsed: ParsedOverrides, today: date) -> bool:
+    eid = entry_id(ev)
+    if eid is None or ev.get("tipo") != "despesa" or ev.get("kind") != "normal":
+        return False
+    if eid in parsed.shift_map or eid in parsed.split_map:
+        return False
+    if ev["date"] < today or (ev.get("status") or "") == "pago":
+        return False
+    return parse_priority(ev.get("priority")) != "alta"
+
+
+def optimize_baseline(
+    baseline: ProjectionBaseline,
+    *,
+    reserve_min: float = 0.0,
+    overrides: dict[str, Any] | None = None,
+    max_shift_days: int = 30,
+    max_parts: int = 6,
+    allow_splits: bool = True,
+    today: date | None = None,
+) -> dict[str, Any]:
+    """Sugere shifts/splits sobre o cenário atual (overrides) sem tocar no banco."""
+    today = today or date.today()
+    start, ndays = baseline.start, (baseline.end - baseline.start).days + 1
+    overrides = overrides if isinstance(overrides, dict) else {}
+    parsed = parse_overrides(overrides)
+    events, daily_deltas, reserve_min = scenario_inputs(baseline, reserve_min, overrides)
+    daily = list(daily_deltas)
+
+    def apply(moves: list[tuple[date, float]], sign: float) -> None:
+        for day, delta in moves:
+            offset = (day - start).days
+            if 0 <= offset < ndays:
+                daily[offset] += sign * delta
+
+    # eventos já vêm ordenados por data
+    candidates = [ev for ev in events if _movable(ev, parsed, today)]
+    heap: list[tuple] = []
+    next_candidate = 0
+    shifts: list[dict[str, Any]] = []
+    splits: list[dict[str, Any]] = []
+    changes: list[dict[str, Any]] = []
+
+    balances = _balances(baseline.saldo_inicial, daily)
+    day = _first_violation(balances, reserve_min)
+    while day is not None:
+        day_date = start + timedelta(days=day)
+        while next_candidate < len(candidates) and candidates[next_candidate]["date"] <= day_date:
+            ev = candidates[next_candidate]
+            next_candidate += 1
+            rank = PRIORITY_ORDER.get(parse_priority(ev.get("priority")), 1)
+            heapq.heappush(heap, (-rank, -abs(float(ev["delta"])), next_candidate, ev))
+        if not heap:
+            break
+
+        _, _, _, ev = heapq.heappop(heap)
+        amount = abs(float(ev["delta"]))
+        ev_offset = (ev["date"] - start).days
+        last_offset = min(ndays - 1, ev_offset + max(0, int(max_shift_days)))
+
+        original = [(ev["date"], float(ev["delta"]))]
+
+        def progress(moves: list[tuple[date, float]]) -> bool:
+            # a mudança só vale se empurrar o primeiro dia abaixo da reserva para depois
+            apply(original, -1.0)
+            apply(moves, 1.0)
+            first = _first_violation(_balances(baseline.saldo_inicial, daily), reserve_min)
+            apply(moves, -1.0)
+            apply(original, 1.0)
+            return first is None or first > day
+
+        # 1) Adiar para o primeiro dia depois do déficit que já está acima da reserva.
+        # Os saldos já descontam a despesa na data original: movê-la para t sobe
+        # os dias [data, t) em `amount` e deixa de t em diante como está, então
+        # um déficit posterior é independente e fica para as próximas voltas.
+        target = None
+        window_min = min(balances[max(0, ev_offset):day + 1], default=float("inf"))
+        for t in range(day + 1, last_offset + 1):
+            if window_min + amount < reserve_min - _EPS:
+                break  # a janela só cresce: nenhum t adiante resolve
+            if balances[t] >= reserve_min - _EPS and progress([(start + timedelta(days=t), float(ev["delta"]))]):
+                target = t
+                break
+            window_min = min(window_min, balances[t])
+        chosen = None
+        if target is not None:
+            chosen = ("shift", target, None)
+        # 2) Parcelar: menor número de parcelas que tira o dia do déficit
+        if chosen is None and allow_splits:
+            for parts in range(2, max(2, int(max_parts)) + 1):
+                moves = split_event(ev, parts)
+                if progress(moves):
+                    chosen = ("split", parts, moves)
+                    break
+        # 3) Sem solução limpa: adia o máximo permitido se isso empurrar o déficit
+        if chosen is None and last_offset > day:
+            if progress([(start + timedelta(days=last_offset), float(ev["delta"]))]):
+                chosen = ("shift", last_offset, None)
+        if chosen is None:
+            continue
+
+        kind, value, moves = chosen
+        change = {
+            "kind": kind,
+            "entrada_id": int(ev["id"]),
+            "descricao": ev.get("descricao"),
+            "valor": round(amount, 2),
+            "priority": parse_priority(ev.get("priority")),
+            "from": ev["date"].isoformat(),
+        }
+        if kind == "shift":
+            new_date = start + timedelta(days=value)
+            moves = [(new_date, float(ev["delta"]))]
+            shifts.append({"entrada_id": int(ev["id"]), "new_date": new_date.isoformat()})
+            change["to"] = new_date.isoformat()
+        else:
+            splits.append({"entrada_id": int(ev["id"]), "parts": value, "frequency": "monthly"})
+            change["parts"] = value
+        apply(original, -1.0)
+        apply(moves, 1.0)
+        changes.append(change)
+
+        balances = _balances(baseline.saldo_inicial, daily)
+        day = _first_violation(balances, reserve_min)
+
+    suggested = {"shifts": shifts, "splits": splits}
+    merged = dict(overrides)
+    merged["shifts"] = list(overrides.get("shifts") or []) + shifts
+    merged["splits"] = list(overrides.get("splits") or []) + splits
+
+    after = summarize_baseline(baseline, reserve_min=reserve_min, overrides=merged)
+    return {
+        "range": {"start": start.isoformat(), "end": baseline.end.isoformat()},
+        "mode": baseline.mode,
+        "reserve_min": round(reserve_min, 2),
+        "max_shift_days": int(max_shift_days),
+        "resolved": day is None,
+        "first_violation": (start + timedelta(days=day)).isoformat() if day is not None else None,
+        "changes": changes,
+        "suggested": suggested,
+        "overrides": merged,
+        "before": summarize_baseline(baseline, reserve_min=reserve_min, overrides=overrides),
+        "after": after,
+    }
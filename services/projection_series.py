@@ -0,0 +1,51 @@
+"""Séries diárias da projeção (deltas por dia, saldo acumulado, totais).
+
+Python puro: os deltas já chegam indexados por dia, então cada série é uma
+passada só (acumulação + mínimo/quebra). Uma versão com NumPy foi medida e
+não ganhava nada, já que o resultado volta para listas arredondadas.
+"""
+
+from __future__ import annotations
+
+from itertools import accumulate
+from typing import Iterable, Sequence
+
+
+def bin_deltas(offsets: Sequence[int], deltas: Sequence[float], ndays: int) -> list[float]:
+    """Soma os deltas por dia (offset a partir do início). Fora de [0, ndays) é ignorado."""
+    if ndays <= 0:
+        return []
+    daily = [0.0] * ndays
+    for offset, delta in zip(offsets, deltas):
+        if 0 <= offset < ndays:
+            daily[offset] += delta
+    return daily
+
+
+def balance_series(
+    saldo_inicial: float, daily_deltas: Sequence[float]
+) -> tuple[list[float], float, int | None, int | None]:
+    """Saldo no fim de cada dia (arredondado), menor saldo e índices do mínimo e da quebra.
+
+    O mínimo parte do saldo inicial (índice None quando nenhum dia fica abaixo
+    dele); a quebra é o primeiro dia com saldo negativo.
+    """
+    if not len(daily_deltas):
+        return [], saldo_inicial, None, None
+
+    saldos = list(accumulate(daily_deltas, initial=saldo_inicial))[1:]
+    saldo_min, min_idx, break_idx = saldo_inicial, None, None
+    for i, saldo in enumerate(saldos):
+        if saldo < saldo_min:
+            saldo_min, min_idx = saldo, i
+        if break_idx is None and saldo < 0:
+            break_idx = i
+    return [round(s, 2) for s in saldos], saldo_min, min_idx, break_idx
+
+
+def grouped_totals(keys: Iterable[str], amounts: Iterable[float]) -> dict[str, float]:
+    """Soma por chave (ordem de primeira aparição), arredondada em centavos."""
+    totals: dict[str, float] = {}
+    for key, amount in zip(keys, amounts):
+        totals[key] = totals.get(key, 0.0) + amount
+    return {k: round(v, 2) for k, v in totals.items()}
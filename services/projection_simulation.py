@@ -0,0 +1,283 @@
+"""Projeção estocástica (Monte Carlo) sobre o baseline determinístico.
+
+Categorias variáveis (ex.: mercado, transporte, extras) viram "fluxos"
+aleatórios ajustados no histórico do usuário: por dia, chance de ocorrer
+(fração de dias com lançamento) e valor lognormal (média/desvio do log dos
+totais diários). Nos dias futuros da janela, os eventos já lançados dessas
+categorias saem do baseline e entram os valores simulados; o resto da
+projeção (fixos, recorrências, overrides) continua determinístico.
+
+Amostragem em Python puro (NumPy não é dependência do projeto): por isso
+o número de caminhos é limitado por PROJECTION_SIM_PATHS (padrão 300) e por
+PROJECTION_SIM_MAX_CELLS (caminhos x dias), o que já estabiliza P10/P50/P90.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+from flask import current_app, has_app_context
+from sqlalchemy import func, tuple_
+
+from models.entrada_model import Entrada
+from models.extensions import db
+from services.projection_engine import ProjectionBaseline, scenario_inputs, get_projection_baseline
+
+BANDS = (10, 50, 90)
+
+
+@dataclass
+class StreamModel:
+    tipo: str
+    categoria: str
+    p_day: float  # chance de ter lançamento no dia
+    mu: float  # média do log do total diário
+    sigma: float  # desvio do log do total diário
+    samples: int
+
+    @property
+    def sign(self) -> float:
+        return 1.0 if self.tipo == "receita" else -1.0
+
+    @property
+    def expected_daily(self) -> float:
+        return self.p_day * math.exp(self.mu + self.sigma**2 / 2)
+
+
+def _config(key: str, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def parse_streams(value) -> list[tuple[str, str]]:
+    """"despesa:mercado,receita:extras" -> [("despesa", "mercado"), ("receita", "extras")]."""
+    if isinstance(value, str):
+        value = value.split(",")
+    out = []
+    for item in value or []:
+        tipo, _, categoria = str(item).strip().lower().partition(":")
+        if tipo in {"receita", "despesa"} and categoria:
+            out.append((tipo, categoria))
+    return out
+
+
+def fit_stream_models(
+    user_id: int,
+    streams: list[tuple[str, str]],
+    *,
+    until: date,
+    lookback_days: int,
+    min_samples: int = 3,
+) -> list[StreamModel]:
+    """Ajusta um StreamModel por (tipo, categoria) com os totais diários do histórico."""
+    if not streams or lookback_days <= 0:
+        return []
+
+    since = until - timedelta(days=lookback_days)
+    categoria = func.lower(func.coalesce(Entrada.categoria, "outros"))
+    rows = (
+        db.session.query(Entrada.tipo, categoria, Entrada.data, func.sum(Entrada.valor))
+        .filter(
+            Entrada.user_id == user_id,
+            Entrada.data >= since,
+            Entrada.data < until,
+            tuple_(Entrada.tipo, categoria).in_(streams),
+        )
+        .group_by(Entrada.tipo, categoria, Entrada.data)
+        .all()
+    )
+
+    daily: dict[tuple[str, str], list[float]] = {}
+    for tipo, cat, _, total in rows:
+        if total and float(total) > 0:
+            daily.setdefault((tipo, cat), []).append(float(total))
+
+    # Conta nova: a frequência usa só o período com histórico (do primeiro
+    # lançamento até `until`), não o lookback inteiro.
+    first_day = (
+        db.session.query(func.min(Entrada.data))
+        .filter(Entrada.user_id == user_id, Entrada.data >= since, Entrada.data < until)
+        .scalar()
+    )
+    span_days = max(1, (until - first_day).days) if first_day else lookback_days
+
+    models = []
+    for key in streams:
+        values = daily.get(key) or []
+        if len(values) < min_samples:
+            continue
+        logs = [math.log(v) for v in values]
+        mu = sum(logs) / len(logs)
+        sigma = math.sqrt(sum((x - mu) ** 2 for x in logs) / len(logs))
+        models.append(
+            StreamModel(
+                tipo=key[0],
+                categoria=key[1],
+                p_day=min(1.0, len(values) / span_days),
+                mu=mu,
+                sigma=sigma,
+                samples=len(values),
+            )
+        )
+    return models
+
+
+def _quantile(sorted_values: list[float], q: float) -> float:
+    # Interpolação linear entre os vizinhos
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _simulate_paths(saldo_inicial, base_daily, models, sim_from, paths, seed):
+    ndays = len(base_daily)
+    rng = random.Random(seed)
+    columns: list[list[float]] = [[] for _ in range(ndays)]
+    path_mins = []
+    for _ in range(paths):
+        saldo = saldo_inicial
+        lowest = saldo_inicial
+        for offset in range(ndays):
+            saldo += base_daily[offset]
+            if offset >= sim_from:
+                for m in models:
+                    if rng.random() < m.p_day:
+                        saldo += m.sign * rng.lognormvariate(m.mu, m.sigma)
+            columns[offset].append(saldo)
+            if saldo < lowest:
+                lowest = saldo
+        path_mins.append(lowest)
+
+    bands: list[list[float]] = [[] for _ in BANDS]
+    p_negative = []
+    for col in columns:
+        col.sort()
+        for i, pct in enumerate(BANDS):
+            bands[i].append(_quantile(col, pct / 100.0))
+        p_negative.append(sum(1 for v in col if v < 0) / paths)
+    path_mins.sort()
+    p_break = sum(1 for v in path_mins if v < 0) / paths
+    return bands, p_negative, p_break, _quantile(path_mins, 0.05)
+
+
+def simulate_baseline(
+    baseline: ProjectionBaseline,
+    models: list[StreamModel],
+    *,
+    reserve_min: float = 0.0,
+    overrides: dict[str, Any] | None = None,
+    paths: int = 300,
+    seed: int = 0,
+    today: date | None = None,
+) -> dict[str, Any]:
+    """Simula `paths` caminhos sobre o baseline (com overrides) e resume por dia.
+
+    Não toca no banco.
+    """
+    today = today or date.today()
+    start = baseline.start
+    events, daily_deltas, reserve_min = scenario_inputs(baseline, reserve_min, overrides)
+    base_daily = list(daily_deltas)
+    ndays = len(base_daily)
+
+    # Dias simulados: só o futuro (amanhã em diante) dentro da janela
+    sim_from = max(0, min(ndays, (today - start).days + 1))
+    streams = {(m.tipo, m.categoria) for m in models}
+    for ev in events:
+        offset = (ev["date"] - start).days
+        key = (ev.get("tipo"), str(ev.get("categoria") or "outros").strip().lower())
+        if offset >= sim_from and key in streams:
+            base_daily[offset] -= float(ev["delta"])
+
+    bands, p_negative, p_break, min_p5 = _simulate_paths(
+        baseline.saldo_inicial, base_daily, models, sim_from, paths, seed
+    )
+
+    first_day = start.toordinal()
+    days = [
+        {
+            "date": date.fromordinal(first_day + i).isoformat(),
+            "p10": round(bands[0][i], 2),
+            "p50": round(bands[1][i], 2),
+            "p90": round(bands[2][i], 2),
+            "p_negative": round(p_negative[i], 4),
+        }
+        for i in range(ndays)
+    ]
+
+    return {
+        "range": {"start": start.isoformat(), "end": baseline.end.isoformat()},
+        "mode": baseline.mode,
+        "include_recurring": baseline.include_recurring,
+        "reserve_min": round(reserve_min, 2),
+        "saldo_inicial": round(baseline.saldo_inicial, 2),
+        "paths": paths,
+        "seed": seed,
+        "simulated_from": date.fromordinal(first_day + sim_from).isoformat() if sim_from < ndays else None,
+        "streams": [
+            {
+                "tipo": m.tipo,
+                "categoria": m.categoria,
+                "p_day": round(m.p_day, 4),
+                "median": round(math.exp(m.mu), 2),
+                "expected_daily": round(m.expected_daily, 2),
+                "samples": m.samples,
+            }
+            for m in models
+        ],
+        "days": days,
+        "p_break": round(p_break, 4),
+        # Quanto a mais em caixa para não ficar abaixo da reserva mínima em 95% dos caminhos
+        "reserve_95": round(max(0.0, reserve_min - min_p5), 2),
+    }
+
+
+def run_simulation(
+    *,
+    user_id: int,
+    start: date,
+    end: date,
+    mode: str = "cash",
+    include_recurring: bool = True,
+    reserve_min: float = 0.0,
+    overrides: dict[str, Any] | None = None,
+    paths: int | None = None,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Baseline (cacheado) + ajuste no histórico + simulação, com limites do config."""
+    today = date.today()
+    baseline = get_projection_baseline(
+        user_id=user_id, start=start, end=end, mode=mode, include_recurring=include_recurring
+    )
+    models = fit_stream_models(
+        user_id,
+        parse_streams(_config("PROJECTION_SIM_STREAMS", "despesa:mercado,despesa:transporte,receita:extras")),
+        until=today,
+        lookback_days=int(_config("PROJECTION_SIM_LOOKBACK_DAYS", 180)),
+        min_samples=int(_config("PROJECTION_SIM_MIN_SAMPLES", 3)),
+    )
+
+    max_paths = int(_config("PROJECTION_SIM_PATHS", 300))
+    paths = min(int(paths or max_paths), max_paths)
+    # teto de memória/CPU: caminhos x dias
+    ndays = (baseline.end - baseline.start).days + 1
+    max_cells = int(_config("PROJECTION_SIM_MAX_CELLS", 200_000))
+    paths = max(1, min(paths, max_cells // max(1, ndays)))
+
+    return simulate_baseline(
+        baseline,
+        models,
+        reserve_min=reserve_min,
+        overrides=overrides,
+        paths=paths,
+        seed=seed,
+        today=today,
+    )
@@ -0,0 +1,78 @@
+"""Registro de renderizadores de relatório com carga sob demanda.
+
+reportlab e openpyxl são pesados (tempo de import e memória) e só são usados
+por usuários Pro exportando relatórios. As rotas pedem o renderizador pelo
+nome e o módulo só é importado na primeira chamada.
+
+Uso:
+
+from services.report_renderers import get_renderer
+
+render_pdf = get_renderer("pdf")
+pdf_bytes = render_pdf(payload, sections, detail, meta)
+"""
+
+from __future__ import annotations
+
+import importlib
+from threading import Lock
+from typing import Callable
+
+# nome -> "modulo:atributo"
+_REGISTRY: dict[str, str] = {
+    "pdf": "services.reports_pdf:render_reports_pdf",
+    "xlsx": "services.reports_excel:build_reports_workbook",
+}
+
+_loaded: dict[str, Callable] = {}
+_lock = Lock()
+
+
+def register_renderer(name: str, target: str) -> None:
+    """Registra (ou substitui) um renderizador no formato "modulo:atributo"."""
+    if ":" not in target:
+        raise ValueError(f"Alvo inválido para renderizador: {target!r}")
+    with _lock:
+        _REGISTRY[name] = target
+        _loaded.pop(name, None)
+
+
+def get_renderer(name: str) -> Callable:
+    """Retorna o renderizador, importando o módulo na primeira chamada.
+
+    Propaga ImportError quando a dependência opcional não está instalada.
+    """
+    fn = _loaded.get(name)
+    if fn is not None:
+        return fn
+
+    target = _REGISTRY.get(name)
+    if not target:
+        raise KeyError(f"Renderizador desconhecido: {name}")
+
+    with _lock:
+        fn = _loaded.get(name)
+        if fn is None:
+            module_name, attr = target.split(":", 1)
+            fn = getattr(importlib.import_module(module_name), attr)
+            _loaded[name] = fn
+    return fn
+
+
+def is_loaded(name: str) -> bool:
+    return name in _loaded
+
+
+def warm(*names: str) -> list[str]:
+    """Pré-carrega renderizadores (ex.: no master do gunicorn com preload).
+
+    Retorna os nomes carregados; dependências ausentes são ignoradas.
+    """
+    loaded = []
+    for name in names or tuple(_REGISTRY):
+        try:
+            get_renderer(name)
+        except ImportError:
+            continue
+        loaded.append(name)
+    return loaded
@@ -0,0 +1,208 @@
+"""Exportação dos relatórios para Excel (XLSX).
+
+Importa openpyxl no topo: o módulo é carregado sob demanda via
+services.report_renderers, nunca no boot do app.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from services.security import sanitize_export_cell, sanitize_export_row
+
+
+EXCEL_DATE_FORMAT = "dd/mm/yyyy"
+EXCEL_CURRENCY_FORMAT = "R$ #,##0.00"
+EXCEL_PERCENT_FORMAT = "0.0%"
+
+
+def _to_float(value, default=None):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _excel_date(value) -> date | datetime | None:
+    if isinstance(value, (date, datetime)):
+        return value
+    if not value:
+        return None
+    try:
+        raw = str(value)
+        if "T" in raw:
+            return datetime.fromisoformat(raw)
+        return date.fromisoformat(raw)
+    except Exception:
+        return None
+
+
+def build_reports_workbook(
+    payload: dict,
+    sections: set[str],
+    mode_label: str,
+    user_label: str,
+    period_label: str,
+) -> Workbook:
+    def pct_value(value):
+        num = _to_float(value)
+        if num is None:
+            return None
+        return num / 100
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill("solid", fgColor="1B7F4A")
+    title_font = Font(bold=True, size=13)
+
+    def add_sheet(title: str):
+        ws = wb.create_sheet(title)
+        ws.page_setup.fitToWidth = 1
+        return ws
+
+    def style_header(ws, headers: list[str]):
+        for col_idx, label in enumerate(headers, start=1):
+            cell = ws.cell(row=1, column=col_idx, value=label)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = Alignment(horizontal="left")
+        ws.freeze_panes = "A2"
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}1"
+
+    def write_row(ws, row_idx: int, values, formats=None, bold=False):
+        for col_idx, value in enumerate(values, start=1):
+            cell_value = sanitize_export_cell(value)
+            cell = ws.cell(row=row_idx, column=col_idx, value=cell_value)
+            if formats and col_idx - 1 < len(formats) and formats[col_idx - 1]:
+                cell.number_format = formats[col_idx - 1]
+            if bold:
+                cell.font = Font(bold=True)
+
+    def set_col_widths(ws, widths: dict[str, float]):
+        for col, width in widths.items():
+            ws.column_dimensions[col].width = width
+
+    summary_pct = pct_value(payload.get("summary", {}).get("economy_pct"))
+
+    if "summary" in sections:
+        ws = add_sheet("Resumo")
+        ws["A1"] = "Relatorio financeiro"
+        ws["A1"].font = title_font
+        ws.append(sanitize_export_row(["Usuario", user_label]))
+        ws.append(sanitize_export_row(["Periodo", period_label]))
+        ws.append(sanitize_export_row(["Regime", mode_label]))
+        ws.append([])
+        write_row(ws, 6, ["Resumo executivo"], bold=True)
+        ws.append(sanitize_export_row(["Total receitas", payload["summary"]["income"]]))
+        ws.append(sanitize_export_row(["Total despesas", payload["summary"]["expense"]]))
+        ws.append(sanitize_export_row(["Resultado liquido", payload["summary"]["net"]]))
+        ws.append(sanitize_export_row(["% economia", summary_pct]))
+        ws["B7"].number_format = EXCEL_CURRENCY_FORMAT
+        ws["B8"].number_format = EXCEL_CURRENCY_FORMAT
+        ws["B9"].number_format = EXCEL_CURRENCY_FORMAT
+        ws["B10"].number_format = EXCEL_PERCENT_FORMAT
+        set_col_widths(ws, {"A": 22, "B": 26})
+
+    if "dre" in sections:
+        ws = add_sheet("DRE")
+        headers = ["Categoria", "Receitas", "Despesas", "Resultado"]
+        style_header(ws, headers)
+        row_idx = 2
+        for row in payload["dre"]["rows"]:
+            write_row(ws, row_idx, [row["label"], row["income"], row["expense"], row["net"]])
+            for col in (2, 3, 4):
+                ws.cell(row=row_idx, column=col).number_format = EXCEL_CURRENCY_FORMAT
+            row_idx += 1
+        write_row(
+            ws,
+            row_idx,
+            ["Resultado total", payload["dre"]["total"]["income"], payload["dre"]["total"]["expense"], payload["dre"]["total"]["net"]],
+            bold=True,
+        )
+        for col in (2, 3, 4):
+            ws.cell(row=row_idx, column=col).number_format = EXCEL_CURRENCY_FORMAT
+        set_col_widths(ws, {"A": 32, "B": 16, "C": 16, "D": 16})
+
+    if "flow" in sections:
+        ws = add_sheet("Fluxo")
+        headers = ["Data", "Descricao", "Categoria", "Metodo", "Entrada", "Saida", "Saldo"]
+        style_header(ws, headers)
+        row_idx = 2
+        for row in payload["flow"]["rows"]:
+            write_row(
+                ws,
+                row_idx,
+                [
+                    _excel_date(row.get("date")),
+                    row.get("description", ""),
+                    row.get("category", ""),
+                    row.get("method", ""),
+                    row.get("income") or None,
+                    row.get("expense") or None,
+                    row.get("balance"),
+                ],
+            )
+            ws.cell(row=row_idx, column=1).number_format = EXCEL_DATE_FORMAT
+            for col in (5, 6, 7):
+                ws.cell(row=row_idx, column=col).number_format = EXCEL_CURRENCY_FORMAT
+            row_idx += 1
+        write_row(ws, row_idx, ["Saldo final", "", "", "", "", "", payload["flow"]["final_balance"]], bold=True)
+        ws.cell(row=row_idx, column=7).number_format = EXCEL_CURRENCY_FORMAT
+        set_col_widths(ws, {"A": 12, "B": 40, "C": 20, "D": 16, "E": 14, "F": 14, "G": 14})
+
+    if "categories" in sections:
+        ws = add_sheet("Categorias")
+        headers = ["Categoria", "Total", "%", "Variacao"]
+        style_header(ws, headers)
+        row_idx = 2
+        for row in payload["categories"]["rows"]:
+            percent_value = pct_value(row.get("percent"))
+            delta_value = pct_value(row.get("delta"))
+            write_row(ws, row_idx, [row["label"], row["total"], percent_value, delta_value])
+            ws.cell(row=row_idx, column=2).number_format = EXCEL_CURRENCY_FORMAT
+            ws.cell(row=row_idx, column=3).number_format = EXCEL_PERCENT_FORMAT
+            ws.cell(row=row_idx, column=4).number_format = EXCEL_PERCENT_FORMAT
+            row_idx += 1
+        set_col_widths(ws, {"A": 32, "B": 16, "C": 10, "D": 12})
+
+    if "recurring" in sections:
+        ws = add_sheet("Recorrencias")
+        headers = ["Nome", "Frequencia", "Valor medio", "Confiabilidade"]
+        style_header(ws, headers)
+        row_idx = 2
+        for item in payload["recurring"]["items"]:
+            reliability_value = pct_value(item.get("reliability"))
+            write_row(ws, row_idx, [item["name"], item["frequency"], item["value"], reliability_value])
+            ws.cell(row=row_idx, column=3).number_format = EXCEL_CURRENCY_FORMAT
+            ws.cell(row=row_idx, column=4).number_format = EXCEL_PERCENT_FORMAT
+            row_idx += 1
+        set_col_widths(ws, {"A": 28, "B": 16, "C": 16, "D": 16})
+
+    if "pending" in sections:
+        ws = add_sheet("Pendencias")
+        headers = ["Vencimento", "Descricao", "Categoria", "Valor", "Dias atraso"]
+        style_header(ws, headers)
+        row_idx = 2
+        for item in payload["pending"]["items"]:
+            write_row(
+                ws,
+                row_idx,
+                [
+                    _excel_date(item.get("date")),
+                    item.get("description", ""),
+                    item.get("category", ""),
+                    item.get("value"),
+                    item.get("days_overdue"),
+                ],
+            )
+            ws.cell(row=row_idx, column=1).number_format = EXCEL_DATE_FORMAT
+            ws.cell(row=row_idx, column=4).number_format = EXCEL_CURRENCY_FORMAT
+            row_idx += 1
+        set_col_widths(ws, {"A": 12, "B": 40, "C": 20, "D": 14, "E": 12})
+
+    return wb
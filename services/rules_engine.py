@@ -6,6 +6,7 @@ from datetime import date, datetime
 from models.automation_rule_model import AutomationRule, RuleExecution
 from models.extensions import db
 from services.feature_gate import user_has_feature
+from services.metrics import RULES_EVALUATIONS
 
 
 CATEGORIAS_RECEITA = {
@@ -290,6 +291,7 @@ def apply_rule_to_entry(rule: AutomationRule, entry, user, trigger: str, dry_run
     conditions = _normalize_conditions(conditions, actions)
 
     matched = _rule_matches(entry, conditions)
+    RULES_EVALUATIONS.inc(trigger=trigger, result="matched" if matched else "not_matched")
     if not matched:
         return None
 
@@ -331,6 +333,7 @@ def apply_rules_to_entry(entry, user, trigger: str, dry_run: bool = False):
         conditions = _normalize_conditions(conditions, actions)
 
         matched = _rule_matches(entry, conditions)
+        RULES_EVALUATIONS.inc(trigger=trigger, result="matched" if matched else "not_matched")
         if not matched:
             continue
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import date, datetime
 from urllib.parse import urlparse
 
 
@@ -22,3 +23,19 @@ def safe_redirect_path(value: str | None, *, allowed_prefixes: tuple[str, ...] =
     if not any(path.startswith(prefix) for prefix in allowed_prefixes):
         return None
     return raw
+
+
+def sanitize_export_cell(value):
+    """Neutraliza formula injection em células de CSV/XLSX."""
+    if value is None:
+        return ""
+    if isinstance(value, (int, float, date, datetime)):
+        return value
+    text = str(value)
+    if text and text[0] in {"=", "+", "-", "@"}:
+        return "'" + text
+    return text
+
+
+def sanitize_export_row(values):
+    return [sanitize_export_cell(v) for v in values]
@@ -0,0 +1,151 @@
+"""Estáticos com hash de conteúdo no nome e cache imutável.
+
+O manifesto (em memória, montado no primeiro uso) mapeia cada arquivo de
+static/ para um nome com hash: `css/app_base.css` -> `css/app_base.3f2a9c1be0d4.css`.
+
+- `url_for('static', filename=...)` passa a gerar o nome com hash (url_defaults);
+  nos templates, `asset_url('/static/css/x.css')` faz o mesmo para caminhos
+  literais (listas page_css/js_bundle).
+- A view de estáticos aceita o nome com hash, serve o arquivo original (com
+  .gz/.br pré-comprimido, se houver) e responde com
+  `Cache-Control: public, max-age=31536000, immutable`: recarregar a página
+  não gera nenhum request de estático.
+- Hash que não confere (HTML antigo durante um deploy) ainda serve o arquivo
+  atual, mas sem cache imutável. Nomes sem hash seguem o padrão do Flask.
+
+Com DEBUG ligado o hash é refeito quando o mtime do arquivo muda.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from threading import Lock
+
+from flask import Flask, current_app
+
+HASH_LENGTH = 12
+HASHED_EXTENSIONS = (".css", ".js", ".png", ".jpg", ".jpeg", ".svg", ".ico", ".webp", ".woff", ".woff2")
+STATIC_PREFIX = "/static/"
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def _with_hash(filename: str, file_hash: str) -> str:
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{file_hash}{ext}"
+
+
+class AssetManifest:
+    """filename lógico -> nome com hash (e o caminho inverso)."""
+
+    def __init__(self, static_folder: str, *, watch: bool = False):
+        self.static_folder = static_folder
+        self.watch = watch
+        self._lock = Lock()
+        self._entries: dict[str, tuple[float, str]] | None = None
+
+    def _scan(self) -> dict[str, tuple[float, str]]:
+        entries: dict[str, tuple[float, str]] = {}
+        for dirpath, _dirnames, filenames in os.walk(self.static_folder):
+            for name in filenames:
+                if not name.endswith(HASHED_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, "/")
+                entries[filename] = (os.path.getmtime(path), _file_hash(path))
+        return entries
+
+    def _load(self) -> dict[str, tuple[float, str]]:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._scan()
+        return self._entries
+
+    def file_hash(self, filename: str) -> str | None:
+        entries = self._load()
+        entry = entries.get(filename)
+        if entry is None:
+            return None
+        if self.watch:
+            path = os.path.join(self.static_folder, filename)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                return None
+            if mtime != entry[0]:
+                entry = (mtime, _file_hash(path))
+                entries[filename] = entry
+        return entry[1]
+
+    def hashed(self, filename: str) -> str:
+        """Nome com hash; o próprio filename se o arquivo não entra no manifesto."""
+        file_hash = self.file_hash(filename)
+        return _with_hash(filename, file_hash) if file_hash else filename
+
+    def resolve(self, requested: str) -> tuple[str, bool]:
+        """Nome pedido -> (filename lógico, hash confere)."""
+        stem, ext = os.path.splitext(requested)
+        base, dot, candidate = stem.rpartition(".")
+        if not dot or len(candidate) != HASH_LENGTH:
+            return requested, False
+        filename = f"{base}{ext}"
+        current = self.file_hash(filename)
+        if current is None:
+            return requested, False
+        return filename, current == candidate
+
+    def as_dict(self) -> dict[str, str]:
+        return {filename: _with_hash(filename, entry[1]) for filename, entry in sorted(self._load().items())}
+
+
+def get_manifest() -> AssetManifest | None:
+    return current_app.extensions.get("static_assets")
+
+
+def asset_url(path: str) -> str:
+    """'/static/css/x.css' ou 'css/x.css' -> URL com hash (para caminhos literais nos templates)."""
+    manifest = get_manifest()
+    filename = path[len(STATIC_PREFIX):] if path.startswith(STATIC_PREFIX) else path.lstrip("/")
+    if manifest is None:
+        return STATIC_PREFIX + filename
+    return STATIC_PREFIX + manifest.hashed(filename)
+
+
+def _hashed_static_view(app: Flask, manifest: AssetManifest, inner_view):
+    max_age = int(app.config.get("STATIC_ASSET_MAX_AGE", 31536000))
+
+    def static(filename: str):
+        logical, immutable = manifest.resolve(filename)
+        response = inner_view(filename=logical)
+        if immutable and response.status_code in {200, 304}:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            response.cache_control.immutable = True
+        return response
+
+    return static
+
+
+def install_static_assets(app: Flask) -> None:
+    """Manifesto + url_defaults + view de estáticos com hash. Instalar depois da compressão."""
+    app.context_processor(lambda: {"asset_url": asset_url})
+    if not app.config.get("STATIC_ASSET_HASHING", True) or "static" not in app.view_functions:
+        return
+    manifest = AssetManifest(app.static_folder, watch=bool(app.debug))
+    app.extensions["static_assets"] = manifest
+
+    def hash_static_filename(endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = manifest.hashed(values["filename"])
+
+    app.url_defaults(hash_static_filename)
+    app.view_functions["static"] = _hashed_static_view(app, manifest, app.view_functions["static"])
@@ -0,0 +1,111 @@
+// Decodificador do formato compacto (format=compact) de /app/projection/data e
+// /app/charts/data. Espelho de services/compact_payload.py: devolve o mesmo
+// formato da resposta completa.
+(function () {
+  const DAY_MS = 86400000;
+
+  function isoToUtc(iso) {
+    const [y, m, d] = String(iso).split('-').map(Number);
+    return Date.UTC(y, m - 1, d);
+  }
+
+  function utcToIso(ms) {
+    return new Date(ms).toISOString().slice(0, 10);
+  }
+
+  function addDays(iso, days) {
+    return utcToIso(isoToUtc(iso) + days * DAY_MS);
+  }
+
+  function expandChangePoints(enc) {
+    if (!enc) return [];
+    const out = new Array(enc.n);
+    const at = enc.at || [];
+    for (let k = 0; k < at.length; k += 1) {
+      const stop = k + 1 < at.length ? at[k + 1] : enc.n;
+      out.fill(enc.v[k], at[k], stop);
+    }
+    return out;
+  }
+
+  function expandColumns(enc, origin) {
+    if (!enc) return [];
+    const rows = Array.from({ length: enc.n }, () => ({}));
+    const dicts = enc.enums || {};
+    const days = new Set(enc.days || []);
+    Object.keys(enc.cols || {}).forEach((key) => {
+      const column = enc.cols[key];
+      const lookup = dicts[key];
+      for (let i = 0; i < rows.length; i += 1) {
+        let value = column[i];
+        if (value === null || value === undefined) continue;
+        if (days.has(key)) value = addDays(origin, value);
+        else if (lookup) value = lookup[value];
+        rows[i][key] = value;
+      }
+    });
+    return rows;
+  }
+
+  function decodeProjection(data) {
+    if (!data || data.format !== 'compact') return data;
+    const out = Object.assign({}, data);
+    delete out.format;
+    delete out.format_version;
+    const start = data.daily.start;
+    const step = Number(data.daily.step || 1);
+    out.daily = expandChangePoints(data.daily.saldo).map((saldo, i) => ({
+      date: addDays(start, i * step),
+      saldo,
+    }));
+    out.events = expandColumns(data.events, start);
+    return out;
+  }
+
+  function bucketBounds(start, end, granularity, count) {
+    const bounds = [];
+    const endMs = isoToUtc(end);
+    let current = isoToUtc(start);
+    if (granularity === 'month') current = isoToUtc(`${start.slice(0, 7)}-01`);
+    for (let i = 0; i < count; i += 1) {
+      let following;
+      if (granularity === 'month') {
+        const d = new Date(current);
+        following = Date.UTC(d.getUTCFullYear(), d.getUTCMonth() + 1, 1);
+      } else {
+        following = current + (granularity === 'week' ? 7 : 1) * DAY_MS;
+      }
+      bounds.push([utcToIso(current), utcToIso(Math.min(following - DAY_MS, endMs))]);
+      current = following;
+    }
+    return bounds;
+  }
+
+  function decodeCharts(data) {
+    if (!data || data.format !== 'compact') return data;
+    const out = Object.assign({}, data);
+    delete out.format;
+    const line = data.line || {};
+    const labels = line.labels || [];
+    out.line = {
+      labels,
+      granularity: line.granularity,
+      buckets: bucketBounds(line.start, line.end, line.granularity, labels.length).map(([start, end], i) => ({
+        label: labels[i],
+        start,
+        end,
+      })),
+    };
+    ['receitas', 'despesas', 'saldo', 'saldo_acumulado'].forEach((key) => {
+      out.line[key] = expandChangePoints(line[key]);
+    });
+    return out;
+  }
+
+  window.CompactPayload = {
+    expandChangePoints,
+    expandColumns,
+    decodeProjection,
+    decodeCharts,
+  };
+})();
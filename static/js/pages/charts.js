@@ -345,6 +345,7 @@
     const search = new URLSearchParams();
     search.set("period", params.period || "month");
     if (params.compare) search.set("compare", "1");
+    if (window.CompactPayload) search.set("format", "compact");
     if (params.period === "quarter") {
       if (params.year) search.set("year", params.year);
       if (params.quarter) search.set("quarter", params.quarter);
@@ -971,7 +972,8 @@
         if (!res.ok) throw new Error("Erro ao carregar dados");
         return res.json();
       })
-      .then((data) => {
+      .then((payload) => {
+        const data = window.CompactPayload ? window.CompactPayload.decodeCharts(payload) : payload;
         state.data = data;
         updatePeriodLabel(data);
         updateKpis(data);
@@ -573,6 +573,7 @@
       overrides: state.overrides,
     };
     if (state.scenarioId) payload.scenario_id = state.scenarioId;
+    if (window.CompactPayload) payload.format = 'compact';
     return payload;
   }
 
@@ -581,11 +582,12 @@
     if (!startInput?.value || !endInput?.value) return;
     closeOpenSelects();
     try {
-      const data = await fetchJSON('/app/projection/data', {
+      const raw = await fetchJSON('/app/projection/data', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(buildPayload()),
       });
+      const data = window.CompactPayload ? window.CompactPayload.decodeProjection(raw) : raw;
       state.lastData = data;
       state.lastRunAt = new Date();
       updateLastRun();